@@ -12,6 +12,8 @@ from pathlib import Path
 import numpy as np
 import pandas as pd
 
+from weighted_descriptives import weighted_distribution, weighted_summary
+
 SEED = 20251016
 random.seed(SEED)
 np.random.seed(SEED)
@@ -50,31 +52,22 @@ def summarize_selflove_by_abuse(df: pd.DataFrame) -> pd.DataFrame:
     temp = temp.dropna(subset=[SELFLOVE_VAR, ABUSE_VAR])
     if temp.empty:
         raise ValueError("No analytic rows for self-love by abuse summary.")
-    grouped = temp.groupby(ABUSE_VAR)
-    total_n = len(temp)
-    rows = []
-    for level, g in grouped:
-        n = len(g)
-        mean_val = g[SELFLOVE_VAR].mean()
-        std_val = g[SELFLOVE_VAR].std(ddof=1)
-        se = std_val / math.sqrt(n) if n > 0 else float("nan")
-        ci_low = mean_val - 1.96 * se
-        ci_high = mean_val + 1.96 * se
-        rows.append(
-            {
-                "abuse_code": level,
-                "n": n,
-                "share": n / total_n,
-                "mean_selflove": mean_val,
-                "se": se,
-                "ci_low": ci_low,
-                "ci_high": ci_high,
-            }
-        )
-    result = pd.DataFrame(rows).sort_values("abuse_code").reset_index(drop=True)
-    result["suppressed"] = result["n"] < SMALL_CELL_THRESHOLD
-    result.loc[result["suppressed"], ["n", "share", "mean_selflove", "se", "ci_low", "ci_high"]] = np.nan
-    return result
+    # Unweighted (SRS) cells: the linearized SE reduces to sd / sqrt(n).
+    summary = weighted_summary(
+        temp, [SELFLOVE_VAR], by=[ABUSE_VAR], small_cell_threshold=SMALL_CELL_THRESHOLD
+    )
+    return pd.DataFrame(
+        {
+            "abuse_code": summary[ABUSE_VAR],
+            "n": summary["n"],
+            "share": summary["n"] / len(temp),
+            "mean_selflove": summary["mean"],
+            "se": summary["se"],
+            "ci_low": summary["ci_low"],
+            "ci_high": summary["ci_high"],
+            "suppressed": summary["suppressed"],
+        }
+    )
 
 
 def recode_classchild(val: float) -> str | pd.NA:
@@ -113,16 +106,22 @@ def summarize_networth_by_class(df: pd.DataFrame) -> pd.DataFrame:
     temp["classchild_group"] = temp[CLASSCHILD_VAR].map(recode_classchild)
     temp["networth_group"] = temp[NETWORTH_VAR].map(recode_networth)
     temp = temp.dropna(subset=["classchild_group", "networth_group"])
-    total_n = len(temp)
-    grouped = (
-        temp.groupby(["classchild_group", "networth_group"], sort=True)
-        .size()
-        .reset_index(name="n")
+    dist = weighted_distribution(
+        temp,
+        ["networth_group"],
+        by=["classchild_group"],
+        small_cell_threshold=SMALL_CELL_THRESHOLD,
+    )
+    grouped = pd.DataFrame(
+        {
+            "classchild_group": dist["classchild_group"],
+            "networth_group": dist["value"],
+            "n": dist["n"],
+            "share_overall": dist["n"] / len(temp),
+            "share_within_class": dist["proportion"],
+            "suppressed": dist["suppressed"],
+        }
     )
-    grouped["share_overall"] = grouped["n"] / total_n
-    grouped["share_within_class"] = grouped.groupby("classchild_group")["n"].transform(lambda x: x / x.sum())
-    grouped["suppressed"] = grouped["n"] < SMALL_CELL_THRESHOLD
-    grouped.loc[grouped["suppressed"], ["n", "share_overall", "share_within_class"]] = np.nan
     return grouped.sort_values(["classchild_group", "networth_group"]).reset_index(drop=True)
 
 
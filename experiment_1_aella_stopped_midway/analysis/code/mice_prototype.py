@@ -58,6 +58,60 @@ DEFAULT_COLUMNS: List[str] = [
 SMALL_CELL_THRESHOLD = 10
 
 
+class RunningImputationSummary:
+    """Accumulate per-variable MI diagnostics as each completed dataset is produced.
+
+    Across imputations the per-draw means are combined with Welford updates, so
+    Rubin's between-imputation variance and the fraction of missing information
+    are available without regrouping the stacked output.
+    """
+
+    def __init__(self, columns: List[str]) -> None:
+        self.columns = list(columns)
+        k = len(self.columns)
+        self.m = 0
+        self.mean = np.zeros(k)
+        self.m2 = np.zeros(k)
+        self.sd_mean = np.zeros(k)
+        self.within = np.zeros(k)
+        self.missing_after = np.zeros(k, dtype=np.int64)
+
+    def update(self, completed: pd.DataFrame) -> None:
+        values = completed[self.columns].to_numpy(dtype=float)
+        observed = ~np.isnan(values)
+        n = observed.sum(axis=0)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            total = np.where(observed, values, 0.0).sum(axis=0)
+            draw_mean = total / n
+            centered = np.where(observed, values - draw_mean, 0.0)
+            draw_var = (centered**2).sum(axis=0) / (n - 1)
+            var_of_mean = draw_var / n
+        self.missing_after += values.shape[0] - n
+        self.m += 1
+        delta = draw_mean - self.mean
+        self.mean += delta / self.m
+        self.m2 += delta * (draw_mean - self.mean)
+        self.sd_mean += (np.sqrt(draw_var) - self.sd_mean) / self.m
+        self.within += (var_of_mean - self.within) / self.m
+
+    def records(self) -> Dict[str, Dict[str, float]]:
+        between = self.m2 / (self.m - 1) if self.m > 1 else np.full_like(self.m2, np.nan)
+        total = self.within + (1 + 1 / max(self.m, 1)) * between
+        with np.errstate(invalid="ignore", divide="ignore"):
+            fmi = (1 + 1 / max(self.m, 1)) * between / total
+        return {
+            col: {
+                "mean_after": float(self.mean[idx]),
+                "sd_after": float(self.sd_mean[idx]),
+                "within_imputation_var": float(self.within[idx]),
+                "between_imputation_var": float(between[idx]),
+                "fraction_missing_info": float(fmi[idx]),
+                "missing_after": int(self.missing_after[idx]),
+            }
+            for idx, col in enumerate(self.columns)
+        }
+
+
 def parse_args() -> argparse.Namespace:
     parser = argparse.ArgumentParser(description="Prototype multiple imputation workflow")
     parser.add_argument("--dataset", type=Path, required=True, help="Path to CSV dataset")
@@ -152,10 +206,14 @@ def main() -> None:
     for _ in range(burn_in):
         mice_data.update_all()
 
+    summary_basis = {orig: sanitized for orig, sanitized in column_map.items() if sanitized in df_sanitized.columns}
+    running = RunningImputationSummary(list(summary_basis.values()))
+
     imputations: List[pd.DataFrame] = []
     for i in range(args.n_imputations):
         mice_data.update_all()
         completed = mice_data.data.copy()
+        running.update(completed)
         completed["imputation_id"] = i + 1
         imputations.append(completed)
 
@@ -172,19 +230,21 @@ def main() -> None:
     missing_fraction = (df.isna().sum() / len(df)).round(6)
 
     summary_records = []
-    grouped = stacked.groupby("imputation_id")
-    summary_basis = {orig: sanitized for orig, sanitized in column_map.items() if sanitized in df_sanitized.columns}
+    running_records = running.records()
     for original_name, sanitized in summary_basis.items():
-        col_means = grouped[sanitized].mean()
-        col_stds = grouped[sanitized].std()
+        stats = running_records[sanitized]
         summary_records.append(
             {
                 "variable": original_name,
                 "sanitized": sanitized,
                 "missing_before_masked": mask_small_cells(float(missing_counts[original_name])),
                 "missing_fraction": float(missing_fraction[original_name]),
-                "mean_after": float(col_means.mean()),
-                "sd_after": float(col_stds.mean()),
+                "missing_after_masked": mask_small_cells(float(stats["missing_after"])),
+                "mean_after": stats["mean_after"],
+                "sd_after": stats["sd_after"],
+                "within_imputation_var": stats["within_imputation_var"],
+                "between_imputation_var": stats["between_imputation_var"],
+                "fraction_missing_info": stats["fraction_missing_info"],
             }
         )
 
@@ -270,7 +330,7 @@ def main() -> None:
 
     for record in summary_records:
         summary_lines.append(
-            f"- {record['variable']}: missing_before={record['missing_before_masked']}, missing_fraction={record['missing_fraction']:.5f}, mean_after={record['mean_after']:.3f}, sd_after={record['sd_after']:.3f}"
+            f"- {record['variable']}: missing_before={record['missing_before_masked']}, missing_fraction={record['missing_fraction']:.5f}, missing_after={record['missing_after_masked']}, mean_after={record['mean_after']:.3f}, sd_after={record['sd_after']:.3f}, within_var={record['within_imputation_var']:.4g}, fmi={record['fraction_missing_info']:.3f}"
         )
 
     summary_lines.extend(
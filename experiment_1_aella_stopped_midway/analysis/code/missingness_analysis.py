@@ -1,5 +1,10 @@
 #!/usr/bin/env python3
-"""Generate missingness diagnostics for key wellbeing and abuse variables."""
+"""Generate missingness diagnostics for key wellbeing and abuse variables.
+
+Missing indicators for the targets are packed once (``missingness_bits``);
+rates come from popcounts and the missingness logits for every target are
+fitted together on the shared listwise-complete predictor design.
+"""
 
 from __future__ import annotations
 
@@ -10,7 +15,8 @@ from typing import Dict, List
 
 import numpy as np
 import pandas as pd
-import statsmodels.api as sm
+
+from missingness_bits import IndicatorLogits, MissingnessBits, fit_indicator_logits
 
 CONFIG_PATH = Path("config/agent_config.yaml")
 DATA_CANDIDATES = [
@@ -80,14 +86,20 @@ def normalize_missing(series: pd.Series) -> pd.Series:
     return series.isna() | as_str.isin(MISSING_TOKENS)
 
 
-def build_summary(df: pd.DataFrame, targets: Dict[str, str]) -> pd.DataFrame:
+def indicator_bits(df: pd.DataFrame, targets: Dict[str, str]) -> MissingnessBits:
+    missing_columns = [col for col in targets.values() if col not in df.columns]
+    if missing_columns:
+        raise KeyError(f"Column '{missing_columns[0]}' not found in dataset.")
+    frame = df[list(targets.values())].set_axis(list(targets), axis=1)
+    return MissingnessBits.from_frame(frame, normalize_missing)
+
+
+def build_summary(df: pd.DataFrame, targets: Dict[str, str], bits: MissingnessBits | None = None) -> pd.DataFrame:
+    bits = indicator_bits(df, targets) if bits is None else bits
     records = []
     total = len(df)
-    for short_name, col in targets.items():
-        if col not in df.columns:
-            raise KeyError(f"Column '{col}' not found in dataset.")
-        mask = normalize_missing(df[col])
-        missing_count = int(mask.sum())
+    for (short_name, col), missing_count in zip(targets.items(), bits.missing_counts()):
+        missing_count = int(missing_count)
         nonmissing_count = int(total - missing_count)
         missing_display = missing_count if missing_count >= SMALL_CELL_THRESHOLD else f"<{SMALL_CELL_THRESHOLD}"
         missing_pct = round(missing_count / total * 100, 2) if total else np.nan
@@ -115,36 +127,65 @@ def prepare_predictors(df: pd.DataFrame, predictors: List[str]) -> pd.DataFrame:
     return prepared
 
 
-def fit_logit_model(df: pd.DataFrame, indicator_col: str, predictors: List[str]):
-    data = df[predictors + [indicator_col]].dropna()
-    if data[indicator_col].nunique() < 2:
-        raise ValueError(f"Indicator '{indicator_col}' has fewer than two levels after dropping missing predictors.")
-    y = data[indicator_col].astype(int)
+def fit_logit_models(df: pd.DataFrame, indicator_cols: List[str], predictors: List[str]) -> IndicatorLogits:
+    """Missingness logits for all indicators on the rows with complete predictors."""
+
+    data = df[predictors + indicator_cols].dropna()
+    for indicator_col in indicator_cols:
+        if data[indicator_col].nunique() < 2:
+            raise ValueError(
+                f"Indicator '{indicator_col}' has fewer than two levels after dropping missing predictors."
+            )
     X = data[predictors].copy()
-    X = sm.add_constant(X, has_constant="add")
-    model = sm.Logit(y, X)
-    result = model.fit(disp=False, maxiter=200)
-    return result, len(data)
+    X.insert(0, "const", 1.0)
+    return fit_indicator_logits(X, data[indicator_cols].astype(int))
 
 
-def model_to_frame(result: sm.Logit, model_name: str, n_obs: int) -> pd.DataFrame:
-    conf = result.conf_int(alpha=0.05)
+def model_to_frame(fits: IndicatorLogits, index: int, model_name: str) -> pd.DataFrame:
+    conf = fits.conf_int(alpha=0.05)[index]
     frame = pd.DataFrame(
         {
             "model": model_name,
-            "term": result.params.index,
-            "estimate": result.params.values,
-            "std_error": result.bse.values,
-            "ci_low": conf[0].values,
-            "ci_high": conf[1].values,
-            "p_value": result.pvalues.values,
-            "n_obs": n_obs,
+            "term": fits.exog_names,
+            "estimate": fits.params[index],
+            "std_error": fits.bse[index],
+            "ci_low": conf[:, 0],
+            "ci_high": conf[:, 1],
+            "p_value": fits.pvalues[index],
+            "n_obs": fits.nobs,
         }
     )
     return frame
 
 
-def write_markdown_report(summary: pd.DataFrame, models: Dict[str, sm.Logit], n_obs: Dict[str, int], report_path: Path) -> None:
+def format_logit(fits: IndicatorLogits, index: int) -> str:
+    header = [
+        f"Dependent variable: {fits.names[index]}",
+        f"No. observations: {fits.nobs}    Df model: {len(fits.exog_names) - 1}",
+        f"Converged: {bool(fits.converged[index])}    No. iterations: {int(fits.n_iter[index])}",
+        f"Log-likelihood: {fits.llf[index]:.3f}    LL-Null: {fits.llnull[index]:.3f}    "
+        f"Pseudo R-squared: {fits.prsquared[index]:.3f}",
+        f"AIC: {fits.aic[index]:.4f}    BIC: {fits.bic[index]:.4f}",
+        "",
+    ]
+    conf = fits.conf_int(alpha=0.05)[index]
+    table = pd.DataFrame(
+        {
+            "Coef.": fits.params[index],
+            "Std.Err.": fits.bse[index],
+            "z": fits.tvalues[index],
+            "P>|z|": fits.pvalues[index],
+            "[0.025": conf[:, 0],
+            "0.975]": conf[:, 1],
+        },
+        index=fits.exog_names,
+    )
+    return "\n".join(header) + table.to_string(float_format="{:.4f}".format)
+
+
+def write_markdown_report(
+    summary: pd.DataFrame, fits: IndicatorLogits, model_names: List[str], report_path: Path
+) -> None:
     report_path.parent.mkdir(parents=True, exist_ok=True)
     lines = [
         "# Missingness Diagnostics (Exploratory)",
@@ -164,13 +205,13 @@ def write_markdown_report(summary: pd.DataFrame, models: Dict[str, sm.Logit], n_
         "### Logistic Models for Missingness Indicators",
         "",
     ]
-    for model_name, result in models.items():
+    for index, model_name in enumerate(model_names):
         lines.append(f"#### {model_name}")
         lines.append("")
-        lines.append(f"Observations (listwise complete): {n_obs[model_name]}")
+        lines.append(f"Observations (listwise complete): {fits.nobs}")
         lines.append("")
         lines.append("```")
-        lines.append(result.summary2().as_text())
+        lines.append(format_logit(fits, index))
         lines.append("```")
         lines.append("")
     lines.append("_Exploratory output – do not treat as confirmatory evidence._")
@@ -184,23 +225,20 @@ def main() -> None:
     data_path = resolve_data_path(DATA_CANDIDATES)
     df = pd.read_csv(data_path, low_memory=False)
 
-    summary = build_summary(df, TARGET_COLUMNS)
+    bits = indicator_bits(df, TARGET_COLUMNS)
+    summary = build_summary(df, TARGET_COLUMNS, bits)
 
     predictors_df = prepare_predictors(df, NUMERIC_PREDICTORS)
-    models = {}
-    n_obs = {}
-    model_frames = []
-
-    for short_name, column in TARGET_COLUMNS.items():
-        indicator_name = f"missing_{short_name}"
-        predictors_df[indicator_name] = normalize_missing(df[column]).astype(int)
-        try:
-            result, n_obs_val = fit_logit_model(predictors_df, indicator_name, NUMERIC_PREDICTORS)
-        except Exception as exc:  # pylint: disable=broad-except
-            raise RuntimeError(f"Failed to fit logistic model for {short_name}: {exc}") from exc
-        models[short_name] = result
-        n_obs[short_name] = n_obs_val
-        model_frames.append(model_to_frame(result, f"logit_missing_{short_name}", n_obs_val))
+    indicator_names = [f"missing_{short_name}" for short_name in TARGET_COLUMNS]
+    predictors_df[indicator_names] = bits.indicator().astype(int)
+    try:
+        fits = fit_logit_models(predictors_df, indicator_names, NUMERIC_PREDICTORS)
+    except Exception as exc:  # pylint: disable=broad-except
+        raise RuntimeError(f"Failed to fit missingness logistic models: {exc}") from exc
+    model_names = list(TARGET_COLUMNS)
+    model_frames = [
+        model_to_frame(fits, index, f"logit_missing_{short_name}") for index, short_name in enumerate(model_names)
+    ]
 
     OUTPUT_SUMMARY.parent.mkdir(parents=True, exist_ok=True)
     summary.to_csv(OUTPUT_SUMMARY, index=False)
@@ -221,7 +259,7 @@ def main() -> None:
         encoding="utf-8",
     )
 
-    write_markdown_report(summary, models, n_obs, QC_REPORT)
+    write_markdown_report(summary, fits, model_names, QC_REPORT)
 
 
 if __name__ == "__main__":
@@ -31,7 +31,8 @@ import pandas as pd
 import yaml
 from scipy import stats
 import statsmodels.api as sm
-from statsmodels.miscmodels.ordinal_model import OrderedModel
+
+from ordinal_solver import CumulativeLinkModel
 
 REPO_ROOT = Path(__file__).resolve().parents[2]
 DEFAULT_DATASET = "childhoodbalancedpublic_original.csv"
@@ -468,8 +469,8 @@ def fit_mi_ordered_logit(
     for frame in prepped.frames:
         outcome = frame[prepped.outcome_col]
         exog = frame[prepped.predictors].astype(float)
-        model = OrderedModel(outcome, exog, distr="logit")
-        result = model.fit(method="bfgs", disp=False, maxiter=1000, cov_type="HC1")
+        model = CumulativeLinkModel(outcome, exog, distr="logit")
+        result = model.fit(cov_type="HC1")
         params_list.append(result.params)
         cov_list.append(result.cov_params())
         results.append(result)
@@ -795,8 +796,8 @@ def fit_ordered_logit(prepped: PreparedData) -> Tuple[object, List[str]]:
         exog_parts.append(df[numeric_cols])
     exog = pd.concat(exog_parts, axis=1).astype(float)
 
-    model = OrderedModel(outcome, exog, distr="logit")
-    result = model.fit(method="bfgs", disp=False, maxiter=1000, cov_type="HC1")
+    model = CumulativeLinkModel(outcome, exog, distr="logit")
+    result = model.fit(cov_type="HC1")
     exog_cols = list(exog.columns)
     return result, exog_cols
 
@@ -4,7 +4,8 @@
 Reads the primary survey CSV, computes unweighted summaries for priority
 variables, and writes a manifest-friendly CSV table. All operations are
 deterministic and respect the configured minimum cell size to avoid
-revealing small-N cells.
+revealing small-N cells. Only the key columns are read, in bounded-size
+chunks that feed per-column sketches (``streaming_profile``).
 """
 
 from __future__ import annotations
@@ -21,6 +22,8 @@ import numpy as np
 import pandas as pd
 import yaml
 
+from streaming_profile import DEFAULT_CELL_BUDGET, ColumnSketch, DatasetProfile, profile_csv
+
 
 @dataclass(frozen=True)
 class VariableSpec:
@@ -102,9 +105,21 @@ def suppress_value(note: str) -> Dict[str, Any]:
     }
 
 
-def summarise_numeric(series: pd.Series, min_cell: int) -> List[Dict[str, Any]]:
-    clean = series.dropna()
-    n = int(clean.shape[0])
+def non_numeric_status(sketch: ColumnSketch) -> List[Dict[str, Any]]:
+    return [
+        {
+            "statistic": "status",
+            "value": "unsupported_type",
+            "unweighted_n": sketch.n_observed,
+            "detail": f"Column is not numeric in every chunk (parsed as {sketch.dtype}).",
+        }
+    ]
+
+
+def summarise_numeric(sketch: ColumnSketch, min_cell: int) -> List[Dict[str, Any]]:
+    if not sketch.is_numeric:
+        return non_numeric_status(sketch)
+    n = sketch.n_observed
     if n < min_cell:
         return [
             {
@@ -115,35 +130,40 @@ def summarise_numeric(series: pd.Series, min_cell: int) -> List[Dict[str, Any]]:
             }
         ]
 
-    quantiles = clean.quantile([0.25, 0.5, 0.75])
+    q1, median, q3 = sketch.quantiles([0.25, 0.5, 0.75])
     stats = {
-        "mean": clean.mean(),
-        "std": clean.std(ddof=1) if n > 1 else float("nan"),
-        "min": clean.min(),
-        "q1": quantiles.loc[0.25],
-        "median": quantiles.loc[0.5],
-        "q3": quantiles.loc[0.75],
-        "max": clean.max(),
+        "mean": sketch.mean,
+        "std": sketch.std(ddof=1) if n > 1 else float("nan"),
+        "min": sketch.minimum,
+        "q1": q1,
+        "median": median,
+        "q3": q3,
+        "max": sketch.maximum,
     }
+    approximate = {"q1", "median", "q3"} if not sketch.exact else set()
     rows: List[Dict[str, Any]] = []
     for key, value in stats.items():
         val = "" if value is None or (isinstance(value, float) and math.isnan(value)) else round(float(value), 4)
-        rows.append({"statistic": key, "value": val, "unweighted_n": n})
+        row = {"statistic": key, "value": val, "unweighted_n": n}
+        if key in approximate:
+            row["detail"] = "Approximate: column exceeded the sketch's distinct-value limit."
+        rows.append(row)
 
-    missing_fraction = 1.0 - (n / series.shape[0])
+    missing_fraction = 1.0 - (n / sketch.n_rows)
     rows.append(
         {
             "statistic": "missing_fraction",
             "value": round(float(missing_fraction), 4),
-            "unweighted_n": series.shape[0],
+            "unweighted_n": sketch.n_rows,
         }
     )
     return rows
 
 
-def summarise_binary(series: pd.Series, min_cell: int) -> List[Dict[str, Any]]:
-    clean = series.dropna()
-    n = int(clean.shape[0])
+def summarise_binary(sketch: ColumnSketch, min_cell: int) -> List[Dict[str, Any]]:
+    if not sketch.is_numeric:
+        return non_numeric_status(sketch)
+    n = sketch.n_observed
     if n < min_cell:
         return [
             {
@@ -154,9 +174,8 @@ def summarise_binary(series: pd.Series, min_cell: int) -> List[Dict[str, Any]]:
             }
         ]
 
-    counts = clean.value_counts()
-    count1 = int(counts.get(1, 0))
-    count0 = int(counts.get(0, 0))
+    count1 = sketch.count_of(1)
+    count0 = sketch.count_of(0)
     rows: List[Dict[str, Any]] = []
 
     if count1 < min_cell or count0 < min_cell:
@@ -169,7 +188,7 @@ def summarise_binary(series: pd.Series, min_cell: int) -> List[Dict[str, Any]]:
             }
         )
     else:
-        prop = clean.mean()
+        prop = sketch.mean
         rows.append(
             {
                 "statistic": "prop_1",
@@ -192,27 +211,27 @@ def summarise_binary(series: pd.Series, min_cell: int) -> List[Dict[str, Any]]:
             }
         )
 
-    missing_fraction = 1.0 - (n / series.shape[0])
+    missing_fraction = 1.0 - (n / sketch.n_rows)
     rows.append(
         {
             "statistic": "missing_fraction",
             "value": round(float(missing_fraction), 4),
-            "unweighted_n": series.shape[0],
+            "unweighted_n": sketch.n_rows,
         }
     )
     return rows
 
 
 def build_summary(
-    df: pd.DataFrame,
+    profile: DatasetProfile,
     variables: List[VariableSpec],
     min_cell: int,
 ) -> List[Dict[str, Any]]:
     results: List[Dict[str, Any]] = []
-    total_records = df.shape[0]
+    total_records = profile.n_rows
 
     for spec in variables:
-        if spec.column not in df.columns:
+        if spec.column not in profile:
             results.append(
                 {
                     "variable_id": spec.alias,
@@ -225,17 +244,17 @@ def build_summary(
             )
             continue
 
-        series = df[spec.column]
+        sketch = profile[spec.column]
         if spec.var_type == "numeric" or spec.var_type == "ordinal":
-            rows = summarise_numeric(series, min_cell)
+            rows = summarise_numeric(sketch, min_cell)
         elif spec.var_type == "binary":
-            rows = summarise_binary(series, min_cell)
+            rows = summarise_binary(sketch, min_cell)
         else:
             rows = [
                 {
                     "statistic": "status",
                     "value": "unsupported_type",
-                    "unweighted_n": int(series.dropna().shape[0]),
+                    "unweighted_n": sketch.n_observed,
                     "detail": f"Unsupported var_type={spec.var_type}",
                 }
             ]
@@ -278,6 +297,12 @@ def parse_args() -> argparse.Namespace:
         default=None,
         help="Override minimum cell size for suppression (defaults to config value).",
     )
+    parser.add_argument(
+        "--cell-budget",
+        type=int,
+        default=DEFAULT_CELL_BUDGET,
+        help="Approximate number of CSV cells held in memory per chunk.",
+    )
     return parser.parse_args()
 
 
@@ -295,9 +320,13 @@ def main() -> None:
     if not csv_path.exists():
         raise FileNotFoundError(f"CSV not found: {csv_path}")
 
-    df = pd.read_csv(csv_path, low_memory=False)
+    profile = profile_csv(
+        csv_path,
+        columns=[spec.column for spec in KEY_VARIABLES],
+        cell_budget=args.cell_budget,
+    )
 
-    summary_rows = build_summary(df, KEY_VARIABLES, min_cell_size)
+    summary_rows = build_summary(profile, KEY_VARIABLES, min_cell_size)
     output_df = pd.DataFrame(summary_rows)
 
     output_path = Path(args.out)
@@ -313,7 +342,7 @@ def main() -> None:
     manifest = {
         "seed": seed,
         "min_cell_size": min_cell_size,
-        "records": df.shape[0],
+        "records": profile.n_rows,
         "variables_summarised": [spec.alias for spec in KEY_VARIABLES],
         "command": f"python {script_ref} --csv {args.csv} --config {args.config} --out {args.out}",
     }
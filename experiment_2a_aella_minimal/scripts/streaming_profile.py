@@ -0,0 +1,320 @@
+#!/usr/bin/env python3
+"""Chunked CSV profiler with bounded-memory per-column sketches.
+
+The CSV is read once in row chunks whose length is ``cell_budget`` divided by
+the number of columns read, so peak memory stays near ``cell_budget`` cells
+however wide the file is. Each chunk updates one ``ColumnSketch`` per
+column; with ``workers > 1`` the columns are split into groups that are
+updated concurrently on a thread pool (sketches are independent, so no
+locking is needed).
+
+A sketch keeps
+
+* row, missing and memory counts, and the dtype each chunk was parsed as
+  (combined the way a single ``read_csv`` would promote them: ints and
+  floats to float64, anything with text to the text dtype);
+* exact min/max and a streaming mean/variance (Chan et al. pairwise merge);
+* a value -> count frequency table. While a column has at most
+  ``max_distinct`` distinct values (survey codes, ages, flags) quantiles and
+  top-k categories computed from it are exact and match pandas' linear
+  interpolation; beyond that, numeric tables are merged into equal-count
+  centroids and text tables keep their most frequent values, and the sketch
+  is flagged ``exact=False``.
+
+Once a column has any text chunk its frequency keys are all kept as text, and
+keys that read as numbers are written canonically (integral values without a
+trailing ``.0``), so ``1``, ``1.0`` and ``"1"`` from differently parsed chunks
+count as one category.
+"""
+
+from __future__ import annotations
+
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Sequence
+
+import numpy as np
+import pandas as pd
+from pandas.api.types import is_bool_dtype, is_numeric_dtype
+
+DEFAULT_CELL_BUDGET = 2_000_000
+DEFAULT_MAX_DISTINCT = 10_000
+_MERGE_EVERY = 16
+
+
+def _text_key(key: Any, number: float) -> str:
+    if isinstance(key, (bool, np.bool_)) or not np.isfinite(number):
+        return str(key)
+    return str(int(number)) if number.is_integer() else repr(number)
+
+
+def _text_keys(table: pd.Series) -> pd.Series:
+    numbers = pd.to_numeric(pd.Series(table.index, dtype=object), errors="coerce").to_numpy(dtype=float)
+    keys = [_text_key(key, float(number)) for key, number in zip(table.index, numbers)]
+    return pd.Series(table.to_numpy(), index=pd.Index(keys, dtype=object))
+
+
+def _lerp(lo: float, hi: float, t: float) -> float:
+    # numpy's "linear" quantile interpolation, including its t >= 0.5 branch.
+    diff = hi - lo
+    return hi - diff * (1.0 - t) if t >= 0.5 else lo + diff * t
+
+
+@dataclass
+class ColumnSketch:
+    """Streaming summary of one column."""
+
+    name: str
+    max_distinct: int = DEFAULT_MAX_DISTINCT
+    n_rows: int = 0
+    n_missing: int = 0
+    memory_bytes: int = 0
+    chunk_dtypes: list = field(default_factory=list)
+    n_numeric: int = 0
+    mean: float = float("nan")
+    m2: float = 0.0
+    minimum: Any = None
+    maximum: Any = None
+    exact: bool = True
+    _table: pd.Series | None = None
+    _pending: list = field(default_factory=list)
+    _pending_size: int = 0
+
+    def update(self, series: pd.Series) -> None:
+        missing = series.isna().to_numpy()
+        self.n_rows += len(series)
+        self.n_missing += int(missing.sum())
+        self.memory_bytes += int(series.memory_usage(index=False, deep=True))
+        if series.dtype not in self.chunk_dtypes:
+            self.chunk_dtypes.append(series.dtype)
+        clean = series[~missing]
+        if clean.empty:
+            return
+        if is_numeric_dtype(series.dtype):
+            self._update_moments(clean)
+        else:
+            clean = clean.astype(str)
+        table = clean.value_counts(sort=False)
+        self._pending.append(table)
+        self._pending_size += len(table)
+        if len(self._pending) >= _MERGE_EVERY or self._pending_size > self.max_distinct:
+            self._merge()
+
+    def _merge(self) -> None:
+        # Chunk tables are buffered and merged in one groupby; aligning a
+        # running table with every chunk's counts dominates the pass otherwise.
+        if not self._pending:
+            return
+        tables = self._pending if self._table is None else [self._table, *self._pending]
+        text = not self.is_numeric
+        if text:
+            tables = [_text_keys(table) for table in tables]
+        if len(tables) == 1 and not text:
+            merged = tables[0]
+        else:
+            # Canonical text keys can repeat within one table, so text always regroups.
+            merged = pd.concat(tables).groupby(level=0, sort=False).sum()
+        self._table = merged.astype(np.int64)
+        self._pending, self._pending_size = [], 0
+        if len(self._table) > self.max_distinct:
+            self._compress()
+
+    @property
+    def counts(self) -> pd.Series | None:
+        """Value -> count table (centroid -> count once compressed)."""
+
+        self._merge()
+        return self._table
+
+    def _update_moments(self, clean: pd.Series) -> None:
+        x = clean.to_numpy(dtype=float)
+        n_b = x.size
+        mean_b = float(x.mean())
+        m2_b = float(((x - mean_b) ** 2).sum())
+        n_a = self.n_numeric
+        if n_a == 0:
+            self.mean, self.m2 = mean_b, m2_b
+        else:
+            delta = mean_b - self.mean
+            total = n_a + n_b
+            self.mean += delta * n_b / total
+            self.m2 += m2_b + delta * delta * n_a * n_b / total
+        self.n_numeric += n_b
+        lo, hi = clean.min(), clean.max()
+        self.minimum = lo if self.minimum is None else min(self.minimum, lo)
+        self.maximum = hi if self.maximum is None else max(self.maximum, hi)
+
+    def _compress(self) -> None:
+        keep = self.max_distinct // 2
+        self.exact = False
+        if not self.is_numeric:
+            self._table = self._table.nlargest(keep)
+            return
+        table = self._table.sort_index()
+        values = table.index.to_numpy(dtype=float)
+        weights = table.to_numpy(dtype=float)
+        bins = np.minimum((np.cumsum(weights) - weights) * keep // weights.sum(), keep - 1).astype(np.int64)
+        merged_counts = np.bincount(bins, weights=weights)
+        centroids = np.bincount(bins, weights=weights * values) / np.where(merged_counts > 0, merged_counts, 1.0)
+        occupied = merged_counts > 0
+        self._table = pd.Series(merged_counts[occupied].astype(np.int64), index=centroids[occupied])
+
+    @property
+    def dtype(self) -> str:
+        if not self.chunk_dtypes:
+            return "object"
+        if len(self.chunk_dtypes) == 1:
+            return str(self.chunk_dtypes[0])
+        numeric = [d for d in self.chunk_dtypes if is_numeric_dtype(d) and not is_bool_dtype(d)]
+        if len(numeric) == len(self.chunk_dtypes):
+            return str(np.result_type(*numeric))
+        text = [d for d in self.chunk_dtypes if not is_numeric_dtype(d)]
+        return str(text[0]) if text else "object"
+
+    @property
+    def is_numeric(self) -> bool:
+        dtypes = self.chunk_dtypes
+        if not dtypes or not all(is_numeric_dtype(d) for d in dtypes):
+            return False
+        bools = [is_bool_dtype(d) for d in dtypes]
+        return all(bools) or not any(bools)
+
+    @property
+    def n_observed(self) -> int:
+        return self.n_rows - self.n_missing
+
+    @property
+    def missing_fraction(self) -> float:
+        return self.n_missing / self.n_rows if self.n_rows else float("nan")
+
+    def variance(self, ddof: int = 1) -> float:
+        return self.m2 / (self.n_numeric - ddof) if self.n_numeric > ddof else float("nan")
+
+    def std(self, ddof: int = 1) -> float:
+        return float(np.sqrt(self.variance(ddof)))
+
+    def count_of(self, value: Any) -> int:
+        counts = self.counts
+        return 0 if counts is None else int(counts.get(value, 0))
+
+    def quantiles(self, qs: Sequence[float]) -> list[float]:
+        """Linear-interpolated quantiles from the frequency table."""
+
+        counts = self.counts
+        if counts is None or not self.is_numeric:
+            return [float("nan") for _ in qs]
+        table = counts.sort_index()
+        values = table.index.to_numpy(dtype=float)
+        cumulative = np.cumsum(table.to_numpy())
+        total = int(cumulative[-1])
+        out = []
+        for q in qs:
+            h = (total - 1) * q
+            lo = int(np.floor(h))
+            v_lo = values[np.searchsorted(cumulative, lo, side="right")]
+            v_hi = values[np.searchsorted(cumulative, min(lo + 1, total - 1), side="right")]
+            out.append(_lerp(v_lo, v_hi, h - lo))
+        return out
+
+    def top_values(self, k: int, min_cell: int = 0) -> list[dict[str, Any]]:
+        """Most frequent values; counts below ``min_cell`` are reported as suppressed."""
+
+        counts = self.counts
+        if counts is None or k <= 0:
+            return []
+        top = counts.sort_values(ascending=False, kind="stable").head(k)
+        return [
+            {
+                "value": value.item() if isinstance(value, np.generic) else value,
+                "count": int(count) if count >= min_cell else f"suppressed_lt_{min_cell}",
+            }
+            for value, count in top.items()
+        ]
+
+
+@dataclass
+class DatasetProfile:
+    """Row count and one sketch per profiled column, in file order."""
+
+    n_rows: int
+    sketches: list[ColumnSketch]
+    index_bytes: int = 0
+
+    def __getitem__(self, name: str) -> ColumnSketch:
+        for sketch in self.sketches:
+            if sketch.name == name:
+                return sketch
+        raise KeyError(name)
+
+    def __contains__(self, name: str) -> bool:
+        return any(sketch.name == name for sketch in self.sketches)
+
+    @property
+    def memory_bytes(self) -> int:
+        return self.index_bytes + sum(sketch.memory_bytes for sketch in self.sketches)
+
+
+def _update_group(sketches: Sequence[ColumnSketch], chunk: pd.DataFrame, positions: Sequence[int]) -> None:
+    for sketch, position in zip(sketches, positions):
+        sketch.update(chunk.iloc[:, position])
+
+
+def _consume(chunks, sketches: list[ColumnSketch], positions: list[int], workers: int) -> int:
+    groups = [list(range(i, len(sketches), workers)) for i in range(workers)] if workers > 1 else [list(range(len(sketches)))]
+    n_rows = 0
+    pool = ThreadPoolExecutor(max_workers=workers) if workers > 1 else None
+    try:
+        for chunk in chunks:
+            n_rows += len(chunk)
+            jobs = [
+                ([sketches[i] for i in group], chunk, [positions[i] for i in group]) for group in groups if group
+            ]
+            if pool is None:
+                for job in jobs:
+                    _update_group(*job)
+            else:
+                list(pool.map(lambda job: _update_group(*job), jobs))
+    finally:
+        if pool is not None:
+            pool.shutdown()
+    return n_rows
+
+
+def profile_frame(
+    df: pd.DataFrame, max_distinct: int = DEFAULT_MAX_DISTINCT, workers: int = 1
+) -> DatasetProfile:
+    """Profile an in-memory frame as a single chunk."""
+
+    sketches = [ColumnSketch(str(name), max_distinct) for name in df.columns]
+    n_rows = _consume([df], sketches, list(range(df.shape[1])), workers)
+    return DatasetProfile(n_rows, sketches, int(df.index.memory_usage(deep=True)))
+
+
+def profile_csv(
+    path: str | Path,
+    columns: Sequence[str] | None = None,
+    cell_budget: int = DEFAULT_CELL_BUDGET,
+    workers: int = 1,
+    max_distinct: int = DEFAULT_MAX_DISTINCT,
+    **read_kwargs: Any,
+) -> DatasetProfile:
+    """Stream ``path`` and profile ``columns`` (all columns when None).
+
+    Requested columns absent from the header are skipped; check with
+    ``name in profile``. Extra ``read_kwargs`` go to ``pd.read_csv``.
+    """
+
+    header = pd.read_csv(path, nrows=0, **read_kwargs).columns
+    if columns is None:
+        positions = list(range(len(header)))
+    else:
+        wanted = set(columns)
+        positions = [i for i, name in enumerate(header) if name in wanted]
+    usecols = positions or [0]
+    chunk_rows = max(1, cell_budget // max(len(usecols), 1))
+    sketches = [ColumnSketch(str(header[i]), max_distinct) for i in positions]
+    chunks = pd.read_csv(path, usecols=usecols, chunksize=chunk_rows, **read_kwargs)
+    # usecols keeps file order, so chunk column j is positions[j].
+    n_rows = _consume(chunks, sketches, list(range(len(positions))), workers)
+    return DatasetProfile(n_rows, sketches, int(pd.RangeIndex(n_rows).memory_usage(deep=True)))
@@ -30,7 +30,9 @@ import yaml
 from patsy import dmatrix
 from scipy import stats
 from statsmodels.formula.api import ols
-from statsmodels.miscmodels.ordinal_model import OrderedModel
+
+from nested_tests import TEST_METHODS, NestedOrdinalTests, NestedTestResult
+from ordinal_solver import CumulativeLinkResults
 
 DEFAULT_OUTCOME = "I tend to suffer from anxiety (npvfh98)-neg"
 DEFAULT_PREDICTOR = "CSA_score_indicator"
@@ -156,6 +158,18 @@ def parse_args() -> argparse.Namespace:
         default=None,
         help="Override random seed (otherwise read from config).",
     )
+    parser.add_argument(
+        "--test-method",
+        choices=TEST_METHODS,
+        default="both",
+        help="Nested ordinal tests of the interaction terms: likelihood-ratio, score, or both.",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Worker processes for the nested interaction tests.",
+    )
     return parser.parse_args()
 
 
@@ -250,19 +264,70 @@ def fit_ols(
     return params, ses, tvalues, df_resid
 
 
-def fit_ordinal_logit(
-    endog: pd.Series, design: pd.DataFrame
+def ordinal_coefficients(
+    result: CumulativeLinkResults, columns: Sequence[str]
 ) -> Tuple[pd.Series, pd.Series, pd.Series, int]:
-    model = OrderedModel(endog, design, distr="logit")
-    result = model.fit(method="bfgs", disp=False)
-    if not bool(result.mle_retvals.get("converged", False)):
+    if not result.converged:
         raise RuntimeError("Ordinal logit model failed to converge.")
-    params = result.params.loc[design.columns]
-    ses = result.bse.loc[design.columns]
+    params = result.params.loc[list(columns)]
+    ses = result.bse.loc[list(columns)]
     z = params / ses
     return params, ses, z, int(result.nobs)
 
 
+def interaction_test_family(design: pd.DataFrame) -> Dict[str, pd.DataFrame]:
+    """Joint test of all predictor × moderator terms, plus each term alone when there are several."""
+    interaction_cols = [col for col in design.columns if col.startswith("predictor:")]
+    family = {"joint": design[interaction_cols]}
+    if len(interaction_cols) > 1:
+        family.update({col: design[[col]] for col in interaction_cols})
+    return family
+
+
+def summarise_nested_tests(
+    interaction_label: str,
+    tests: Sequence[NestedTestResult],
+    sample_size: int,
+    seed: int,
+    timestamp: str,
+) -> List[dict]:
+    rows: List[dict] = []
+    for test in tests:
+        for test_type, statistic, p_value in (
+            ("lr_test", test.lr_statistic, test.lr_pvalue),
+            ("score_test", test.score_statistic, test.score_pvalue),
+        ):
+            if np.isnan(statistic):
+                continue
+            if test_type == "lr_test":
+                note = f"{test.lr_seconds:.3f}s; warm start, {test.iterations} iterations"
+            else:
+                note = f"{test.score_seconds:.3f}s; no refit"
+            rows.append(
+                {
+                    "interaction": interaction_label,
+                    "type": test_type,
+                    "model": "ordinal_logit",
+                    "term": test.label,
+                    "estimate": np.nan,
+                    "se": np.nan,
+                    "ci_low": np.nan,
+                    "ci_high": np.nan,
+                    "p_value": p_value,
+                    "statistic": statistic,
+                    "df": test.df,
+                    "n_unweighted": sample_size,
+                    "n_weighted": float(sample_size),
+                    "moderator_level": "",
+                    "csa_level": "",
+                    "notes": note,
+                    "seed": seed,
+                    "generated_at": timestamp,
+                }
+            )
+    return rows
+
+
 def summarise_coefficients(
     interaction_label: str,
     model_label: str,
@@ -358,6 +423,7 @@ def build_markdown_summary(
     outcome_levels: Sequence[float],
     coeff_table: pd.DataFrame,
     subgroup_table: pd.DataFrame,
+    tests_table: pd.DataFrame,
 ) -> List[str]:
     lines = [
         f"## Interaction: `{interaction_label}`",
@@ -381,6 +447,13 @@ def build_markdown_summary(
             ].round(6)
         ),
         "",
+        "### Nested Ordinal Tests (interaction terms vs. main-effects model)",
+        render_markdown_table(
+            tests_table[["type", "term", "statistic", "df", "p_value", "notes"]].round(6)
+        )
+        if not tests_table.empty
+        else "_No nested tests requested._",
+        "",
         "### Subgroup Means (CSA level × Moderator level)",
         render_markdown_table(
             subgroup_table[
@@ -526,9 +599,16 @@ def main() -> None:
         if "Intercept" in design_matrix.columns:
             design_matrix = design_matrix.drop(columns="Intercept")
         design_matrix = design_matrix.astype(float)
-        ord_params, ord_ses, ord_zscores, n_obs = fit_ordinal_logit(
-            endog=outcome_encoded,
-            design=design_matrix,
+        family = interaction_test_family(design_matrix)
+        nested = NestedOrdinalTests(
+            outcome_encoded, design_matrix.drop(columns=family["joint"].columns)
+        )
+        nested_results = nested.run(family, method=args.test_method, workers=args.workers)
+        full_result = nested_results[0].full_result
+        if full_result is None:
+            _, _, full_result = nested.lr_test(family["joint"])
+        ord_params, ord_ses, ord_zscores, n_obs = ordinal_coefficients(
+            full_result, design_matrix.columns
         )
         outputs.extend(
             summarise_coefficients(
@@ -544,6 +624,16 @@ def main() -> None:
             )
         )
 
+        outputs.extend(
+            summarise_nested_tests(
+                interaction_label=interaction_label,
+                tests=nested_results,
+                sample_size=n_obs,
+                seed=seed,
+                timestamp=timestamp,
+            )
+        )
+
         outputs.extend(
             summarise_subgroups(
                 interaction_label=interaction_label,
@@ -561,6 +651,13 @@ def main() -> None:
         subgroup_frame = pd.DataFrame(
             [row for row in outputs if row["interaction"] == interaction_label and row["type"] == "subgroup_mean"]
         )
+        tests_frame = pd.DataFrame(
+            [
+                row
+                for row in outputs
+                if row["interaction"] == interaction_label and row["type"] in ("lr_test", "score_test")
+            ]
+        )
         md_sections.extend(
             build_markdown_summary(
                 interaction_label=interaction_label,
@@ -569,6 +666,7 @@ def main() -> None:
                 outcome_levels=outcome_levels,
                 coeff_table=coeff_frame,
                 subgroup_table=subgroup_frame,
+                tests_table=tests_frame,
             )
         )
 
@@ -19,21 +19,22 @@ from __future__ import annotations
 
 import argparse
 import json
-import math
 from datetime import datetime, timezone
 from pathlib import Path
-from typing import Iterable, List, Tuple
+from typing import Tuple
 
-import numpy as np
 import pandas as pd
 import yaml
 
+from weighted_descriptives import weighted_distribution, weighted_summary
+
 
 DEFAULT_OUTCOMES: Tuple[str, ...] = (
     "I love myself (2l8994l)",
     "I tend to suffer from depression (wz901dj)",
     "I tend to suffer from anxiety (npvfh98)-neg",
 )
+SUMMARY_QUANTILES: Tuple[float, ...] = (0.1, 0.25, 0.5, 0.75, 0.9)
 
 
 def parse_args() -> argparse.Namespace:
@@ -64,6 +65,12 @@ def parse_args() -> argparse.Namespace:
         default=None,
         help="Optional weight column name. If omitted or null in survey design, uniform weights are used.",
     )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Threads used to summarise outcome columns in parallel.",
+    )
     parser.add_argument(
         "--timestamp",
         default=datetime.now(tz=timezone.utc).isoformat(timespec="seconds"),
@@ -84,19 +91,6 @@ def load_config(config_path: Path) -> dict:
         return yaml.safe_load(fh)
 
 
-def weighted_quantiles(values: np.ndarray, weights: np.ndarray, quantiles: Iterable[float]) -> List[float]:
-    if values.size == 0:
-        return [math.nan for _ in quantiles]
-    order = np.argsort(values)
-    sorted_values = values[order]
-    sorted_weights = weights[order]
-    cumulative = np.cumsum(sorted_weights)
-    if cumulative[-1] == 0:
-        return [math.nan for _ in quantiles]
-    cumulative /= cumulative[-1]
-    return [float(np.interp(q, cumulative, sorted_values)) for q in quantiles]
-
-
 def ensure_parent(path: Path) -> None:
     path.parent.mkdir(parents=True, exist_ok=True)
 
@@ -130,93 +124,61 @@ def main() -> None:
         weights = pd.to_numeric(df[weight_col], errors="coerce").fillna(0.0)
         weight_source = weight_col
 
-    summary_records = []
-    distribution_frames = []
-
-    for col in outcomes:
-        series = pd.to_numeric(df[col], errors="coerce")
-        valid_mask = series.notna() & weights.notna()
-        x = series[valid_mask].to_numpy(dtype=float)
-        w = weights[valid_mask].to_numpy(dtype=float)
-
-        weight_sum = float(w.sum()) if w.size else 0.0
-        if weight_sum == 0.0:
-            weighted_mean = math.nan
-            weighted_std = math.nan
-        else:
-            weighted_mean = float(np.average(x, weights=w))
-            weighted_var = float(np.average((x - weighted_mean) ** 2, weights=w))
-            weighted_std = math.sqrt(weighted_var)
-
-        quantile_values = weighted_quantiles(x, w, quantiles=(0.1, 0.25, 0.5, 0.75, 0.9))
-
-        summary_records.append(
-            {
-                "variable": col,
-                "label": codebook_labels.get(col, col),
-                "n_unweighted": int(valid_mask.sum()),
-                "n_weighted": weight_sum,
-                "weighted_mean": weighted_mea
-n,
-                "weighted_sd": weighted_std,
-                "p10": quantile_values[0],
-                "p25": quantile_values[1],
-                "median": quantile_values[2],
-                "p75": quantile_values[3],
-                "p90": quantile_values[4],
-            }
-        )
-
-        # Weighted distribution with small-cell suppression
-        value_counts = (
-            pd.DataFrame({"value": series, "weight": weights})
-            .dropna()
-            .groupby("value", as_index=False)["weight"]
-            .sum()
-        )
-        total_w = float(value_counts["weight"].sum())
-
-        value_counts["proportion"] = value_counts["weight"] / total_w if total_w else math.nan
-        value_counts["count_display"] = value_counts["weight"].apply(
-            lambda v: "<10 (suppressed)" if v < small_cell_threshold else f"{v:.0f}"
-        )
-        value_counts["proportion_display"] = value_counts.apply(
-            lambda row: "" if isinstance(row["count_display"], str) and "suppressed" in row["count_display"]
-            else f"{row['proportion']:.4f}",
-            axis=1,
-        )
-        value_counts["variable"] = col
-        value_counts["label"] = codebook_labels.get(col, col)
-        value_counts["weight_source"] = weight_source
-        value_counts["small_cell_threshold"] = small_cell_threshold
-        value_counts["seed"] = seed
-        value_counts["timestamp_utc"] = args.timestamp
-
-        distribution_frames.append(
-            value_counts[
-                [
-                    "variable",
-                    "label",
-                    "value",
-                    "count_display",
-                    "proportion_display",
-                    "weight_source",
-                    "small_cell_threshold",
-                    "seed",
-                    "timestamp_utc",
-                ]
-            ]
-        )
-
-    summary_df = pd.DataFrame(summary_records)
+    # Every outcome is reduced with bincounts over the same weight vector;
+    # small cells are suppressed on the unweighted count.
+    frame = df[outcomes].apply(pd.to_numeric, errors="coerce")
+    summary = weighted_summary(
+        frame,
+        outcomes,
+        weights=weights.to_numpy(dtype=float),
+        quantiles=SUMMARY_QUANTILES,
+        workers=args.workers,
+    )
+    labels = summary["variable"].map(lambda col: codebook_labels.get(col, col))
+    summary_df = pd.DataFrame(
+        {
+            "variable": summary["variable"],
+            "label": labels,
+            "n_unweighted": summary["n"].astype(int),
+            "n_weighted": summary["weight_sum"],
+            "weighted_mean": summary["mean"],
+            "weighted_sd": summary["sd"],
+            "p10": summary["q0.1"],
+            "p25": summary["q0.25"],
+            "median": summary["q0.5"],
+            "p75": summary["q0.75"],
+            "p90": summary["q0.9"],
+        }
+    )
     summary_df["weight_source"] = weight_source
     summary_df["seed"] = seed
     summary_df["timestamp_utc"] = args.timestamp
 
+    dist = weighted_distribution(
+        frame,
+        outcomes,
+        weights=weights.to_numpy(dtype=float),
+        small_cell_threshold=small_cell_threshold,
+        workers=args.workers,
+    )
+    distribution_df = pd.DataFrame(
+        {
+            "variable": dist["variable"],
+            "label": dist["variable"].map(lambda col: codebook_labels.get(col, col)),
+            "value": dist["value"],
+            "count_display": dist["weight_sum"].map("{:.0f}".format).where(~dist["suppressed"], "<10 (suppressed)"),
+            "proportion_display": dist["proportion"].map("{:.4f}".format).where(~dist["suppressed"], ""),
+        }
+    )
+    distribution_df["weight_source"] = weight_source
+    distribution_df["small_cell_threshold"] = small_cell_threshold
+    distribution_df["seed"] = seed
+    distribution_df["timestamp_utc"] = args.timestamp
+
     ensure_parent(Path(args.out_summary))
     ensure_parent(Path(args.out_distribution))
     summary_df.to_csv(args.out_summary, index=False)
-    pd.concat(distribution_frames, ignore_index=True).to_csv(args.out_distribution, index=False)
+    distribution_df.to_csv(args.out_distribution, index=False)
 
     print(
         json.dumps(
@@ -16,7 +16,9 @@ Typical usage (after confirmatory models populate `analysis/results.csv`):
         --out analysis/results.csv
 
 The script updates the `q_value` column for the targeted hypotheses and writes an
-audit table to `tables/fdr_adjustment_confirmatory.csv` by default.
+audit table to `tables/fdr_adjustment_confirmatory.csv` by default. All families are
+adjusted in one grouped pass through `multiplicity.py`; `--method` switches between
+BH (default), BY, Holm, Hochberg and Storey q-values.
 """
 
 from __future__ import annotations
@@ -26,11 +28,13 @@ import csv
 import logging
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Iterable, List, Sequence, Tuple
+from typing import List, Sequence
 
 import pandas as pd
 import yaml
 
+import multiplicity
+
 FALLBACK_Q = 0.05
 AUDIT_DEFAULT = Path("tables/fdr_adjustment_confirmatory.csv")
 
@@ -79,6 +83,12 @@ def parse_args() -> argparse.Namespace:
         default=str(AUDIT_DEFAULT),
         help="Path for audit table documenting BH steps.",
     )
+    parser.add_argument(
+        "--method",
+        choices=multiplicity.METHODS,
+        default="bh",
+        help="Multiplicity adjustment applied within each family (default: bh).",
+    )
     parser.add_argument(
         "--log-level",
         default="INFO",
@@ -142,38 +152,22 @@ def benjamini_hochberg(p_values: Sequence[float]) -> List[float]:
     """
     Compute BH-adjusted q-values. Ignores NaNs (returns NaN for those entries).
     """
-    series = pd.Series(p_values, dtype="float64")
-    valid = series.notna()
-    p_valid = series[valid]
-    if p_valid.empty:
-        return series.tolist()
-
-    ranked = p_valid.rank(method="first")
-    m = float(len(p_valid))
-
-    adjusted = pd.Series(index=p_valid.index, dtype="float64")
-    prev = 1.0
-    for idx, p in p_valid.sort_values(ascending=False).items():
-        rank = ranked.loc[idx]
-        candidate = (m / rank) * p
-        prev = min(prev, candidate)
-        adjusted.loc[idx] = prev
-
-    series.loc[valid] = adjusted.clip(upper=1.0)
-    return series.tolist()
+    return multiplicity.adjust(pd.Series(p_values, dtype="float64").to_numpy(), method="bh").tolist()
 
 
-def adjust_family(
+def adjust_families(
     results: pd.DataFrame,
-    hypothesis_ids: Iterable[str],
-) -> Tuple[pd.Series, pd.DataFrame]:
-    subset = results.set_index("hypothesis_id").loc[list(hypothesis_ids)]
-    q_values = benjamini_hochberg(subset["p_value"])
-    adjusted = subset.assign(q_value=q_values)
-    audit = adjusted[["p_value", "q_value"]].copy()
-    audit["rank"] = audit["p_value"].rank(method="first")
-    audit["sorted_p_value"] = audit["p_value"].sort_values().values
-    return adjusted["q_value"], audit
+    family_labels: pd.DataFrame,
+    method: str = "bh",
+) -> pd.DataFrame:
+    """Audit rows (family, hypothesis_id, p, q, rank) for every family in one pass."""
+    p_values = results.drop_duplicates("hypothesis_id").set_index("hypothesis_id")["p_value"]
+    return multiplicity.audit_table(
+        family_labels["id"].tolist(),
+        p_values.reindex(family_labels["id"]).to_numpy(dtype=float),
+        family_labels["family"].to_numpy(),
+        method=method,
+    )
 
 
 def write_audit_table(path: Path, rows: List[dict]) -> None:
@@ -217,30 +211,24 @@ def main() -> None:
     else:
         family_labels = hypo_df.loc[hypo_df["family"].isin(target_families), ["id", "family"]]
 
-    rows: List[dict] = []
-    updated_results = results.copy()
-
-    for family in family_labels["family"].unique():
-        ids = family_labels.loc[family_labels["family"] == family, "id"]
-        if ids.empty:
-            continue
-        missing_ids = [hid for hid in ids if hid not in set(results["hypothesis_id"])]
+    known_ids = set(results["hypothesis_id"])
+    keep = []
+    for family, ids in family_labels.groupby("family", sort=False)["id"]:
+        missing_ids = [hid for hid in ids if hid not in known_ids]
         if missing_ids:
             logging.warning("Skipping family %s due to missing hypotheses: %s", family, missing_ids)
             continue
-        q_values, audit = adjust_family(results, ids)
-        updated_results.loc[updated_results["hypothesis_id"].isin(ids), "q_value"] = q_values.values
-        for hid, row in audit.iterrows():
-            rows.append(
-                {
-                    "family": family,
-                    "hypothesis_id": hid,
-                    "p_value": row["p_value"],
-                    "q_value": row["q_value"],
-                    "rank_within_family": int(row["rank"]),
-                    "seed": config.seed,
-                }
-            )
+        keep.append(family)
+    family_labels = family_labels[family_labels["family"].isin(keep)]
+
+    audit = adjust_families(results, family_labels, method=args.method)
+    audit["rank_within_family"] = audit["rank_within_family"].astype("Int64")
+    audit["seed"] = config.seed
+    updated_results = results.copy()
+    q_by_id = audit.drop_duplicates("hypothesis_id", keep="last").set_index("hypothesis_id")["q_value"]
+    targeted = updated_results["hypothesis_id"].isin(q_by_id.index)
+    updated_results.loc[targeted, "q_value"] = updated_results.loc[targeted, "hypothesis_id"].map(q_by_id)
+    rows: List[dict] = audit.to_dict("records")
 
     out_path = Path(args.out) if args.out else results_path
     out_path.parent.mkdir(parents=True, exist_ok=True)
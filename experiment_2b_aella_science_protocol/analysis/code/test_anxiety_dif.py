@@ -28,7 +28,8 @@ import numpy as np
 import pandas as pd
 import yaml
 from scipy import stats
-from statsmodels.miscmodels.ordinal_model import OrderedModel
+
+from nested_tests import NestedOrdinalTests, NestedTestResult
 
 
 def parse_args() -> argparse.Namespace:
@@ -150,14 +151,6 @@ def build_exog_matrix(
     return exog
 
 
-def fit_ordered_model(endog: pd.Series, exog: pd.DataFrame) -> OrderedModel:
-    model = OrderedModel(endog, exog, distr="logit")
-    result = model.fit(method="bfgs", disp=False)
-    if not bool(result.mle_retvals.get("converged", False)):
-        raise RuntimeError("Ordinal model failed to converge.")
-    return result
-
-
 def summarise_coefficients(
     result, exog_columns: List[str], seed: int, timestamp: str
 ) -> pd.DataFrame:
@@ -193,35 +186,45 @@ def summarise_coefficients(
     return pd.DataFrame(rows)
 
 
-def lr_test(
-    base_result, full_result, interaction_col: str, seed: int, timestamp: str
+def nested_test_rows(
+    test: NestedTestResult, n_obs: int, seed: int, timestamp: str
 ) -> pd.DataFrame:
-    lr_stat = float(2 * (full_result.llf - base_result.llf))
-    df_diff = int(len(full_result.model.exog_names) - len(base_result.model.exog_names))
-    if df_diff <= 0:
-        raise ValueError("Full model does not add parameters over the base model.")
-    p_value = float(stats.chi2.sf(lr_stat, df_diff))
-    return pd.DataFrame(
-        [
+    rows = []
+    for test_type, statistic, p_value, note in (
+        (
+            "lr_test",
+            test.lr_statistic,
+            test.lr_pvalue,
+            "Likelihood-ratio test of interaction term "
+            f"({test.lr_seconds:.3f}s; warm start, {test.iterations} iterations).",
+        ),
+        (
+            "score_test",
+            test.score_statistic,
+            test.score_pvalue,
+            f"Score (LM) test at the base fit, no refit ({test.score_seconds:.3f}s).",
+        ),
+    ):
+        rows.append(
             {
-                "type": "lr_test",
+                "type": test_type,
                 "model": "full_vs_base",
-                "term": interaction_col,
+                "term": test.label,
                 "estimate": np.nan,
                 "se": np.nan,
                 "z": np.nan,
                 "ci_low": np.nan,
                 "ci_high": np.nan,
                 "p_value": p_value,
-                "statistic": lr_stat,
-                "df": df_diff,
-                "n_obs": int(full_result.nobs),
+                "statistic": statistic,
+                "df": test.df,
+                "n_obs": n_obs,
                 "seed": seed,
                 "generated_at": timestamp,
-                "notes": "Likelihood-ratio test of interaction term.",
+                "notes": note,
             }
-        ]
-    )
+        )
+    return pd.DataFrame(rows)
 
 
 def subgroup_summary(
@@ -259,7 +262,8 @@ def write_markdown(
     command: str,
 ) -> None:
     interaction_row = coef_df.loc[coef_df["term"] == interaction_col].iloc[0]
-    lr_row = lr_df.iloc[0]
+    lr_row = lr_df.loc[lr_df["type"] == "lr_test"].iloc[0]
+    score_row = lr_df.loc[lr_df["type"] == "score_test"].iloc[0]
     md_lines = [
         "# Anxiety Item DIF (CSA \u00d7 Gender)",
         f"Generated: {timestamp} | Seed: {seed}",
@@ -281,6 +285,8 @@ def write_markdown(
         "## Likelihood-Ratio Test",
         f"- LR statistic = {lr_row['statistic']:.3f} on {int(lr_row['df'])} df, "
         f"p = {lr_row['p_value']:.4f}",
+        f"- Score (LM) statistic = {score_row['statistic']:.3f} on {int(score_row['df'])} df, "
+        f"p = {score_row['p_value']:.4f} (evaluated at the base fit, no refit)",
         "",
         "## Subgroup Means (complete cases)",
     ]
@@ -344,15 +350,25 @@ def main() -> None:
     interaction_col = f"{csa_col}_x_{group_col}"
     exog_base = exog_full.drop(columns=[interaction_col])
 
-    model_base = fit_ordered_model(encoded_outcome, exog_base)
-    model_full = fit_ordered_model(encoded_outcome, exog_full)
+    dif_test = NestedOrdinalTests(encoded_outcome, exog_base).run_test(
+        interaction_col, exog_full[[interaction_col]]
+    )
+    if not dif_test.converged:
+        raise RuntimeError("Ordinal model failed to converge.")
+    model_full = dif_test.full_result
+    logging.info(
+        "LR test %.3fs (%d warm-start iterations); score test %.3fs",
+        dif_test.lr_seconds,
+        dif_test.iterations,
+        dif_test.score_seconds,
+    )
 
     timestamp = datetime.now(timezone.utc).isoformat()
 
     coef_df = summarise_coefficients(
         model_full, list(exog_full.columns), seed, timestamp
     )
-    lr_df = lr_test(model_base, model_full, interaction_col, seed, timestamp)
+    lr_df = nested_test_rows(dif_test, int(model_full.nobs), seed, timestamp)
 
     results_df = pd.concat([coef_df, lr_df], ignore_index=True)
     out_table_path.parent.mkdir(parents=True, exist_ok=True)
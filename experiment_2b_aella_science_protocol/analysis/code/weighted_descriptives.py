@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+"""Weighted descriptives for many variables × subgroups from bincount reductions.
+
+Grouping keys are factorized once per call; every variable is then reduced
+to per-cell sums with ``np.bincount`` (rows, weight, weighted value,
+weighted squared deviation and squared weighted deviation), so counts,
+means, variances and CIs for all subgroups come out of a handful of vector
+operations per column. Columns are independent tasks and can be spread over
+a thread pool (``workers``); ``np.bincount`` releases the GIL.
+
+Standard errors are the design-based (Taylor-linearized) SE of a weighted
+mean or proportion under with-replacement sampling,
+
+    se^2 = n / (n - 1) * sum w^2 (x - mean)^2 / (sum w)^2,
+
+which reduces to ``sd / sqrt(n)`` (ddof=1) when weights are uniform.
+``variance`` is the weighted population variance ``sum w (x - mean)^2 / sum w``.
+Cells with fewer than ``small_cell_threshold`` unweighted rows are flagged
+``suppressed`` and their statistics are blanked in the same pass.
+"""
+
+from __future__ import annotations
+
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Sequence
+
+import numpy as np
+import pandas as pd
+
+Z_CRIT = 1.96
+STAT_COLUMNS = ("n", "weight_sum", "mean", "variance", "sd", "se", "ci_low", "ci_high")
+DISTRIBUTION_COLUMNS = ("n", "weight_sum", "proportion", "se", "ci_low", "ci_high")
+
+
+def group_codes(frame: pd.DataFrame, by: Sequence[str] | None) -> tuple[np.ndarray, pd.DataFrame]:
+    """Sorted subgroup code per row (-1 when a key is missing) and the key table."""
+
+    if not by:
+        return np.zeros(len(frame), dtype=np.int64), pd.DataFrame(index=[0])
+    grouped = frame.groupby(list(by), sort=True, dropna=True)
+    codes = grouped.ngroup().to_numpy(dtype=float)
+    keys = grouped.size().index.to_frame(index=False)
+    return np.where(np.isnan(codes), -1, codes).astype(np.int64), keys
+
+
+def _weights(frame: pd.DataFrame, weights: str | np.ndarray | None) -> np.ndarray:
+    if weights is None:
+        return np.ones(len(frame))
+    if isinstance(weights, str):
+        return pd.to_numeric(frame[weights], errors="coerce").to_numpy(dtype=float)
+    return np.asarray(weights, dtype=float)
+
+
+def _map_columns(task: Callable[[str], pd.DataFrame], variables: Sequence[str], workers: int) -> list[pd.DataFrame]:
+    if workers <= 1 or len(variables) <= 1:
+        return [task(column) for column in variables]
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(task, variables))
+
+
+def _interval(
+    mean: np.ndarray, ss_w2: np.ndarray, n: np.ndarray, w_sum: np.ndarray, z: float
+) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    with np.errstate(divide="ignore", invalid="ignore"):
+        se = np.sqrt(n / (n - 1.0) * ss_w2) / w_sum
+    return se, mean - z * se, mean + z * se
+
+
+def _suppress(table: pd.DataFrame, columns: Sequence[str], threshold: int) -> pd.DataFrame:
+    table["suppressed"] = table["n"] < threshold
+    table[list(columns)] = table[list(columns)].astype(float)
+    table.loc[table["suppressed"], list(columns)] = np.nan
+    return table
+
+
+def _grouped_quantiles(
+    x: np.ndarray, w: np.ndarray, idx: np.ndarray, n_groups: int, quantiles: Sequence[float]
+) -> np.ndarray:
+    """Weighted quantiles per group (linear interpolation on the normalized CDF)."""
+
+    out = np.full((n_groups, len(quantiles)), np.nan)
+    order = np.lexsort((x, idx))
+    x, w, idx = x[order], w[order], idx[order]
+    bounds = np.searchsorted(idx, np.arange(n_groups + 1))
+    for g in range(n_groups):
+        lo, hi = bounds[g], bounds[g + 1]
+        cumulative = np.cumsum(w[lo:hi])
+        if hi > lo and cumulative[-1] != 0:
+            out[g] = np.interp(quantiles, cumulative / cumulative[-1], x[lo:hi])
+    return out
+
+
+def weighted_summary(
+    frame: pd.DataFrame,
+    variables: Sequence[str],
+    weights: str | np.ndarray | None = None,
+    by: Sequence[str] | None = None,
+    small_cell_threshold: int = 0,
+    quantiles: Sequence[float] = (),
+    z: float = Z_CRIT,
+    workers: int = 1,
+) -> pd.DataFrame:
+    """One row per (variable, subgroup) with weighted moments and CI.
+
+    Values are coerced to numeric; rows with a missing value, weight or
+    subgroup key are excluded per variable. Quantile columns are named
+    ``q<quantile>`` (e.g. ``q0.5``).
+    """
+
+    codes, keys = group_codes(frame, by)
+    n_groups = len(keys)
+    w_all = _weights(frame, weights)
+
+    def task(column: str) -> pd.DataFrame:
+        x = pd.to_numeric(frame[column], errors="coerce").to_numpy(dtype=float)
+        valid = np.isfinite(x) & np.isfinite(w_all) & (codes >= 0)
+        x, w, idx = x[valid], w_all[valid], codes[valid]
+        n = np.bincount(idx, minlength=n_groups)
+        w_sum = np.bincount(idx, weights=w, minlength=n_groups)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            mean = np.bincount(idx, weights=w * x, minlength=n_groups) / w_sum
+            dev = x - mean[idx]
+            variance = np.bincount(idx, weights=w * dev * dev, minlength=n_groups) / w_sum
+        ss_w2 = np.bincount(idx, weights=(w * dev) ** 2, minlength=n_groups)
+        se, ci_low, ci_high = _interval(mean, ss_w2, n, w_sum, z)
+        table = keys.copy()
+        table.insert(0, "variable", column)
+        table["n"] = n
+        table["weight_sum"] = w_sum
+        table["mean"] = mean
+        table["variance"] = variance
+        table["sd"] = np.sqrt(variance)
+        table["se"] = se
+        table["ci_low"] = ci_low
+        table["ci_high"] = ci_high
+        quantile_columns = [f"q{q:g}" for q in quantiles]
+        if quantiles:
+            table[quantile_columns] = _grouped_quantiles(x, w, idx, n_groups, quantiles)
+        return _suppress(table, [*STAT_COLUMNS, *quantile_columns], small_cell_threshold)
+
+    return pd.concat(_map_columns(task, list(variables), workers), ignore_index=True)
+
+
+def weighted_distribution(
+    frame: pd.DataFrame,
+    variables: Sequence[str],
+    weights: str | np.ndarray | None = None,
+    by: Sequence[str] | None = None,
+    small_cell_threshold: int = 0,
+    z: float = Z_CRIT,
+    workers: int = 1,
+) -> pd.DataFrame:
+    """One row per observed (variable, subgroup, value) with weighted shares.
+
+    ``proportion`` is the weighted share of the value within its subgroup and
+    ``se`` its linearized SE. With ``p`` the cell share, ``S`` the subgroup's
+    and ``S_v`` the cell's sum of squared weights,
+    ``sum w^2 (1[v] - p)^2 = S_v (1 - p)^2 + (S - S_v) p^2``, so every term
+    is a bincount over the combined (subgroup, value) code.
+    """
+
+    codes, keys = group_codes(frame, by)
+    n_groups = len(keys)
+    w_all = _weights(frame, weights)
+
+    def task(column: str) -> pd.DataFrame:
+        value_codes, levels = pd.factorize(frame[column], sort=True)
+        valid = (value_codes >= 0) & np.isfinite(w_all) & (codes >= 0)
+        n_levels = len(levels)
+        cell = codes[valid] * n_levels + value_codes[valid]
+        w = w_all[valid]
+        size = n_groups * n_levels
+        n = np.bincount(cell, minlength=size).reshape(n_groups, n_levels)
+        w_cell = np.bincount(cell, weights=w, minlength=size).reshape(n_groups, n_levels)
+        w2_cell = np.bincount(cell, weights=w * w, minlength=size).reshape(n_groups, n_levels)
+        n_group, w_group, w2_group = n.sum(axis=1), w_cell.sum(axis=1), w2_cell.sum(axis=1)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            p = w_cell / w_group[:, None]
+        ss_w2 = w2_cell * (1.0 - p) ** 2 + (w2_group[:, None] - w2_cell) * p**2
+        se, ci_low, ci_high = _interval(p, ss_w2, n_group[:, None], w_group[:, None], z)
+        g, v = np.nonzero(n)
+        table = keys.iloc[g].reset_index(drop=True)
+        table.insert(0, "variable", column)
+        table["value"] = np.asarray(levels)[v]
+        table["n"] = n[g, v]
+        table["weight_sum"] = w_cell[g, v]
+        table["proportion"] = p[g, v]
+        table["se"] = se[g, v]
+        table["ci_low"] = ci_low[g, v]
+        table["ci_high"] = ci_high[g, v]
+        return _suppress(table, DISTRIBUTION_COLUMNS, small_cell_threshold)
+
+    return pd.concat(_map_columns(task, list(variables), workers), ignore_index=True)
@@ -0,0 +1,182 @@
+#!/usr/bin/env python3
+"""Shared helpers for batched non-parametric bootstrap replicates.
+
+Replicates are represented as frequency-weight vectors over the original rows
+(resample counts or Poisson weights) instead of materialised DataFrames, so a
+chunk of replicates can be solved at once from the OLS normal equations.
+Several models fitted on subsets of the same respondents can share one weight
+matrix per chunk, so their replicate estimates are joint draws.
+"""
+
+from __future__ import annotations
+
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import List, Sequence, Tuple
+
+import numpy as np
+from scipy import stats
+
+WEIGHT_SCHEMES = ("multinomial", "poisson")
+
+
+# (X, y, rows): a design, its outcome and the shared-frame rows it uses
+# (boolean mask or index array; None for all rows).
+SharedDesign = Tuple[np.ndarray, np.ndarray, "np.ndarray | None"]
+
+
+@dataclass
+class BatchedOLSResult:
+    """Per-replicate OLS output; each array has one row per replicate."""
+
+    params: np.ndarray
+    bse: np.ndarray
+    tvalues: np.ndarray
+    pvalues: np.ndarray
+    nobs: np.ndarray
+
+
+def draw_replicate_weights(
+    rng: np.random.Generator, n: int, n_reps: int, scheme: str = "multinomial"
+) -> np.ndarray:
+    """Return an (n_reps, n) matrix of bootstrap frequency weights."""
+
+    if scheme == "multinomial":
+        # Same draw as resampling n row indices with replacement, stored as counts.
+        indices = rng.integers(0, n, size=(n_reps, n))
+        flat = (indices + np.arange(n_reps)[:, None] * n).ravel()
+        return np.bincount(flat, minlength=n_reps * n).reshape(n_reps, n).astype(float)
+    if scheme == "poisson":
+        return rng.poisson(1.0, size=(n_reps, n)).astype(float)
+    raise ValueError(f"Unknown bootstrap weight scheme '{scheme}'; choose from {WEIGHT_SCHEMES}.")
+
+
+def weighted_ols(X: np.ndarray, y: np.ndarray, weights: np.ndarray) -> BatchedOLSResult:
+    """Solve frequency-weighted OLS for every row of ``weights`` at once.
+
+    Results match refitting ``sm.OLS`` on the physically resampled rows: the
+    cross-products X'WX and X'Wy for all replicates come from two matrix
+    products over precomputed per-row outer products. Like statsmodels, a
+    pseudo-inverse is used so duplicated design columns do not fail.
+    """
+
+    n, p = X.shape
+    outer = (X[:, :, None] * X[:, None, :]).reshape(n, p * p)
+    xtwx = (weights @ outer).reshape(-1, p, p)
+    xtwy = weights @ (X * y[:, None])
+    ytwy = weights @ (y * y)
+    xtwx_inv = np.linalg.pinv(xtwx, hermitian=True)
+    params = np.einsum("rpq,rq->rp", xtwx_inv, xtwy)
+    rss = ytwy - np.einsum("rp,rp->r", params, xtwy)
+    nobs = weights.sum(axis=1)
+    df_resid = nobs - np.linalg.matrix_rank(xtwx, hermitian=True)
+    sigma2 = np.clip(rss, 0.0, None) / df_resid
+    xtwx_inv_diag = np.diagonal(xtwx_inv, axis1=1, axis2=2)
+    bse = np.sqrt(sigma2[:, None] * xtwx_inv_diag)
+    tvalues = params / bse
+    pvalues = 2 * stats.t.sf(np.abs(tvalues), df_resid[:, None])
+    return BatchedOLSResult(params=params, bse=bse, tvalues=tvalues, pvalues=pvalues, nobs=nobs)
+
+
+def _bootstrap_chunk(
+    designs: Sequence[SharedDesign],
+    n_rows: int,
+    n_reps: int,
+    seed: np.random.SeedSequence,
+    scheme: str,
+) -> List[BatchedOLSResult]:
+    rng = np.random.default_rng(seed)
+    weights = draw_replicate_weights(rng, n_rows, n_reps, scheme)
+    return [weighted_ols(X, y, weights if rows is None else weights[:, rows]) for X, y, rows in designs]
+
+
+def concat_results(chunks: List[BatchedOLSResult]) -> BatchedOLSResult:
+    """Stack chunked results in replicate order."""
+
+    return BatchedOLSResult(
+        params=np.concatenate([c.params for c in chunks]),
+        bse=np.concatenate([c.bse for c in chunks]),
+        tvalues=np.concatenate([c.tvalues for c in chunks]),
+        pvalues=np.concatenate([c.pvalues for c in chunks]),
+        nobs=np.concatenate([c.nobs for c in chunks]),
+    )
+
+
+def bootstrap_ols(
+    designs: Sequence[SharedDesign],
+    n_rows: int,
+    n_reps: int,
+    seed: int | np.random.SeedSequence,
+    scheme: str = "multinomial",
+    chunk_size: int = 500,
+    workers: int = 1,
+) -> List[BatchedOLSResult]:
+    """Bootstrap one or more OLS models in chunks of ``chunk_size`` shared replicates.
+
+    Every replicate draws one weight vector over the ``n_rows`` shared rows and
+    each design uses the weights of its own ``rows``, so replicate b of every
+    model comes from the same resample. Each chunk gets its own child of
+    ``seed`` so the draws do not depend on the number of ``workers``; with
+    ``workers > 1`` chunks run in a process pool.
+    """
+
+    if n_reps < 1:
+        raise ValueError("n_reps must be at least 1.")
+    designs = [
+        (np.asarray(X, dtype=float), np.asarray(y, dtype=float), None if rows is None else np.asarray(rows))
+        for X, y, rows in designs
+    ]
+    seed_seq = seed if isinstance(seed, np.random.SeedSequence) else np.random.SeedSequence(seed)
+    sizes = [min(chunk_size, n_reps - start) for start in range(0, n_reps, chunk_size)]
+    child_seeds = seed_seq.spawn(len(sizes))
+    if workers > 1 and len(sizes) > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            chunks = list(
+                pool.map(
+                    _bootstrap_chunk,
+                    [designs] * len(sizes),
+                    [n_rows] * len(sizes),
+                    sizes,
+                    child_seeds,
+                    [scheme] * len(sizes),
+                )
+            )
+    else:
+        chunks = [
+            _bootstrap_chunk(designs, n_rows, size, child, scheme)
+            for size, child in zip(sizes, child_seeds)
+        ]
+    return [concat_results([chunk[k] for chunk in chunks]) for k in range(len(designs))]
+
+
+def cluster_count_weights(rng: np.random.Generator, n_clusters: int) -> np.ndarray:
+    """Times each cluster is picked when resampling ``n_clusters`` clusters with replacement."""
+
+    picks = rng.integers(0, n_clusters, size=n_clusters)
+    return np.bincount(picks, minlength=n_clusters).astype(float)
+
+
+def blb_subset_weights(
+    rng: np.random.Generator,
+    freq_weights: np.ndarray,
+    subset_size: int,
+    n_resamples: int,
+) -> tuple[np.ndarray, np.ndarray]:
+    """Draw one bag-of-little-bootstraps subset and its resample weights.
+
+    ``freq_weights`` are integer frequencies on the original rows, so the
+    expanded sample of size N = sum(freq_weights) is never materialised. A
+    subset of ``subset_size`` expanded units is drawn without replacement and
+    collapsed to distinct original rows; each resample is a Multinomial(N)
+    draw over that subset. Returns the selected row indices and an
+    (n_resamples, n_rows_selected) weight matrix.
+    """
+
+    freq_weights = np.asarray(freq_weights, dtype=np.int64)
+    total = int(freq_weights.sum())
+    subset_size = min(subset_size, total)
+    units = rng.choice(total, size=subset_size, replace=False)
+    rows = np.searchsorted(np.cumsum(freq_weights), units, side="right")
+    rows, unit_counts = np.unique(rows, return_counts=True)
+    weights = rng.multinomial(total, unit_counts / subset_size, size=n_resamples).astype(float)
+    return rows, weights
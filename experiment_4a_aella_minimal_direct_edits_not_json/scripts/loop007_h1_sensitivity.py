@@ -12,10 +12,10 @@ from __future__ import annotations
 from pathlib import Path
 from typing import Dict, Iterable, List, Sequence
 
-import numpy as np
 import pandas as pd
 import statsmodels.api as sm
 
+import multiplicity
 from likert_utils import align_likert, ensure_columns, get_likert_specs, zscore
 
 DATA_PATH = Path("childhoodbalancedpublic_original.csv")
@@ -114,22 +114,6 @@ def collect_term(
     }
 
 
-def bh_adjust(series: pd.Series) -> pd.Series:
-    """Apply Benjamini–Hochberg (non-decreasing, m tests)."""
-
-    values = series.to_numpy(dtype=float)
-    order = np.argsort(values)
-    m = len(values)
-    q = np.empty_like(values)
-    running = 1.0
-    for idx in range(m - 1, -1, -1):
-        rank = idx + 1
-        adj = values[order[idx]] * m / rank
-        running = min(running, adj)
-        q[order[idx]] = running
-    return pd.Series(q, index=series.index)
-
-
 def main() -> None:
     df = pd.read_csv(DATA_PATH, low_memory=False)
     add_aligned_columns(df)
@@ -212,8 +196,9 @@ def main() -> None:
             )
 
     result_df = pd.DataFrame(rows)
-    for sensitivity_id, subset in result_df.groupby("sensitivity_id"):
-        result_df.loc[subset.index, "q_value"] = bh_adjust(subset["p_value"])
+    result_df["q_value"] = multiplicity.adjust(
+        result_df["p_value"].to_numpy(dtype=float), result_df["sensitivity_id"].to_numpy()
+    )
 
     result_df.to_csv(OUTPUT_PATH, index=False)
 
@@ -1,9 +1,12 @@
 #!/usr/bin/env python3
 """Loop 010 models that relax the H3 proportional-odds assumption.
 
-We approximate a partial proportional-odds (PPO) specification by stacking the
-net-worth outcome across cumulative logits and allowing the childhood class
-terms to vary by cutpoint while keeping the control set parallel. The script
+We fit a partial proportional-odds (PPO) specification over the net-worth
+cumulative logits, allowing the childhood class terms to vary by cutpoint while
+keeping the control set parallel. ``ppo_model`` evaluates the cumulative logits
+on the respondent rows rather than a stacked long frame; ``--likelihood
+ordinal`` switches from the stacked-logit objective to the generalized ordered
+logit likelihood. The script
 exports coefficient tables plus threshold-specific marginal effects so the
 ordered-logit diagnostics from Loop 008 can be benchmarked against this more
 flexible alternative.
@@ -11,12 +14,14 @@ flexible alternative.
 
 from __future__ import annotations
 
+import argparse
 from pathlib import Path
-from typing import Iterable, List
+from typing import Iterable
 
 import numpy as np
 import pandas as pd
-import statsmodels.api as sm
+
+from ppo_model import LIKELIHOODS, PartialProportionalOddsModel, PPOResults
 
 DATA_PATH = Path("childhoodbalancedpublic_original.csv")
 TABLES_DIR = Path("tables")
@@ -52,46 +57,16 @@ def prepare_base_dataframe(df: pd.DataFrame) -> pd.DataFrame:
     return subset
 
 
-def build_long_format(df: pd.DataFrame) -> tuple[pd.DataFrame, List[int]]:
-    """Stack the ordinal outcome into cumulative logits for PPO fitting."""
-
-    thresholds = sorted(df["networth_ord"].unique())
-    long_frames: list[pd.DataFrame] = []
-    for cut in thresholds[1:]:
-        tmp = df.copy()
-        tmp["ge_cut"] = (tmp["networth_ord"] >= cut).astype(int)
-        tmp["cutpoint"] = int(cut)
-        long_frames.append(tmp)
-    long_df = pd.concat(long_frames, ignore_index=True)
-    long_df["cutpoint"] = long_df["cutpoint"].astype(int)
-    return long_df, thresholds[1:]
-
-
-def add_cutpoint_dummies(long_df: pd.DataFrame) -> tuple[pd.DataFrame, List[str], int]:
-    """Attach cutpoint dummies (minus the baseline) for intercept shifts."""
-
-    cut_dummies = pd.get_dummies(long_df["cutpoint"], prefix="cut", drop_first=True, dtype=int)
-    long_df = pd.concat([long_df, cut_dummies], axis=1)
-    base_cut = long_df["cutpoint"].min()
-    return long_df, list(cut_dummies.columns), base_cut
-
-
-def fit_partial_model(long_df: pd.DataFrame, cut_cols: Iterable[str]) -> sm.discrete.discrete_model.BinaryResultsWrapper:
-    """Fit the stacked logit allowing the childhood class terms to vary by cut."""
-
-    predictors: list[str] = [*PROP_TERMS, *NON_PROP_TERMS, *cut_cols]
-    for term in NON_PROP_TERMS:
-        for cut_col in cut_cols:
-            interaction = f"{term}_x_{cut_col}"
-            long_df[interaction] = long_df[term] * long_df[cut_col]
-            predictors.append(interaction)
+def fit_partial_model(base_df: pd.DataFrame, likelihood: str = "stacked") -> PPOResults:
+    """Fit the PPO logit allowing the childhood class terms to vary by cut."""
 
-    X = sm.add_constant(long_df[predictors], has_constant="add")
-    model = sm.Logit(long_df["ge_cut"], X)
-    return model.fit(disp=False, maxiter=200)
+    model = PartialProportionalOddsModel(
+        base_df["networth_ord"], base_df, PROP_TERMS, NON_PROP_TERMS
+    )
+    return model.fit(likelihood=likelihood)
 
 
-def export_coefficients(result: sm.discrete.discrete_model.BinaryResultsWrapper) -> None:
+def export_coefficients(result: PPOResults) -> None:
     """Persist raw coefficient table for full transparency."""
 
     rows: list[dict[str, object]] = []
@@ -109,7 +84,7 @@ def export_coefficients(result: sm.discrete.discrete_model.BinaryResultsWrapper)
 
 
 def export_threshold_effects(
-    result: sm.discrete.discrete_model.BinaryResultsWrapper,
+    result: PPOResults,
     cut_values: Iterable[int],
     cut_cols: Iterable[str],
     base_cut: int,
@@ -167,13 +142,13 @@ def export_threshold_effects(
 
 
 def export_fit_stats(
-    result: sm.discrete.discrete_model.BinaryResultsWrapper,
+    result: PPOResults,
     n_individuals: int,
 ) -> None:
     """Record high-level fit diagnostics."""
 
     metrics = [
-        {"metric": "n_long_rows", "value": int(result.nobs)},
+        {"metric": "n_long_rows", "value": int(result.n_long_rows)},
         {"metric": "n_individuals", "value": n_individuals},
         {"metric": "log_likelihood", "value": float(result.llf)},
         {"metric": "aic", "value": float(result.aic)},
@@ -183,17 +158,24 @@ def export_fit_stats(
     pd.DataFrame(metrics).to_csv(FIT_PATH, index=False)
 
 
-def main() -> None:
+def main(likelihood: str = "stacked") -> None:
     df = pd.read_csv(DATA_PATH, low_memory=False)
     base_df = prepare_base_dataframe(df)
-    long_df, cut_values = build_long_format(base_df)
-    long_df, cut_cols, base_cut = add_cutpoint_dummies(long_df)
 
-    result = fit_partial_model(long_df, cut_cols)
+    result = fit_partial_model(base_df, likelihood=likelihood)
+    cut_values = [int(cut) for cut in result.model.cuts]
     export_coefficients(result)
-    export_threshold_effects(result, cut_values, cut_cols, base_cut)
+    export_threshold_effects(result, cut_values, result.model.cut_cols, result.model.base_cut)
     export_fit_stats(result, n_individuals=len(base_df))
 
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description="Loop 010 H3 partial proportional-odds models.")
+    parser.add_argument(
+        "--likelihood",
+        choices=LIKELIHOODS,
+        default="stacked",
+        help="Stacked cumulative-logit objective (default) or the generalized ordered logit likelihood.",
+    )
+    args = parser.parse_args()
+    main(likelihood=args.likelihood)
@@ -1,16 +1,28 @@
 #!/usr/bin/env python3
-"""Loop 011 benchmark: multinomial net-worth model versus PPO baseline."""
+"""Loop 011 benchmark: multinomial net-worth model versus PPO baseline.
+
+The multinomial logit is fitted by ``multinomial_model`` (CSR design built
+directly from the analytic columns, block-structured Newton Hessian,
+vectorized average marginal effects with analytic delta-method errors)
+instead of ``sm.MNLogit`` and ``get_margeff``.
+Coefficient and marginal-effect errors use the Taylor-linearized (sandwich)
+covariance from ``linearization``; the public file has no PSU identifiers, so
+every respondent is its own PSU.
+"""
 
 from __future__ import annotations
 
+from dataclasses import replace
 from pathlib import Path
 from typing import List
 
 import numpy as np
 import pandas as pd
-import statsmodels.api as sm
+from scipy import sparse
 
+from linearization import multinomial_cov
 from loop010_h3_partial_models import prepare_base_dataframe
+from multinomial_model import MultinomialResults, SparseMultinomialLogit, frame_to_csr
 
 DATA_PATH = Path("childhoodbalancedpublic_original.csv")
 TABLES_DIR = Path("tables")
@@ -32,17 +44,19 @@ PREDICTORS = [
 ]
 
 
-def fit_multinomial(df: pd.DataFrame) -> sm.discrete.discrete_model.MNLogitResults:
-    """Fit the multinomial logit on the ordinal net-worth outcome."""
+def fit_multinomial(df: pd.DataFrame) -> MultinomialResults:
+    """Fit the multinomial logit on the ordinal net-worth outcome, with linearized errors."""
 
     subset = df.dropna(subset=["networth_ord", *PREDICTORS]).copy()
     y = subset["networth_ord"].astype(int)
-    X = sm.add_constant(subset[PREDICTORS], has_constant="add")
-    model = sm.MNLogit(y, X)
-    return model.fit(disp=False, maxiter=300)
+    # Constant plus predictors straight into CSR; the gender dummy and its
+    # interaction are stored by their non-zero entries only.
+    X = sparse.hstack([np.ones((len(subset), 1)), frame_to_csr(subset[PREDICTORS])], format="csr")
+    result = SparseMultinomialLogit(y, X, exog_names=["const", *PREDICTORS]).fit(maxiter=300)
+    return replace(result, cov=multinomial_cov(result))
 
 
-def export_params(result: sm.discrete.discrete_model.MNLogitResults) -> None:
+def export_params(result: MultinomialResults) -> None:
     """Persist coefficient table in tidy long form."""
 
     rows: List[dict[str, object]] = []
@@ -67,44 +81,19 @@ def export_params(result: sm.discrete.discrete_model.MNLogitResults) -> None:
     pd.DataFrame(rows).to_csv(MULTI_PARAM_PATH, index=False)
 
 
-def export_marginals(result: sm.discrete.discrete_model.MNLogitResults) -> None:
-    """Store marginal effects for all predictors."""
+def export_marginals(result: MultinomialResults) -> None:
+    """Store average marginal effects for all predictors and outcome levels."""
 
-    margeff = result.get_margeff(at="overall", method="dydx")
-    frame = margeff.summary_frame()
-    rows: list[dict[str, object]] = []
-    for (outcome_label, term), row in frame.iterrows():
-        outcome_level = int(outcome_label.split("=")[-1])
-        rows.append(
-            {
-                "outcome_level": outcome_level,
-                "term": term,
-                "dy_dx": float(row["dy/dx"]),
-                "std_err": float(row["Std. Err."]),
-                "z_value": float(row["z"]),
-                "p_value": float(row["Pr(>|z|)"]),
-                "ci_low": float(row["Conf. Int. Low"]),
-                "ci_high": float(row["Cont. Int. Hi."]),
-            }
-        )
-    pd.DataFrame(rows).to_csv(MARGINAL_PATH, index=False)
+    result.marginal_effects().to_csv(MARGINAL_PATH, index=False)
 
 
 def export_fit_stats(
-    result: sm.discrete.discrete_model.MNLogitResults,
+    result: MultinomialResults,
     n_individuals: int,
 ) -> None:
     """Record key fit statistics for the multinomial specification."""
 
-    metrics = [
-        {"metric": "n_individuals", "value": int(n_individuals)},
-        {"metric": "log_likelihood", "value": float(result.llf)},
-        {"metric": "aic", "value": float(result.aic)},
-        {"metric": "bic", "value": float(result.bic)},
-        {"metric": "pseudo_r2_mcfadden", "value": float(result.prsquared)},
-        {"metric": "df_model", "value": int(result.df_model)},
-    ]
-    pd.DataFrame(metrics).to_csv(MULTI_FIT_PATH, index=False)
+    result.fit_statistics(n_individuals).to_csv(MULTI_FIT_PATH, index=False)
 
 
 def build_comparison_table(multi_fit: pd.DataFrame) -> None:
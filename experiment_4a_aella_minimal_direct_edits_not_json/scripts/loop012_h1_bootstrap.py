@@ -1,5 +1,13 @@
 #!/usr/bin/env python3
-"""Loop 012 bootstrap diagnostics for the confirmatory H1 interactions."""
+"""Loop 012 bootstrap diagnostics for the confirmatory H1 interactions.
+
+Every replicate draws one set of respondent resample counts over the union of
+both analytic samples and refits each interaction model on its own complete
+cases under those counts. The two estimates of a replicate are therefore joint
+draws, and they also give a resampling-based family-wise adjustment: step-down maxT (Romano–Wolf) p-values
+from studentized, null-centred draws are written next to the summaries and
+into the ``q_value`` column of the matching ``analysis/results.csv`` rows.
+"""
 
 from __future__ import annotations
 
@@ -12,7 +20,10 @@ import numpy as np
 import pandas as pd
 import statsmodels.api as sm
 
+import multiplicity
+from bootstrap_utils import WEIGHT_SCHEMES, bootstrap_ols
 from likert_utils import align_likert, ensure_columns, get_likert_specs, zscore
+from resampling_adjust import MaxTAdjustment, draw_matrix, maxt_adjust, studentized_stats, write_q_values
 
 DATA_PATH = Path("childhoodbalancedpublic_original.csv")
 TABLES_DIR = Path("tables")
@@ -22,6 +33,13 @@ BOOT_PATH = TABLES_DIR / "loop012_h1_bootstrap_draws.csv"
 BOOT_SUMMARY_PATH = TABLES_DIR / "loop012_h1_bootstrap_summary.csv"
 SLOPE_PATH = TABLES_DIR / "loop012_h1_bootstrap_slopes.csv"
 SLOPE_SUMMARY_PATH = TABLES_DIR / "loop012_h1_bootstrap_slopes_summary.csv"
+STEPDOWN_PATH = TABLES_DIR / "loop012_h1_bootstrap_stepdown.csv"
+RESULTS_PATH = Path("analysis/results.csv")
+
+RESULT_IDS = {
+    "guidance": "loop012_h1_bootstrap_guidance",
+    "male": "loop012_h1_bootstrap_male",
+}
 
 OUTCOME = "depression_z"
 
@@ -103,27 +121,21 @@ def fit_ols(data: pd.DataFrame, outcome: str, predictors: Iterable[str]) -> sm.r
     return model
 
 
-def sample_with_replacement(df: pd.DataFrame, rng: np.random.Generator) -> pd.DataFrame:
-    """Return a bootstrap sample with replacement."""
+def analytic_frames(df: pd.DataFrame) -> tuple[pd.DataFrame, Dict[str, np.ndarray]]:
+    """Rows complete for at least one model, with each model's complete-case mask."""
 
-    indices = rng.integers(0, len(df), size=len(df))
-    return df.iloc[indices].reset_index(drop=True)
+    model_columns = {key: [OUTCOME, *spec.predictors] for key, spec in MODEL_SPECS.items()}
+    columns = list(dict.fromkeys(col for cols in model_columns.values() for col in cols))
+    masks = {key: df[cols].notna().all(axis=1).to_numpy() for key, cols in model_columns.items()}
+    keep = np.logical_or.reduce(list(masks.values()))
+    union = df.loc[keep, columns].reset_index(drop=True)
+    return union, {key: mask[keep] for key, mask in masks.items()}
 
 
 def bh_adjust(p_values: np.ndarray) -> np.ndarray:
     """Apply Benjamini-Hochberg adjustment within a family."""
 
-    m = len(p_values)
-    order = np.argsort(p_values)
-    adjusted = np.empty(m, dtype=float)
-    prev = 1.0
-    for i in range(m - 1, -1, -1):
-        rank = i + 1
-        adj = p_values[order[i]] * m / rank
-        adj = min(adj, prev)
-        adjusted[order[i]] = adj
-        prev = adj
-    return np.clip(adjusted, 0, 1)
+    return multiplicity.adjust(p_values, method="bh")
 
 
 def summarize_series(values: pd.Series, label: str) -> dict[str, object]:
@@ -170,24 +182,42 @@ def compute_two_sided_tail(values: pd.Series) -> float:
     return float(min(tail, 1.0))
 
 
-def main(n_reps: int, seed: int) -> None:
-    df = prepare_dataframe()
-    rng = np.random.default_rng(seed)
+def stepdown_adjustment(
+    prepared: Dict[str, pd.DataFrame], draws_df: pd.DataFrame, chunk_size: int = 500
+) -> MaxTAdjustment:
+    """Romano–Wolf step-down p-values for the interaction family from the joint replicates."""
+
+    keys = list(MODEL_SPECS)
+    estimate = np.empty(len(keys))
+    se = np.empty(len(keys))
+    for idx, key in enumerate(keys):
+        spec = MODEL_SPECS[key]
+        model = fit_ols(prepared[key], OUTCOME, spec.predictors)
+        estimate[idx] = model.params[spec.interaction_term]
+        se[idx] = model.bse[spec.interaction_term]
+    complete = draws_df.dropna(subset=["estimate", "std_err"])
+    boot_estimate = draw_matrix(complete, "model_key", "estimate", keys)
+    boot_se = draw_matrix(complete, "model_key", "std_err", keys)
+    observed, null_stats = studentized_stats(estimate, se, boot_estimate, boot_se)
+    return maxt_adjust(observed, null_stats, hypotheses=keys, chunk_size=chunk_size)
+
 
+def run_loop_engine(
+    union: pd.DataFrame, masks: Dict[str, np.ndarray], n_reps: int, seed: int
+) -> tuple[pd.DataFrame, pd.DataFrame]:
+    """Original engine: resample respondents and refit statsmodels OLS once per replicate."""
+
+    rng = np.random.default_rng(seed)
     draws: list[dict[str, object]] = []
     slope_draws: list[dict[str, object]] = []
 
-    prepared: Dict[str, pd.DataFrame] = {}
-    for key, spec in MODEL_SPECS.items():
-        cols = [OUTCOME, *spec.predictors]
-        prepared[key] = df[cols].dropna().reset_index(drop=True)
-
     for rep in range(1, n_reps + 1):
         p_values: list[float] = []
         idxs: list[int] = []
+        indices = rng.integers(0, len(union), size=len(union))
+        sample = union.iloc[indices].reset_index(drop=True)
         for key, spec in MODEL_SPECS.items():
-            sample = sample_with_replacement(prepared[key], rng)
-            model = fit_ols(sample, OUTCOME, spec.predictors)
+            model = fit_ols(sample[masks[key][indices]], OUTCOME, spec.predictors)
             term = spec.interaction_term
             if term not in model.params:
                 continue
@@ -231,10 +261,100 @@ def main(n_reps: int, seed: int) -> None:
             for local_idx, q_value in zip(idxs, adjusted):
                 draws[local_idx]["q_value"] = float(q_value)
 
-    draws_df = pd.DataFrame(draws)
-    draws_df.to_csv(BOOT_PATH, index=False)
+    return pd.DataFrame(draws), pd.DataFrame(slope_draws)
+
+
+def run_batched_engine(
+    union: pd.DataFrame,
+    masks: Dict[str, np.ndarray],
+    n_reps: int,
+    seed: int,
+    scheme: str = "multinomial",
+    chunk_size: int = 500,
+    workers: int = 1,
+) -> tuple[pd.DataFrame, pd.DataFrame]:
+    """Solve all replicates of both models from batched normal equations on shared weights."""
 
-    slope_df = pd.DataFrame(slope_draws)
+    designs = []
+    for key, spec in MODEL_SPECS.items():
+        data = union[masks[key]]
+        X = np.column_stack([np.ones(len(data)), data[spec.predictors].to_numpy(dtype=float)])
+        designs.append((X, data[OUTCOME].to_numpy(dtype=float), masks[key]))
+    results = bootstrap_ols(
+        designs, len(union), n_reps, seed, scheme=scheme, chunk_size=chunk_size, workers=workers
+    )
+    replicates = np.arange(1, n_reps + 1)
+    frames: list[pd.DataFrame] = []
+    slope_frames: list[pd.DataFrame] = []
+    for (key, spec), result in zip(MODEL_SPECS.items(), results):
+        columns = ["const", *spec.predictors]
+        term_idx = columns.index(spec.interaction_term)
+        frames.append(
+            pd.DataFrame(
+                {
+                    "replicate": replicates,
+                    "model_key": key,
+                    "model_id": spec.model_id,
+                    "interaction_label": spec.interaction_label,
+                    "term": spec.interaction_term,
+                    "estimate": result.params[:, term_idx],
+                    "std_err": result.bse[:, term_idx],
+                    "t_value": result.tvalues[:, term_idx],
+                    "p_value": result.pvalues[:, term_idx],
+                    "n_obs": result.nobs.astype(int),
+                }
+            )
+        )
+        if key == "guidance":
+            beta_main = result.params[:, columns.index("abuse_child_z")]
+            beta_int = result.params[:, term_idx]
+            for level_label, level_value in (("minus1sd", -1.0), ("plus1sd", 1.0)):
+                slope_frames.append(
+                    pd.DataFrame(
+                        {
+                            "replicate": replicates,
+                            "slope_id": f"abuse_at_{level_label}",
+                            "level_value": level_value,
+                            "estimate": beta_main + beta_int * level_value,
+                            "n_obs": result.nobs.astype(int),
+                        }
+                    )
+                )
+
+    draws_df = pd.concat(frames).sort_values(["replicate"], kind="stable").reset_index(drop=True)
+    # Each replicate is one BH family; all replicates are adjusted in one grouped pass.
+    draws_df["q_value"] = multiplicity.adjust(
+        draws_df["p_value"].to_numpy(dtype=float), draws_df["replicate"].to_numpy()
+    )
+    slope_df = pd.concat(slope_frames).sort_values(["replicate"], kind="stable").reset_index(drop=True)
+    return draws_df, slope_df
+
+
+def main(
+    n_reps: int,
+    seed: int,
+    engine: str = "batched",
+    scheme: str = "multinomial",
+    chunk_size: int = 500,
+    workers: int = 1,
+    results_path: Path | None = RESULTS_PATH,
+) -> None:
+    df = prepare_dataframe()
+
+    union, masks = analytic_frames(df)
+    prepared: Dict[str, pd.DataFrame] = {
+        key: union.loc[masks[key], [OUTCOME, *spec.predictors]].reset_index(drop=True)
+        for key, spec in MODEL_SPECS.items()
+    }
+
+    if engine == "loop":
+        draws_df, slope_df = run_loop_engine(union, masks, n_reps, seed)
+    else:
+        draws_df, slope_df = run_batched_engine(
+            union, masks, n_reps, seed, scheme=scheme, chunk_size=chunk_size, workers=workers
+        )
+
+    draws_df.to_csv(BOOT_PATH, index=False)
     slope_df.to_csv(SLOPE_PATH, index=False)
 
     summaries: list[dict[str, object]] = []
@@ -248,9 +368,21 @@ def main(n_reps: int, seed: int) -> None:
         slope_summaries.append(summarize_series(group["estimate"], slope_id))
         slope_summaries[-1]["two_sided_tail"] = compute_two_sided_tail(group["estimate"])
 
+    adjustment = stepdown_adjustment(prepared, draws_df, chunk_size=chunk_size)
+    stepdown_df = adjustment.to_frame().rename(columns={"hypothesis": "model_key"})
+    stepdown_df.insert(1, "result_id", stepdown_df["model_key"].map(RESULT_IDS))
+    stepdown_df.to_csv(STEPDOWN_PATH, index=False)
+
     summary_df = pd.DataFrame(summaries)
+    summary_df["p_maxt"] = adjustment.p_single_step
+    summary_df["p_stepdown"] = adjustment.p_stepdown
     summary_df.to_csv(BOOT_SUMMARY_PATH, index=False)
 
+    if results_path is not None and results_path.exists():
+        missing = write_q_values(results_path, dict(zip(stepdown_df["result_id"], stepdown_df["p_stepdown"])))
+        if missing:
+            print(f"Result rows not found in {results_path}: {', '.join(missing)}")
+
     slope_summary_df = pd.DataFrame(slope_summaries)
     slope_summary_df.to_csv(SLOPE_SUMMARY_PATH, index=False)
 
@@ -259,5 +391,38 @@ if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Bootstrap the confirmatory H1 interaction models.")
     parser.add_argument("--n-reps", type=int, default=500, help="Number of bootstrap replicates (default: 500).")
     parser.add_argument("--seed", type=int, default=20251016, help="Random seed for numpy's default_rng.")
+    parser.add_argument(
+        "--engine",
+        choices=["batched", "loop"],
+        default="batched",
+        help="Batched normal-equation solver (default) or the per-replicate statsmodels refit.",
+    )
+    parser.add_argument(
+        "--weights",
+        choices=WEIGHT_SCHEMES,
+        default="multinomial",
+        help="Replicate weights for the batched engine: resample counts or Poisson(1).",
+    )
+    parser.add_argument("--chunk-size", type=int, default=500, help="Replicates solved per batch (bounds memory).")
+    parser.add_argument("--workers", type=int, default=1, help="Process-pool workers for batched chunks.")
+    parser.add_argument(
+        "--results-csv",
+        type=Path,
+        default=RESULTS_PATH,
+        help="Results table whose q_value column receives the step-down p-values (skipped if absent).",
+    )
+    parser.add_argument(
+        "--no-update-results",
+        action="store_true",
+        help="Write the step-down table without touching the results CSV.",
+    )
     args = parser.parse_args()
-    main(n_reps=args.n_reps, seed=args.seed)
+    main(
+        n_reps=args.n_reps,
+        seed=args.seed,
+        engine=args.engine,
+        scheme=args.weights,
+        chunk_size=args.chunk_size,
+        workers=args.workers,
+        results_path=None if args.no_update_results else args.results_csv,
+    )
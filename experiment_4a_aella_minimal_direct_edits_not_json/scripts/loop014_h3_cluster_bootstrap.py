@@ -1,16 +1,35 @@
 #!/usr/bin/env python3
-"""Loop 014: Clustered bootstrap of the H3 PPO estimator."""
+"""Loop 014: Clustered bootstrap of the H3 PPO estimator.
+
+The PPO model is evaluated on the respondent rows by ``ppo_model`` (no stacked
+long frame). The default ``weights`` engine builds that model once, tags every
+respondent with its cluster, and represents each replicate as a vector of
+cluster pick counts. Replicates are refitted by weighted Newton steps
+warm-started from the full-sample estimate, and can be spread over a process
+pool; each replicate draws from its own spawned seed so results do not depend
+on the number of workers. ``--engine concat`` keeps the original
+resample-and-concatenate path.
+
+The three threshold effects share each cluster resample, so their draws also
+give step-down maxT (Romano–Wolf) p-values for the cutpoint family; these are
+added to the summary and written to the ``q_value`` column of the matching
+``analysis/results.csv`` rows.
+"""
 
 from __future__ import annotations
 
 import argparse
+from concurrent.futures import ProcessPoolExecutor
 from dataclasses import dataclass
 from pathlib import Path
 from typing import Dict, Iterable, List
 
 import numpy as np
 import pandas as pd
-import statsmodels.api as sm
+
+from bootstrap_utils import cluster_count_weights
+from ppo_model import PartialProportionalOddsModel, PPOResults
+from resampling_adjust import MaxTAdjustment, draw_matrix, maxt_adjust, studentized_stats, write_q_values
 
 DATA_PATH = Path("childhoodbalancedpublic_original.csv")
 TABLES_DIR = Path("tables")
@@ -27,6 +46,13 @@ TARGET_CUTPOINTS = {
 
 DRAWS_PATH = TABLES_DIR / "loop014_h3_bootstrap_draws.csv"
 SUMMARY_PATH = TABLES_DIR / "loop014_h3_bootstrap_summary.csv"
+RESULTS_PATH = Path("analysis/results.csv")
+
+RESULT_IDS = {
+    "networth_ge_100k": "loop014_h3_bootstrap_cut3",
+    "networth_ge_1m": "loop014_h3_bootstrap_cut4",
+    "networth_ge_10m": "loop015_h3_bootstrap_cut5",
+}
 
 
 @dataclass(frozen=True)
@@ -66,42 +92,11 @@ def prepare_dataframe() -> pd.DataFrame:
     return df
 
 
-def build_long_format(df: pd.DataFrame) -> tuple[pd.DataFrame, List[int]]:
-    """Stack the ordinal outcome into cumulative logits."""
-
-    thresholds = sorted(df["networth_ord"].unique())
-    frames: list[pd.DataFrame] = []
-    for cut in thresholds[1:]:
-        tmp = df.copy()
-        tmp["ge_cut"] = (tmp["networth_ord"] >= cut).astype(int)
-        tmp["cutpoint"] = int(cut)
-        frames.append(tmp)
-    long_df = pd.concat(frames, ignore_index=True)
-    return long_df, thresholds[1:]
-
-
-def add_cutpoint_dummies(long_df: pd.DataFrame) -> tuple[pd.DataFrame, List[str], int]:
-    """Attach cutpoint dummies (minus the baseline)."""
-
-    cut_dummies = pd.get_dummies(long_df["cutpoint"], prefix="cut", drop_first=True, dtype=int)
-    long_df = pd.concat([long_df, cut_dummies], axis=1)
-    base_cut = int(long_df["cutpoint"].min())
-    return long_df, list(cut_dummies.columns), base_cut
-
-
-def fit_partial_model(long_df: pd.DataFrame, cut_cols: Iterable[str]) -> sm.discrete.discrete_model.BinaryResultsWrapper:
-    """Fit the stacked logit that relaxes proportional odds."""
+def fit_partial_model(df: pd.DataFrame) -> PPOResults:
+    """Fit the PPO logit that relaxes proportional odds for the childhood class terms."""
 
-    predictors: list[str] = [*PROP_TERMS, *NON_PROP_TERMS, *cut_cols]
-    for term in NON_PROP_TERMS:
-        for cut_col in cut_cols:
-            interaction = f"{term}_x_{cut_col}"
-            long_df[interaction] = long_df[term] * long_df[cut_col]
-            predictors.append(interaction)
-
-    X = sm.add_constant(long_df[predictors], has_constant="add")
-    model = sm.Logit(long_df["ge_cut"], X)
-    return model.fit(disp=False, maxiter=200)
+    model = PartialProportionalOddsModel(df["networth_ord"], df, PROP_TERMS, NON_PROP_TERMS)
+    return model.fit()
 
 
 def _column_for_cut(cut_cols: Iterable[str], cut: int) -> str | None:
@@ -121,17 +116,13 @@ def _column_for_cut(cut_cols: Iterable[str], cut: int) -> str | None:
     return None
 
 
-def extract_threshold_effect(
-    result: sm.discrete.discrete_model.BinaryResultsWrapper,
-    cut_cols: Iterable[str],
-    base_cut: int,
-    cut: int,
-    label: str,
-) -> BootstrapResult:
-    """Recover the net childhood-class effect at a given cutpoint."""
+def threshold_contrast(
+    param_names: Iterable[str], cut_cols: Iterable[str], base_cut: int, cut: int
+) -> np.ndarray:
+    """Contrast vector selecting the net childhood-class effect at ``cut``."""
 
-    param_index = {name: idx for idx, name in enumerate(result.params.index)}
-    vec = np.zeros(len(result.params))
+    param_index = {name: idx for idx, name in enumerate(param_names)}
+    vec = np.zeros(len(param_index))
     vec[param_index["classchild"]] = 1.0
     if cut != base_cut:
         cut_col = _column_for_cut(cut_cols, cut)
@@ -141,7 +132,17 @@ def extract_threshold_effect(
         if interaction not in param_index:
             raise KeyError(f"Missing interaction term {interaction}")
         vec[param_index[interaction]] = 1.0
+    return vec
 
+
+def extract_threshold_effect(
+    result: PPOResults,
+    cut: int,
+    label: str,
+) -> BootstrapResult:
+    """Recover the net childhood-class effect at a given cutpoint."""
+
+    vec = threshold_contrast(result.params.index, result.model.cut_cols, result.model.base_cut, cut)
     test = result.t_test(vec)
     effect = float(np.atleast_1d(test.effect).squeeze())
     std_err = float(np.atleast_1d(test.sd).squeeze())
@@ -158,8 +159,8 @@ def extract_threshold_effect(
         p_value=p_value,
         ci_low=ci_low,
         ci_high=ci_high,
-        n_obs=int(getattr(result, "nobs", 0)),
-        n_long_rows=int(getattr(result, "nobs", 0)),
+        n_obs=int(result.n_long_rows),
+        n_long_rows=int(result.n_long_rows),
     )
 
 
@@ -174,6 +175,118 @@ def sample_by_cluster(cluster_frames: Dict[str, pd.DataFrame], rng: np.random.Ge
     return sample
 
 
+@dataclass(frozen=True)
+class ClusterDesign:
+    """PPO model built once, with each respondent tagged by cluster."""
+
+    model: PartialProportionalOddsModel
+    row_cluster: np.ndarray
+    cluster_sizes: np.ndarray
+    contrasts: Dict[int, np.ndarray]
+
+
+def build_cluster_design(base_df: pd.DataFrame) -> ClusterDesign:
+    """Precompute the PPO model, cluster codes and target contrasts."""
+
+    codes, _ = pd.factorize(base_df["cluster_id"])
+    model = PartialProportionalOddsModel(
+        base_df["networth_ord"], base_df, PROP_TERMS, NON_PROP_TERMS
+    )
+    contrasts = {
+        cut: threshold_contrast(model.param_names, model.cut_cols, model.base_cut, cut)
+        for cut in TARGET_CUTPOINTS
+    }
+    return ClusterDesign(
+        model=model,
+        row_cluster=codes,
+        cluster_sizes=np.bincount(codes).astype(float),
+        contrasts=contrasts,
+    )
+
+
+def run_weighted_replicates(
+    design: ClusterDesign,
+    start: np.ndarray,
+    replicates: List[int],
+    seeds: List[np.random.SeedSequence],
+) -> tuple[list[dict[str, object]], int]:
+    """Refit replicates as cluster-count weights on the precomputed design."""
+
+    n_clusters = design.cluster_sizes.shape[0]
+    draws: list[dict[str, object]] = []
+    failures = 0
+    for rep, seed in zip(replicates, seeds):
+        counts = cluster_count_weights(np.random.default_rng(seed), n_clusters)
+        weights = counts[design.row_cluster]
+        try:
+            fit = design.model.fit(weights, start_params=start)
+        except np.linalg.LinAlgError:
+            failures += 1
+            continue
+        if not fit.converged:
+            failures += 1
+            continue
+        n_long_rows = int(fit.n_long_rows)
+        for cut, label in TARGET_CUTPOINTS.items():
+            test = fit.t_test(design.contrasts[cut])
+            effect = test.effect
+            std_err = test.sd
+            p_value = test.pvalue
+            boot = BootstrapResult(
+                replicate=rep,
+                cutpoint=cut,
+                cut_label=label,
+                estimate=effect,
+                std_err=std_err,
+                p_value=p_value,
+                ci_low=effect - 1.96 * std_err,
+                ci_high=effect + 1.96 * std_err,
+                n_obs=n_long_rows,
+                n_long_rows=n_long_rows,
+            )
+            boot_dict = boot.__dict__.copy()
+            boot_dict.update(
+                {
+                    "n_individuals": int(counts @ design.cluster_sizes),
+                    "n_clusters_sampled": int(n_clusters),
+                }
+            )
+            draws.append(boot_dict)
+    return draws, failures
+
+
+def run_weighted_engine(
+    base_df: pd.DataFrame, n_reps: int, seed: int, workers: int = 1
+) -> tuple[pd.DataFrame, int]:
+    """Cluster bootstrap via count weights, warm starts and optional process pool."""
+
+    design = build_cluster_design(base_df)
+    full_fit = design.model.fit()
+    start = full_fit.params.to_numpy()
+    replicates = list(range(1, n_reps + 1))
+    seeds = np.random.SeedSequence(seed).spawn(n_reps)
+    if workers > 1:
+        chunks = np.array_split(np.arange(n_reps), workers * 4)
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [
+                pool.submit(
+                    run_weighted_replicates,
+                    design,
+                    start,
+                    [replicates[i] for i in chunk],
+                    [seeds[i] for i in chunk],
+                )
+                for chunk in chunks
+                if len(chunk)
+            ]
+            outputs = [future.result() for future in futures]
+    else:
+        outputs = [run_weighted_replicates(design, start, replicates, seeds)]
+    draws = [row for chunk_draws, _ in outputs for row in chunk_draws]
+    failures = sum(chunk_failures for _, chunk_failures in outputs)
+    return pd.DataFrame(draws), failures
+
+
 def summarize_draws(draws: pd.DataFrame) -> pd.DataFrame:
     """Compute percentile summaries and tail probabilities ordered by cutpoint."""
 
@@ -222,11 +335,28 @@ def summarize_draws(draws: pd.DataFrame) -> pd.DataFrame:
     return pd.DataFrame(summaries)
 
 
-def main(n_reps: int, seed: int) -> None:
-    base_df = prepare_dataframe()
+def stepdown_adjustment(base_df: pd.DataFrame, draws: pd.DataFrame) -> MaxTAdjustment:
+    """Romano–Wolf step-down p-values for the threshold family from shared cluster resamples."""
+
+    full_fit = fit_partial_model(base_df)
+    labels = list(TARGET_CUTPOINTS.values())
+    effects = [extract_threshold_effect(full_fit, cut, label) for cut, label in TARGET_CUTPOINTS.items()]
+    complete = draws.dropna(subset=["estimate", "std_err"])
+    boot_estimate = draw_matrix(complete, "cut_label", "estimate", labels)
+    boot_se = draw_matrix(complete, "cut_label", "std_err", labels)
+    observed, null_stats = studentized_stats(
+        np.array([effect.estimate for effect in effects]),
+        np.array([effect.std_err for effect in effects]),
+        boot_estimate,
+        boot_se,
+    )
+    return maxt_adjust(observed, null_stats, hypotheses=labels)
+
+
+def run_concat_engine(base_df: pd.DataFrame, n_reps: int, seed: int) -> tuple[pd.DataFrame, int]:
+    """Original engine: concatenate resampled cluster frames and refit each replicate."""
+
     clusters = base_df["cluster_id"].unique().tolist()
-    if not clusters:
-        raise RuntimeError("No cluster labels detected; cannot run clustered bootstrap.")
     cluster_frames = {cluster: base_df[base_df["cluster_id"] == cluster].copy() for cluster in clusters}
 
     rng = np.random.default_rng(seed)
@@ -235,16 +365,14 @@ def main(n_reps: int, seed: int) -> None:
 
     for rep in range(1, n_reps + 1):
         sample = sample_by_cluster(cluster_frames, rng)
-        sample_long, _ = build_long_format(sample)
-        sample_long, cut_cols, base_cut = add_cutpoint_dummies(sample_long)
         try:
-            result = fit_partial_model(sample_long, cut_cols)
-        except Exception:  # pragma: no cover - statsmodels failure path
+            result = fit_partial_model(sample)
+        except Exception:  # pragma: no cover - solver failure path
             failures += 1
             continue
 
         for cut, label in TARGET_CUTPOINTS.items():
-            boot = extract_threshold_effect(result, cut_cols, base_cut, cut, label)
+            boot = extract_threshold_effect(result, cut, label)
             boot_dict = boot.__dict__.copy()
             boot_dict.update(
                 {
@@ -255,17 +383,71 @@ def main(n_reps: int, seed: int) -> None:
             )
             draws.append(boot_dict)
 
-    draws_df = pd.DataFrame(draws)
+    return pd.DataFrame(draws), failures
+
+
+def main(
+    n_reps: int,
+    seed: int,
+    engine: str = "weights",
+    workers: int = 1,
+    results_path: Path | None = RESULTS_PATH,
+) -> None:
+    base_df = prepare_dataframe()
+    if base_df["cluster_id"].nunique() == 0:
+        raise RuntimeError("No cluster labels detected; cannot run clustered bootstrap.")
+
+    if engine == "concat":
+        draws_df, failures = run_concat_engine(base_df, n_reps, seed)
+    else:
+        draws_df, failures = run_weighted_engine(base_df, n_reps, seed, workers=workers)
     draws_df.to_csv(DRAWS_PATH, index=False)
 
     summary_df = summarize_draws(draws_df)
     summary_df["n_failures"] = failures
+    adjustment = stepdown_adjustment(base_df, draws_df).to_frame()
+    adjustment = adjustment.rename(columns={"hypothesis": "cut_label"})
+    adjustment["result_id"] = adjustment["cut_label"].map(RESULT_IDS)
+    summary_df = summary_df.merge(
+        adjustment[["cut_label", "result_id", "t_observed", "p_maxt", "p_stepdown"]],
+        on="cut_label",
+        how="left",
+    )
     summary_df.to_csv(SUMMARY_PATH, index=False)
 
+    if results_path is not None and results_path.exists():
+        missing = write_q_values(results_path, dict(zip(adjustment["result_id"], adjustment["p_stepdown"])))
+        if missing:
+            print(f"Result rows not found in {results_path}: {', '.join(missing)}")
+
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Clustered bootstrap for the H3 PPO estimator.")
     parser.add_argument("--n-reps", type=int, default=400, help="Number of bootstrap replicates (default: 400).")
     parser.add_argument("--seed", type=int, default=20251016, help="Random seed for numpy's default_rng.")
+    parser.add_argument(
+        "--engine",
+        choices=["weights", "concat"],
+        default="weights",
+        help="Cluster-count weights on a precomputed design (default) or concatenated resamples.",
+    )
+    parser.add_argument("--workers", type=int, default=1, help="Process-pool workers for the weights engine.")
+    parser.add_argument(
+        "--results-csv",
+        type=Path,
+        default=RESULTS_PATH,
+        help="Results table whose q_value column receives the step-down p-values (skipped if absent).",
+    )
+    parser.add_argument(
+        "--no-update-results",
+        action="store_true",
+        help="Add the step-down p-values to the summary without touching the results CSV.",
+    )
     args = parser.parse_args()
-    main(n_reps=args.n_reps, seed=args.seed)
+    main(
+        n_reps=args.n_reps,
+        seed=args.seed,
+        engine=args.engine,
+        workers=args.workers,
+        results_path=None if args.no_update_results else args.results_csv,
+    )
@@ -10,9 +10,10 @@ import matplotlib.pyplot as plt
 import numpy as np
 import pandas as pd
 import statsmodels.api as sm
-from statsmodels.miscmodels.ordinal_model import OrderedModel
 
 from likert_utils import align_likert, ensure_columns, get_likert_specs, zscore
+from ordinal_solver import CumulativeLinkModel
+from prediction_grid import PredictionGrid, class_religion_grid
 
 DATA_PATH = Path("childhoodbalancedpublic_original.csv")
 TABLES_DIR = Path("tables")
@@ -142,8 +143,8 @@ def fit_ordered_model(df: pd.DataFrame, predictors: list[str], terms: list[str])
         return []
     y = data["anxiety_ord3"].astype(int)
     X = data[predictors].astype(float)
-    model = OrderedModel(y, X, distr="logit")
-    result = model.fit(method="bfgs", disp=False, maxiter=500)
+    model = CumulativeLinkModel(y, X, distr="logit")
+    result = model.fit()
     threshold_terms = [idx for idx in result.params.index if idx.startswith("threshold") or "/" in idx]
     keep = [idx for idx in result.params.index if idx not in threshold_terms]
     params = result.params[keep]
@@ -194,34 +195,14 @@ def build_prediction_grid(
     if logit_result is None:
         return pd.DataFrame()
 
-    means = {}
-    for col in predictors:
-        if col in ("classchild", "classcurrent"):
-            continue
-        means[col] = logit_result.model.exog[:, logit_result.model.exog_names.index(col)].mean()
-
-    rows: list[dict[str, object]] = []
-    for rel_level, rel_label in RELIGION_LEVELS.items():
-        for class_value in class_values:
-            row = {col: 0.0 for col in predictors}
-            row["classchild"] = class_value
-            row["classcurrent"] = logit_result.model.exog[:, logit_result.model.exog_names.index("classcurrent")].mean()
-            row["classteen"] = means.get("classteen", 0.0)
-            row["selfage"] = means.get("selfage", 0.0)
-            row["gendermale"] = means.get("gendermale", 0.0)
-            row["education"] = means.get("education", 0.0)
-            for dummy_level, dummy_col in RELIGION_DUMMIES.items():
-                value = 1.0 if rel_level == dummy_level else 0.0
-                row[dummy_col] = value
-                row[f"{dummy_col}_classchild_int"] = value * class_value
-            rows.append({"classchild": class_value, "religion_level": rel_label, **row})
-
-    design = pd.DataFrame(rows)
-    X = sm.add_constant(design[predictors], has_constant="add")
-    linpred = np.dot(X, logit_result.params.loc[X.columns])
-    probs = 1 / (1 + np.exp(-linpred))
-    design["predicted_prob"] = probs
-    return design[["classchild", "religion_level", "predicted_prob"]]
+    exog = pd.DataFrame(logit_result.model.exog, columns=logit_result.model.exog_names)
+    base = {col: float(exog[col].mean()) for col in predictors if col != "classchild"}
+    grid = class_religion_grid(base, class_values, RELIGION_LEVELS, RELIGION_DUMMIES)
+    predictions = PredictionGrid(
+        grid, logit_result.params, logit_result.cov_params(), link="logit"
+    ).predictions()
+    predictions = predictions.rename(columns={"predicted": "predicted_prob"})
+    return predictions[["classchild", "religion_level", "predicted_prob", "ci_low", "ci_high"]]
 
 
 def plot_predictions(grid: pd.DataFrame) -> None:
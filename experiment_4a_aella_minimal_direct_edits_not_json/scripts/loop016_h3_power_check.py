@@ -1,5 +1,11 @@
 #!/usr/bin/env python3
-"""Loop 016: Effective sample size and power diagnostics for the H3 ≥$10M contrast."""
+"""Loop 016: Effective sample size and power diagnostics for the H3 ≥$10M contrast.
+
+``--simulate`` adds Monte Carlo power curves (``power_simulation``): a logit
+of the ≥$10M indicator (or an ordered logit of the net-worth ladder) on
+childhood class is fitted to the observed rows and used to simulate datasets
+over a grid of sample sizes, true slopes and design effects.
+"""
 
 from __future__ import annotations
 
@@ -9,7 +15,12 @@ import sys
 from pathlib import Path
 from typing import List, Tuple
 
+import numpy as np
 import pandas as pd
+import statsmodels.api as sm
+
+from ordinal_solver import CumulativeLinkModel
+from power_simulation import GeneratingModel, run_power_grid, scenario_grid
 
 DATA_PATH = Path("childhoodbalancedpublic_original.csv")
 THRESHOLD_PATH = Path("tables/loop010_h3_threshold_effects.csv")
@@ -18,6 +29,7 @@ BOOT_DRAWS_PATH = Path("tables/loop014_h3_bootstrap_draws.csv")
 SUMMARY_PATH = Path("tables/loop016_h3_power_summary.csv")
 CONFIRM_PATH = Path("tables/loop016_h3_confirmatory.csv")
 WEIGHTED_EFFECT_PATH = Path("tables/loop021_h3_weighted_effect.csv")
+POWER_CURVE_PATH = Path("tables/loop016_h3_power_curve.csv")
 
 COUNTRY_COL = "What country do you live in? (4bxk14u)"
 
@@ -59,9 +71,86 @@ def parse_args() -> argparse.Namespace:
             "loop021_h3_weighted_checks.py (or follow-on scripts)."
         ),
     )
+    parser.add_argument(
+        "--simulate",
+        action="store_true",
+        help=f"Estimate Monte Carlo power curves and write them to {POWER_CURVE_PATH}.",
+    )
+    parser.add_argument(
+        "--sim-model",
+        choices=["binary", "ordered"],
+        default="binary",
+        help="Generating model: logit of the ≥$10M tier or ordered logit of the full ladder.",
+    )
+    parser.add_argument(
+        "--sim-n",
+        nargs="+",
+        type=int,
+        help="Sample sizes to simulate (default: 1×, 2× and 3× the observed n).",
+    )
+    parser.add_argument(
+        "--sim-effects",
+        nargs="+",
+        type=float,
+        help="True childhood-class slopes in log-odds (default: the fitted slope).",
+    )
+    parser.add_argument(
+        "--sim-deffs",
+        nargs="+",
+        type=float,
+        help="Design effects applied to the Wald SE (default: 1 and the bootstrap design effect).",
+    )
+    parser.add_argument("--sim-reps", type=int, default=1000, help="Simulated datasets per scenario.")
+    parser.add_argument("--chunk-size", type=int, default=100, help="Datasets simulated and fitted per chunk.")
+    parser.add_argument("--workers", type=int, default=1, help="Process-pool workers for simulation chunks.")
+    parser.add_argument("--seed", type=int, default=20251016, help="Seed for the simulated datasets.")
+    parser.add_argument(
+        "--checkpoint",
+        type=Path,
+        default=None,
+        help=(
+            "Optional chunk-level checkpoint CSV (e.g. tables/loop016_h3_power_checkpoint.csv); "
+            "rerunning with the same settings resumes from it, other settings are rejected."
+        ),
+    )
     return parser.parse_args()
 
 
+def generating_model(df: pd.DataFrame, kind: str) -> GeneratingModel:
+    """Fit the childhood-class model that the simulated datasets are drawn from."""
+
+    exog = df[["classchild"]].to_numpy(dtype=float)
+    if kind == "ordered":
+        fit = CumulativeLinkModel(df["networth_ord"], exog).fit()
+        return GeneratingModel.from_cumulative_link(fit, exog, target=0)
+    y = (df["networth_ord"] >= 5).astype(float).to_numpy()
+    fit = sm.Logit(y, sm.add_constant(exog, has_constant="add")).fit(disp=0)
+    return GeneratingModel.from_logit(fit.params, exog, target=0)
+
+
+def simulate_power_curve(
+    df: pd.DataFrame, args: argparse.Namespace, design_effect: float
+) -> pd.DataFrame:
+    """Monte Carlo power over sample size, true slope and design effect."""
+
+    model = generating_model(df, args.sim_model)
+    n_total = int(df.shape[0])
+    ns = args.sim_n or [n_total, 2 * n_total, 3 * n_total]
+    effects = args.sim_effects or [float(model.beta[model.target])]
+    deffs = args.sim_deffs or [1.0, *([design_effect] if np.isfinite(design_effect) else [])]
+    curve = run_power_grid(
+        model,
+        scenario_grid(ns, effects, deffs),
+        n_sims=args.sim_reps,
+        seed=args.seed,
+        chunk_size=args.chunk_size,
+        workers=args.workers,
+        checkpoint=args.checkpoint,
+    )
+    curve.insert(1, "model", args.sim_model)
+    return curve
+
+
 def update_metric(
     summary: pd.DataFrame, metric_name: str, new_value: float
 ) -> None:
@@ -358,6 +447,25 @@ def main() -> None:
             weighted_path=args.weighted_effect_path,
         )
 
+    if args.simulate:
+        curve = simulate_power_curve(df, args, design_effect)
+        curve.to_csv(POWER_CURVE_PATH, index=False)
+        observed = curve[curve["n"] == n_total]
+        sim_rows = [
+            {
+                "section": "simulation",
+                "metric": f"Simulated power (DEFF={row.design_effect:g}, slope={row.effect:.3f})",
+                "value": row.power,
+                "units": "probability",
+                "notes": (
+                    f"{int(row.n_sims - row.n_failed)} simulated {args.sim_model} datasets at the "
+                    f"observed n; Monte Carlo SE {row.power_mc_se:.3f} ({POWER_CURVE_PATH})."
+                ),
+            }
+            for row in observed.itertuples()
+        ]
+        summary = pd.concat([summary, pd.DataFrame(sim_rows)], ignore_index=True)
+
     summary.to_csv(SUMMARY_PATH, index=False)
     pd.DataFrame([confirm_row]).to_csv(CONFIRM_PATH, index=False)
 
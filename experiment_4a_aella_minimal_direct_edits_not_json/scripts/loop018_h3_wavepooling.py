@@ -8,10 +8,16 @@ and/or oversampling the ≥$10M tier—to quantify how the analytic SE, effectiv
 sample size, and two-sided power would change if additional data became
 available. The exercise guides whether a confirmatory freeze is feasible once
 multiple waves ship or if targeted oversamples are required.
+
+Pooled waves and oversamples are represented as integer frequency weights on
+the observed rows, so each scenario fits the PPO design of the original n
+rather than an inflated copy. ``--blb-subsets`` adds a bag-of-little-bootstraps
+SE per scenario whose cost scales with the subset size, not n × multiplier.
 """
 
 from __future__ import annotations
 
+import argparse
 import math
 from dataclasses import dataclass
 from pathlib import Path
@@ -20,11 +26,9 @@ from typing import Iterable, List
 import numpy as np
 import pandas as pd
 
-from loop010_h3_partial_models import (
-    add_cutpoint_dummies,
-    build_long_format,
-    fit_partial_model,
-)
+from bootstrap_utils import blb_subset_weights
+from loop010_h3_partial_models import NON_PROP_TERMS, PROP_TERMS
+from ppo_model import PartialProportionalOddsModel, PPOResults
 
 TABLES_DIR = Path("tables")
 TABLES_DIR.mkdir(parents=True, exist_ok=True)
@@ -90,53 +94,46 @@ def prepare_dataframe(raw: pd.DataFrame) -> pd.DataFrame:
     return df.reset_index(drop=True)
 
 
-def replicate_waves(df: pd.DataFrame, multiplier: int) -> pd.DataFrame:
-    """Concatenate identical waves to simulate pooled survey releases."""
-
-    if multiplier <= 1:
-        return df.copy()
-    frames = []
-    for wave_id in range(multiplier):
-        tmp = df.copy()
-        tmp["wave_id_sim"] = wave_id + 1
-        frames.append(tmp)
-    return pd.concat(frames, ignore_index=True)
-
-
-def oversample_high_wealth(df: pd.DataFrame, factor: float) -> pd.DataFrame:
-    """Replicate ≥$10M observations to mimic targeted oversamples."""
+def scenario_frequency_weights(
+    df: pd.DataFrame, wave_multiplier: int, ge10m_multiplier: float
+) -> np.ndarray:
+    """Integer row weights for pooling ``wave_multiplier`` identical waves and
+    oversampling the ≥$10M tier ``ge10m_multiplier`` times.
 
-    if factor <= 1.0:
-        return df
-    mask = df["networth_ord"] >= CUTPOINT_TARGET
-    subset = df[mask]
-    if subset.empty:
-        return df
+    Equivalent to stacking the waves and then appending ≥$10M rows from the
+    stacked frame (whole copies, then the first rows for a fractional part).
+    """
 
-    frames = [df]
-    integer_part = int(math.floor(factor))
-    additional_full = max(integer_part - 1, 0)
-    for _ in range(additional_full):
-        frames.append(subset.copy())
+    wave_weight = max(int(wave_multiplier), 1)
+    weights = np.full(len(df), wave_weight, dtype=np.int64)
+    if ge10m_multiplier <= 1.0:
+        return weights
+    ge_rows = np.flatnonzero(df["networth_ord"].to_numpy() >= CUTPOINT_TARGET)
+    if ge_rows.size == 0:
+        return weights
 
-    remainder = factor - integer_part
+    integer_part = int(math.floor(ge10m_multiplier))
+    weights[ge_rows] += max(integer_part - 1, 0) * wave_weight
+    remainder = ge10m_multiplier - integer_part
     if remainder > 1e-9:
-        n_partial = max(1, int(round(remainder * len(subset))))
-        frames.append(subset.head(n_partial).copy())
-
-    return pd.concat(frames, ignore_index=True)
+        n_partial = max(1, int(round(remainder * ge_rows.size * wave_weight)))
+        # head() of the wave-stacked subset walks the ≥$10M rows wave by wave.
+        weights[ge_rows] += np.bincount(
+            np.arange(n_partial) % ge_rows.size, minlength=ge_rows.size
+        )
+    return weights
 
 
-def extract_cut_effect(
-    result,
+def cut_contrast(
+    param_names: Iterable[str],
     cut_cols: Iterable[str],
     base_cut: int,
     cutpoint: int = CUTPOINT_TARGET,
-) -> tuple[float, float]:
-    """Recover the classchild effect and SE at the requested cutpoint."""
+) -> np.ndarray:
+    """Contrast vector selecting the classchild effect at the requested cutpoint."""
 
-    param_index = {name: idx for idx, name in enumerate(result.params.index)}
-    vector = np.zeros(len(result.params))
+    param_index = {name: idx for idx, name in enumerate(param_names)}
+    vector = np.zeros(len(param_index))
     vector[param_index["classchild"]] = 1.0
     if cutpoint != base_cut:
         matching = None
@@ -158,13 +155,94 @@ def extract_cut_effect(
         if interaction not in param_index:
             raise KeyError(f"Missing interaction coefficient {interaction}")
         vector[param_index[interaction]] = 1.0
+    return vector
+
+
+def extract_cut_effect(
+    result,
+    cut_cols: Iterable[str],
+    base_cut: int,
+    cutpoint: int = CUTPOINT_TARGET,
+) -> tuple[float, float]:
+    """Recover the classchild effect and SE at the requested cutpoint."""
 
+    vector = cut_contrast(result.params.index, cut_cols, base_cut, cutpoint)
     test = result.t_test(vector)
     effect = float(np.atleast_1d(test.effect).squeeze())
     std_err = float(np.atleast_1d(test.sd).squeeze())
     return effect, std_err
 
 
+@dataclass(frozen=True)
+class PPODesign:
+    """PPO model of the observed rows, shared by every scenario."""
+
+    model: PartialProportionalOddsModel
+    contrast: np.ndarray
+
+
+def build_ppo_design(base_df: pd.DataFrame) -> PPODesign:
+    """Build the observed-row PPO model once and locate the ≥$10M contrast."""
+
+    model = PartialProportionalOddsModel(
+        base_df["networth_ord"], base_df, PROP_TERMS, NON_PROP_TERMS
+    )
+    return PPODesign(
+        model=model,
+        contrast=cut_contrast(model.param_names, model.cut_cols, model.base_cut, CUTPOINT_TARGET),
+    )
+
+
+def weighted_cut_effect(
+    design: PPODesign,
+    freq_weights: np.ndarray,
+    rows: np.ndarray | None = None,
+    start: np.ndarray | None = None,
+) -> tuple[float, float, PPOResults]:
+    """Fit the PPO logit under row frequency weights; return effect, SE and the fit."""
+
+    model = design.model if rows is None else design.model.take(rows)
+    fit = model.fit(freq_weights, start_params=start)
+    test = fit.t_test(design.contrast)
+    return test.effect, test.sd, fit
+
+
+def blb_standard_error(
+    design: PPODesign,
+    freq_weights: np.ndarray,
+    rng: np.random.Generator,
+    n_subsets: int,
+    n_resamples: int,
+    gamma: float,
+    start: np.ndarray,
+) -> tuple[float, int]:
+    """Bag-of-little-bootstraps SE of the ≥$10M effect for one weighted scenario.
+
+    Resamples whose fit fails or does not converge are dropped; returns the
+    SE and the number of dropped resamples.
+    """
+
+    subset_size = int(math.ceil(float(freq_weights.sum()) ** gamma))
+    subset_ses: list[float] = []
+    dropped = 0
+    for _ in range(n_subsets):
+        rows, resample_weights = blb_subset_weights(rng, freq_weights, subset_size, n_resamples)
+        estimates = []
+        for weights in resample_weights:
+            try:
+                effect, _, fit = weighted_cut_effect(design, weights, rows=rows, start=start)
+            except np.linalg.LinAlgError:
+                dropped += 1
+                continue
+            if not fit.converged:
+                dropped += 1
+                continue
+            estimates.append(effect)
+        if len(estimates) > 1:
+            subset_ses.append(float(np.std(estimates, ddof=1)))
+    return (float(np.mean(subset_ses)) if subset_ses else float("nan")), dropped
+
+
 @dataclass(frozen=True)
 class Scenario:
     """Configuration for a hypothetical sample expansion."""
@@ -209,25 +287,33 @@ SCENARIOS: List[Scenario] = [
 ]
 
 
-def main() -> None:
+def main(
+    blb_subsets: int = 0,
+    blb_resamples: int = 50,
+    blb_gamma: float = 0.7,
+    seed: int = 20251016,
+) -> None:
     design_effect = load_design_effect()
     raw = pd.read_csv("childhoodbalancedpublic_original.csv", low_memory=False)
     base_df = prepare_dataframe(raw)
+    design = build_ppo_design(base_df)
+    ge_rows = base_df["networth_ord"].to_numpy() >= CUTPOINT_TARGET
+    rng = np.random.default_rng(seed)
+    start = None
 
     rows: list[dict[str, object]] = []
     for scenario in SCENARIOS:
-        df_wave = replicate_waves(base_df, scenario.wave_multiplier)
-        df_wave = oversample_high_wealth(df_wave, scenario.ge10m_multiplier)
+        freq_weights = scenario_frequency_weights(
+            base_df, scenario.wave_multiplier, scenario.ge10m_multiplier
+        )
 
-        n_total = int(df_wave.shape[0])
-        ge_mask = df_wave["networth_ord"] >= CUTPOINT_TARGET
-        n_ge10m = int(ge_mask.sum())
+        n_total = int(freq_weights.sum())
+        n_ge10m = int(freq_weights[ge_rows].sum())
         share_ge10m = float(n_ge10m / n_total) if n_total else float("nan")
 
-        long_df, _ = build_long_format(df_wave)
-        long_df, cut_cols, base_cut = add_cutpoint_dummies(long_df)
-        result = fit_partial_model(long_df, cut_cols)
-        effect, se = extract_cut_effect(result, cut_cols, base_cut, CUTPOINT_TARGET)
+        effect, se, fit = weighted_cut_effect(design, freq_weights, start=start)
+        if start is None:
+            start = fit.params.to_numpy()
         analytic_z = effect / se if se else float("nan")
         analytic_power = two_sided_power(analytic_z)
 
@@ -236,6 +322,17 @@ def main() -> None:
         cluster_z = effect / cluster_se if cluster_se else float("nan")
         cluster_power = two_sided_power(cluster_z)
 
+        blb_columns: dict[str, object] = {}
+        if blb_subsets > 0:
+            blb_se, blb_dropped = blb_standard_error(
+                design, freq_weights, rng, blb_subsets, blb_resamples, blb_gamma, start
+            )
+            blb_columns = {
+                "blb_se": blb_se,
+                "blb_dropped_resamples": blb_dropped,
+                "blb_power": two_sided_power(effect / blb_se) if blb_se else float("nan"),
+            }
+
         rows.append(
             {
                 "scenario_id": scenario.scenario_id,
@@ -254,6 +351,7 @@ def main() -> None:
                 "cluster_se": cluster_se,
                 "cluster_z": cluster_z,
                 "cluster_power": cluster_power,
+                **blb_columns,
                 "notes": "Design effect held constant at the Loop 016 bootstrap estimate.",
             }
         )
@@ -263,4 +361,25 @@ def main() -> None:
 
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description="H3 ≥$10M precision under pooled/oversampled waves.")
+    parser.add_argument(
+        "--blb-subsets",
+        type=int,
+        default=0,
+        help="Bag-of-little-bootstraps subsets per scenario (0 disables the BLB SE).",
+    )
+    parser.add_argument("--blb-resamples", type=int, default=50, help="Resamples per BLB subset.")
+    parser.add_argument(
+        "--blb-gamma",
+        type=float,
+        default=0.7,
+        help="BLB subset size exponent: b = N^gamma of the weighted scenario size.",
+    )
+    parser.add_argument("--seed", type=int, default=20251016, help="Random seed for BLB draws.")
+    args = parser.parse_args()
+    main(
+        blb_subsets=args.blb_subsets,
+        blb_resamples=args.blb_resamples,
+        blb_gamma=args.blb_gamma,
+        seed=args.seed,
+    )
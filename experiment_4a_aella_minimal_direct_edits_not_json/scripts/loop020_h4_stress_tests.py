@@ -4,15 +4,16 @@
 from __future__ import annotations
 
 from pathlib import Path
-from typing import Dict, Iterable, List, Tuple
+from typing import Iterable, List, Tuple
 
 import numpy as np
 import pandas as pd
 import statsmodels.api as sm
 from scipy import stats
-from statsmodels.miscmodels.ordinal_model import OrderedModel, OrderedResults
 
 from likert_utils import align_likert, ensure_columns, get_likert_specs, zscore
+from ordinal_solver import CumulativeLinkModel, CumulativeLinkResults
+from prediction_grid import PredictionGrid, class_religion_grid
 
 DATA_PATH = Path("childhoodbalancedpublic_original.csv")
 TABLES_DIR = Path("tables")
@@ -197,7 +198,7 @@ def fit_ridge_logit(
     predictors: list[str],
     terms: list[str],
     alpha: float,
-) -> Tuple[list[dict[str, object]], pd.Series]:
+) -> Tuple[list[dict[str, object]], pd.Series, pd.DataFrame]:
     """Run an L2-penalized logistic regression to shrink wide coefficients."""
 
     data = df[["anxiety_high_flag", *predictors]].dropna()
@@ -216,7 +217,7 @@ def fit_ridge_logit(
         disp=False,
     )
     params = pd.Series(result.params, index=X.columns)
-    se, _ = ridge_standard_errors(X, params, alpha, pen_weight)
+    se, cov = ridge_standard_errors(X, params, alpha, pen_weight)
     z_scores = params / se
     pvalues = pd.Series(2 * (1 - stats.norm.cdf(np.abs(z_scores))), index=X.columns)
     ci_low = params - 1.96 * se
@@ -235,14 +236,14 @@ def fit_ridge_logit(
         n_obs=len(y),
         notes="Ridge penalty applied to shrink imprecise interactions",
     )
-    return rows, params
+    return rows, params, cov
 
 
 def fit_ordered_model(
     df: pd.DataFrame,
     predictors: list[str],
     terms: list[str],
-) -> Tuple[list[dict[str, object]], OrderedResults | None]:
+) -> Tuple[list[dict[str, object]], CumulativeLinkResults | None]:
     """Estimate the 3-bin ordinal anxiety specification with interactions."""
 
     data = df[["anxiety_ord3", *predictors]].dropna()
@@ -250,8 +251,8 @@ def fit_ordered_model(
         return [], None
     y = data["anxiety_ord3"].astype(int)
     X = data[predictors].astype(float)
-    model = OrderedModel(y, X, distr="logit")
-    result = model.fit(method="bfgs", disp=False, maxiter=500)
+    model = CumulativeLinkModel(y, X, distr="logit")
+    result = model.fit()
     threshold_terms = [idx for idx in result.params.index if idx.startswith("threshold") or "/" in idx]
     keep = [idx for idx in result.params.index if idx not in threshold_terms]
     params = result.params.loc[keep]
@@ -277,30 +278,20 @@ def build_logit_grid(
     predictors: list[str],
     df: pd.DataFrame,
     class_values: Iterable[float],
+    cov: pd.DataFrame | None = None,
 ) -> pd.DataFrame:
-    """Generate predicted high-anxiety probabilities for logistic models."""
+    """Generate predicted high-anxiety probabilities (with delta-method CIs when ``cov`` is given)."""
 
     means = df[predictors].mean(numeric_only=True).to_dict()
-    rows: list[dict[str, object]] = []
-    for rel_level, rel_label in RELIGION_LEVELS.items():
-        for class_value in class_values:
-            design: Dict[str, float] = {col: float(means.get(col, 0.0)) for col in predictors}
-            design["classchild"] = class_value
-            for level, dummy in RELIGION_DUMMIES.items():
-                value = 1.0 if rel_level == level else 0.0
-                design[dummy] = value
-                design[f"{dummy}_classchild_int"] = value * class_value
-            linear = params.get("const", 0.0)
-            linear += sum(params.get(col, 0.0) * val for col, val in design.items())
-            prob = 1.0 / (1.0 + np.exp(-linear))
-            rows.append(
-                {
-                    "classchild": class_value,
-                    "religion_level": rel_label,
-                    "predicted_prob": prob,
-                }
-            )
-    return pd.DataFrame(rows)
+    base = {col: float(means.get(col, 0.0)) for col in predictors}
+    grid = PredictionGrid(class_religion_grid(base, class_values, RELIGION_LEVELS, RELIGION_DUMMIES), params, cov, link="logit")
+    columns = ["classchild", "religion_level", "predicted_prob"]
+    if cov is None:
+        frame = grid.grid.assign(predicted_prob=grid.point_predictions())
+    else:
+        frame = grid.predictions().rename(columns={"predicted": "predicted_prob"})
+        columns += ["ci_low", "ci_high"]
+    return frame[columns]
 
 
 def summarize_probability_deltas(grid: pd.DataFrame, value_col: str) -> pd.DataFrame:
@@ -322,34 +313,33 @@ def summarize_probability_deltas(grid: pd.DataFrame, value_col: str) -> pd.DataF
 
 
 def build_ordinal_grid(
-    result: OrderedResults,
+    result: CumulativeLinkResults,
     df: pd.DataFrame,
     predictors: list[str],
     class_values: Iterable[float],
 ) -> pd.DataFrame:
-    """Generate predictions for the highest anxiety bin under the ordinal model."""
+    """Generate predictions for the highest anxiety bin under the ordinal model.
+
+    P(top bin) = expit(x'beta - alpha_top) is a logit in the natural parameters
+    (slopes and the top cutpoint), so the grid predicts it with a ``-1`` column
+    for the cutpoint and the covariance mapped from OrderedModel's layout.
+    """
+
+    model = result.model
+    beta, cutpoints = model.to_natural(result.params.to_numpy())
+    to_natural = np.linalg.inv(model.transform_jacobian(cutpoints))
+    cov_natural = to_natural @ result.cov_params().to_numpy() @ to_natural.T
+    keep = [*range(model.k_vars), len(result.params) - 1]
+    names = [*model.exog_columns, "top_cutpoint"]
+    params = pd.Series(np.append(beta, cutpoints[-1]), index=names)
+    cov = pd.DataFrame(cov_natural[np.ix_(keep, keep)], index=names, columns=names)
 
     means = df[predictors].mean(numeric_only=True).to_dict()
-    rows: list[dict[str, object]] = []
-    design_rows: list[dict[str, float]] = []
-    for rel_level, rel_label in RELIGION_LEVELS.items():
-        for class_value in class_values:
-            design: Dict[str, float] = {col: float(means.get(col, 0.0)) for col in predictors}
-            design["classchild"] = class_value
-            for level, dummy in RELIGION_DUMMIES.items():
-                value = 1.0 if rel_level == level else 0.0
-                design[dummy] = value
-                design[f"{dummy}_classchild_int"] = value * class_value
-            rows.append({"classchild": class_value, "religion_level": rel_label})
-            design_rows.append(design)
-    design_df = pd.DataFrame(design_rows, columns=predictors).astype(float)
-    probs = result.model.predict(result.params, exog=design_df, which="prob")
-    if probs.ndim != 2:
-        raise RuntimeError("Unexpected ordinal prediction output shape")
-    top_probs = probs[:, -1]
-    grid = pd.DataFrame(rows)
-    grid["predicted_prob_top"] = top_probs
-    return grid
+    base = {col: float(means.get(col, 0.0)) for col in predictors}
+    base["top_cutpoint"] = -1.0
+    grid = PredictionGrid(class_religion_grid(base, class_values, RELIGION_LEVELS, RELIGION_DUMMIES), params, cov, link="logit")
+    frame = grid.predictions().rename(columns={"predicted": "predicted_prob_top"})
+    return frame[["classchild", "religion_level", "predicted_prob_top", "ci_low", "ci_high"]]
 
 
 def main() -> None:
@@ -368,14 +358,16 @@ def main() -> None:
     logit_rows, logit_result = fit_logit_model(df, predictors, report_terms)
     rows.extend(logit_rows)
     if logit_result is not None:
-        logit_grid = build_logit_grid(logit_result.params, predictors, df, CLASS_GRID)
+        logit_grid = build_logit_grid(
+            logit_result.params, predictors, df, CLASS_GRID, logit_result.cov_params()
+        )
         logit_grid.to_csv(LOGIT_GRID_OUTPUT, index=False)
         summarize_probability_deltas(logit_grid, "predicted_prob").to_csv(LOGIT_DELTA_OUTPUT, index=False)
 
-    ridge_rows, ridge_params = fit_ridge_logit(df, predictors, report_terms, RIDGE_ALPHA)
+    ridge_rows, ridge_params, ridge_cov = fit_ridge_logit(df, predictors, report_terms, RIDGE_ALPHA)
     rows.extend(ridge_rows)
     if ridge_rows:
-        ridge_grid = build_logit_grid(ridge_params, predictors, df, CLASS_GRID)
+        ridge_grid = build_logit_grid(ridge_params, predictors, df, CLASS_GRID, ridge_cov)
         ridge_grid.to_csv(RIDGE_GRID_OUTPUT, index=False)
         summarize_probability_deltas(ridge_grid, "predicted_prob").to_csv(RIDGE_DELTA_OUTPUT, index=False)
 
@@ -5,8 +5,9 @@ The script plays two roles:
 1. Audit the DG-4827 delivery described in the Markdown manifest by computing
    file checksums/sizes and writing a reproducible status table.
 2. When all required pieces (PSU IDs, base weights, and BRR replicates) exist,
-   merge them with the H3 analytic variables so downstream scripts (e.g.,
-   `loop016_h3_power_check.py --use-weights`) can recompute design effects.
+   merge them with the H3 analytic variables and estimate the weighted
+   ≥$10M threshold effect with a Taylor-linearized (PSU/stratum) SE, which
+   `loop016_h3_power_check.py --use-weights` reads as its override.
 
 Run with `PYTHONHASHSEED=20251016 python scripts/loop021_h3_weighted_checks.py
 --manifest docs/h3_replicate_weights_manifest/manifest_loop021.md`.
@@ -21,7 +22,12 @@ from dataclasses import dataclass
 from pathlib import Path
 from typing import Dict, Iterable, List, Tuple
 
+import numpy as np
 import pandas as pd
+import statsmodels.api as sm
+from scipy import stats
+
+from linearization import logit_terms, sandwich_cov
 
 DATA_PATH = Path("childhoodbalancedpublic_original.csv")
 STATUS_OUTPUT = Path("tables/loop021_h3_weight_delivery_status.csv")
@@ -33,6 +39,8 @@ PANEL_OUTPUT = Path("outputs/loop021_h3_weighted_panel.parquet")
 NETWORTH_COL = "networth"
 CLASSCHILD_COL = "classchild"
 COUNTRY_COL = "What country do you live in? (4bxk14u)"
+# networth_ord >= 5 is the ≥$10M tier used by loop016's threshold effect.
+THRESHOLD_CUT = 5
 
 
 @dataclass
@@ -290,6 +298,47 @@ def write_summary(
     pd.DataFrame(rows).to_csv(destination, index=False)
 
 
+def weighted_threshold_effect(panel: pd.DataFrame) -> Dict[str, object]:
+    """Weighted logit of the ≥$10M tier on childhood class with a linearized SE.
+
+    The design effect compares the linearized variance with the unweighted,
+    model-based (SRS) variance of the same slope.
+    """
+
+    design_cols = [NETWORTH_COL, CLASSCHILD_COL, "weight", "psu_id"]
+    data = panel.dropna(subset=design_cols)
+    y = (data[NETWORTH_COL].astype(int) >= THRESHOLD_CUT).astype(float).to_numpy()
+    X = sm.add_constant(data[[CLASSCHILD_COL]].astype(float)).to_numpy()
+    w = data["weight"].to_numpy(dtype=float)
+    weighted = sm.GLM(y, X, family=sm.families.Binomial(), var_weights=w).fit()
+    scores, bread = logit_terms(X, y, weighted.params, w)
+    strata = data["stratum_id"].to_numpy() if "stratum_id" in data.columns else None
+    cov = sandwich_cov(bread, scores, data["psu_id"].to_numpy(), strata)
+    srs = sm.Logit(y, X).fit(disp=0)
+    estimate = float(weighted.params[1])
+    se = float(np.sqrt(cov[1, 1]))
+    design_effect = float(cov[1, 1] / np.asarray(srs.cov_params())[1, 1])
+    q = float(stats.norm.ppf(0.975))
+    return {
+        "estimate_log_odds": estimate,
+        "analytic_se": se,
+        "analytic_ci_low": estimate - q * se,
+        "analytic_ci_high": estimate + q * se,
+        "design_effect": design_effect,
+        "effective_n": float(len(data) / design_effect),
+        "power_srs": float(
+            stats.norm.sf(q - abs(estimate) / se) + stats.norm.cdf(-q - abs(estimate) / se)
+        ),
+        "n": int(len(data)),
+        "n_psu": int(data["psu_id"].nunique()),
+        "notes": (
+            "Weighted logit for networth_ord >= 5 on classchild; SE from Taylor "
+            "linearization over PSUs"
+            + (" within strata." if strata is not None else ".")
+        ),
+    }
+
+
 def main() -> int:
     args = parse_args()
     manifest_rows = parse_manifest(args.manifest)
@@ -380,22 +429,8 @@ def main() -> int:
         weight_stats=weight_stats,
     )
 
-    # Placeholder: once replicate SE calculations are finalized, populate the
-    # weighted effect override table consumed by loop016.
     ensure_parent(args.effect_output)
-    pd.DataFrame(
-        [
-            {
-                "status": "todo",
-                "notes": (
-                    "Weighted effect calculations not yet implemented. "
-                    "Use outputs/loop021_h3_weighted_panel.parquet to compute "
-                    "replicate-based SEs before rerunning loop016 with "
-                    "--use-weights."
-                ),
-            }
-        ]
-    ).to_csv(args.effect_output, index=False)
+    pd.DataFrame([weighted_threshold_effect(panel)]).to_csv(args.effect_output, index=False)
     return 0
 
 
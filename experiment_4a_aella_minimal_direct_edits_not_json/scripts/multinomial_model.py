@@ -0,0 +1,304 @@
+#!/usr/bin/env python3
+"""Multinomial logit fitted by Newton steps on a sparse design.
+
+Replaces ``sm.MNLogit(...).fit()`` plus ``get_margeff(at="overall")`` for the
+H3 benchmark. The design is held as a CSR matrix built column by column from
+the frame (sparse pandas columns contribute only their stored entries) or
+passed in directly, and it is never densified, so dummy-coded controls cost
+only their non-zero entries. The Hessian is assembled block by block: with
+``J`` non-base outcomes, block ``(j, l)`` is
+``-X' diag(w * p_j * (1[j = l] - p_l)) X``, and only the upper triangle of
+blocks is computed. Average marginal effects for every outcome and predictor
+and their analytic delta-method Jacobian are accumulated over row blocks, so
+their working memory is bounded by the block size rather than n.
+
+Parameters follow MNLogit's layout: one column per non-base outcome, labelled
+``0 .. J-1``, with the lowest outcome level as the base.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Sequence
+
+import numpy as np
+import pandas as pd
+from scipy import sparse, special, stats
+
+
+@dataclass
+class MultinomialResults:
+    """Fitted multinomial logit with the MNLogitResults attributes the scripts read."""
+
+    model: "SparseMultinomialLogit"
+    params: pd.DataFrame
+    cov: np.ndarray
+    llf: float
+    llnull: float
+    converged: bool
+    iterations: int
+    hessian: np.ndarray
+
+    def cov_params(self) -> np.ndarray:
+        return self.cov
+
+    @property
+    def nobs(self) -> float:
+        return float(self.model.weights.sum())
+
+    @property
+    def bse(self) -> pd.DataFrame:
+        se = np.sqrt(np.clip(np.diag(self.cov), 0.0, None))
+        return pd.DataFrame(
+            se.reshape(self.params.shape[1], -1).T,
+            index=self.params.index,
+            columns=self.params.columns,
+        )
+
+    @property
+    def tvalues(self) -> pd.DataFrame:
+        return self.params / self.bse
+
+    @property
+    def pvalues(self) -> pd.DataFrame:
+        return pd.DataFrame(
+            2 * stats.norm.sf(np.abs(self.tvalues.to_numpy())),
+            index=self.params.index,
+            columns=self.params.columns,
+        )
+
+    @property
+    def df_model(self) -> int:
+        return int(self.model.n_outcomes - 1) * (self.model.rank - 1)
+
+    @property
+    def aic(self) -> float:
+        return -2 * self.llf + 2 * self.params.size
+
+    @property
+    def bic(self) -> float:
+        return -2 * self.llf + np.log(self.nobs) * self.params.size
+
+    @property
+    def prsquared(self) -> float:
+        return 1 - self.llf / self.llnull
+
+    def fit_statistics(self, n_individuals: int) -> pd.DataFrame:
+        """Metric/value rows in the layout ``build_comparison_table`` reads."""
+
+        return pd.DataFrame(
+            [
+                {"metric": "n_individuals", "value": int(n_individuals)},
+                {"metric": "log_likelihood", "value": float(self.llf)},
+                {"metric": "aic", "value": float(self.aic)},
+                {"metric": "bic", "value": float(self.bic)},
+                {"metric": "pseudo_r2_mcfadden", "value": float(self.prsquared)},
+                {"metric": "df_model", "value": int(self.df_model)},
+            ]
+        )
+
+    def marginal_effects(self, alpha: float = 0.05) -> pd.DataFrame:
+        """Average dP(y = k)/dx for every outcome level and non-constant term."""
+
+        ame, jacobian = self.model.average_marginal_effects(self.params.to_numpy())
+        k_levels, k_terms = ame.shape
+        flat_jac = jacobian.reshape(k_levels * k_terms, -1)
+        se = np.sqrt(np.clip(np.einsum("ap,pq,aq->a", flat_jac, self.cov, flat_jac), 0.0, None))
+        estimate = ame.ravel()
+        z_value = estimate / se
+        q = stats.norm.ppf(1 - alpha / 2)
+        terms = self.model.slope_names
+        return pd.DataFrame(
+            {
+                "outcome_level": np.repeat(self.model.levels, k_terms),
+                "term": np.tile(terms, k_levels),
+                "dy_dx": estimate,
+                "std_err": se,
+                "z_value": z_value,
+                "p_value": 2 * stats.norm.sf(np.abs(z_value)),
+                "ci_low": estimate - q * se,
+                "ci_high": estimate + q * se,
+            }
+        )
+
+
+def frame_to_csr(frame: pd.DataFrame) -> sparse.csr_matrix:
+    """CSR design from a frame, one column at a time.
+
+    Sparse columns with a zero fill value are copied from their stored
+    entries; dense columns keep their non-zero values.
+    """
+
+    rows, cols, values = [], [], []
+    for position, (_, column) in enumerate(frame.items()):
+        array = column.array
+        if isinstance(column.dtype, pd.SparseDtype) and array.fill_value == 0:
+            index = np.asarray(array.sp_index.indices)
+            data = np.asarray(array.sp_values, dtype=float)
+        else:
+            data = column.to_numpy(dtype=float)
+            index = np.flatnonzero(data)
+            data = data[index]
+        rows.append(index)
+        cols.append(np.full(index.size, position))
+        values.append(data)
+    return sparse.csr_matrix(
+        (np.concatenate(values), (np.concatenate(rows), np.concatenate(cols))), shape=frame.shape
+    )
+
+
+class SparseMultinomialLogit:
+    """Multinomial logit P(y = k | x) proportional to exp(x'beta_k), beta_base = 0.
+
+    ``exog`` is a frame (dense or sparse columns) or a scipy sparse matrix
+    with its column names in ``exog_names``.
+    """
+
+    def __init__(
+        self,
+        endog: pd.Series | np.ndarray,
+        exog: pd.DataFrame | sparse.spmatrix,
+        weights: np.ndarray | None = None,
+        exog_names: Sequence[str] | None = None,
+    ) -> None:
+        values = np.asarray(endog)
+        self.levels, self.endog_code = np.unique(values, return_inverse=True)
+        self.n_outcomes = int(self.levels.size)
+        if self.n_outcomes < 2:
+            raise ValueError("Multinomial outcome needs at least two observed levels.")
+        if sparse.issparse(exog):
+            if exog_names is None:
+                raise ValueError("exog_names are required for a sparse matrix design.")
+            self.exog = sparse.csr_matrix(exog, dtype=float)
+            self.exog_names = [str(name) for name in exog_names]
+        else:
+            self.exog = frame_to_csr(exog)
+            self.exog_names = [str(col) for col in exog.columns]
+        lo = self.exog.min(axis=0).toarray().ravel()
+        hi = self.exog.max(axis=0).toarray().ravel()
+        self.const_mask = lo == hi
+        self.slope_names = [name for name, const in zip(self.exog_names, self.const_mask) if not const]
+        # rank(X) = rank(X'X), which stays k_exog x k_exog.
+        self.rank = int(np.linalg.matrix_rank((self.exog.T @ self.exog).toarray(), hermitian=True))
+        self.weights = np.ones(len(values)) if weights is None else np.asarray(weights, dtype=float)
+        self.indicator = np.eye(self.n_outcomes)[self.endog_code]
+
+    @property
+    def k_exog(self) -> int:
+        return self.exog.shape[1]
+
+    def probabilities(self, params: np.ndarray, exog: sparse.csr_matrix | None = None) -> np.ndarray:
+        """(n, K) outcome probabilities for params shaped (k_exog, K - 1)."""
+
+        eta = np.asarray((self.exog if exog is None else exog) @ params)
+        full = np.column_stack([np.zeros(eta.shape[0]), eta])
+        return special.softmax(full, axis=1)
+
+    def predict(self, params: np.ndarray) -> np.ndarray:
+        return self.probabilities(np.asarray(params, dtype=float))
+
+    def loglike_null(self) -> float:
+        counts = np.bincount(self.endog_code, weights=self.weights, minlength=self.n_outcomes)
+        share = counts[counts > 0] / counts.sum()
+        return float(counts[counts > 0] @ np.log(share))
+
+    def _derivatives(self, params: np.ndarray) -> tuple[float, np.ndarray, np.ndarray]:
+        probs = self.probabilities(params)
+        w = self.weights
+        llf = float(w @ np.log(np.clip(probs[np.arange(len(w)), self.endog_code], 1e-300, None)))
+        resid = (self.indicator - probs)[:, 1:] * w[:, None]
+        score = np.asarray(self.exog.T @ resid).T.ravel()
+        n_free = self.n_outcomes - 1
+        k = self.k_exog
+        hessian = np.empty((n_free * k, n_free * k))
+        for j in range(n_free):
+            for l in range(j, n_free):
+                curvature = w * probs[:, j + 1] * ((j == l) - probs[:, l + 1])
+                block = -(self.exog.T @ self.exog.multiply(curvature[:, None])).toarray()
+                hessian[j * k : (j + 1) * k, l * k : (l + 1) * k] = block
+                hessian[l * k : (l + 1) * k, j * k : (j + 1) * k] = block.T
+        return llf, score, hessian
+
+    def fit(
+        self,
+        start_params: np.ndarray | None = None,
+        maxiter: int = 300,
+        tol: float = 1e-8,
+    ) -> MultinomialResults:
+        """Newton-Raphson with step halving on the stacked (outcome-major) parameters."""
+
+        n_free = self.n_outcomes - 1
+        if start_params is None:
+            flat = np.zeros(self.k_exog * n_free)
+        else:
+            flat = np.asarray(start_params, dtype=float).T.ravel()
+
+        def unflatten(vec: np.ndarray) -> np.ndarray:
+            return vec.reshape(n_free, self.k_exog).T
+
+        llf, score, hessian = self._derivatives(unflatten(flat))
+        converged = False
+        iterations = 0
+        for iterations in range(1, maxiter + 1):
+            step = np.linalg.solve(-hessian, score)
+            scale = 1.0
+            while scale > 1e-10:
+                cand_llf, cand_score, cand_hessian = self._derivatives(unflatten(flat + scale * step))
+                if cand_llf >= llf - 1e-12 * abs(llf):
+                    break
+                scale *= 0.5
+            else:
+                break
+            flat = flat + scale * step
+            llf, score, hessian = cand_llf, cand_score, cand_hessian
+            if np.max(np.abs(scale * step)) < tol:
+                converged = True
+                break
+        return MultinomialResults(
+            model=self,
+            params=pd.DataFrame(unflatten(flat), index=self.exog_names, columns=range(n_free)),
+            cov=np.linalg.inv(-hessian),
+            llf=llf,
+            llnull=self.loglike_null(),
+            converged=converged,
+            iterations=iterations,
+            hessian=hessian,
+        )
+
+    def average_marginal_effects(
+        self, params: np.ndarray, block_rows: int = 4096
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """AMEs (K, m) over non-constant terms and their Jacobian (K, m, k_exog * (K - 1)).
+
+        With ``D_km = beta_km - sum_l p_l beta_lm`` the row effect is
+        ``p_k D_km``; the Jacobian's columns follow the outcome-major order of
+        ``cov_params()``. Sums run over blocks of ``block_rows`` rows.
+        """
+
+        params = np.asarray(params, dtype=float)
+        weights = self.weights / self.weights.sum()
+        beta = np.column_stack([np.zeros(self.k_exog), params]).T  # (K, k_exog)
+        slopes = np.flatnonzero(~self.const_mask)
+        n_free = self.n_outcomes - 1
+        ame = np.zeros((self.n_outcomes, slopes.size))
+        jac = np.zeros((self.n_outcomes, slopes.size, n_free, self.k_exog))
+        own = np.zeros((self.n_outcomes, n_free))
+        basis = np.eye(self.n_outcomes)[None, :, 1:]
+        for start in range(0, self.exog.shape[0], block_rows):
+            block = self.exog[start : start + block_rows]
+            w = weights[start : start + block_rows]
+            probs = self.probabilities(params, block)
+            spread = (beta[None, :, :] - (probs @ beta)[:, None, :])[:, :, slopes]  # (b, K, m)
+            ame += np.einsum("i,ik,ikm->km", w, probs, spread)
+
+            x = block.toarray()
+            free = probs[:, 1:]
+            # dp_k/d eta_j = p_k (1[k = j] - p_j) for the free outcomes j.
+            dprob = probs[:, :, None] * (basis - free[:, None, :])
+            jac += np.einsum("i,ikj,ikm,ir->kmjr", w, dprob, spread, x, optimize=True)
+            jac -= np.einsum("i,ik,ij,ijm,ir->kmjr", w, probs, free, spread[:, 1:], x, optimize=True)
+            own += np.einsum("i,ikj->kj", w, dprob)
+        for pos, col in enumerate(slopes):
+            jac[:, pos, :, col] += own
+        return ame, jac.reshape(self.n_outcomes, slopes.size, -1)
+
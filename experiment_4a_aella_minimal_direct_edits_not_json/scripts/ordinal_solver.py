@@ -0,0 +1,399 @@
+#!/usr/bin/env python3
+"""Cumulative-link (ordered logit/probit) solver with analytic derivatives.
+
+Replaces ``OrderedModel(...).fit(method="bfgs")`` for the PAP ordinal models.
+The log-likelihood is concave in the natural parameters (slopes and ordered
+cutpoints), so Newton steps with the analytic Hessian converge in a handful of
+iterations. Frequency or probability weights are supported, and
+``freq_weights`` lets each row stand for several identical respondents (see
+``pattern_compression``).
+
+Fitted parameters are reported in OrderedModel's layout (slopes, then the first
+threshold and the log increments of the remaining thresholds) under the same
+names, so ``params``, ``cov_params()``, ``llf``, ``nobs`` and
+``model.predict(params, exog, which="prob")`` can be used by code written
+against ``OrderedResults``.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Any, Sequence
+
+import numpy as np
+import pandas as pd
+from scipy import special, stats
+
+DISTRIBUTIONS = ("logit", "probit")
+WEIGHT_TYPES = ("freq", "prob")
+COV_TYPES = ("nonrobust", "HC0", "HC1")
+
+
+def _cdf_pdf_dpdf(distr: str, z: np.ndarray) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """CDF, density and density derivative at ``z`` (infinite ``z`` is allowed)."""
+
+    if distr == "logit":
+        cdf = special.expit(z)
+        pdf = cdf * (1.0 - cdf)
+        dpdf = pdf * (1.0 - 2.0 * cdf)
+    else:
+        cdf = special.ndtr(z)
+        pdf = np.exp(-0.5 * np.square(np.where(np.isfinite(z), z, 0.0))) / np.sqrt(2 * np.pi)
+        pdf = np.where(np.isfinite(z), pdf, 0.0)
+        dpdf = -np.where(np.isfinite(z), z, 0.0) * pdf
+    return cdf, pdf, dpdf
+
+
+def _ppf(distr: str, p: np.ndarray) -> np.ndarray:
+    return special.logit(p) if distr == "logit" else special.ndtri(p)
+
+
+class CumulativeLinkModel:
+    """Ordered-response model P(y <= k | x) = F(alpha_k - x'beta)."""
+
+    def __init__(
+        self,
+        endog: Any,
+        exog: Any,
+        distr: str = "logit",
+        weights: Any = None,
+        weight_type: str = "freq",
+        freq_weights: Any = None,
+    ) -> None:
+        if distr not in DISTRIBUTIONS:
+            raise ValueError(f"Unsupported distribution '{distr}'; choose from {DISTRIBUTIONS}.")
+        if weight_type not in WEIGHT_TYPES:
+            raise ValueError(f"Unsupported weight type '{weight_type}'; choose from {WEIGHT_TYPES}.")
+        self.distr = distr
+        self.weight_type = weight_type
+
+        if isinstance(endog, pd.Series) and isinstance(endog.dtype, pd.CategoricalDtype):
+            labels = list(endog.cat.categories)
+            codes = endog.cat.codes.to_numpy()
+            if (codes < 0).any():
+                raise ValueError("missing values in categorical endog are not supported")
+        else:
+            values = np.asarray(endog)
+            if values.dtype.kind == "f" and np.isnan(values).any():
+                raise ValueError("NaN in dependent variable detected. Missing values need to be removed.")
+            labels, codes = np.unique(values, return_inverse=True)
+            labels = list(labels)
+        self.labels = labels
+        self.endog = np.asarray(codes, dtype=np.int64)
+        self.k_levels = len(labels)
+        if self.k_levels < 2:
+            raise ValueError("Ordered outcome needs at least two observed levels.")
+
+        if isinstance(exog, pd.DataFrame):
+            self.exog_columns = [str(col) for col in exog.columns]
+            self.row_index = exog.index
+        else:
+            exog = np.asarray(exog, dtype=float)
+            if exog.ndim == 1:
+                exog = exog[:, None]
+            self.exog_columns = [f"x{idx + 1}" for idx in range(exog.shape[1])]
+            self.row_index = None
+        self.exog = np.asarray(exog, dtype=float)
+        n_rows, self.k_vars = self.exog.shape
+        constant = np.ptp(self.exog, axis=0) == 0 if n_rows else np.zeros(self.k_vars, dtype=bool)
+        if np.any(constant & np.any(self.exog != 0, axis=0)):
+            raise ValueError("There should not be a constant in the model")
+        threshold_names = [f"{lo}/{hi}" for lo, hi in zip(labels[:-1], labels[1:])]
+        self.exog_names = [*self.exog_columns, *threshold_names]
+        self.k_extra = self.k_levels - 1
+
+        self.weights = self._row_weights(weights, n_rows, "weights")
+        self.freq_weights = self._row_weights(freq_weights, n_rows, "freq_weights")
+        # Rows the fit represents: repeated rows count once per repetition.
+        row_counts = self.freq_weights * (self.weights if self.weight_type == "freq" else 1.0)
+        self.nobs = int(round(row_counts.sum()))
+        self.fit_weights = self.freq_weights * self.weights
+        self.prob_weighted = weights is not None and weight_type == "prob"
+        self.df_model = self.k_vars
+        self.df_resid = self.nobs - (self.k_vars + self.k_extra)
+
+    @staticmethod
+    def _row_weights(values: Any, n_rows: int, name: str) -> np.ndarray:
+        if values is None:
+            return np.ones(n_rows)
+        values = np.asarray(values, dtype=float)
+        if values.shape != (n_rows,) or np.any(values < 0):
+            raise ValueError(f"{name} must be a non-negative vector with one entry per row.")
+        return values
+
+    # -- parameter transforms -------------------------------------------------
+
+    def to_natural(self, params: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        """Split OrderedModel-style params into slopes and increasing cutpoints."""
+
+        params = np.asarray(params, dtype=float)
+        beta = params[: self.k_vars]
+        raw = params[self.k_vars :]
+        cutpoints = np.cumsum(np.concatenate([raw[:1], np.exp(raw[1:])]))
+        return beta, cutpoints
+
+    def from_natural(self, beta: np.ndarray, cutpoints: np.ndarray) -> np.ndarray:
+        return np.concatenate([beta, cutpoints[:1], np.log(np.diff(cutpoints))])
+
+    def transform_jacobian(self, cutpoints: np.ndarray) -> np.ndarray:
+        """d(OrderedModel params) / d(natural params)."""
+
+        q = self.k_vars + self.k_extra
+        jac = np.eye(q)
+        gaps = np.diff(cutpoints)
+        for j in range(1, self.k_extra):
+            row = self.k_vars + j
+            jac[row, row] = 1.0 / gaps[j - 1]
+            jac[row, row - 1] = -1.0 / gaps[j - 1]
+        return jac
+
+    # -- likelihood -----------------------------------------------------------
+
+    def _bounds(self, beta: np.ndarray, cutpoints: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        padded = np.concatenate([[-np.inf], cutpoints, [np.inf]])
+        eta = self.exog @ beta
+        upper = padded[self.endog + 1] - eta
+        lower = padded[self.endog] - eta
+        return upper, lower
+
+    def loglikeobs_natural(self, beta: np.ndarray, cutpoints: np.ndarray) -> np.ndarray:
+        upper, lower = self._bounds(beta, cutpoints)
+        cdf_u, _, _ = _cdf_pdf_dpdf(self.distr, upper)
+        cdf_l, _, _ = _cdf_pdf_dpdf(self.distr, lower)
+        prob = cdf_u - cdf_l
+        return np.log(np.clip(prob, 1e-300, None))
+
+    def loglike_natural(self, beta: np.ndarray, cutpoints: np.ndarray) -> float:
+        return float(self.fit_weights @ self.loglikeobs_natural(beta, cutpoints))
+
+    def loglike(self, params: np.ndarray) -> float:
+        return self.loglike_natural(*self.to_natural(params))
+
+    def score_hessian_natural(
+        self, beta: np.ndarray, cutpoints: np.ndarray
+    ) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Per-observation scores, weighted score and Hessian in natural params."""
+
+        upper, lower = self._bounds(beta, cutpoints)
+        cdf_u, pdf_u, dpdf_u = _cdf_pdf_dpdf(self.distr, upper)
+        cdf_l, pdf_l, dpdf_l = _cdf_pdf_dpdf(self.distr, lower)
+        prob = np.clip(cdf_u - cdf_l, 1e-300, None)
+
+        # d(upper)/d(theta) and d(lower)/d(theta): -x for slopes, unit vectors for cutpoints.
+        q = self.k_vars + self.k_extra
+        n_rows = self.exog.shape[0]
+        a = np.zeros((n_rows, q))
+        b = np.zeros((n_rows, q))
+        a[:, : self.k_vars] = -self.exog
+        b[:, : self.k_vars] = -self.exog
+        rows = np.arange(n_rows)
+        has_upper = self.endog < self.k_levels - 1
+        has_lower = self.endog > 0
+        a[rows[has_upper], self.k_vars + self.endog[has_upper]] = 1.0
+        b[rows[has_lower], self.k_vars + self.endog[has_lower] - 1] = 1.0
+
+        score_obs = (pdf_u / prob)[:, None] * a - (pdf_l / prob)[:, None] * b
+        w = self.fit_weights
+        hessian = (
+            (a * (w * dpdf_u / prob)[:, None]).T @ a
+            - (b * (w * dpdf_l / prob)[:, None]).T @ b
+            - (score_obs * w[:, None]).T @ score_obs
+        )
+        return score_obs, w @ score_obs, hessian
+
+    def start_natural(self) -> tuple[np.ndarray, np.ndarray]:
+        counts = np.bincount(self.endog, weights=self.fit_weights, minlength=self.k_levels)
+        cum = np.cumsum(counts)[:-1] / counts.sum()
+        cum = np.clip(cum, 1e-6, 1 - 1e-6)
+        cutpoints = _ppf(self.distr, cum)
+        cutpoints = np.maximum.accumulate(cutpoints + np.arange(self.k_extra) * 1e-6)
+        return np.zeros(self.k_vars), cutpoints
+
+    # -- fitting --------------------------------------------------------------
+
+    def fit(
+        self,
+        start_params: Sequence[float] | None = None,
+        maxiter: int = 100,
+        tol: float = 1e-8,
+        cov_type: str = "nonrobust",
+    ) -> "CumulativeLinkResults":
+        """Maximise the likelihood with damped Newton steps.
+
+        ``start_params`` uses the OrderedModel layout (e.g. a previous fit's
+        ``params`` padded with zeros for added columns). Probability weights
+        always get a sandwich covariance; ``cov_type`` "HC0"/"HC1" requests it
+        for unweighted or frequency-weighted fits too. As in statsmodels'
+        likelihood models, "HC1" applies no small-sample factor.
+        """
+
+        if cov_type not in COV_TYPES:
+            raise ValueError(f"Unsupported cov_type '{cov_type}'; choose from {COV_TYPES}.")
+        if start_params is None:
+            beta, cutpoints = self.start_natural()
+        else:
+            beta, cutpoints = self.to_natural(start_params)
+        natural = np.concatenate([beta, cutpoints])
+        llf = self.loglike_natural(beta, cutpoints)
+        converged = False
+        iterations = 0
+        for iterations in range(1, maxiter + 1):
+            _, score, hessian = self.score_hessian_natural(beta, cutpoints)
+            try:
+                step = np.linalg.solve(-hessian, score)
+            except np.linalg.LinAlgError:
+                step = np.linalg.lstsq(-hessian, score, rcond=None)[0]
+            # Halve the step until cutpoints stay ordered and the likelihood improves.
+            scale = 1.0
+            line_search_failed = False
+            while True:
+                candidate = natural + scale * step
+                cand_beta = candidate[: self.k_vars]
+                cand_cut = candidate[self.k_vars :]
+                if np.all(np.diff(cand_cut) > 0):
+                    cand_llf = self.loglike_natural(cand_beta, cand_cut)
+                    if cand_llf >= llf - 1e-12 * abs(llf):
+                        break
+                scale *= 0.5
+                if scale < 1e-10:
+                    line_search_failed = True
+                    break
+            if line_search_failed:
+                # Stalled: only a vanishing score at the current point counts as converged.
+                converged = bool(np.max(np.abs(score)) < tol)
+                break
+            natural, beta, cutpoints, llf = candidate, cand_beta, cand_cut, cand_llf
+            if (scale == 1.0 and np.max(np.abs(step)) < tol) or np.max(np.abs(score)) < tol:
+                converged = True
+                break
+
+        score_obs, score, hessian = self.score_hessian_natural(beta, cutpoints)
+        hessian_inv = np.linalg.pinv(-hessian)
+        robust = cov_type != "nonrobust" or self.prob_weighted
+        if robust:
+            meat_weights = self.freq_weights * (
+                self.weights**2 if self.weight_type == "prob" else self.weights
+            )
+            meat = (score_obs * meat_weights[:, None]).T @ score_obs
+            cov_natural = hessian_inv @ meat @ hessian_inv
+        else:
+            cov_natural = hessian_inv
+        jac = self.transform_jacobian(cutpoints)
+        cov = jac @ cov_natural @ jac.T
+        params = self.from_natural(beta, cutpoints)
+        return CumulativeLinkResults(
+            model=self,
+            params=pd.Series(params, index=self.exog_names),
+            cov=pd.DataFrame(cov, index=self.exog_names, columns=self.exog_names),
+            llf=llf,
+            cov_type="HC0" if robust and cov_type == "nonrobust" else cov_type,
+            mle_retvals={
+                "converged": converged,
+                "iterations": iterations,
+                "score_max": float(np.max(np.abs(score))),
+            },
+            hessian_natural=hessian,
+            score_obs_natural=score_obs,
+        )
+
+    # -- prediction -----------------------------------------------------------
+
+    def predict(
+        self,
+        params: Sequence[float],
+        exog: Any = None,
+        which: str = "prob",
+    ) -> np.ndarray:
+        """Category probabilities ("prob"), cumulative probabilities ("cumprob") or x'beta ("linpred")."""
+
+        beta, cutpoints = self.to_natural(np.asarray(params, dtype=float))
+        exog = self.exog if exog is None else np.asarray(exog, dtype=float)
+        if exog.ndim == 1:
+            exog = exog[None, :]
+        eta = exog @ beta
+        if which == "linpred":
+            return eta
+        cdf, _, _ = _cdf_pdf_dpdf(self.distr, cutpoints[None, :] - eta[:, None])
+        cum = np.column_stack([cdf, np.ones(eta.shape[0])])
+        if which == "cumprob":
+            return cum
+        if which != "prob":
+            raise ValueError(f"Unsupported prediction type '{which}'.")
+        return np.diff(np.column_stack([np.zeros(eta.shape[0]), cum]), axis=1)
+
+
+@dataclass
+class CumulativeLinkResults:
+    """Fit output mirroring the parts of OrderedResults used by the analysis scripts."""
+
+    model: CumulativeLinkModel
+    params: pd.Series
+    cov: pd.DataFrame
+    llf: float
+    cov_type: str
+    mle_retvals: dict[str, Any]
+    hessian_natural: np.ndarray
+    score_obs_natural: np.ndarray
+
+    @property
+    def nobs(self) -> int:
+        return self.model.nobs
+
+    @property
+    def df_model(self) -> int:
+        return self.model.df_model
+
+    @property
+    def df_resid(self) -> int:
+        return self.model.df_resid
+
+    @property
+    def converged(self) -> bool:
+        return bool(self.mle_retvals["converged"])
+
+    def cov_params(self) -> pd.DataFrame:
+        return self.cov
+
+    @property
+    def bse(self) -> pd.Series:
+        return pd.Series(np.sqrt(np.clip(np.diag(self.cov.to_numpy()), 0.0, None)), index=self.params.index)
+
+    @property
+    def tvalues(self) -> pd.Series:
+        return self.params / self.bse
+
+    @property
+    def pvalues(self) -> pd.Series:
+        return pd.Series(2 * stats.norm.sf(np.abs(self.tvalues.to_numpy())), index=self.params.index)
+
+    def conf_int(self, alpha: float = 0.05) -> pd.DataFrame:
+        crit = stats.norm.ppf(1 - alpha / 2)
+        return pd.DataFrame(
+            {0: self.params - crit * self.bse, 1: self.params + crit * self.bse},
+            index=self.params.index,
+        )
+
+    @property
+    def aic(self) -> float:
+        return -2 * self.llf + 2 * (self.df_model + self.model.k_extra)
+
+    @property
+    def bic(self) -> float:
+        return -2 * self.llf + np.log(self.nobs) * (self.df_model + self.model.k_extra)
+
+    def predict(self, exog: Any = None, which: str = "prob") -> np.ndarray:
+        return self.model.predict(self.params.to_numpy(), exog=exog, which=which)
+
+
+def fit_cumulative_link(
+    endog: Any,
+    exog: Any,
+    distr: str = "logit",
+    weights: Any = None,
+    weight_type: str = "freq",
+    **fit_kwargs: Any,
+) -> CumulativeLinkResults:
+    """Convenience wrapper: build the model and fit it in one call."""
+
+    model = CumulativeLinkModel(endog, exog, distr=distr, weights=weights, weight_type=weight_type)
+    return model.fit(**fit_kwargs)
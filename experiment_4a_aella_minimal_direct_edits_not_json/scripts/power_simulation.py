@@ -0,0 +1,366 @@
+#!/usr/bin/env python3
+"""Monte Carlo power for binary and ordered (cumulative-link) Wald tests.
+
+A fitted model is turned into a data-generating process: covariate rows are
+resampled from the observed pool and outcomes are drawn from the latent
+variable ``y* = x'beta + e`` (logistic or normal ``e``), ``y = #{k: y* >
+alpha_k}``. One chunk of synthetic datasets is generated with a single
+(n_sims, n) draw, so no per-dataset frames are built.
+
+Each dataset is refitted and the target slope is tested with a two-sided Wald
+test whose SE is inflated by ``sqrt(design_effect)``, the same convention as
+the loop016/loop018 power tables; scenarios that differ only in the design
+effect therefore share their simulated fits. Binary outcomes are fitted for a
+whole chunk at once by batched Newton steps; ordered outcomes use
+``ordinal_solver`` warm-started at the generating parameters. Chunks run in a
+process pool, and each chunk draws from a seed spawned from the (n, effect)
+values of its cell and the chunk index, so results depend neither on the
+number of workers nor on the order of the grid. Finished chunks can be
+appended to a checkpoint CSV; a restarted run skips every chunk already
+recorded there. Every checkpoint row carries the run settings (generating
+model and parameters, seed, ``n_sims``, ``chunk_size``, alpha), and a
+checkpoint written with different settings is rejected rather than reused.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import itertools
+import json
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, replace
+from pathlib import Path
+from typing import Iterable, List, Sequence
+
+import numpy as np
+import pandas as pd
+from scipy import special, stats
+
+from ordinal_solver import CumulativeLinkModel
+
+RUN_SETTINGS = ["model", "seed", "n_sims_total", "chunk_size", "alpha", "generating_params"]
+CHECKPOINT_COLUMNS = [
+    *RUN_SETTINGS,
+    "scenario_id",
+    "chunk",
+    "n_sims",
+    "n_failed",
+    "n_reject",
+    "sum_estimate",
+    "sum_sq_estimate",
+]
+
+
+@dataclass(frozen=True)
+class GeneratingModel:
+    """Latent-variable model ``P(y <= k | x) = F(alpha_k - x'beta)``.
+
+    ``cutpoints`` holds one threshold for a binary outcome (``y = 1`` when the
+    latent value exceeds it) and K - 1 increasing thresholds for K ordered
+    categories. ``exog`` is the covariate pool (no constant) that synthetic
+    samples are drawn from.
+    """
+
+    exog: np.ndarray
+    beta: np.ndarray
+    cutpoints: np.ndarray
+    target: int
+    distr: str = "logit"
+
+    @property
+    def binary(self) -> bool:
+        return self.cutpoints.size == 1
+
+    @property
+    def kind(self) -> str:
+        return f"{'binary' if self.binary else 'ordered'}_{self.distr}"
+
+    def fingerprint(self) -> str:
+        """JSON of the generating parameters plus a digest of the covariate pool."""
+
+        return json.dumps(
+            {
+                "beta": [float(value) for value in self.beta],
+                "cutpoints": [float(value) for value in self.cutpoints],
+                "target": int(self.target),
+                "exog_sha1": hashlib.sha1(np.ascontiguousarray(self.exog, dtype=float).tobytes()).hexdigest(),
+            },
+            sort_keys=True,
+        )
+
+    @classmethod
+    def from_logit(cls, params: Sequence[float], exog: np.ndarray, target: int) -> "GeneratingModel":
+        """From logit ``params`` = (const, slopes...); ``target`` indexes the slopes."""
+
+        params = np.asarray(params, dtype=float)
+        return cls(
+            exog=np.asarray(exog, dtype=float),
+            beta=params[1:],
+            cutpoints=np.array([-params[0]]),
+            target=target,
+        )
+
+    @classmethod
+    def from_cumulative_link(cls, result, exog: np.ndarray, target: int) -> "GeneratingModel":
+        """From an ``ordinal_solver`` fit (parameters mapped back to natural cutpoints)."""
+
+        beta, cutpoints = result.model.to_natural(result.params.to_numpy())
+        return cls(
+            exog=np.asarray(exog, dtype=float),
+            beta=beta,
+            cutpoints=cutpoints,
+            target=target,
+            distr=result.model.distr,
+        )
+
+    def with_effect(self, effect: float | None) -> "GeneratingModel":
+        if effect is None:
+            return self
+        beta = self.beta.copy()
+        beta[self.target] = effect
+        return replace(self, beta=beta)
+
+    def simulate(
+        self, rng: np.random.Generator, n: int, n_sims: int
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """Row indices into ``exog`` and outcome codes, both shaped (n_sims, n)."""
+
+        rows = rng.integers(0, self.exog.shape[0], size=(n_sims, n))
+        uniforms = rng.random((n_sims, n))
+        noise = special.logit(uniforms) if self.distr == "logit" else special.ndtri(uniforms)
+        latent = (self.exog @ self.beta)[rows] + noise
+        y = (latent[..., None] > self.cutpoints).sum(axis=-1)
+        return rows, y
+
+
+@dataclass(frozen=True)
+class PowerScenario:
+    """Sample size, true target effect and design effect of one power cell."""
+
+    scenario_id: str
+    n: int
+    effect: float
+    design_effect: float = 1.0
+
+
+def scenario_grid(
+    ns: Iterable[int], effects: Iterable[float], design_effects: Iterable[float] = (1.0,)
+) -> List[PowerScenario]:
+    return [
+        PowerScenario(f"n{n}_b{effect:g}_deff{deff:g}", int(n), float(effect), float(deff))
+        for n, effect, deff in itertools.product(ns, effects, design_effects)
+    ]
+
+
+def batched_logit(
+    X: np.ndarray, y: np.ndarray, start: np.ndarray, maxiter: int = 25, tol: float = 1e-8
+) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Newton logit fits for a stack of datasets.
+
+    ``X`` is (S, n, p), ``y`` is (S, n). Returns params (S, p), model-based
+    SEs (S, p) and a converged mask; datasets with separation or a singular
+    Hessian come back unconverged.
+    """
+
+    n_sets, _, p = X.shape
+    params = np.broadcast_to(start, (n_sets, p)).copy()
+    converged = np.zeros(n_sets, dtype=bool)
+    hessian = np.zeros((n_sets, p, p))
+    for _ in range(maxiter):
+        prob = special.expit(np.einsum("snp,sp->sn", X, params))
+        score = np.einsum("snp,sn->sp", X, y - prob)
+        hessian = np.einsum("snp,sn,snq->spq", X, prob * (1.0 - prob), X)
+        try:
+            step = np.linalg.solve(hessian, score[..., None])[..., 0]
+        except np.linalg.LinAlgError:
+            step = np.einsum("spq,sq->sp", np.linalg.pinv(hessian, hermitian=True), score)
+        step = np.where(converged[:, None], 0.0, step)
+        params = params + step
+        converged |= np.max(np.abs(step), axis=1) < tol
+        if converged.all():
+            break
+    with np.errstate(invalid="ignore"):
+        diag = np.diagonal(np.linalg.pinv(hessian, hermitian=True), axis1=1, axis2=2)
+        bse = np.sqrt(diag)
+    converged &= np.all(np.isfinite(params), axis=1) & np.all(np.isfinite(bse), axis=1)
+    return params, bse, converged
+
+
+def _fit_target(
+    model: GeneratingModel, rows: np.ndarray, y: np.ndarray
+) -> tuple[np.ndarray, np.ndarray]:
+    """Target slope and SE for every simulated dataset (NaN where the fit failed)."""
+
+    n_sims = rows.shape[0]
+    X = model.exog[rows]
+    if model.binary:
+        X = np.concatenate([np.ones(rows.shape + (1,)), X], axis=-1)
+        start = np.concatenate([-model.cutpoints, model.beta])
+        params, bse, ok = batched_logit(X, y.astype(float), start)
+        estimate = np.where(ok, params[:, model.target + 1], np.nan)
+        return estimate, np.where(ok, bse[:, model.target + 1], np.nan)
+    estimate = np.full(n_sims, np.nan)
+    se = np.full(n_sims, np.nan)
+    for s in range(n_sims):
+        # Skip datasets that do not realise every category; thresholds would be unidentified.
+        if np.unique(y[s]).size != model.cutpoints.size + 1:
+            continue
+        clm = CumulativeLinkModel(y[s], X[s], distr=model.distr)
+        try:
+            fit = clm.fit(start_params=clm.from_natural(model.beta, model.cutpoints))
+        except np.linalg.LinAlgError:
+            continue
+        if fit.converged:
+            estimate[s] = fit.params.iloc[model.target]
+            se[s] = fit.bse.iloc[model.target]
+    return estimate, se
+
+
+def simulate_chunk(
+    model: GeneratingModel,
+    scenarios: Sequence[PowerScenario],
+    n_sims: int,
+    seed: np.random.SeedSequence,
+    alpha: float = 0.05,
+) -> List[dict[str, object]]:
+    """Simulate, refit and test ``n_sims`` datasets shared by scenarios with one (n, effect).
+
+    The design effect only rescales the test statistic, so every design
+    effect in ``scenarios`` is evaluated on the same fits.
+    """
+
+    first = scenarios[0]
+    rng = np.random.default_rng(seed)
+    truth = model.with_effect(first.effect)
+    rows, y = truth.simulate(rng, first.n, n_sims)
+    estimate, se = _fit_target(truth, rows, y)
+    ok = np.isfinite(estimate) & np.isfinite(se) & (se > 0)
+    z = np.abs(estimate[ok]) / se[ok]
+    z_crit = stats.norm.ppf(1.0 - alpha / 2.0)
+    return [
+        {
+            "scenario_id": scenario.scenario_id,
+            "n_sims": int(n_sims),
+            "n_failed": int(n_sims - ok.sum()),
+            "n_reject": int((z / np.sqrt(scenario.design_effect) > z_crit).sum()),
+            "sum_estimate": float(estimate[ok].sum()),
+            "sum_sq_estimate": float(np.square(estimate[ok]).sum()),
+        }
+        for scenario in scenarios
+    ]
+
+
+def _effect_key(effect: float) -> int:
+    # Spawn keys must be integers; the float's bit pattern identifies it exactly.
+    return int(np.float64(effect).view(np.uint64))
+
+
+def _load_checkpoint(path: Path | None, settings: dict[str, object]) -> pd.DataFrame:
+    if path is None or not path.exists():
+        return pd.DataFrame(columns=CHECKPOINT_COLUMNS)
+    done = pd.read_csv(path)
+    missing = [column for column in RUN_SETTINGS if column not in done.columns]
+    if missing:
+        raise ValueError(
+            f"Checkpoint {path} has no run settings ({', '.join(missing)}); "
+            "remove it or pass a different checkpoint path."
+        )
+    mismatched = [
+        column
+        for column in RUN_SETTINGS
+        if not done[column].astype(str).eq(str(settings[column])).all()
+    ]
+    if mismatched:
+        raise ValueError(
+            f"Checkpoint {path} was written with different {', '.join(mismatched)}; "
+            "remove it or pass a different checkpoint path."
+        )
+    return done
+
+
+def _append_checkpoint(path: Path | None, records: List[dict[str, object]]) -> None:
+    if path is None:
+        return
+    path.parent.mkdir(parents=True, exist_ok=True)
+    pd.DataFrame(records, columns=CHECKPOINT_COLUMNS).to_csv(
+        path, mode="a", header=not path.exists(), index=False
+    )
+
+
+def summarize_chunks(chunks: pd.DataFrame, scenarios: Sequence[PowerScenario]) -> pd.DataFrame:
+    """Power curve table: one row per scenario with its Monte Carlo SE."""
+
+    totals = chunks.groupby("scenario_id")[
+        ["n_sims", "n_failed", "n_reject", "sum_estimate", "sum_sq_estimate"]
+    ].sum()
+    grid = pd.DataFrame([scenario.__dict__ for scenario in scenarios]).set_index("scenario_id")
+    table = grid.join(totals, how="left")
+    n_ok = table["n_sims"] - table["n_failed"]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        power = table["n_reject"] / n_ok
+        mean = table["sum_estimate"] / n_ok
+        var = (table["sum_sq_estimate"] - n_ok * mean**2) / (n_ok - 1)
+    table["power"] = power
+    table["power_mc_se"] = np.sqrt(power * (1.0 - power) / n_ok)
+    table["mean_estimate"] = mean
+    table["sd_estimate"] = np.sqrt(var.clip(lower=0.0))
+    return table.drop(columns=["sum_estimate", "sum_sq_estimate"]).reset_index()
+
+
+def run_power_grid(
+    model: GeneratingModel,
+    scenarios: Sequence[PowerScenario],
+    n_sims: int,
+    seed: int,
+    chunk_size: int = 100,
+    workers: int = 1,
+    checkpoint: Path | None = None,
+    alpha: float = 0.05,
+) -> pd.DataFrame:
+    """Power for every scenario from ``n_sims`` datasets each, resuming from ``checkpoint``.
+
+    Checkpoint chunks are keyed by scenario ID and chunk index; a checkpoint
+    written with other run settings raises ``ValueError``.
+    """
+
+    settings = {
+        "model": model.kind,
+        "seed": int(seed),
+        "n_sims_total": int(n_sims),
+        "chunk_size": int(chunk_size),
+        "alpha": float(alpha),
+        "generating_params": model.fingerprint(),
+    }
+    done = _load_checkpoint(checkpoint, settings)
+    finished = set(zip(done["scenario_id"], done["chunk"].astype(int)))
+    cells: dict[tuple[int, float], List[PowerScenario]] = {}
+    for scenario in scenarios:
+        cells.setdefault((scenario.n, scenario.effect), []).append(scenario)
+    tasks = []
+    for (n, effect), cell in cells.items():
+        for chunk, start in enumerate(range(0, n_sims, chunk_size)):
+            pending = [sc for sc in cell if (sc.scenario_id, chunk) not in finished]
+            if not pending:
+                continue
+            seed_seq = np.random.SeedSequence(seed, spawn_key=(n, _effect_key(effect), chunk))
+            tasks.append((pending, chunk, min(chunk_size, n_sims - start), seed_seq))
+
+    records = done.to_dict("records")
+
+    def collect(chunk: int, chunk_records: List[dict[str, object]]) -> None:
+        chunk_records = [{**settings, **record, "chunk": chunk} for record in chunk_records]
+        _append_checkpoint(checkpoint, chunk_records)
+        records.extend(chunk_records)
+
+    if workers > 1 and len(tasks) > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [
+                (chunk, pool.submit(simulate_chunk, model, pending, size, seed_seq, alpha))
+                for pending, chunk, size, seed_seq in tasks
+            ]
+            for chunk, future in futures:
+                collect(chunk, future.result())
+    else:
+        for pending, chunk, size, seed_seq in tasks:
+            collect(chunk, simulate_chunk(model, pending, size, seed_seq, alpha))
+    return summarize_chunks(pd.DataFrame(records, columns=CHECKPOINT_COLUMNS), scenarios)
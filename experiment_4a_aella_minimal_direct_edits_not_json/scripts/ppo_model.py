@@ -0,0 +1,318 @@
+#!/usr/bin/env python3
+"""Partial proportional-odds (PPO) logit fitted on the original rows.
+
+The H3 scripts used to stack the ordinal outcome into one binary row per
+respondent and cutpoint, add cutpoint dummies and cut × term interactions, and
+fit ``sm.Logit`` on the long frame. This module evaluates the same model
+cut by cut on the respondent rows instead: the linear predictor for cut ``c`` is
+
+    const + delta_c + x'beta + z'(gamma + gamma_c),
+
+with ``x`` the parallel terms, ``z`` the terms allowed to vary by cut, and
+``delta``/``gamma_c`` zero at the lowest cut. Score and Hessian are
+accumulated per cut from the row-level design, so memory does not grow with the
+number of thresholds. Parameter names match the stacked design (``const``,
+``cut_<c>``, ``<term>_x_cut_<c>``) so existing contrast code keeps working.
+
+Two objectives are available:
+
+* ``"stacked"`` (default) is the sum of the cumulative binary logits; it
+  reproduces the stacked ``sm.Logit`` fit, including its standard errors.
+* ``"ordinal"`` is the generalized ordered logit likelihood,
+  P(y = k) = P(y >= c_k) - P(y >= c_{k+1}), started from the stacked solution.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Iterable, List, Sequence
+
+import numpy as np
+import pandas as pd
+from scipy import special, stats
+
+LIKELIHOODS = ("stacked", "ordinal")
+
+
+def _cut_label(value: float) -> str:
+    """Format a cutpoint the way ``pd.get_dummies`` names integer levels."""
+
+    return str(int(value)) if float(value).is_integer() else str(value)
+
+
+@dataclass
+class ContrastTest:
+    """Wald test of a single linear contrast (mirrors ``t_test`` attributes)."""
+
+    effect: float
+    sd: float
+    pvalue: float
+
+
+@dataclass
+class PPOResults:
+    """Fitted PPO parameters with the statsmodels attributes the scripts read."""
+
+    model: "PartialProportionalOddsModel"
+    params: pd.Series
+    cov: pd.DataFrame
+    llf: float
+    llnull: float
+    likelihood: str
+    nobs: float
+    converged: bool
+    iterations: int
+
+    def cov_params(self) -> pd.DataFrame:
+        return self.cov
+
+    @property
+    def bse(self) -> pd.Series:
+        return pd.Series(np.sqrt(np.clip(np.diag(self.cov.to_numpy()), 0.0, None)), index=self.params.index)
+
+    @property
+    def tvalues(self) -> pd.Series:
+        return self.params / self.bse
+
+    @property
+    def pvalues(self) -> pd.Series:
+        return pd.Series(2 * stats.norm.sf(np.abs(self.tvalues.to_numpy())), index=self.params.index)
+
+    @property
+    def n_long_rows(self) -> float:
+        """Rows the equivalent stacked design would have had."""
+
+        return self.nobs * self.model.n_cuts
+
+    @property
+    def aic(self) -> float:
+        return -2 * self.llf + 2 * len(self.params)
+
+    @property
+    def bic(self) -> float:
+        # The stacked logit counted every respondent once per cutpoint.
+        n = self.n_long_rows if self.likelihood == "stacked" else self.nobs
+        return -2 * self.llf + np.log(n) * len(self.params)
+
+    @property
+    def prsquared(self) -> float:
+        return 1 - self.llf / self.llnull
+
+    def t_test(self, contrast: Sequence[float]) -> ContrastTest:
+        """Wald z-test of ``contrast @ params``."""
+
+        vec = np.asarray(contrast, dtype=float)
+        effect = float(vec @ self.params.to_numpy())
+        sd = float(np.sqrt(vec @ self.cov.to_numpy() @ vec))
+        pvalue = float(2 * stats.norm.sf(abs(effect / sd))) if sd > 0 else float("nan")
+        return ContrastTest(effect=effect, sd=sd, pvalue=pvalue)
+
+
+class PartialProportionalOddsModel:
+    """Cumulative logits with cut-specific slopes for ``varying`` terms."""
+
+    def __init__(
+        self,
+        endog: pd.Series | np.ndarray,
+        exog: pd.DataFrame,
+        parallel: Iterable[str],
+        varying: Iterable[str],
+        cut_prefix: str = "cut",
+    ) -> None:
+        self.parallel = list(parallel)
+        self.varying = list(varying)
+        values = np.asarray(endog, dtype=float)
+        self.levels = np.unique(values)
+        if self.levels.size < 2:
+            raise ValueError("PPO outcome needs at least two observed levels.")
+        self.cuts = self.levels[1:]
+        self.n_cuts = int(self.cuts.size)
+        self.endog_code = np.searchsorted(self.levels, values)
+        # Shared design: constant, parallel terms, then the base-cut varying slopes.
+        shared = exog[[*self.parallel, *self.varying]].to_numpy(dtype=float)
+        self.shared = np.column_stack([np.ones(len(values)), shared])
+        self.varying_exog = exog[self.varying].to_numpy(dtype=float)
+        self.ge_cut = (values[:, None] >= self.cuts[None, :]).astype(float)
+
+        self.cut_cols = [f"{cut_prefix}_{_cut_label(cut)}" for cut in self.cuts[1:]]
+        names = ["const", *self.parallel, *self.varying, *self.cut_cols]
+        for term in self.varying:
+            names.extend(f"{term}_x_{cut_col}" for cut_col in self.cut_cols)
+        self.param_names = names
+        self.base_cut = float(self.cuts[0])
+
+        # Parameter positions used by each cut's local design [shared, 1, varying].
+        n_shared = self.shared.shape[1]
+        n_varying = len(self.varying)
+        dummy_start = n_shared
+        inter_start = n_shared + len(self.cut_cols)
+        self.cut_index: List[np.ndarray] = [np.arange(n_shared)]
+        for j in range(1, self.n_cuts):
+            inter = inter_start + np.arange(n_varying) * len(self.cut_cols) + (j - 1)
+            self.cut_index.append(np.concatenate([np.arange(n_shared), [dummy_start + j - 1], inter]))
+
+    @property
+    def nobs(self) -> int:
+        return int(self.shared.shape[0])
+
+    def take(self, rows: np.ndarray) -> "PartialProportionalOddsModel":
+        """Model restricted to ``rows`` with the same cuts and parameter layout."""
+
+        subset = object.__new__(PartialProportionalOddsModel)
+        subset.__dict__.update(self.__dict__)
+        subset.endog_code = self.endog_code[rows]
+        subset.shared = self.shared[rows]
+        subset.varying_exog = self.varying_exog[rows]
+        subset.ge_cut = self.ge_cut[rows]
+        return subset
+
+    def local_design(self, j: int) -> np.ndarray:
+        """Row-level design for cut ``j`` (never stacked across cuts)."""
+
+        if j == 0:
+            return self.shared
+        return np.column_stack([self.shared, np.ones(self.nobs), self.varying_exog])
+
+    def linear_predictors(self, params: np.ndarray) -> np.ndarray:
+        """(n, n_cuts) matrix of cumulative logits for P(y >= cut)."""
+
+        return np.column_stack(
+            [self.local_design(j) @ params[idx] for j, idx in enumerate(self.cut_index)]
+        )
+
+    def predict(self, params: np.ndarray, which: str = "prob") -> np.ndarray:
+        """Level probabilities ("prob") or P(y >= cut) ("cumprob") per row."""
+
+        upper = special.expit(self.linear_predictors(np.asarray(params, dtype=float)))
+        if which == "cumprob":
+            return upper
+        if which != "prob":
+            raise ValueError(f"Unsupported prediction type '{which}'.")
+        n = upper.shape[0]
+        cum = np.column_stack([np.ones(n), upper, np.zeros(n)])
+        return cum[:, :-1] - cum[:, 1:]
+
+    # -- stacked objective ----------------------------------------------------
+
+    def _stacked_derivatives(
+        self, params: np.ndarray, weights: np.ndarray
+    ) -> tuple[float, np.ndarray, np.ndarray]:
+        k = len(self.param_names)
+        score = np.zeros(k)
+        hessian = np.zeros((k, k))
+        llf = 0.0
+        for j, idx in enumerate(self.cut_index):
+            design = self.local_design(j)
+            eta = design @ params[idx]
+            prob = special.expit(eta)
+            y = self.ge_cut[:, j]
+            llf += float(weights @ (y * eta - np.logaddexp(0.0, eta)))
+            score[idx] += design.T @ (weights * (y - prob))
+            hessian[np.ix_(idx, idx)] -= (design * (weights * prob * (1.0 - prob))[:, None]).T @ design
+        return llf, score, hessian
+
+    # -- ordinal objective ----------------------------------------------------
+
+    def _bound_gradients(self, j: np.ndarray) -> np.ndarray:
+        """d eta_j / d params for each row's cut index ``j`` (rows outside 0..J-1 are zero)."""
+
+        k = len(self.param_names)
+        grad = np.zeros((self.nobs, k))
+        for cut, idx in enumerate(self.cut_index):
+            rows = np.flatnonzero(j == cut)
+            if rows.size:
+                grad[np.ix_(rows, idx)] = self.local_design(cut)[rows]
+        return grad
+
+    def _ordinal_derivatives(
+        self, params: np.ndarray, weights: np.ndarray
+    ) -> tuple[float, np.ndarray, np.ndarray]:
+        eta = self.linear_predictors(params)
+        n = self.nobs
+        rows = np.arange(n)
+        upper_cut = self.endog_code - 1  # P(y >= own level): cut index k-1
+        lower_cut = self.endog_code  # P(y >= next level): cut index k
+        has_upper = upper_cut >= 0
+        has_lower = lower_cut < self.n_cuts
+        eta_u = np.where(has_upper, eta[rows, np.clip(upper_cut, 0, self.n_cuts - 1)], np.inf)
+        eta_l = np.where(has_lower, eta[rows, np.clip(lower_cut, 0, self.n_cuts - 1)], -np.inf)
+        s_u, s_l = special.expit(eta_u), special.expit(eta_l)
+        prob = s_u - s_l
+        if np.any(prob <= 0):
+            return -np.inf, np.zeros(len(self.param_names)), np.zeros((len(self.param_names),) * 2)
+        d_u, d_l = s_u * (1 - s_u), s_l * (1 - s_l)
+        dd_u, dd_l = d_u * (1 - 2 * s_u), d_l * (1 - 2 * s_l)
+        a = self._bound_gradients(np.where(has_upper, upper_cut, -1))
+        b = self._bound_gradients(np.where(has_lower, lower_cut, -1))
+        score_obs = (d_u / prob)[:, None] * a - (d_l / prob)[:, None] * b
+        hessian = (
+            (a * (weights * dd_u / prob)[:, None]).T @ a
+            - (b * (weights * dd_l / prob)[:, None]).T @ b
+            - (score_obs * weights[:, None]).T @ score_obs
+        )
+        return float(weights @ np.log(prob)), weights @ score_obs, hessian
+
+    def loglike_null(self, weights: np.ndarray, likelihood: str) -> float:
+        """Intercept-only log-likelihood under the chosen objective."""
+
+        if likelihood == "stacked":
+            ybar = float(weights @ self.ge_cut.sum(axis=1)) / (weights.sum() * self.n_cuts)
+            return float(weights.sum() * self.n_cuts * (ybar * np.log(ybar) + (1 - ybar) * np.log1p(-ybar)))
+        counts = np.bincount(self.endog_code, weights=weights, minlength=self.levels.size)
+        share = counts[counts > 0] / counts.sum()
+        return float(counts[counts > 0] @ np.log(share))
+
+    def fit(
+        self,
+        weights: np.ndarray | None = None,
+        start_params: np.ndarray | None = None,
+        likelihood: str = "stacked",
+        maxiter: int = 100,
+        tol: float = 1e-8,
+    ) -> PPOResults:
+        """Newton-Raphson with step halving; ``weights`` are row frequency weights.
+
+        A warm ``start_params`` (e.g. the full-sample fit when refitting
+        bootstrap weights) usually converges in two or three steps.
+        """
+
+        if likelihood not in LIKELIHOODS:
+            raise ValueError(f"Unsupported likelihood '{likelihood}'; choose from {LIKELIHOODS}.")
+        weights = np.ones(self.nobs) if weights is None else np.asarray(weights, dtype=float)
+        if start_params is None and likelihood == "ordinal":
+            start_params = self.fit(weights, likelihood="stacked").params.to_numpy()
+        params = np.zeros(len(self.param_names)) if start_params is None else np.array(start_params, dtype=float)
+        derivatives = self._stacked_derivatives if likelihood == "stacked" else self._ordinal_derivatives
+
+        llf, score, hessian = derivatives(params, weights)
+        if not np.isfinite(llf):
+            raise ValueError("Start values imply non-positive level probabilities.")
+        converged = False
+        iterations = 0
+        for iterations in range(1, maxiter + 1):
+            step = np.linalg.solve(-hessian, score)
+            scale = 1.0
+            while scale > 1e-10:
+                cand_llf, cand_score, cand_hessian = derivatives(params + scale * step, weights)
+                if cand_llf >= llf - 1e-12 * abs(llf):
+                    break
+                scale *= 0.5
+            else:
+                break
+            params = params + scale * step
+            llf, score, hessian = cand_llf, cand_score, cand_hessian
+            if np.max(np.abs(scale * step)) < tol:
+                converged = True
+                break
+        cov = np.linalg.inv(-hessian)
+        return PPOResults(
+            model=self,
+            params=pd.Series(params, index=self.param_names),
+            cov=pd.DataFrame(cov, index=self.param_names, columns=self.param_names),
+            llf=llf,
+            llnull=self.loglike_null(weights, likelihood),
+            likelihood=likelihood,
+            nobs=float(weights.sum()),
+            converged=converged,
+            iterations=iterations,
+        )
@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+"""Resampling-based FWER adjustment (single-step and step-down maxT).
+
+Every hypothesis in a family shares the same bootstrap replicates, so the
+draws form one (n_replicates, n_hypotheses) matrix. Studentized null
+statistics ``|theta*_bj - theta_j| / se*_bj`` are compared with the observed
+``|theta_j| / se_j``:
+
+* single-step maxT: the share of replicates whose maximum over the family
+  reaches the observed statistic;
+* step-down (Westfall–Young / Romano–Wolf): hypotheses are ordered from most
+  to least significant and hypothesis j is compared with the maximum over
+  itself and all less significant hypotheses; adjusted p-values are then made
+  monotone along that order.
+
+Successive maxima are one reversed ``np.maximum.accumulate`` per chunk of
+replicates, so memory stays at ``chunk_size * n_hypotheses``. Adjusted
+p-values use ``(1 + count) / (1 + B)``, which never returns zero.
+"""
+
+from __future__ import annotations
+
+import csv
+import io
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Sequence
+
+import numpy as np
+import pandas as pd
+
+
+@dataclass
+class MaxTAdjustment:
+    """Adjusted p-values for one family of hypotheses."""
+
+    hypotheses: List[str]
+    observed: np.ndarray
+    p_single_step: np.ndarray
+    p_stepdown: np.ndarray
+    n_replicates: int
+
+    def to_frame(self) -> pd.DataFrame:
+        return pd.DataFrame(
+            {
+                "hypothesis": self.hypotheses,
+                "t_observed": self.observed,
+                "p_maxt": self.p_single_step,
+                "p_stepdown": self.p_stepdown,
+                "n_replicates": self.n_replicates,
+            }
+        )
+
+
+def draw_matrix(
+    draws: pd.DataFrame,
+    hypothesis_col: str,
+    value_col: str,
+    hypotheses: Sequence[str],
+    replicate_col: str = "replicate",
+) -> np.ndarray:
+    """Long bootstrap draws as a (replicate, hypothesis) matrix.
+
+    Replicates missing any hypothesis of the family (failed refits) are
+    dropped so every row is a complete joint draw.
+    """
+
+    wide = draws.pivot_table(
+        index=replicate_col, columns=hypothesis_col, values=value_col, aggfunc="first"
+    ).reindex(columns=list(hypotheses))
+    return wide.dropna().to_numpy(dtype=float)
+
+
+def studentized_stats(
+    estimate: np.ndarray,
+    se: np.ndarray,
+    boot_estimate: np.ndarray,
+    boot_se: np.ndarray | None = None,
+) -> tuple[np.ndarray, np.ndarray]:
+    """Observed ``|theta / se|`` and null-centred bootstrap statistics.
+
+    Replicate SEs are used when given and positive; otherwise the full-sample
+    SE studentizes the draws.
+    """
+
+    estimate = np.asarray(estimate, dtype=float)
+    se = np.asarray(se, dtype=float)
+    scale = np.broadcast_to(se, np.shape(boot_estimate))
+    if boot_se is not None:
+        boot_se = np.asarray(boot_se, dtype=float)
+        scale = np.where(boot_se > 0, boot_se, scale)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        observed = np.abs(estimate / se)
+        null = np.abs(np.asarray(boot_estimate, dtype=float) - estimate) / scale
+    return observed, null
+
+
+def maxt_adjust(
+    observed: np.ndarray,
+    null_stats: np.ndarray,
+    hypotheses: Sequence[str] | None = None,
+    chunk_size: int = 1000,
+) -> MaxTAdjustment:
+    """Single-step and step-down maxT adjusted p-values from shared replicates.
+
+    NaN null statistics never exceed the observed value; a NaN observed
+    statistic gets a NaN adjusted p-value and does not enter other maxima.
+    """
+
+    observed = np.asarray(observed, dtype=float)
+    null_stats = np.asarray(null_stats, dtype=float)
+    n_reps, m = null_stats.shape
+    valid = ~np.isnan(observed)
+    order = np.flatnonzero(valid)[np.argsort(-observed[valid], kind="stable")]
+    sorted_obs = observed[order]
+    count_step = np.zeros(order.size)
+    count_single = np.zeros(order.size)
+    for start in range(0, n_reps, chunk_size):
+        block = null_stats[start : start + chunk_size][:, order]
+        block = np.where(np.isnan(block), -np.inf, block)
+        successive = np.maximum.accumulate(block[:, ::-1], axis=1)[:, ::-1]
+        count_step += (successive >= sorted_obs).sum(axis=0)
+        if order.size:
+            count_single += (successive[:, :1] >= sorted_obs).sum(axis=0)
+    p_step = np.maximum.accumulate((1.0 + count_step) / (1.0 + n_reps))
+    p_single = (1.0 + count_single) / (1.0 + n_reps)
+    p_stepdown = np.full(m, np.nan)
+    p_single_step = np.full(m, np.nan)
+    p_stepdown[order] = p_step
+    p_single_step[order] = p_single
+    labels = list(hypotheses) if hypotheses is not None else [str(j) for j in range(m)]
+    return MaxTAdjustment(
+        hypotheses=labels,
+        observed=observed,
+        p_single_step=p_single_step,
+        p_stepdown=p_stepdown,
+        n_replicates=int(n_reps),
+    )
+
+
+def write_q_values(results_path: Path, q_values: Dict[str, float]) -> List[str]:
+    """Set ``q_value`` for the given ``result_id`` rows of a results CSV in place.
+
+    Only the updated records are re-serialized; every other record keeps its
+    original text and quoting. Returns the result IDs that were not found.
+    """
+
+    with results_path.open("r", newline="", encoding="utf-8") as fh:
+        lines = fh.readlines()
+    reader = csv.reader(lines)
+    header = next(reader)
+    id_col, q_col = header.index("result_id"), header.index("q_value")
+    out = lines[: reader.line_num]
+    found = set()
+    start = reader.line_num
+    for record in reader:
+        raw = lines[start : reader.line_num]
+        start = reader.line_num
+        if len(record) > q_col and record[id_col] in q_values:
+            record[q_col] = repr(float(q_values[record[id_col]]))
+            ending = raw[-1][len(raw[-1].rstrip("\r\n")) :] or "\n"
+            buffer = io.StringIO()
+            csv.writer(buffer, lineterminator=ending).writerow(record)
+            raw = [buffer.getvalue()]
+            found.add(record[id_col])
+        out.extend(raw)
+    with results_path.open("w", newline="", encoding="utf-8") as fh:
+        fh.write("".join(out))
+    return [result_id for result_id in q_values if result_id not in found]
@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""Benchmark the native cumulative-link solver against statsmodels OrderedModel.
+
+Fits the H1 and H2 ordered-logit specifications from `run_models.py` with both
+`OrderedModel(...).fit(method="bfgs")` (the previous workhorse) and
+`ordinal_solver.CumulativeLinkModel`, and records wall time, BFGS gradient
+calls versus Newton iterations, log-likelihood and the largest parameter,
+standard-error and predicted-probability gaps.
+
+Usage
+-----
+python analysis/code/benchmark_ordinal_solver.py \
+  --config config/agent_config.yaml \
+  --repeats 3 \
+  --output outputs/benchmark_ordinal_solver.csv
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import time
+from typing import Any, Callable
+
+import numpy as np
+import pandas as pd
+from statsmodels.miscmodels.ordinal_model import OrderedModel
+
+import run_models
+from ordinal_solver import CumulativeLinkModel
+
+SPECS = {
+    "H1": {
+        "outcome": "wz901dj_score",
+        "focal": "externalreligion_ord",
+        "controls": ["selfage", "biomale", "gendermale", "cis", "classchild_score"],
+    },
+    "H2": {
+        "outcome": "okq5xh8_ord",
+        "focal": "pqo6jmj_score",
+        "controls": [
+            "selfage",
+            "biomale",
+            "gendermale",
+            "classcurrent_score",
+            "classteen_score",
+            "mentalillness",
+        ],
+    },
+}
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--config",
+        default="config/agent_config.yaml",
+        help="Agent configuration YAML path.",
+    )
+    parser.add_argument(
+        "--repeats",
+        type=int,
+        default=3,
+        help="Timed fits per solver; the minimum wall time is reported.",
+    )
+    parser.add_argument(
+        "--output",
+        default="outputs/benchmark_ordinal_solver.csv",
+        help="CSV path for the benchmark table (a JSON copy is written alongside).",
+    )
+    return parser.parse_args()
+
+
+def build_spec_data(prepared: pd.DataFrame, spec: dict[str, Any]) -> tuple[pd.Series, pd.DataFrame]:
+    controls, _ = run_models.select_controls(prepared, spec["controls"])
+    design_cols = [spec["focal"]] + controls
+    data = prepared[[spec["outcome"]] + design_cols].dropna()
+    if data.empty:
+        raise ValueError(f"No complete cases for outcome '{spec['outcome']}'.")
+    y_codes, _ = run_models.encode_ordered_outcome(data[spec["outcome"]])
+    return y_codes, data[design_cols].astype(float)
+
+
+def time_fit(fit: Callable[[], Any], repeats: int) -> tuple[Any, float]:
+    best = np.inf
+    result = None
+    for _ in range(max(repeats, 1)):
+        start = time.perf_counter()
+        result = fit()
+        best = min(best, time.perf_counter() - start)
+    return result, best
+
+
+def benchmark_spec(hyp_id: str, y_codes: pd.Series, exog: pd.DataFrame, repeats: int) -> dict[str, Any]:
+    reference, reference_time = time_fit(
+        lambda: OrderedModel(y_codes, exog, distr="logit").fit(
+            method="bfgs", disp=False, maxiter=1000
+        ),
+        repeats,
+    )
+    native, native_time = time_fit(
+        lambda: CumulativeLinkModel(y_codes, exog, distr="logit").fit(), repeats
+    )
+    ref_params = reference.params.to_numpy()
+    ref_bse = reference.bse.to_numpy()
+    ref_probs = reference.model.predict(reference.params, exog=exog, which="prob")
+    native_probs = native.predict(exog, which="prob")
+    return {
+        "hypothesis": hyp_id,
+        "n_obs": int(native.nobs),
+        "n_params": int(len(native.params)),
+        "orderedmodel_seconds": float(reference_time),
+        "orderedmodel_gradient_calls": int(reference.mle_retvals.get("gcalls", -1)),
+        "orderedmodel_converged": bool(reference.mle_retvals.get("converged", False)),
+        "orderedmodel_llf": float(reference.llf),
+        "native_seconds": float(native_time),
+        "native_iterations": int(native.mle_retvals["iterations"]),
+        "native_converged": bool(native.converged),
+        "native_llf": float(native.llf),
+        "speedup": float(reference_time / native_time) if native_time > 0 else float("nan"),
+        "llf_difference": float(native.llf - reference.llf),
+        "max_abs_param_diff": float(np.max(np.abs(native.params.to_numpy() - ref_params))),
+        "max_abs_bse_diff": float(np.max(np.abs(native.bse.to_numpy() - ref_bse))),
+        "max_abs_prob_diff": float(np.max(np.abs(native_probs - ref_probs))),
+    }
+
+
+def main() -> None:
+    args = parse_args()
+    config = run_models.load_config(args.config)
+    dataset_path = run_models.resolve_dataset_path(config["paths"]["raw_data"])
+    codebook_path = run_models.resolve_repo_path(config["paths"]["codebook"])
+    alias_map = run_models.load_codebook_alias_map(codebook_path)
+    prepared = run_models.prepare_variables(
+        run_models.load_analysis_frame(dataset_path, alias_map)
+    )
+    rows = []
+    for hyp_id, spec in SPECS.items():
+        y_codes, exog = build_spec_data(prepared, spec)
+        row = benchmark_spec(hyp_id, y_codes, exog, args.repeats)
+        print(
+            f"{hyp_id}: OrderedModel {row['orderedmodel_seconds']:.3f}s, "
+            f"native {row['native_seconds']:.3f}s ({row['native_iterations']} iterations), "
+            f"max |param diff| {row['max_abs_param_diff']:.2e}"
+        )
+        rows.append(row)
+    out_path = run_models.resolve_repo_path(args.output)
+    out_path.parent.mkdir(parents=True, exist_ok=True)
+    pd.DataFrame(rows).to_csv(out_path, index=False)
+    out_path.with_suffix(".json").write_text(json.dumps(rows, indent=2))
+    print(f"Saved benchmark to {out_path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,10 @@
 #!/usr/bin/env python3
 """
 Benjamini-Hochberg (BH) q-value calculator scoped by hypothesis family.
+
+Targeted rows of every family are adjusted together in one grouped pass
+(``multiplicity.adjust``); missing p-values stay blank and do not count
+towards the family size.
 """
 
 from __future__ import annotations
@@ -13,6 +17,8 @@ from typing import Dict
 import pandas as pd
 import yaml
 
+import multiplicity
+
 
 REQUIRED_COLUMNS = ["hypothesis_id", "family", "targeted", "p_value"]
 
@@ -29,17 +35,16 @@ def validate_columns(df: pd.DataFrame) -> None:
         raise ValueError(f"Input CSV missing required columns: {missing}")
 
 
+def _targeted_mask(df: pd.DataFrame) -> pd.Series:
+    return df["targeted"].astype(str).str.upper() == "Y"
+
+
 def compute_bh_for_family(family_df: pd.DataFrame) -> Dict[str, float]:
-    targeted_mask = family_df["targeted"].astype(str).str.upper() == "Y"
-    targeted = family_df[targeted_mask]
+    targeted = family_df[_targeted_mask(family_df)]
     if targeted.empty:
         return {}
-
-    ordered = targeted["p_value"].astype(float).sort_values()
-    m = len(ordered)
-    bh_values = (ordered * m / pd.Series(range(1, m + 1), index=ordered.index)).clip(upper=1.0)
-    adjusted = bh_values.iloc[::-1].cummin().iloc[::-1]
-    return adjusted.to_dict()
+    q_values = multiplicity.adjust(targeted["p_value"].to_numpy(dtype=float))
+    return dict(zip(targeted.index, q_values))
 
 
 def apply_bh(df: pd.DataFrame) -> pd.DataFrame:
@@ -50,14 +55,17 @@ def apply_bh(df: pd.DataFrame) -> pd.DataFrame:
         df["bh_in_scope"] = ""
     df["bh_in_scope"] = df["bh_in_scope"].astype(str)
 
-    for family, fam_df in df.groupby("family"):
-        q_values = compute_bh_for_family(fam_df)
-        targeted_ids = fam_df.loc[fam_df["targeted"].astype(str).str.upper() == "Y", "hypothesis_id"].tolist()
-        scope_str = "|".join(targeted_ids)
-        df.loc[fam_df.index, "bh_in_scope"] = scope_str
-        for idx, q_val in q_values.items():
-            df.at[idx, "q_value"] = float(q_val)
-
+    targeted_mask = _targeted_mask(df) & df["family"].notna()
+    targeted = df[targeted_mask]
+    scopes = targeted.groupby("family")["hypothesis_id"].agg(lambda ids: "|".join(ids.astype(str)))
+    in_family = df["family"].notna()
+    df.loc[in_family, "bh_in_scope"] = df.loc[in_family, "family"].map(scopes).fillna("")
+
+    q_values = multiplicity.adjust(
+        targeted["p_value"].to_numpy(dtype=float), targeted["family"].to_numpy()
+    )
+    df["q_value"] = pd.to_numeric(df["q_value"], errors="coerce")
+    df.loc[targeted_mask, "q_value"] = q_values
     return df
 
 
@@ -3,6 +3,8 @@
 
 The script reads the survey dataset, computes descriptive metadata such as row/column
 counts, missingness, and dtype distributions, and emits both JSON and Markdown reports.
+The CSV is streamed in chunks into per-column sketches (``streaming_profile``), so
+memory stays bounded regardless of dataset width.
 
 Example
 -------
@@ -23,6 +25,8 @@ from pathlib import Path
 import numpy as np
 import pandas as pd
 
+from streaming_profile import DEFAULT_CELL_BUDGET, DatasetProfile, profile_csv, profile_frame
+
 
 def parse_args() -> argparse.Namespace:
     parser = argparse.ArgumentParser(description="Dataset structure summary utility.")
@@ -45,27 +49,58 @@ def parse_args() -> argparse.Namespace:
         default=20,
         help="Number of variables to highlight in the missingness table.",
     )
+    parser.add_argument(
+        "--top-categories",
+        type=int,
+        default=0,
+        help="Add the K most frequent values of each non-numeric column to the JSON.",
+    )
+    parser.add_argument(
+        "--min-cell-size",
+        type=int,
+        default=10,
+        help="Category counts below this are reported as suppressed.",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Threads updating column groups of each chunk.",
+    )
+    parser.add_argument(
+        "--cell-budget",
+        type=int,
+        default=DEFAULT_CELL_BUDGET,
+        help="Approximate number of cells held in memory per chunk.",
+    )
     return parser.parse_args()
 
 
-def summarize_dataframe(df: pd.DataFrame, top_missing: int) -> dict:
-    n_rows, n_cols = df.shape
-    missing_fraction = float(df.isna().mean().mean())
-    memory_mb = float(df.memory_usage(deep=True).sum() / 1_000_000)
+def summarize_profile(
+    profile: DatasetProfile, top_missing: int, top_categories: int = 0, min_cell: int = 10
+) -> dict:
+    sketches = profile.sketches
+    fractions = [sketch.missing_fraction for sketch in sketches]
+    missing_fraction = float(np.mean(fractions)) if fractions else float("nan")
+    memory_mb = float(profile.memory_bytes / 1_000_000)
 
-    dtype_counts = df.dtypes.astype(str).value_counts().to_dict()
+    dtype_counts = pd.Series([sketch.dtype for sketch in sketches], dtype=object).value_counts().to_dict()
 
     column_details: list[dict] = []
-    for col in df.columns:
-        series = df[col]
+    for sketch in sketches:
         detail = {
-            "name": col,
-            "dtype": str(series.dtype),
-            "missing_fraction": float(series.isna().mean()),
+            "name": sketch.name,
+            "dtype": sketch.dtype,
+            "missing_fraction": float(sketch.missing_fraction),
         }
-        if pd.api.types.is_numeric_dtype(series):
-            detail["min"] = float(series.min(skipna=True)) if series.notna().any() else None
-            detail["max"] = float(series.max(skipna=True)) if series.notna().any() else None
+        if sketch.is_numeric:
+            observed = sketch.n_observed > 0
+            detail["min"] = float(sketch.minimum) if observed else None
+            detail["max"] = float(sketch.maximum) if observed else None
+        elif top_categories:
+            detail["top_categories"] = sketch.top_values(top_categories, min_cell)
+            # False once the column outgrew the sketch's frequency table; counts are then lower bounds.
+            detail["top_categories_exact"] = sketch.exact
         column_details.append(detail)
 
     top_missing_cols = sorted(
@@ -75,8 +110,8 @@ def summarize_dataframe(df: pd.DataFrame, top_missing: int) -> dict:
     )[:top_missing]
 
     return {
-        "rows": int(n_rows),
-        "columns": int(n_cols),
+        "rows": int(profile.n_rows),
+        "columns": len(sketches),
         "missing_fraction": missing_fraction,
         "memory_mb": memory_mb,
         "dtype_counts": dtype_counts,
@@ -85,6 +120,10 @@ def summarize_dataframe(df: pd.DataFrame, top_missing: int) -> dict:
     }
 
 
+def summarize_dataframe(df: pd.DataFrame, top_missing: int) -> dict:
+    return summarize_profile(profile_frame(df), top_missing)
+
+
 def write_markdown(summary: dict, output_path: Path):
     lines = [
         "# Data Overview (Automated)",
@@ -121,8 +160,8 @@ def main():
     if not input_path.exists():
         raise FileNotFoundError(f"Input dataset not found: {input_path}")
 
-    df = pd.read_csv(input_path)
-    summary = summarize_dataframe(df, args.top_missing)
+    profile = profile_csv(input_path, cell_budget=args.cell_budget, workers=args.workers)
+    summary = summarize_profile(profile, args.top_missing, args.top_categories, args.min_cell_size)
     summary.update(
         {
             "input_path": str(input_path),
@@ -1,13 +1,29 @@
 #!/usr/bin/env python3
-"""Generate a design-effect grid showing how inflated uncertainties affect the confirmatory estimates."""
+"""Generate a design-effect grid showing how inflated uncertainties affect the confirmatory estimates.
+
+Estimates, SEs and sample sizes of the targeted hypotheses are held as arrays
+and broadcast against a (scenario × hypothesis) matrix of design effects, so
+adjusted SEs, CIs, p-values, effective n and per-scenario BH q-values for the
+whole grid come from a handful of array operations. Fixed ``--deffs`` apply
+one value to every hypothesis; ``--replicate-summary`` adds a scenario with
+per-hypothesis design effects estimated from the pseudo-replicate variances
+(replicate variance / model variance). The CSV and Markdown tables are
+rendered column-wise from the same frame.
+"""
 
 from __future__ import annotations
 
 import argparse
-import math
+import json
 from pathlib import Path
 
+import numpy as np
 import pandas as pd
+from scipy import stats
+
+import multiplicity
+
+Z_CRIT = 1.96
 
 
 def parse_args() -> argparse.Namespace:
@@ -24,6 +40,13 @@ def parse_args() -> argparse.Namespace:
         default=[1.0, 1.25, 1.5, 2.0],
         help="Design-effect multipliers to apply to the standard errors.",
     )
+    parser.add_argument(
+        "--replicate-summary",
+        help=(
+            "sensitivity_replicates_summary.json from pseudo_replicates.py; adds a "
+            "scenario with per-hypothesis design effects from the replicate variances."
+        ),
+    )
     parser.add_argument(
         "--output-csv",
         default="outputs/sensitivity_design_effect_grid.csv",
@@ -37,67 +60,111 @@ def parse_args() -> argparse.Namespace:
     return parser.parse_args()
 
 
-def norm_cdf(x: float) -> float:
-    return (1 + math.erf(x / math.sqrt(2))) / 2
-
-
-def two_sided_pvalue(estimate: float, se: float) -> float:
-    if se == 0 or math.isnan(estimate) or math.isnan(se):
-        return float("nan")
-    z = estimate / se
-    return 2 * (1 - norm_cdf(abs(z)))
-
-
-def build_rows(df: pd.DataFrame, deffs: list[float]) -> pd.DataFrame:
-    targeted = df[df["targeted"].astype(str).str.upper() == "Y"].copy()
-    rows: list[dict[str, float | str]] = []
-    for deff in deffs:
-        sqrt_deff = math.sqrt(deff)
-        for _, row in targeted.iterrows():
-            estimate = float(row["estimate"])
-            se_orig = float(row["se"])
-            se_adj = se_orig * sqrt_deff
-            ci_low = estimate - 1.96 * se_adj
-            ci_high = estimate + 1.96 * se_adj
-            p_value = two_sided_pvalue(estimate, se_adj)
-            n_unweighted = int(row["n_unweighted"])
-            n_eff = n_unweighted / deff if deff else 0.0
-            rows.append(
-                {
-                    "hypothesis_id": row["hypothesis_id"],
-                    "deff": deff,
-                    "estimate": estimate,
-                    "se_adj": se_adj,
-                    "ci_low": ci_low,
-                    "ci_high": ci_high,
-                    "p_value": p_value,
-                    "n_unweighted": n_unweighted,
-                    "n_effective": n_eff,
-                    "q_value": row.get("q_value", ""),
-                }
-            )
-    return pd.DataFrame(rows)
+def replicate_deffs(summary_path: str | Path, targeted: pd.DataFrame) -> np.ndarray:
+    """Per-hypothesis deff = replicate variance / squared model SE (NaN when missing)."""
+
+    aggregated = json.loads(Path(summary_path).read_text())["aggregated"]
+    variances = np.array(
+        [
+            aggregated.get(hyp, {}).get("replicate_variance", np.nan)
+            for hyp in targeted["hypothesis_id"]
+        ],
+        dtype=float,
+    )
+    se = targeted["se"].to_numpy(dtype=float)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return variances / se**2
+
+
+def build_rows(
+    df: pd.DataFrame, deffs: list[float], hypothesis_deffs: np.ndarray | None = None
+) -> pd.DataFrame:
+    targeted = df[df["targeted"].astype(str).str.upper() == "Y"].reset_index(drop=True)
+    n_hyp = len(targeted)
+    deff_matrix = np.repeat(np.asarray(deffs, dtype=float)[:, None], n_hyp, axis=1)
+    sources = ["fixed"] * len(deffs)
+    if hypothesis_deffs is not None:
+        deff_matrix = np.vstack([deff_matrix, np.asarray(hypothesis_deffs, dtype=float)[None, :]])
+        sources.append("replicate")
+
+    estimate = targeted["estimate"].to_numpy(dtype=float)[None, :]
+    se = targeted["se"].to_numpy(dtype=float)[None, :]
+    n_unweighted = targeted["n_unweighted"].to_numpy(dtype=int)
+    se_adj = se * np.sqrt(deff_matrix)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        z = np.where(se_adj > 0, np.abs(estimate) / se_adj, np.nan)
+        n_effective = np.where(deff_matrix != 0, n_unweighted / deff_matrix, 0.0)
+    p_value = 2 * stats.norm.sf(z)
+
+    # BH within each (scenario, bh_in_scope family); all targeted rows form one family when absent.
+    families = (
+        targeted["bh_in_scope"].fillna("").astype(str).to_numpy()
+        if "bh_in_scope" in targeted.columns
+        else np.full(n_hyp, "")
+    )
+    family_codes, family_labels = pd.factorize(families)
+    scenario_family = np.arange(deff_matrix.shape[0])[:, None] * len(family_labels) + family_codes
+    q_deff = multiplicity.adjust(p_value, scenario_family)
+
+    n_scen = deff_matrix.shape[0]
+    q_value = targeted["q_value"] if "q_value" in targeted.columns else pd.Series([""] * n_hyp)
+    return pd.DataFrame(
+        {
+            "hypothesis_id": np.tile(targeted["hypothesis_id"].to_numpy(), n_scen),
+            "deff": deff_matrix.ravel(),
+            "estimate": np.broadcast_to(estimate, deff_matrix.shape).ravel(),
+            "se_adj": se_adj.ravel(),
+            "ci_low": (estimate - Z_CRIT * se_adj).ravel(),
+            "ci_high": (estimate + Z_CRIT * se_adj).ravel(),
+            "p_value": p_value.ravel(),
+            "n_unweighted": np.tile(n_unweighted, n_scen),
+            "n_effective": n_effective.ravel(),
+            "q_value": np.tile(q_value.to_numpy(), n_scen),
+            "q_value_deff": q_deff.ravel(),
+            "deff_source": np.repeat(sources, n_hyp),
+        }
+    )
+
+
+def _fmt(values: pd.Series, spec: str) -> pd.Series:
+    return values.map(spec.format)
 
 
 def to_markdown(df: pd.DataFrame) -> str:
-    header = "| Hypothesis | DEFF | Estimate | SE_adj | 95% CI | p-value | n_unweighted | n_effective | q-value |"
-    sep = "| --- | --- | --- | --- | --- | --- | --- | --- | --- |"
-    lines = [header, sep]
-    for _, row in df.iterrows():
-        ci_range = f"[{row['ci_low']:.3f}, {row['ci_high']:.3f}]"
-        lines.append(
-            "| "
-            f"{row['hypothesis_id']} | {row['deff']:.2f} | {row['estimate']:.3f} | {row['se_adj']:.3f} | "
-            f"{ci_range} | {row['p_value']:.2g} | {int(row['n_unweighted'])} | "
-            f"{row['n_effective']:.1f} | {row['q_value']} |"
-        )
+    header = (
+        "| Hypothesis | DEFF | Estimate | SE_adj | 95% CI | p-value | n_unweighted | "
+        "n_effective | q-value | q-value (DEFF) |"
+    )
+    sep = "| --- | --- | --- | --- | --- | --- | --- | --- | --- | --- |"
+    ci_range = "[" + _fmt(df["ci_low"], "{:.3f}") + ", " + _fmt(df["ci_high"], "{:.3f}") + "]"
+    deff = _fmt(df["deff"], "{:.2f}")
+    if "deff_source" in df.columns:
+        deff = deff.where(df["deff_source"] == "fixed", deff + " (replicate)")
+    columns = [
+        df["hypothesis_id"].astype(str),
+        deff,
+        _fmt(df["estimate"], "{:.3f}"),
+        _fmt(df["se_adj"], "{:.3f}"),
+        ci_range,
+        _fmt(df["p_value"], "{:.2g}"),
+        df["n_unweighted"].astype(int).astype(str),
+        _fmt(df["n_effective"], "{:.1f}"),
+        df["q_value"].astype(str),
+        _fmt(df["q_value_deff"], "{:.2g}"),
+    ]
+    body = columns[0].str.cat(columns[1:], sep=" | ")
+    lines = [header, sep, *("| " + body + " |")]
     return "\n".join(lines) + "\n"
 
 
 def main() -> None:
     args = parse_args()
     df = pd.read_csv(args.input)
-    grid = build_rows(df, args.deffs)
+    hypothesis_deffs = None
+    if args.replicate_summary:
+        targeted = df[df["targeted"].astype(str).str.upper() == "Y"]
+        hypothesis_deffs = replicate_deffs(args.replicate_summary, targeted)
+    grid = build_rows(df, args.deffs, hypothesis_deffs)
     output_csv = Path(args.output_csv)
     output_csv.parent.mkdir(parents=True, exist_ok=True)
     grid.to_csv(output_csv, index=False)
@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""Persistent, size-capped cache of fitted models.
+
+The PAP scripts refit the same H1–H3 models many times across loops
+(run_models, robustness_checks, pseudo_replicates, pseudo_weight_sensitivity).
+Every fit goes through a ``pattern_compression`` solver on a
+``CompressedDesign``, and that design already encodes everything the fit
+depends on: the prepared data values, the analytic rows left after listwise
+deletion or exclusions, the design columns and the weights. The cache key is
+therefore a hash of the design contents plus the solver and its options, and
+the value is the pickled results object (params, covariance, log-likelihood,
+diagnostics and the model needed for predictions). The key also hashes the
+source of the solver modules, so editing a solver invalidates the fits it
+produced; entries that no longer unpickle are treated as misses.
+
+Entries are one pickle file each under the cache directory. Hits refresh the
+file's modification time and the least recently used entries are evicted once
+the directory exceeds ``max_bytes``. The cache is local and trusted: only point
+it at directories written by these scripts.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import importlib
+import os
+import pickle
+import tempfile
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Callable
+
+import numpy as np
+import pandas as pd
+
+from pattern_compression import CompressedDesign
+
+CACHE_VERSION = "2"
+SOLVER_MODULES = ("pattern_compression", "ordinal_solver")
+
+
+@lru_cache(maxsize=None)
+def source_digest(module_name: str) -> str:
+    """SHA-256 of a module's source file ("" when it has none)."""
+    path = getattr(importlib.import_module(module_name), "__file__", None)
+    return hashlib.sha256(Path(path).read_bytes()).hexdigest() if path else ""
+
+
+def _update_array(digest: Any, values: Any) -> None:
+    if isinstance(values, pd.Series) and isinstance(values.dtype, pd.CategoricalDtype):
+        digest.update(repr(list(values.cat.categories)).encode())
+        values = values.cat.codes
+    arr = np.ascontiguousarray(np.asarray(values))
+    digest.update(f"{arr.dtype.str}{arr.shape}".encode())
+    if arr.dtype == object:
+        digest.update(repr(arr.tolist()).encode())
+    else:
+        digest.update(arr.tobytes())
+
+
+def design_key(design: CompressedDesign, solver: str, options: dict[str, Any]) -> str:
+    """Hash of the compressed cells, their weights, the solver and its options.
+
+    The source of every module in ``SOLVER_MODULES`` is part of the key.
+    """
+    digest = hashlib.sha256()
+    digest.update(f"v{CACHE_VERSION}|{solver}|{sorted(options.items())!r}".encode())
+    for module_name in SOLVER_MODULES:
+        digest.update(f"|{module_name}:{source_digest(module_name)}".encode())
+    digest.update(repr(list(design.exog.columns)).encode())
+    for values in (design.endog, design.exog, design.counts):
+        _update_array(digest, values)
+    if design.weights is not None:
+        _update_array(digest, design.weights)
+    return digest.hexdigest()
+
+
+class FitCache:
+    def __init__(self, directory: str | Path, max_bytes: int = 256 * 1024**2) -> None:
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+
+    def _path(self, key: str) -> Path:
+        return self.directory / f"{key}.pkl"
+
+    def get(self, key: str) -> Any | None:
+        path = self._path(key)
+        try:
+            with path.open("rb") as handle:
+                value = pickle.load(handle)
+        except (OSError, pickle.UnpicklingError, EOFError, AttributeError, ImportError):
+            # Missing, truncated, or pickled against classes that no longer exist.
+            return None
+        os.utime(path)
+        return value
+
+    def put(self, key: str, value: Any) -> None:
+        fd, tmp_name = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        with os.fdopen(fd, "wb") as handle:
+            pickle.dump(value, handle, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_name, self._path(key))
+        self.evict()
+
+    def evict(self) -> None:
+        entries = []
+        for path in self.directory.glob("*.pkl"):
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries, key=lambda entry: entry[0]):
+            if total <= self.max_bytes:
+                break
+            path.unlink(missing_ok=True)
+            total -= size
+
+    def summary(self) -> str:
+        return f"fit cache {self.directory}: {self.hits} hits, {self.misses} misses"
+
+
+def cached_fit(
+    solver: Callable[..., Any],
+    design: CompressedDesign,
+    cache: FitCache | None = None,
+    **options: Any,
+) -> Any:
+    """``solver(design, **options)``, served from ``cache`` when the inputs are unchanged."""
+    if cache is None:
+        return solver(design, **options)
+    solver_id = f"{solver.__module__}.{solver.__qualname__}@{source_digest(solver.__module__)}"
+    key = design_key(design, solver_id, options)
+    result = cache.get(key)
+    if result is not None:
+        cache.hits += 1
+        return result
+    cache.misses += 1
+    result = solver(design, **options)
+    cache.put(key, result)
+    return result
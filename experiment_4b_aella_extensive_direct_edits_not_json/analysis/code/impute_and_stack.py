@@ -5,14 +5,26 @@ Deterministic hot-deck multiple imputation + stacked export utility.
 The procedure replicates across runs given the same seed and input data order.
 Numeric and categorical variables are imputed separately using observed
  distributions (with replacement) to emulate predictive mean matching.
+
+Two covariate-aware modes are available via ``--method``:
+
+* ``class_hot_deck`` draws donors only from rows sharing the same donor class
+  (``--donor-classes``). Observed rows are sorted by class once per column so
+  each recipient locates its donor block with a binary search.
+* ``pmm`` performs predictive mean matching: a linear model on
+  ``--pmm-predictors`` (fully observed columns only; default: every fully
+  observed numeric column, never the target itself) is fitted once per column, coefficients are perturbed per draw, and each missing cell picks
+  one of its ``--pmm-k`` nearest donors on the sorted predicted means.
+  Categorical columns fall back to the (class) hot deck.
 """
 
 from __future__ import annotations
 
 import argparse
 import json
+from dataclasses import dataclass
 from pathlib import Path
-from typing import Dict, List, Tuple
+from typing import Dict, List, Sequence, Tuple
 
 import numpy as np
 import pandas as pd
@@ -80,22 +92,274 @@ def hot_deck_impute(df: pd.DataFrame, rng: np.random.Generator, numeric_cols: Li
     return imputed
 
 
-def impute_and_stack(df: pd.DataFrame, m: int, seed: int) -> Tuple[pd.DataFrame, Dict[str, Dict[str, int]]]:
+IMPUTATION_METHODS = ("hot_deck", "class_hot_deck", "pmm")
+
+
+def donor_class_codes(df: pd.DataFrame, class_cols: Sequence[str]) -> np.ndarray:
+    """Integer donor-class code per row (missing class values form their own class)."""
+    missing = [col for col in class_cols if col not in df.columns]
+    if missing:
+        raise KeyError(f"Donor-class columns not present in data: {missing}")
+    if not class_cols:
+        return np.zeros(len(df), dtype=np.int64)
+    return df.groupby(list(class_cols), dropna=False, sort=False).ngroup().to_numpy(dtype=np.int64)
+
+
+def draw_within_class(
+    rng: np.random.Generator,
+    donor_values: np.ndarray,
+    donor_classes: np.ndarray,
+    recipient_classes: np.ndarray,
+) -> np.ndarray:
+    """Sample one donor per recipient from its class block, falling back to all donors."""
+    order = np.argsort(donor_classes, kind="stable")
+    sorted_classes = donor_classes[order]
+    sorted_values = donor_values[order]
+    start = np.searchsorted(sorted_classes, recipient_classes, side="left")
+    stop = np.searchsorted(sorted_classes, recipient_classes, side="right")
+    empty = stop <= start
+    start = np.where(empty, 0, start)
+    stop = np.where(empty, sorted_values.size, stop)
+    picks = start + np.floor(rng.random(recipient_classes.size) * (stop - start)).astype(np.int64)
+    return sorted_values[picks]
+
+
+def class_hot_deck_impute(
+    df: pd.DataFrame,
+    rng: np.random.Generator,
+    columns: Sequence[str],
+    class_codes: np.ndarray,
+    as_str: bool = False,
+) -> pd.DataFrame:
+    imputed = df.copy()
+    for col in columns:
+        mask = imputed[col].isna().to_numpy()
+        if not mask.any() or mask.all():
+            continue
+        donors = imputed.loc[~mask, col]
+        donor_values = donors.astype(str).to_numpy() if as_str else donors.to_numpy()
+        imputed.loc[mask, col] = draw_within_class(
+            rng, donor_values, class_codes[~mask], class_codes[mask]
+        )
+    return imputed
+
+
+@dataclass
+class PMMModel:
+    """Per-column regression used to rank donors by predicted mean."""
+
+    column: str
+    design_cols: np.ndarray
+    beta: np.ndarray
+    cov_chol: np.ndarray
+
+
+def pmm_design(df: pd.DataFrame, predictors: Sequence[str]) -> np.ndarray:
+    design = df[list(predictors)].astype(float)
+    design = design.fillna(design.mean()).fillna(0.0)
+    return np.column_stack([np.ones(len(df)), design.to_numpy()])
+
+
+def default_pmm_predictors(df: pd.DataFrame, numeric_cols: Sequence[str]) -> List[str]:
+    return [col for col in numeric_cols if df[col].notna().all()]
+
+
+def check_pmm_predictors(df: pd.DataFrame, predictors: Sequence[str]) -> None:
+    incomplete = [col for col in predictors if df[col].isna().any()]
+    if incomplete:
+        raise ValueError(
+            f"PMM predictors must be fully observed (mean-filling biases the match); incomplete: {incomplete}."
+        )
+
+
+def fit_pmm_models(
+    df: pd.DataFrame, design: np.ndarray, numeric_cols: Sequence[str], predictors: Sequence[str]
+) -> Dict[str, PMMModel]:
+    """Fit each incomplete column on the shared design once, outside the draw loop.
+
+    ``design`` is ``pmm_design(df, predictors)``; a column is never one of its own predictors.
+    """
+    models: Dict[str, PMMModel] = {}
+    for col in numeric_cols:
+        values = df[col].to_numpy(dtype=float)
+        observed = ~np.isnan(values)
+        design_cols = np.array([0] + [idx + 1 for idx, name in enumerate(predictors) if name != col])
+        n_params = design_cols.size
+        if observed.all() or observed.sum() <= n_params:
+            continue
+        x_obs = design[np.ix_(observed, design_cols)]
+        y_obs = values[observed]
+        beta, *_ = np.linalg.lstsq(x_obs, y_obs, rcond=None)
+        resid = y_obs - x_obs @ beta
+        sigma2 = float(resid @ resid) / max(observed.sum() - n_params, 1)
+        xtx_inv = np.linalg.pinv(x_obs.T @ x_obs)
+        cov = sigma2 * xtx_inv
+        eigvals, eigvecs = np.linalg.eigh((cov + cov.T) / 2)
+        cov_chol = eigvecs * np.sqrt(np.clip(eigvals, 0.0, None))
+        models[col] = PMMModel(column=col, design_cols=design_cols, beta=beta, cov_chol=cov_chol)
+    return models
+
+
+def nearest_donors(
+    rng: np.random.Generator,
+    donor_means: np.ndarray,
+    recipient_means: np.ndarray,
+    k: int,
+) -> np.ndarray:
+    """Index (into ``donor_means``) of a random pick among each recipient's k nearest donors."""
+    order = np.argsort(donor_means, kind="stable")
+    sorted_means = donor_means[order]
+    n_donors = sorted_means.size
+    k = max(1, min(k, n_donors))
+    pos = np.searchsorted(sorted_means, recipient_means)
+    # The k nearest donors lie within k positions either side of the insertion point.
+    offsets = np.arange(-k, k)
+    window = np.clip(pos[:, None] + offsets[None, :], 0, n_donors - 1)
+    distance = np.abs(sorted_means[window] - recipient_means[:, None])
+    # Clipping duplicates edge positions; push duplicates to the back of the ranking.
+    duplicate = np.zeros_like(window, dtype=bool)
+    duplicate[:, 1:] = window[:, 1:] == window[:, :-1]
+    distance[duplicate] = np.inf
+    nearest = np.argpartition(distance, k - 1, axis=1)[:, :k]
+    choice = nearest[np.arange(nearest.shape[0]), rng.integers(0, k, size=nearest.shape[0])]
+    return order[window[np.arange(window.shape[0]), choice]]
+
+
+def pmm_impute(
+    df: pd.DataFrame,
+    rng: np.random.Generator,
+    design: np.ndarray,
+    models: Dict[str, PMMModel],
+    k: int,
+) -> pd.DataFrame:
+    imputed = df.copy()
+    for col, model in models.items():
+        values = imputed[col].to_numpy(dtype=float)
+        mask = np.isnan(values)
+        beta_draw = model.beta + model.cov_chol @ rng.standard_normal(model.beta.size)
+        x = design[:, model.design_cols]
+        donor_means = x[~mask] @ model.beta
+        recipient_means = x[mask] @ beta_draw
+        donor_idx = nearest_donors(rng, donor_means, recipient_means, k)
+        imputed.loc[mask, col] = values[~mask][donor_idx]
+    return imputed
+
+
+class RunningImputationStats:
+    """Diagnostics updated as each draw is produced instead of re-scanning the stack.
+
+    Missingness is only re-counted for columns that were incomplete before
+    imputation; numeric means are combined across draws with Welford updates to
+    give Rubin's within/between variance and the fraction of missing information.
+    """
+
+    def __init__(self, df: pd.DataFrame, numeric_cols: Sequence[str]) -> None:
+        self.columns = df.columns.tolist()
+        self.missing_before = df.isna().sum()
+        self.incomplete = [col for col in self.columns if self.missing_before[col] > 0]
+        self.tracked = [
+            col for col in numeric_cols if 0 < self.missing_before[col] < len(df)
+        ]
+        k = len(self.tracked)
+        self.m = 0
+        self.mean = np.zeros(k)
+        self.m2 = np.zeros(k)
+        self.within = np.zeros(k)
+        self.missing_after: Dict[str, Dict[str, int]] = {}
+
+    def update(self, draw: int, imputed: pd.DataFrame) -> None:
+        counts = dict.fromkeys(self.columns, 0)
+        if self.incomplete:
+            counts.update(
+                {col: int(val) for col, val in imputed[self.incomplete].isna().sum().items()}
+            )
+        self.missing_after[f"imputation_{draw}"] = counts
+
+        values = imputed[self.tracked].to_numpy(dtype=float)
+        observed = ~np.isnan(values)
+        n = observed.sum(axis=0)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            draw_mean = np.where(observed, values, 0.0).sum(axis=0) / n
+            centered = np.where(observed, values - draw_mean, 0.0)
+            var_of_mean = (centered**2).sum(axis=0) / (n - 1) / n
+        self.m += 1
+        delta = draw_mean - self.mean
+        self.mean += delta / self.m
+        self.m2 += delta * (draw_mean - self.mean)
+        self.within += (var_of_mean - self.within) / self.m
+
+    def pooled(self) -> Dict[str, Dict[str, float | None]]:
+        """Rubin's pooled diagnostics; undefined values (e.g. between-variance with m=1) are None."""
+
+        inflation = 1 + 1 / max(self.m, 1)
+        between = self.m2 / (self.m - 1) if self.m > 1 else np.full_like(self.m2, np.nan)
+        total = self.within + inflation * between
+        with np.errstate(invalid="ignore", divide="ignore"):
+            fmi = inflation * between / total
+        return {
+            col: {
+                "mean": _finite_or_none(self.mean[idx]),
+                "within_var": _finite_or_none(self.within[idx]),
+                "between_var": _finite_or_none(between[idx]),
+                "total_var": _finite_or_none(total[idx]),
+                "fraction_missing_info": _finite_or_none(fmi[idx]),
+            }
+            for idx, col in enumerate(self.tracked)
+        }
+
+
+def _finite_or_none(value: float) -> float | None:
+    # JSON has no NaN/inf; undefined diagnostics are written as null.
+    value = float(value)
+    return value if np.isfinite(value) else None
+
+
+def impute_and_stack(
+    df: pd.DataFrame,
+    m: int,
+    seed: int,
+    method: str = "hot_deck",
+    donor_classes: Sequence[str] = (),
+    pmm_predictors: Sequence[str] | None = None,
+    pmm_k: int = 5,
+) -> Tuple[pd.DataFrame, RunningImputationStats]:
+    if method not in IMPUTATION_METHODS:
+        raise ValueError(f"Unknown imputation method '{method}'; choose from {IMPUTATION_METHODS}.")
     numeric_cols, categorical_cols = infer_types(df)
     stacked_frames = []
-    imputed_missingness = {}
+    stats = RunningImputationStats(df, numeric_cols)
+
+    class_codes = donor_class_codes(df, donor_classes) if method != "hot_deck" else None
+    if method == "pmm":
+        if pmm_predictors is not None:
+            predictors = list(pmm_predictors)
+            check_pmm_predictors(df, predictors)
+        else:
+            predictors = default_pmm_predictors(df, numeric_cols)
+        design = pmm_design(df, predictors)
+        pmm_models = fit_pmm_models(df, design, numeric_cols, predictors)
+        # Columns the regression cannot handle (too few donors) use the class hot deck.
+        pmm_fallback = [col for col in numeric_cols if col not in pmm_models]
 
     for draw in range(1, m + 1):
         # advance generator deterministically for each draw
         draw_seed = seed + draw
         draw_rng = np.random.default_rng(draw_seed)
-        imputed = hot_deck_impute(df, draw_rng, numeric_cols, categorical_cols)
+        if method == "hot_deck":
+            imputed = hot_deck_impute(df, draw_rng, numeric_cols, categorical_cols)
+        elif method == "class_hot_deck":
+            imputed = class_hot_deck_impute(df, draw_rng, numeric_cols, class_codes)
+            imputed = class_hot_deck_impute(imputed, draw_rng, categorical_cols, class_codes, as_str=True)
+        else:
+            imputed = pmm_impute(df, draw_rng, design, pmm_models, pmm_k)
+            imputed = class_hot_deck_impute(imputed, draw_rng, pmm_fallback, class_codes)
+            imputed = class_hot_deck_impute(imputed, draw_rng, categorical_cols, class_codes, as_str=True)
+        stats.update(draw, imputed)
         imputed["imputation_id"] = draw
         stacked_frames.append(imputed)
-        imputed_missingness[f"imputation_{draw}"] = imputed.isna().sum().to_dict()
 
     stacked = pd.concat(stacked_frames, ignore_index=True)
-    return stacked, imputed_missingness
+    return stacked, stats
 
 
 def write_outputs(stacked: pd.DataFrame, stacked_path: Path, summary_path: Path, metadata: Dict[str, object]) -> None:
@@ -113,7 +377,7 @@ def write_outputs(stacked: pd.DataFrame, stacked_path: Path, summary_path: Path,
 
     metadata["stacked_output_actual"] = str(actual_path)
     summary_path.parent.mkdir(parents=True, exist_ok=True)
-    summary_path.write_text(json.dumps(metadata, indent=2))
+    summary_path.write_text(json.dumps(metadata, indent=2, allow_nan=False))
 
 
 def parse_args() -> argparse.Namespace:
@@ -124,6 +388,10 @@ def parse_args() -> argparse.Namespace:
     parser.add_argument("--seed", type=int, default=None, help="Random seed; defaults to config seed.")
     parser.add_argument("--stacked-output", default="data/clean/childhood_imputed_stack.parquet", type=Path, help="Path for stacked imputed dataset (parquet or csv).")
     parser.add_argument("--summary-output", default="artifacts/imputation_summary.json", type=Path, help="Path for JSON summary diagnostics.")
+    parser.add_argument("--method", choices=IMPUTATION_METHODS, default="hot_deck", help="Imputation mode: unconditional hot deck, within-class hot deck, or predictive mean matching.")
+    parser.add_argument("--donor-classes", nargs="*", default=[], help="Columns defining donor classes (class_hot_deck and pmm fallback).")
+    parser.add_argument("--pmm-predictors", nargs="*", default=None, help="Fully observed predictors for PMM (default: all fully observed numeric columns).")
+    parser.add_argument("--pmm-k", type=int, default=5, help="Number of nearest donors to sample from in PMM.")
     return parser.parse_args()
 
 
@@ -136,7 +404,15 @@ def main() -> None:
 
     input_path = resolve_input_path(Path(args.config), args.input)
     df = load_frame(input_path)
-    stacked, imputed_missingness = impute_and_stack(df, args.m, seed)
+    stacked, stats = impute_and_stack(
+        df,
+        args.m,
+        seed,
+        method=args.method,
+        donor_classes=args.donor_classes,
+        pmm_predictors=args.pmm_predictors,
+        pmm_k=args.pmm_k,
+    )
 
     metadata = {
         "input_path": str(input_path),
@@ -144,9 +420,14 @@ def main() -> None:
         "summary_output": str(args.summary_output),
         "seed": seed,
         "m": args.m,
+        "method": args.method,
+        "donor_classes": args.donor_classes,
+        "pmm_predictors": args.pmm_predictors,
+        "pmm_k": args.pmm_k,
         "rows_per_imputation": len(df),
-        "missing_before": df.isna().sum().to_dict(),
-        "missing_after_by_imputation": imputed_missingness,
+        "missing_before": {col: int(val) for col, val in stats.missing_before.items()},
+        "missing_after_by_imputation": stats.missing_after,
+        "pooled_numeric_diagnostics": stats.pooled(),
     }
 
     write_outputs(stacked, args.stacked_output, args.summary_output, metadata)
@@ -0,0 +1,252 @@
+#!/usr/bin/env python3
+"""Bit-packed missing-indicator matrices and batched missingness logits.
+
+The (rows × variables) missing-indicator matrix is packed once in both
+orientations with ``np.packbits``:
+
+* column bitsets (one bit per row, read as 64-bit words) give per-variable
+  missing counts and pairwise co-missingness as popcounts of ``a & b``;
+* row bitsets (one bit per variable) are the missingness patterns, so the
+  distinct patterns and their frequencies are one ``np.unique`` over short
+  byte strings instead of a groupby over hundreds of boolean columns.
+
+``fit_indicator_logits`` fits ``logit P(missing_t) ~ X`` for every indicator
+column t by Newton-Raphson on a shared design: the per-row outer products
+of X are formed once and every Hessian is one product with them.
+Covariances are the inverse observed information, as in ``sm.Logit``.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from statistics import NormalDist
+from typing import Callable, Sequence
+
+import numpy as np
+import pandas as pd
+from scipy import special
+
+_POPCOUNT = np.array([bin(i).count("1") for i in range(256)], dtype=np.int64)
+
+
+def popcount(packed: np.ndarray) -> np.ndarray:
+    """Set bits along the last axis of an unsigned integer array."""
+
+    if hasattr(np, "bitwise_count"):  # numpy >= 2.0
+        return np.bitwise_count(packed).sum(axis=-1, dtype=np.int64)
+    as_bytes = np.ascontiguousarray(packed).view(np.uint8)
+    return _POPCOUNT[as_bytes].sum(axis=-1)
+
+
+def _words(packed: np.ndarray) -> np.ndarray:
+    """uint8 bitsets (last axis) zero-padded and viewed as uint64 words."""
+
+    pad = (-packed.shape[-1]) % 8
+    widths = [(0, 0)] * (packed.ndim - 1) + [(0, pad)]
+    return np.ascontiguousarray(np.pad(packed, widths)).view(np.uint64)
+
+
+@dataclass
+class MissingnessBits:
+    """Missing indicators packed per column (``by_column``) and per row (``by_row``)."""
+
+    columns: list[str]
+    n_rows: int
+    by_column: np.ndarray
+    by_row: np.ndarray
+
+    @classmethod
+    def from_indicator(cls, indicator: np.ndarray, columns: Sequence[str]) -> "MissingnessBits":
+        indicator = np.asarray(indicator, dtype=bool)
+        return cls(
+            columns=list(columns),
+            n_rows=indicator.shape[0],
+            by_column=np.packbits(indicator.T, axis=1),
+            by_row=np.packbits(indicator, axis=1),
+        )
+
+    @classmethod
+    def from_frame(
+        cls, df: pd.DataFrame, is_missing: Callable[[pd.Series], pd.Series] | None = None
+    ) -> "MissingnessBits":
+        """Pack ``df.isna()`` or, when given, ``is_missing`` applied to every column."""
+
+        if is_missing is None:
+            indicator = df.isna().to_numpy()
+        else:
+            indicator = np.column_stack([is_missing(df[column]).to_numpy(dtype=bool) for column in df.columns])
+        return cls.from_indicator(indicator.reshape(len(df), len(df.columns)), df.columns)
+
+    def indicator(self) -> np.ndarray:
+        return np.unpackbits(self.by_row, axis=1, count=len(self.columns)).astype(bool)
+
+    def missing_counts(self) -> np.ndarray:
+        return popcount(_words(self.by_column))
+
+    def co_missing(self, max_block_bytes: int = 1 << 26) -> np.ndarray:
+        """(variables × variables) counts of rows missing both; the diagonal is ``missing_counts``."""
+
+        words = _words(self.by_column)
+        k, width = words.shape
+        out = np.empty((k, k), dtype=np.int64)
+        block = max(1, max_block_bytes // max(8 * k * width, 1))
+        for start in range(0, k, block):
+            both = words[start : start + block, None, :] & words[None, :, :]
+            out[start : start + block] = popcount(both)
+        return out
+
+    def patterns(self) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Distinct row patterns (unpacked), their row counts and each row's pattern index.
+
+        Patterns are ordered by decreasing frequency, ties by bit pattern.
+        """
+
+        unique, inverse, counts = np.unique(self.by_row, axis=0, return_inverse=True, return_counts=True)
+        order = np.argsort(-counts, kind="stable")
+        rank = np.empty_like(order)
+        rank[order] = np.arange(order.size)
+        unpacked = np.unpackbits(unique[order], axis=1, count=len(self.columns)).astype(bool)
+        return unpacked, counts[order], rank[np.asarray(inverse).ravel()]
+
+    def pattern_table(self, max_listed: int = 50) -> pd.DataFrame:
+        """One row per distinct pattern with its frequency and missing variables.
+
+        ``missing_variables`` lists at most ``max_listed`` names per pattern.
+        """
+
+        unpacked, counts, _ = self.patterns()
+        names = np.asarray(self.columns, dtype=object)
+        listed = []
+        for row in unpacked:
+            missing = names[row]
+            text = "; ".join(missing[:max_listed])
+            listed.append(text + (f"; ... (+{missing.size - max_listed})" if missing.size > max_listed else ""))
+        return pd.DataFrame(
+            {
+                "pattern_id": np.arange(len(counts)),
+                "n_rows": counts,
+                "pct_rows": counts / self.n_rows if self.n_rows else 0.0,
+                "n_missing_variables": unpacked.sum(axis=1),
+                "missing_variables": listed,
+            }
+        )
+
+    def co_missing_pairs(self) -> pd.DataFrame:
+        """Long table of variable pairs (a before b) that are missing together at least once."""
+
+        counts = self.co_missing()
+        diag = np.diag(counts)
+        a, b = np.nonzero(np.triu(counts, k=1))
+        names = np.asarray(self.columns, dtype=object)
+        both = counts[a, b]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            union = diag[a] + diag[b] - both
+            jaccard = np.where(union > 0, both / union, np.nan)
+        return pd.DataFrame(
+            {
+                "variable_a": names[a],
+                "variable_b": names[b],
+                "n_both_missing": both,
+                "n_missing_a": diag[a],
+                "n_missing_b": diag[b],
+                "jaccard": jaccard,
+            }
+        )
+
+
+@dataclass
+class IndicatorLogits:
+    """Logit fits sharing one design; leading axis is the indicator column."""
+
+    names: list[str]
+    exog_names: list[str]
+    params: np.ndarray
+    cov_params: np.ndarray
+    llf: np.ndarray
+    llnull: np.ndarray
+    n_iter: np.ndarray
+    converged: np.ndarray
+    nobs: int
+
+    @property
+    def bse(self) -> np.ndarray:
+        return np.sqrt(np.diagonal(self.cov_params, axis1=1, axis2=2))
+
+    @property
+    def tvalues(self) -> np.ndarray:
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return self.params / self.bse
+
+    @property
+    def pvalues(self) -> np.ndarray:
+        return 2.0 * special.ndtr(-np.abs(self.tvalues))
+
+    def conf_int(self, alpha: float = 0.05) -> np.ndarray:
+        half = NormalDist().inv_cdf(1.0 - alpha / 2.0) * self.bse
+        return np.stack([self.params - half, self.params + half], axis=-1)
+
+    @property
+    def prsquared(self) -> np.ndarray:
+        return 1.0 - self.llf / self.llnull
+
+    @property
+    def aic(self) -> np.ndarray:
+        return -2.0 * self.llf + 2.0 * self.params.shape[1]
+
+    @property
+    def bic(self) -> np.ndarray:
+        return -2.0 * self.llf + np.log(self.nobs) * self.params.shape[1]
+
+
+def _loglik(y: np.ndarray, eta: np.ndarray) -> np.ndarray:
+    return (y * eta - np.logaddexp(0.0, eta)).sum(axis=0)
+
+
+def fit_indicator_logits(
+    X: pd.DataFrame,
+    Y: pd.DataFrame,
+    max_iter: int = 100,
+    tol: float = 1e-8,
+) -> IndicatorLogits:
+    """Newton-Raphson logits of every 0/1 column of ``Y`` on ``X`` (intercept included).
+
+    Rows must already be complete. Columns stop iterating once their largest
+    Newton step is below ``tol``.
+    """
+
+    x = X.to_numpy(dtype=float)
+    y = Y.to_numpy(dtype=float)
+    n, p = x.shape
+    t = y.shape[1]
+    outer = (x[:, :, None] * x[:, None, :]).reshape(n, p * p)
+    params = np.zeros((t, p))
+    n_iter = np.zeros(t, dtype=int)
+    active = np.ones(t, dtype=bool)
+    for _ in range(max_iter):
+        cols = np.flatnonzero(active)
+        if cols.size == 0:
+            break
+        prob = special.expit(x @ params[cols].T)
+        score = x.T @ (y[:, cols] - prob)
+        hessian = ((prob * (1.0 - prob)).T @ outer).reshape(-1, p, p)
+        step = np.linalg.solve(hessian, score.T[:, :, None])[:, :, 0]
+        params[cols] += step
+        n_iter[cols] += 1
+        active[cols] = np.abs(step).max(axis=1) >= tol
+
+    prob = special.expit(x @ params.T)
+    hessian = ((prob * (1.0 - prob)).T @ outer).reshape(-1, p, p)
+    ybar = y.mean(axis=0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        llnull = n * (special.xlogy(ybar, ybar) + special.xlogy(1.0 - ybar, 1.0 - ybar))
+    return IndicatorLogits(
+        names=list(Y.columns),
+        exog_names=list(X.columns),
+        params=params,
+        cov_params=np.linalg.inv(hessian),
+        llf=_loglik(y, x @ params.T),
+        llnull=llnull,
+        n_iter=n_iter,
+        converged=~active,
+        nobs=n,
+    )
@@ -4,6 +4,9 @@
 The output CSV lists every variable with counts and percentages of missing
 responses. A companion Markdown stub highlights the top-K variables with the
 highest missingness rate (labelled Exploratory per governance instructions).
+Counts, distinct missingness patterns and pairwise co-missingness all come
+from one bit-packed indicator matrix (see ``missingness_bits``); the pattern
+and pair tables are written when their output paths are given.
 """
 
 from __future__ import annotations
@@ -16,6 +19,8 @@ from typing import Any
 import numpy as np
 import pandas as pd
 
+from missingness_bits import MissingnessBits
+
 
 def parse_args() -> argparse.Namespace:
     parser = argparse.ArgumentParser(description="Missingness profile generator.")
@@ -32,6 +37,16 @@ def parse_args() -> argparse.Namespace:
         required=True,
         help="Path to write a Markdown summary (Exploratory).",
     )
+    parser.add_argument(
+        "--output-patterns",
+        type=Path,
+        help="Optional CSV of distinct missingness patterns with row counts.",
+    )
+    parser.add_argument(
+        "--output-comissing",
+        type=Path,
+        help="Optional CSV of variable pairs that are missing together.",
+    )
     parser.add_argument(
         "--seed",
         type=int,
@@ -47,22 +62,22 @@ def parse_args() -> argparse.Namespace:
     return parser.parse_args()
 
 
-def compute_missingness(df: pd.DataFrame) -> list[dict[str, Any]]:
+def compute_missingness(
+    df: pd.DataFrame, bits: MissingnessBits | None = None
+) -> list[dict[str, Any]]:
     n_rows = len(df)
-    profile: list[dict[str, Any]] = []
-    for column in df.columns:
-        series = df[column]
-        missing = int(series.isna().sum())
-        profile.append(
-            {
-                "variable": column,
-                "dtype": str(series.dtype),
-                "n_missing": missing,
-                "n_obs": int(n_rows - missing),
-                "pct_missing": float(missing / n_rows) if n_rows else 0.0,
-            }
-        )
-    return profile
+    bits = MissingnessBits.from_frame(df) if bits is None else bits
+    missing_counts = bits.missing_counts()
+    return [
+        {
+            "variable": column,
+            "dtype": str(dtype),
+            "n_missing": int(missing),
+            "n_obs": int(n_rows - missing),
+            "pct_missing": float(missing / n_rows) if n_rows else 0.0,
+        }
+        for column, dtype, missing in zip(df.columns, df.dtypes, missing_counts)
+    ]
 
 
 def write_csv(profile: list[dict[str, Any]], output_path: Path):
@@ -77,7 +92,11 @@ def write_csv(profile: list[dict[str, Any]], output_path: Path):
 
 
 def write_markdown(
-    profile: list[dict[str, Any]], output_path: Path, top_n: int, seed: int
+    profile: list[dict[str, Any]],
+    output_path: Path,
+    top_n: int,
+    seed: int,
+    pattern_summary: tuple[int, int] | None = None,
 ):
     rng = np.random.default_rng(seed)
     sorted_profile = sorted(
@@ -90,6 +109,11 @@ def write_markdown(
         "# Missingness Snapshot (Exploratory)",
         "",
         f"- Total variables: {len(profile)}",
+    ]
+    if pattern_summary is not None:
+        n_patterns, n_complete = pattern_summary
+        lines.append(f"- Distinct missingness patterns: {n_patterns} ({n_complete} fully observed rows)")
+    lines += [
         f"- Top {len(top)} listed below (highest missingness first).",
         "",
         "| variable | dtype | n_missing | pct_missing |",
@@ -106,9 +130,21 @@ def write_markdown(
 def main():
     args = parse_args()
     df = pd.read_csv(args.input, low_memory=False)
-    profile = compute_missingness(df)
+    bits = MissingnessBits.from_frame(df)
+    profile = compute_missingness(df, bits)
     write_csv(profile, args.output_csv)
-    write_markdown(profile, args.output_md, args.top_n, args.seed)
+
+    patterns = bits.pattern_table()
+    complete = patterns.loc[patterns["n_missing_variables"] == 0, "n_rows"].sum()
+    if args.output_patterns:
+        args.output_patterns.parent.mkdir(parents=True, exist_ok=True)
+        patterns.to_csv(args.output_patterns, index=False)
+    if args.output_comissing:
+        args.output_comissing.parent.mkdir(parents=True, exist_ok=True)
+        bits.co_missing_pairs().to_csv(args.output_comissing, index=False)
+    write_markdown(
+        profile, args.output_md, args.top_n, args.seed, pattern_summary=(len(patterns), int(complete))
+    )
 
 
 if __name__ == "__main__":
@@ -0,0 +1,447 @@
+#!/usr/bin/env python3
+"""Specification-curve (multiverse) engine for the PAP hypotheses H1–H3.
+
+Each hypothesis declares its choice dimensions — outcome coding, exposure
+coding and control sets — and every hypothesis is crossed with the shared
+weighting (pseudo-weight design effects, 1.0 = unweighted) and exclusion-rule
+dimensions. Preprocessing is done once: the prepared frame, derived codings,
+exclusion masks and pseudo weights are built before any fit. Specifications
+that resolve to the same model, outcome, design columns, analytic rows and
+weights share a single fit, and the unique fits are scheduled across a process
+pool. The result is one row per specification in a single table. A fit that
+fails (e.g. a singular design from collinear codings) does not stop the run:
+its specifications get NaN estimates, ``converged = False`` and the error in
+``fit_error``.
+
+The default grid can be replaced hypothesis-by-hypothesis with a YAML file of
+the same shape as ``DEFAULT_GRID`` (``--grid``).
+
+Usage
+-----
+python analysis/code/multiverse.py \
+  --config config/agent_config.yaml \
+  --hypothesis all \
+  --workers 4 \
+  --output outputs/spec_curve.csv
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import itertools
+import json
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable
+
+import numpy as np
+import pandas as pd
+import yaml
+
+import run_models
+from pattern_compression import (
+    compress_design,
+    fit_compressed_logit,
+    fit_compressed_ols,
+    fit_compressed_ordered,
+)
+from pseudo_weight_sensitivity import generate_weights
+
+MODELS = ("ordered_logit", "ols", "logit")
+
+H1_CONTROLS = ["selfage", "biomale", "gendermale", "cis", "classchild_score"]
+H2_CONTROLS = [
+    "selfage",
+    "biomale",
+    "gendermale",
+    "classcurrent_score",
+    "classteen_score",
+    "mentalillness",
+]
+H3_CONTROLS = ["selfage", "biomale", "gendermale", "siblingnumber", "classchild_score"]
+DEMOGRAPHICS = ["selfage", "biomale", "gendermale"]
+
+DEFAULT_GRID: dict[str, Any] = {
+    "hypotheses": {
+        "H1": {
+            "outcome": {
+                "ordinal": {"model": "ordered_logit", "column": "wz901dj_score"},
+                "continuous": {"model": "ols", "column": "wz901dj_score"},
+            },
+            "exposure": {
+                "ordinal": "externalreligion_ord",
+                "high_low": "external_high",
+            },
+            "controls": {
+                "pap": H1_CONTROLS,
+                "demographics": DEMOGRAPHICS,
+                "none": [],
+            },
+        },
+        "H2": {
+            "outcome": {
+                "ordinal": {"model": "ordered_logit", "column": "okq5xh8_ord"},
+                "continuous": {"model": "ols", "column": "okq5xh8_ord"},
+                "very_good_plus": {"model": "logit", "column": "health_very_good_plus"},
+            },
+            "exposure": {"score": "pqo6jmj_score"},
+            "controls": {
+                "pap": H2_CONTROLS,
+                "demographics": DEMOGRAPHICS,
+                "none": [],
+            },
+        },
+        "H3": {
+            "outcome": {
+                "continuous": {"model": "ols", "column": "self_love_score"},
+                "positive": {"model": "logit", "column": "self_love_positive"},
+            },
+            "exposure": {
+                "binary": "mds78zu_binary",
+                "score": "mds78zu_score",
+            },
+            "controls": {
+                "pap": H3_CONTROLS,
+                "pap_teen_abuse": ["v1k988q_binary"] + H3_CONTROLS,
+                "demographics": DEMOGRAPHICS,
+                "none": [],
+            },
+        },
+    },
+    "weighting": [1.0, 1.25, 1.5],
+    "exclusions": ["none", "no_perpetration"],
+}
+
+
+def keep_all(df: pd.DataFrame) -> pd.Series:
+    return pd.Series(True, index=df.index)
+
+
+def exclude_perpetrators(df: pd.DataFrame) -> pd.Series:
+    return ~(df["rapist"].notna() & (df["rapist"] > 0))
+
+
+EXCLUSION_RULES: dict[str, Callable[[pd.DataFrame], pd.Series]] = {
+    "none": keep_all,
+    "no_perpetration": exclude_perpetrators,
+}
+
+
+@dataclass(frozen=True)
+class Specification:
+    hypothesis_id: str
+    outcome_coding: str
+    exposure_coding: str
+    control_set: str
+    design_effect: float
+    exclusion: str
+
+
+@dataclass
+class FitTask:
+    model: str
+    endog: pd.Series
+    exog: pd.DataFrame
+    weights: np.ndarray | None
+    focal: str
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Run the H1–H3 specification curve.")
+    parser.add_argument(
+        "--config",
+        default="config/agent_config.yaml",
+        help="Agent configuration YAML path.",
+    )
+    parser.add_argument(
+        "--grid",
+        help="Optional YAML grid overriding DEFAULT_GRID entries.",
+    )
+    parser.add_argument(
+        "--hypothesis",
+        default="all",
+        help="Hypothesis ID (H1, H2, H3) or 'all'.",
+    )
+    parser.add_argument(
+        "--seed",
+        type=int,
+        help="Seed for pseudo weights (defaults to config value).",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Worker processes for the unique fits.",
+    )
+    parser.add_argument(
+        "--output",
+        default="outputs/spec_curve.csv",
+        help="Spec-curve table (.csv or .parquet); a JSON summary is written alongside.",
+    )
+    return parser.parse_args()
+
+
+def load_grid(path: str | None) -> dict[str, Any]:
+    grid = {
+        "hypotheses": dict(DEFAULT_GRID["hypotheses"]),
+        "weighting": list(DEFAULT_GRID["weighting"]),
+        "exclusions": list(DEFAULT_GRID["exclusions"]),
+    }
+    if path:
+        override = yaml.safe_load(run_models.resolve_repo_path(path).read_text()) or {}
+        if not isinstance(override, dict):
+            raise ValueError("Multiverse grid must be a YAML mapping.")
+        grid["hypotheses"].update(override.get("hypotheses", {}))
+        for key in ("weighting", "exclusions"):
+            if key in override:
+                grid[key] = list(override[key])
+    for hyp_id, choices in grid["hypotheses"].items():
+        for coding, outcome in choices["outcome"].items():
+            if outcome["model"] not in MODELS:
+                raise ValueError(
+                    f"{hyp_id} outcome '{coding}' uses unknown model '{outcome['model']}'; "
+                    f"choose from {MODELS}."
+                )
+    unknown = [rule for rule in grid["exclusions"] if rule not in EXCLUSION_RULES]
+    if unknown:
+        raise ValueError(f"Unknown exclusion rules {unknown}; choose from {list(EXCLUSION_RULES)}.")
+    return grid
+
+
+def derive_codings(prepared: pd.DataFrame) -> pd.DataFrame:
+    """Add the alternative outcome/exposure codings used by the grid."""
+    high_threshold = run_models.RELIGION_ORDER.index("very important")
+    very_good = run_models.HEALTH_ORDER.index("very good")
+    derived = prepared.copy()
+    derived["external_high"] = (derived["externalreligion_ord"] >= high_threshold).astype(float)
+    derived.loc[derived["externalreligion_ord"].isna(), "external_high"] = np.nan
+    derived["health_very_good_plus"] = (derived["okq5xh8_ord"] >= very_good).astype(float)
+    derived.loc[derived["okq5xh8_ord"].isna(), "health_very_good_plus"] = np.nan
+    derived["self_love_positive"] = (derived["self_love_score"] > 0).astype(float)
+    derived.loc[derived["self_love_score"].isna(), "self_love_positive"] = np.nan
+    return derived
+
+
+def build_weights(n: int, design_effects: list[float], seed: int) -> dict[float, np.ndarray | None]:
+    # Same draws as pseudo_weight_sensitivity scenario ``idx`` (seed + idx).
+    weights: dict[float, np.ndarray | None] = {}
+    for idx, deff in enumerate(design_effects):
+        if deff == 1.0:
+            weights[deff] = None
+        else:
+            rng = np.random.default_rng(seed + idx)
+            weights[deff] = generate_weights(n, deff, rng).to_numpy()
+    return weights
+
+
+def enumerate_specifications(grid: dict[str, Any], hyp_ids: list[str]) -> list[Specification]:
+    specs = []
+    for hyp_id in hyp_ids:
+        choices = grid["hypotheses"][hyp_id]
+        for outcome, exposure, controls, deff, exclusion in itertools.product(
+            choices["outcome"],
+            choices["exposure"],
+            choices["controls"],
+            grid["weighting"],
+            grid["exclusions"],
+        ):
+            specs.append(
+                Specification(hyp_id, outcome, exposure, controls, float(deff), exclusion)
+            )
+    return specs
+
+
+FAILED_FIT = {
+    "n_analytic": 0,
+    "estimate": np.nan,
+    "se": np.nan,
+    "ci_lower": np.nan,
+    "ci_upper": np.nan,
+    "p_value": np.nan,
+    "converged": False,
+}
+
+
+def fit_task(task: FitTask) -> dict[str, Any]:
+    try:
+        return {**_fit_focal(task), "fit_error": ""}
+    except (np.linalg.LinAlgError, ValueError, FloatingPointError) as exc:
+        return {
+            **FAILED_FIT,
+            "n_analytic": int(len(task.endog)),
+            "fit_error": f"{type(exc).__name__}: {exc}",
+        }
+
+
+def _fit_focal(task: FitTask) -> dict[str, Any]:
+    if task.model == "ordered_logit":
+        y_codes, _ = run_models.encode_ordered_outcome(task.endog)
+        result = fit_compressed_ordered(compress_design(y_codes, task.exog, task.weights))
+    else:
+        design = compress_design(task.endog, run_models.add_constant(task.exog), task.weights)
+        if task.model == "ols":
+            result = fit_compressed_ols(design, cov_type="HC1")
+        else:
+            result = fit_compressed_logit(design)
+    ci_low, ci_high = result.conf_int().loc[task.focal].tolist()
+    return {
+        "n_analytic": int(result.nobs),
+        "estimate": float(result.params[task.focal]),
+        "se": float(result.bse[task.focal]),
+        "ci_lower": float(ci_low),
+        "ci_upper": float(ci_high),
+        "p_value": float(result.pvalues[task.focal]),
+        "converged": bool(result.mle_retvals.get("converged", True)),
+    }
+
+
+def plan_fits(
+    data: pd.DataFrame,
+    grid: dict[str, Any],
+    specs: list[Specification],
+    weights: dict[float, np.ndarray | None],
+) -> tuple[list[dict[str, Any]], dict[str, FitTask]]:
+    """Resolve each specification to a fit key; identical sub-specifications share one task."""
+    exclusion_masks = {
+        rule: EXCLUSION_RULES[rule](data).to_numpy() for rule in grid["exclusions"]
+    }
+    rows: list[dict[str, Any]] = []
+    tasks: dict[str, FitTask] = {}
+    for spec_id, spec in enumerate(specs):
+        choices = grid["hypotheses"][spec.hypothesis_id]
+        outcome = choices["outcome"][spec.outcome_coding]
+        exposure = choices["exposure"][spec.exposure_coding]
+        controls, dropped = run_models.select_controls(data, choices["controls"][spec.control_set])
+        controls = [col for col in controls if col != exposure]
+        design_cols = [exposure] + controls
+        complete = data[[outcome["column"]] + design_cols].notna().all(axis=1).to_numpy()
+        mask = exclusion_masks[spec.exclusion] & complete
+        digest = hashlib.sha1(np.packbits(mask).tobytes()).hexdigest()
+        key_source = json.dumps(
+            [outcome["model"], outcome["column"], design_cols, digest, spec.design_effect]
+        )
+        fit_key = hashlib.sha1(key_source.encode()).hexdigest()[:12]
+        if fit_key not in tasks and mask.any():
+            row_weights = weights[spec.design_effect]
+            tasks[fit_key] = FitTask(
+                model=outcome["model"],
+                endog=data.loc[mask, outcome["column"]],
+                exog=data.loc[mask, design_cols].astype(float),
+                weights=None if row_weights is None else row_weights[mask],
+                focal=exposure,
+            )
+        rows.append(
+            {
+                "spec_id": spec_id,
+                "hypothesis_id": spec.hypothesis_id,
+                "outcome_coding": spec.outcome_coding,
+                "exposure_coding": spec.exposure_coding,
+                "control_set": spec.control_set,
+                "design_effect": spec.design_effect,
+                "exclusion": spec.exclusion,
+                "model": outcome["model"],
+                "outcome": outcome["column"],
+                "predictor": exposure,
+                "controls": ";".join(controls),
+                "dropped_controls": ";".join(dropped),
+                "fit_key": fit_key,
+            }
+        )
+    return rows, tasks
+
+
+def run_fits(tasks: dict[str, FitTask], workers: int) -> dict[str, dict[str, Any]]:
+    keys = list(tasks)
+    if workers > 1 and len(keys) > 1:
+        chunksize = max(1, len(keys) // (workers * 4))
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            fitted = list(pool.map(fit_task, [tasks[k] for k in keys], chunksize=chunksize))
+    else:
+        fitted = [fit_task(tasks[k]) for k in keys]
+    return dict(zip(keys, fitted))
+
+
+def assemble_curve(rows: list[dict[str, Any]], fits: dict[str, dict[str, Any]]) -> pd.DataFrame:
+    empty = {**FAILED_FIT, "fit_error": "no analytic rows"}
+    curve = pd.DataFrame([{**row, **fits.get(row["fit_key"], empty)} for row in rows])
+    curve["shared_fit_count"] = curve.groupby("fit_key")["spec_id"].transform("size")
+    # Estimates are only comparable within one model scale, so rank per (hypothesis, model).
+    curve["curve_rank"] = (
+        curve.groupby(["hypothesis_id", "model"])["estimate"].rank(method="first").astype("Int64")
+    )
+    return curve
+
+
+def summarize_curve(curve: pd.DataFrame) -> list[dict[str, Any]]:
+    summary = []
+    for (hyp_id, model), group in curve.groupby(["hypothesis_id", "model"]):
+        fitted = group.dropna(subset=["estimate"])
+        summary.append(
+            {
+                "hypothesis_id": hyp_id,
+                "model": model,
+                "n_specs": int(len(group)),
+                "n_unique_fits": int(group["fit_key"].nunique()),
+                "n_failed_specs": int((group["fit_error"] != "").sum()),
+                "median_estimate": float(fitted["estimate"].median()),
+                "share_positive": float((fitted["estimate"] > 0).mean()),
+                "share_p_below_05": float((fitted["p_value"] < 0.05).mean()),
+            }
+        )
+    return summary
+
+
+def write_curve(curve: pd.DataFrame, out_path: Path) -> None:
+    out_path.parent.mkdir(parents=True, exist_ok=True)
+    if out_path.suffix == ".parquet":
+        curve.to_parquet(out_path, index=False)
+    else:
+        curve.to_csv(out_path, index=False)
+
+
+def main() -> None:
+    args = parse_args()
+    config = run_models.load_config(args.config)
+    seed = args.seed if args.seed is not None else int(config.get("seed", 0))
+    grid = load_grid(args.grid)
+    hyp_ids = (
+        list(grid["hypotheses"]) if args.hypothesis.lower() == "all" else [args.hypothesis.upper()]
+    )
+    missing = [hyp_id for hyp_id in hyp_ids if hyp_id not in grid["hypotheses"]]
+    if missing:
+        raise ValueError(f"Hypotheses {missing} are not defined in the grid.")
+
+    dataset_path = run_models.resolve_dataset_path(config["paths"]["raw_data"])
+    codebook_path = run_models.resolve_repo_path(config["paths"]["codebook"])
+    alias_map = run_models.load_codebook_alias_map(codebook_path)
+    prepared = run_models.prepare_variables(
+        run_models.load_analysis_frame(dataset_path, alias_map)
+    )
+    data = derive_codings(prepared)
+    weights = build_weights(len(data), [float(d) for d in grid["weighting"]], seed)
+
+    specs = enumerate_specifications(grid, hyp_ids)
+    rows, tasks = plan_fits(data, grid, specs, weights)
+    print(f"{len(specs)} specifications resolve to {len(tasks)} unique fits.")
+    curve = assemble_curve(rows, run_fits(tasks, args.workers))
+    summary = summarize_curve(curve)
+
+    out_path = run_models.resolve_repo_path(args.output)
+    write_curve(curve, out_path)
+    out_path.with_suffix(".json").write_text(
+        json.dumps({"seed": seed, "grid": grid, "summary": summary}, indent=2)
+    )
+    for row in summary:
+        print(
+            f"{row['hypothesis_id']} ({row['model']}): {row['n_specs']} specs, "
+            f"median estimate {row['median_estimate']:.3f}, "
+            f"{row['share_p_below_05']:.0%} with p < .05, "
+            f"{row['n_failed_specs']} failed"
+        )
+    print(f"Saved specification curve to {out_path}")
+
+
+if __name__ == "__main__":
+    main()
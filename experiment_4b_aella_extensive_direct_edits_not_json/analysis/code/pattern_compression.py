@@ -0,0 +1,377 @@
+#!/usr/bin/env python3
+"""Sufficient-statistic compression for models with discrete covariates.
+
+The PAP models regress few-category outcomes on ordinal predictors and
+categorical controls, so the analytic rows collapse to far fewer unique
+(outcome, covariate pattern[, weight]) cells. ``compress_design`` builds those
+cells once with frequency counts; the ``fit_compressed_*`` solvers then work
+on cells only and reproduce the row-level fits exactly (same params, standard
+errors, llf and nobs as refitting the expanded rows). Row-level quantities are
+recovered with ``CompressedDesign.expand``.
+
+With probability weights the weight value is part of the cell key, so every
+row in a cell shares one weight and sandwich variances stay exact. As in
+statsmodels, "HC1" rescales only the OLS sandwich; for the likelihood models
+it equals "HC0".
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from typing import Any
+
+import numpy as np
+import pandas as pd
+from scipy import stats
+
+from ordinal_solver import CumulativeLinkModel, CumulativeLinkResults
+
+COV_TYPES = ("nonrobust", "HC0", "HC1")
+
+
+@dataclass
+class CompressedDesign:
+    """Unique (endog, exog[, weight]) cells with their row counts."""
+
+    endog: np.ndarray | pd.Series
+    exog: pd.DataFrame
+    counts: np.ndarray
+    weights: np.ndarray | None
+    inverse: np.ndarray
+    row_index: pd.Index
+
+    @property
+    def n_cells(self) -> int:
+        return int(self.counts.size)
+
+    @property
+    def nobs(self) -> int:
+        return int(self.counts.sum())
+
+    @property
+    def fit_weights(self) -> np.ndarray:
+        return self.counts if self.weights is None else self.counts * self.weights
+
+    def expand(self, cell_values: Any) -> pd.Series | pd.DataFrame:
+        """Map per-cell values (1-D or rows of a 2-D array) back onto the original rows."""
+
+        values = np.asarray(cell_values)[self.inverse]
+        if values.ndim == 1:
+            return pd.Series(values, index=self.row_index)
+        return pd.DataFrame(values, index=self.row_index)
+
+
+def compress_design(endog: Any, exog: pd.DataFrame, weights: Any = None) -> CompressedDesign:
+    """Group rows into unique (endog, exog, weight) cells with frequency counts."""
+
+    exog = pd.DataFrame(exog)
+    if isinstance(endog, pd.Series) and isinstance(endog.dtype, pd.CategoricalDtype):
+        # Keep the category order so ordered outcomes keep their labels.
+        endog_values = endog.cat.codes.to_numpy()
+        categories = endog.cat.categories
+    else:
+        endog_values = np.asarray(endog)
+        categories = None
+    endog_labels, endog_codes = np.unique(endog_values, return_inverse=True)
+    keys = [endog_codes.astype(float)[:, None], exog.to_numpy(dtype=float)]
+    if weights is not None:
+        keys.append(np.asarray(weights, dtype=float)[:, None])
+    cells, first, inverse, counts = np.unique(
+        np.hstack(keys), axis=0, return_index=True, return_inverse=True, return_counts=True
+    )
+    inverse = inverse.ravel()
+    cell_endog = endog_labels[cells[:, 0].astype(np.int64)]
+    if categories is not None:
+        cell_endog = pd.Series(
+            pd.Categorical.from_codes(cell_endog, categories=categories, ordered=True)
+        )
+    cell_exog = pd.DataFrame(
+        cells[:, 1 : 1 + exog.shape[1]], columns=exog.columns, index=exog.index[first]
+    )
+    return CompressedDesign(
+        endog=cell_endog,
+        exog=cell_exog,
+        counts=counts.astype(float),
+        weights=None if weights is None else cells[:, -1].copy(),
+        inverse=inverse,
+        row_index=exog.index,
+    )
+
+
+def pattern_counts(exog: Any) -> tuple[np.ndarray, np.ndarray]:
+    """Unique covariate rows and their frequencies, for averaging predictions."""
+
+    patterns, counts = np.unique(np.asarray(exog, dtype=float), axis=0, return_counts=True)
+    return patterns, counts.astype(float)
+
+
+def _constant_count(X: np.ndarray) -> int:
+    return int(np.any((np.ptp(X, axis=0) == 0) & np.any(X != 0, axis=0)))
+
+
+def _sandwich(bread: np.ndarray, scores: np.ndarray, meat_weights: np.ndarray) -> np.ndarray:
+    meat = (scores * meat_weights[:, None]).T @ scores
+    return bread @ meat @ bread
+
+
+@dataclass
+class CompressedFitResults:
+    """Fit output exposing the statsmodels attributes the analysis scripts read."""
+
+    params: pd.Series
+    cov: pd.DataFrame
+    nobs: int
+    df_model: float
+    df_resid: float
+    llf: float
+    cov_type: str
+    use_t: bool
+    mle_retvals: dict[str, Any] = field(default_factory=dict)
+    ssr: float = float("nan")
+    rsquared: float = float("nan")
+    rsquared_adj: float = float("nan")
+    llnull: float = float("nan")
+
+    @property
+    def prsquared(self) -> float:
+        return 1 - self.llf / self.llnull
+
+    def cov_params(self) -> pd.DataFrame:
+        return self.cov
+
+    @property
+    def bse(self) -> pd.Series:
+        return pd.Series(np.sqrt(np.clip(np.diag(self.cov.to_numpy()), 0.0, None)), index=self.params.index)
+
+    @property
+    def tvalues(self) -> pd.Series:
+        return self.params / self.bse
+
+    @property
+    def pvalues(self) -> pd.Series:
+        tvals = np.abs(self.tvalues.to_numpy())
+        if self.use_t:
+            return pd.Series(2 * stats.t.sf(tvals, self.df_resid), index=self.params.index)
+        return pd.Series(2 * stats.norm.sf(tvals), index=self.params.index)
+
+    def conf_int(self, alpha: float = 0.05) -> pd.DataFrame:
+        if self.use_t:
+            crit = stats.t.ppf(1 - alpha / 2, self.df_resid)
+        else:
+            crit = stats.norm.ppf(1 - alpha / 2)
+        return pd.DataFrame(
+            {0: self.params - crit * self.bse, 1: self.params + crit * self.bse},
+            index=self.params.index,
+        )
+
+
+def _check_cov_type(cov_type: str) -> None:
+    if cov_type not in COV_TYPES:
+        raise ValueError(f"Unsupported cov_type '{cov_type}'; choose from {COV_TYPES}.")
+
+
+def fit_compressed_ols(design: CompressedDesign, cov_type: str = "nonrobust") -> CompressedFitResults:
+    """OLS/WLS on cells; matches ``sm.OLS``/``sm.WLS`` fitted to the expanded rows."""
+
+    _check_cov_type(cov_type)
+    X = design.exog.to_numpy(dtype=float)
+    y = np.asarray(design.endog, dtype=float)
+    f = design.counts
+    w = np.ones_like(f) if design.weights is None else design.weights
+    fw = f * w
+    xtwx = (X * fw[:, None]).T @ X
+    bread = np.linalg.pinv(xtwx, hermitian=True)
+    params = bread @ (X.T @ (fw * y))
+    resid = y - X @ params
+    nobs = design.nobs
+    rank = np.linalg.matrix_rank(xtwx, hermitian=True)
+    df_resid = nobs - rank
+    ssr = float(fw @ resid**2)
+    if cov_type == "nonrobust":
+        cov = bread * (ssr / df_resid)
+    else:
+        cov = _sandwich(bread, X * resid[:, None], f * w**2)
+        if cov_type == "HC1":
+            cov *= nobs / df_resid
+    ybar = float(fw @ y / fw.sum())
+    centered_tss = float(fw @ (y - ybar) ** 2)
+    k_constant = _constant_count(X)
+    rsquared = 1 - ssr / centered_tss
+    llf = float(
+        -nobs / 2 * (np.log(2 * np.pi) + np.log(ssr / nobs) + 1)
+        + 0.5 * (f @ np.log(w))
+    )
+    names = list(design.exog.columns)
+    return CompressedFitResults(
+        params=pd.Series(params, index=names),
+        cov=pd.DataFrame(cov, index=names, columns=names),
+        nobs=nobs,
+        df_model=float(rank - k_constant),
+        df_resid=float(df_resid),
+        llf=llf,
+        cov_type=cov_type,
+        use_t=cov_type == "nonrobust",
+        ssr=ssr,
+        rsquared=rsquared,
+        rsquared_adj=1 - (nobs - k_constant) / df_resid * (1 - rsquared),
+    )
+
+
+def fit_compressed_logit(
+    design: CompressedDesign,
+    cov_type: str = "nonrobust",
+    start: np.ndarray | None = None,
+    maxiter: int = 50,
+    tol: float = 1e-8,
+) -> CompressedFitResults:
+    """Binary logit on cells by Newton-Raphson; matches ``sm.Logit`` on the expanded rows."""
+
+    _check_cov_type(cov_type)
+    X = design.exog.to_numpy(dtype=float)
+    y = np.asarray(design.endog, dtype=float)
+    fw = design.fit_weights
+    params = np.zeros(X.shape[1]) if start is None else np.array(start, dtype=float)
+    converged = False
+    iterations = 0
+    for iterations in range(1, maxiter + 1):
+        prob = 1.0 / (1.0 + np.exp(-(X @ params)))
+        score = X.T @ (fw * (y - prob))
+        hessian = (X * (fw * prob * (1.0 - prob))[:, None]).T @ X
+        step = np.linalg.solve(hessian, score)
+        params = params + step
+        if np.max(np.abs(step)) < tol:
+            converged = True
+            break
+    eta = X @ params
+    prob = 1.0 / (1.0 + np.exp(-eta))
+    hessian = (X * (fw * prob * (1.0 - prob))[:, None]).T @ X
+    bread = np.linalg.inv(hessian)
+    if cov_type == "nonrobust" and design.weights is None:
+        cov = bread
+    else:
+        meat_weights = design.counts * (1.0 if design.weights is None else design.weights**2)
+        cov = _sandwich(bread, X * (y - prob)[:, None], meat_weights)
+    llf = float(fw @ (y * eta - np.logaddexp(0.0, eta)))
+    ybar = float(fw @ y / fw.sum())
+    llnull = float(fw.sum() * (ybar * np.log(ybar) + (1 - ybar) * np.log(1 - ybar)))
+    names = list(design.exog.columns)
+    k_constant = _constant_count(X)
+    return CompressedFitResults(
+        params=pd.Series(params, index=names),
+        cov=pd.DataFrame(cov, index=names, columns=names),
+        nobs=design.nobs,
+        df_model=float(X.shape[1] - k_constant),
+        df_resid=float(design.nobs - X.shape[1]),
+        llf=llf,
+        cov_type="HC0" if cov_type == "nonrobust" and design.weights is not None else cov_type,
+        use_t=False,
+        mle_retvals={"converged": converged, "iterations": iterations},
+        llnull=llnull,
+    )
+
+
+def fit_compressed_mnlogit(
+    design: CompressedDesign,
+    cov_type: str = "nonrobust",
+    maxiter: int = 100,
+    tol: float = 1e-8,
+) -> CompressedFitResults:
+    """Multinomial logit on cells; the first outcome level is the reference.
+
+    Parameters are ordered equation by equation (all slopes for level 1, then
+    level 2, ...) and named ``"<level>:<column>"``, matching the row order of
+    ``MNLogit.cov_params()``; ``unstack_mnlogit_params`` gives the
+    columns-by-level layout of ``MNLogit.params``.
+    """
+
+    _check_cov_type(cov_type)
+    X = design.exog.to_numpy(dtype=float)
+    levels, codes = np.unique(np.asarray(design.endog), return_inverse=True)
+    n_eq = levels.size - 1
+    if n_eq < 1:
+        raise ValueError("Multinomial outcome needs at least two observed levels.")
+    k = X.shape[1]
+    Y = np.zeros((X.shape[0], n_eq))
+    nonbase = codes > 0
+    Y[np.flatnonzero(nonbase), codes[nonbase] - 1] = 1.0
+    fw = design.fit_weights
+
+    def probabilities(beta: np.ndarray) -> np.ndarray:
+        eta = np.column_stack([np.zeros(X.shape[0]), X @ beta.reshape(n_eq, k).T])
+        eta -= eta.max(axis=1, keepdims=True)
+        expd = np.exp(eta)
+        return (expd / expd.sum(axis=1, keepdims=True))[:, 1:]
+
+    def hessian_at(prob: np.ndarray) -> np.ndarray:
+        hess = np.empty((n_eq * k, n_eq * k))
+        for j in range(n_eq):
+            for m in range(j, n_eq):
+                cross = prob[:, j] * ((j == m) - prob[:, m])
+                block = (X * (fw * cross)[:, None]).T @ X
+                hess[j * k : (j + 1) * k, m * k : (m + 1) * k] = block
+                hess[m * k : (m + 1) * k, j * k : (j + 1) * k] = block.T
+        return hess
+
+    beta = np.zeros(n_eq * k)
+    converged = False
+    iterations = 0
+    for iterations in range(1, maxiter + 1):
+        prob = probabilities(beta)
+        score = ((Y - prob) * fw[:, None]).T @ X
+        step = np.linalg.solve(hessian_at(prob), score.ravel())
+        beta = beta + step
+        if np.max(np.abs(step)) < tol:
+            converged = True
+            break
+    prob = probabilities(beta)
+    bread = np.linalg.inv(hessian_at(prob))
+    if cov_type == "nonrobust" and design.weights is None:
+        cov = bread
+    else:
+        scores = ((Y - prob)[:, :, None] * X[:, None, :]).reshape(X.shape[0], n_eq * k)
+        meat_weights = design.counts * (1.0 if design.weights is None else design.weights**2)
+        cov = _sandwich(bread, scores, meat_weights)
+    base_prob = 1.0 - prob.sum(axis=1)
+    full_prob = np.column_stack([base_prob, prob])
+    llf = float(fw @ np.log(np.clip(full_prob[np.arange(X.shape[0]), codes], 1e-300, None)))
+    names = [f"{level}:{col}" for level in levels[1:] for col in design.exog.columns]
+    k_constant = _constant_count(X)
+    return CompressedFitResults(
+        params=pd.Series(beta, index=names),
+        cov=pd.DataFrame(cov, index=names, columns=names),
+        nobs=design.nobs,
+        df_model=float(n_eq * (k - k_constant)),
+        df_resid=float(design.nobs - beta.size),
+        llf=llf,
+        cov_type="HC0" if cov_type == "nonrobust" and design.weights is not None else cov_type,
+        use_t=False,
+        mle_retvals={"converged": converged, "iterations": iterations},
+    )
+
+
+def unstack_mnlogit_params(result: CompressedFitResults, values: pd.Series | None = None) -> pd.DataFrame:
+    """Reshape equation-major multinomial values into a columns-by-level table."""
+
+    values = result.params if values is None else values
+    split = values.index.str.split(":", n=1)
+    return pd.DataFrame(
+        {"level": split.str[0], "term": split.str[1], "value": values.to_numpy()}
+    ).pivot(index="term", columns="level", values="value")
+
+
+def fit_compressed_ordered(
+    design: CompressedDesign,
+    distr: str = "logit",
+    **fit_kwargs: Any,
+) -> CumulativeLinkResults:
+    """Cumulative-link fit on cells via ``CumulativeLinkModel`` with frequency counts."""
+
+    model = CumulativeLinkModel(
+        design.endog,
+        design.exog,
+        distr=distr,
+        weights=design.weights,
+        weight_type="freq" if design.weights is None else "prob",
+        freq_weights=design.counts,
+    )
+    return model.fit(**fit_kwargs)
@@ -1,5 +1,15 @@
 #!/usr/bin/env python3
-"""Estimate replicate-based uncertainty by sequentially omitting pseudo-clusters."""
+"""Estimate replicate-based uncertainty from pseudo-cluster replicate weights.
+
+Rows are assigned to ``--k`` pseudo-clusters and a replicate-weight design
+(JK1 delete-one-cluster by default; BRR, Fay or Rao–Wu bootstrap on request)
+is built once and saved with ``--replicate-weights``. Reruns reuse the file
+when it was built with the same method, k, seed and replicate options, and
+rebuild it otherwise. Each hypothesis is then re-estimated by reweighting its
+analytic rows (``run_models.replicate_effects``) rather than rebuilding the
+models per replicate, and the variance uses the method's own replicate
+scaling.
+"""
 
 from __future__ import annotations
 
@@ -15,6 +25,8 @@ import math
 import numpy as np
 import pandas as pd
 
+from replicate_weights import REPLICATE_METHODS, ReplicateWeights, build_replicates
+
 
 def parse_args() -> argparse.Namespace:
     parser = argparse.ArgumentParser(description="Pseudo-replicate estimator for H1–H3.")
@@ -27,7 +39,34 @@ def parse_args() -> argparse.Namespace:
         "--k",
         type=int,
         default=6,
-        help="Number of pseudo-clusters to cycle through for jackknife replicates.",
+        help="Number of pseudo-clusters the replicate weights are built from.",
+    )
+    parser.add_argument(
+        "--replicate-method",
+        choices=REPLICATE_METHODS,
+        default="jk1",
+        help="Replicate-weight scheme (BRR/Fay pair clusters into pseudo-strata; needs even k).",
+    )
+    parser.add_argument(
+        "--replicates",
+        type=int,
+        default=200,
+        help="Number of bootstrap replicates (ignored by jk1/brr/fay).",
+    )
+    parser.add_argument(
+        "--fay-rho",
+        type=float,
+        default=0.5,
+        help="Fay perturbation factor for --replicate-method fay.",
+    )
+    parser.add_argument(
+        "--replicate-weights",
+        help="NPZ file of replicate weights; loaded when present, otherwise written.",
+    )
+    parser.add_argument(
+        "--linearized",
+        action="store_true",
+        help="One-step score updates for ordinal replicates instead of warm-started refits.",
     )
     parser.add_argument(
         "--seed",
@@ -44,6 +83,16 @@ def parse_args() -> argparse.Namespace:
         default="analysis/results.csv",
         help="Confirmatory results CSV for base estimates.",
     )
+    parser.add_argument(
+        "--fit-cache",
+        help="Directory for the persistent model-fit cache (disabled when omitted).",
+    )
+    parser.add_argument(
+        "--fit-cache-max-mb",
+        type=float,
+        default=256.0,
+        help="Size cap for the fit cache; least recently used fits are evicted.",
+    )
     return parser.parse_args()
 
 
@@ -71,7 +120,7 @@ def build_context(
     prepared = module.prepare_variables(df_raw)
     base_command = (
         f"python analysis/code/pseudo_replicates.py --config {args.config} --seed {seed} "
-        f"--k {args.k} --output-dir {args.output_dir}"
+        f"--k {args.k} --replicate-method {args.replicate_method} --output-dir {args.output_dir}"
     )
     ctx = module.RunContext(
         seed=seed,
@@ -79,6 +128,7 @@ def build_context(
         dataset_path=dataset_path,
         config_path=module.resolve_repo_path(args.config),
         command=base_command,
+        fit_cache=module.build_fit_cache(args),
     )
     base_results = pd.read_csv(module.resolve_repo_path(args.results))
     base_lookup = {
@@ -102,63 +152,80 @@ def assign_clusters(prepared: pd.DataFrame, k: int) -> pd.Series:
     return (ranks.astype(int) % k).astype(int)
 
 
-def run_replicate(
+def load_or_build_replicates(
+    args: argparse.Namespace, clusters: pd.Series, seed: int
+) -> ReplicateWeights:
+    path = Path(args.replicate_weights) if args.replicate_weights else None
+    settings = {
+        "method": args.replicate_method,
+        "k": args.k,
+        "seed": seed,
+        "n_replicates": args.replicates,
+        "rho": args.fay_rho,
+    }
+    if path is not None and path.exists():
+        replicates = ReplicateWeights.load(path)
+        if replicates.settings == settings and replicates.factors.shape[0] == len(clusters):
+            return replicates
+        print(f"Rebuilding {path}: it was built with other replicate settings or analysis rows.")
+    replicates = build_replicates(
+        args.replicate_method,
+        clusters.to_numpy(),
+        n_replicates=args.replicates,
+        rho=args.fay_rho,
+        rng=np.random.default_rng(seed),
+    )
+    replicates.settings = settings
+    if path is not None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        replicates.save(path)
+    return replicates
+
+
+def replicate_hypothesis(
     module: ModuleType,
-    prepared: pd.DataFrame,
+    problem: Any,
     ctx: module.RunContext,
-    cluster_id: int,
-    k: int,
+    replicates: ReplicateWeights,
+    row_positions: pd.Series,
+    linearized: bool,
 ) -> dict[str, Any]:
-    subset = prepared[prepared["_cluster_id"] != cluster_id].copy()
-    command = f"{ctx.command} --replicate {cluster_id + 1} (k={k})"
-    local_ctx = module.RunContext(
-        seed=ctx.seed,
-        draws=ctx.draws,
-        dataset_path=ctx.dataset_path,
-        config_path=ctx.config_path,
-        command=command,
-    )
-    results = {
-        "H1": module.run_h1(subset, local_ctx),
-        "H2": module.run_h2(subset, local_ctx),
-        "H3": module.run_h3(subset, local_ctx),
-    }
+    result = problem.fit(ctx)
+    row_factors = replicates.rows(row_positions.loc[problem.data.index].to_numpy())
+    estimates = module.replicate_effects(problem, result, row_factors, linearized=linearized)
+    if problem.ordinal:
+        exog_low, exog_high, pattern_weights, _ = problem.contrast_patterns()
+        full_estimate, _ = module.contrast_effect(
+            result, exog_low, exog_high, problem.values, pattern_weights
+        )
+    else:
+        full_estimate = float(result.params[problem.term])
     return {
-        "cluster_left_out": int(cluster_id),
-        "n_used": int(len(subset)),
-        "results": results,
-        "command": command,
+        "full_estimate": float(full_estimate),
+        "estimates": estimates,
+        "n_used": (row_factors > 0).sum(axis=0),
     }
 
 
 def aggregate_replicates(
-    replicate_outputs: list[dict[str, Any]],
+    replicate_estimates: dict[str, dict[str, Any]],
     base_estimates: dict[str, float],
-    k: int,
+    replicates: ReplicateWeights,
 ) -> dict[str, Any]:
     hypothesis_data: dict[str, dict[str, Any]] = {}
-    for hyp in base_estimates:
+    for hyp, content in replicate_estimates.items():
+        estimates = content["estimates"]
+        var_rep = float(replicates.variance(content["full_estimate"], estimates))
         hypothesis_data[hyp] = {
-            "base_estimate": base_estimates[hyp],
-            "replicates": [],
+            "base_estimate": base_estimates.get(hyp, content["full_estimate"]),
+            "full_sample_estimate": content["full_estimate"],
+            "replicates": [
+                {"replicate": r + 1, "estimate": float(estimate), "n_used": int(n_used)}
+                for r, (estimate, n_used) in enumerate(zip(estimates, content["n_used"]))
+            ],
+            "replicate_variance": var_rep,
+            "replicate_se": math.sqrt(var_rep),
         }
-    for rep in replicate_outputs:
-        for hyp, result in rep["results"].items():
-            hypothesis_data[hyp]["replicates"].append(
-                {
-                    "replicate": rep["cluster_left_out"] + 1,
-                    "cluster_left_out": rep["cluster_left_out"],
-                    "estimate": result["effect"]["estimate"],
-                    "n_used": rep["n_used"],
-                    "command": result["command"],
-                }
-            )
-    for hyp, content in hypothesis_data.items():
-        estimates = [row["estimate"] for row in content["replicates"]]
-        theta_bar = content["base_estimate"]
-        var_rep = sum((x - theta_bar) ** 2 for x in estimates) / max(k - 1, 1)
-        hypothesis_data[hyp]["replicate_variance"] = var_rep
-        hypothesis_data[hyp]["replicate_se"] = math.sqrt(var_rep)
     return hypothesis_data
 
 
@@ -175,21 +242,36 @@ def main() -> None:
         .rename("size")
         .to_dict()
     )
-    replicate_outputs = []
-    for cluster in sorted(prepared["_cluster_id"].unique()):
-        replicate_outputs.append(run_replicate(module, prepared, ctx, cluster, args.k))
-    aggregated = aggregate_replicates(replicate_outputs, base_estimates, args.k)
+    replicates = load_or_build_replicates(args, prepared["_cluster_id"], ctx.seed)
+    row_positions = pd.Series(np.arange(len(prepared)), index=prepared.index)
+    problems = {
+        "H1": module.h1_problem(prepared),
+        "H2": module.h2_problem(prepared),
+        "H3": module.h3_problem(prepared),
+    }
+    replicate_estimates = {
+        hyp: replicate_hypothesis(
+            module, problem, ctx, replicates, row_positions, args.linearized
+        )
+        for hyp, problem in problems.items()
+    }
+    aggregated = aggregate_replicates(replicate_estimates, base_estimates, replicates)
     payload = {
         "seed": ctx.seed,
         "k": args.k,
+        "replicate_method": replicates.method,
+        "n_replicates": replicates.n_replicates,
+        "variance_scale": replicates.scale,
+        "fay_rho": replicates.rho,
         "cluster_summary": {int(k): int(v) for k, v in cluster_summary.items()},
-        "replicate_outputs": replicate_outputs,
         "aggregated": aggregated,
         "command": ctx.command,
     }
     output_path = outputs_dir / "sensitivity_replicates_summary.json"
     output_path.write_text(json.dumps(payload, indent=2))
     print(f"Wrote pseudo-replicates summary to {output_path}")
+    if ctx.fit_cache is not None:
+        print(ctx.fit_cache.summary())
 
 
 if __name__ == "__main__":
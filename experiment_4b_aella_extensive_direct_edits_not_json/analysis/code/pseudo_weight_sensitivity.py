@@ -40,11 +40,35 @@ def parse_args() -> argparse.Namespace:
         default=400,
         help="Number of draws for simulation-based summaries (H1).",
     )
+    parser.add_argument(
+        "--effect-method",
+        nargs="+",
+        default=["delta"],
+        help="Ordinal contrast uncertainty: delta, draws or both (HYP=method overrides).",
+    )
     parser.add_argument(
         "--output-dir",
         default="outputs/sensitivity_pseudo_weights",
         help="Directory for pseudo-weight JSON summaries.",
     )
+    parser.add_argument(
+        "--fit-cache",
+        help="Directory for the persistent model-fit cache (disabled when omitted).",
+    )
+    parser.add_argument(
+        "--fit-cache-max-mb",
+        type=float,
+        default=256.0,
+        help="Size cap for the fit cache; least recently used fits are evicted.",
+    )
+    parser.add_argument(
+        "--cluster-col",
+        help="Prepared column of cluster IDs for linearized covariance of the weighted fits.",
+    )
+    parser.add_argument(
+        "--strata-col",
+        help="Prepared column of stratum IDs for linearized covariance.",
+    )
     return parser.parse_args()
 
 
@@ -73,7 +97,10 @@ def build_context(
     base_command = (
         f"python analysis/code/pseudo_weight_sensitivity.py --config {args.config} "
         f"--seed {seed} --draws {args.draws} --output-dir {args.output_dir} "
+        f"--effect-method {' '.join(args.effect_method)} "
         f"--scenarios {' '.join(str(s) for s in args.scenarios)}"
+        + (f" --cluster-col {args.cluster_col}" if args.cluster_col else "")
+        + (f" --strata-col {args.strata_col}" if args.strata_col else "")
     )
     ctx = module.RunContext(
         seed=seed,
@@ -81,6 +108,10 @@ def build_context(
         dataset_path=dataset_path,
         config_path=module.resolve_repo_path(args.config),
         command=base_command,
+        fit_cache=module.build_fit_cache(args),
+        effect_methods=module.parse_effect_methods(args.effect_method),
+        cluster_col=args.cluster_col,
+        strata_col=args.strata_col,
     )
     outputs_dir = module.resolve_repo_path(Path(args.output_dir))
     outputs_dir.mkdir(parents=True, exist_ok=True)
@@ -132,6 +163,10 @@ def run_scenario(
         dataset_path=base_ctx.dataset_path,
         config_path=base_ctx.config_path,
         command=scenario_command,
+        fit_cache=base_ctx.fit_cache,
+        effect_methods=base_ctx.effect_methods,
+        cluster_col=base_ctx.cluster_col,
+        strata_col=base_ctx.strata_col,
     )
     results = []
     runners = [
@@ -169,6 +204,8 @@ def main() -> None:
     prepared, ctx, outputs_dir = build_context(args, module)
     for idx, deff in enumerate(args.scenarios):
         run_scenario(module, prepared, ctx, outputs_dir, idx, deff)
+    if ctx.fit_cache is not None:
+        print(ctx.fit_cache.summary())
 
 
 if __name__ == "__main__":
@@ -14,8 +14,10 @@ import sys
 
 import numpy as np
 import pandas as pd
-import statsmodels.api as sm
-from statsmodels.miscmodels.ordinal_model import OrderedModel, OrderedResults
+
+from fit_cache import cached_fit
+from ordinal_solver import CumulativeLinkResults
+from pattern_compression import compress_design, fit_compressed_ols, fit_compressed_ordered
 
 RUN_MODELS: ModuleType | None = None
 
@@ -38,11 +40,27 @@ def parse_args() -> argparse.Namespace:
         default=400,
         help="Draws for simulation-based effect summaries (H1 only).",
     )
+    parser.add_argument(
+        "--effect-method",
+        nargs="+",
+        default=["delta"],
+        help="Ordinal contrast uncertainty: delta, draws or both (HYP=method overrides).",
+    )
     parser.add_argument(
         "--output-dir",
         default="outputs/robustness_loop052",
         help="Directory to write each robustness JSON.",
     )
+    parser.add_argument(
+        "--fit-cache",
+        help="Directory for the persistent model-fit cache (disabled when omitted).",
+    )
+    parser.add_argument(
+        "--fit-cache-max-mb",
+        type=float,
+        default=256.0,
+        help="Size cap for the fit cache; least recently used fits are evicted.",
+    )
     return parser.parse_args()
 
 
@@ -86,33 +104,35 @@ def build_context(
         config_path=module.resolve_repo_path(args.config),
         command=(
             f"python analysis/code/robustness_checks.py --config {args.config} "
-            f"--seed {seed} --draws {args.draws} --output-dir {args.output_dir}"
+            f"--seed {seed} --draws {args.draws} --output-dir {args.output_dir} "
+            f"--effect-method {' '.join(args.effect_method)}"
         ),
+        fit_cache=module.build_fit_cache(args),
+        effect_methods=module.parse_effect_methods(args.effect_method),
     )
     return module, prepared, ctx
 
 
 def ordered_marginal_effect(
-    result: OrderedResults,
-    params: np.ndarray,
+    result: CumulativeLinkResults,
     exog_low: np.ndarray,
     exog_high: np.ndarray,
     levels: list[float],
     ctx: Any,
-) -> dict[str, float]:
+    hypothesis_id: str,
+    pattern_weights: np.ndarray | None = None,
+) -> dict[str, Any]:
     assert RUN_MODELS is not None
-    base = RUN_MODELS.expected_score_difference(
-        result, params, exog_low, exog_high, levels
-    )
-    rng = np.random.default_rng(ctx.seed + 303)
-    sim_params = RUN_MODELS.simulate_from_cov(
-        rng, result.params.values, result.cov_params(), ctx.draws
+    return RUN_MODELS.summarize_contrast(
+        result,
+        exog_low,
+        exog_high,
+        levels,
+        pattern_weights,
+        ctx.effect_method(hypothesis_id),
+        np.random.default_rng(ctx.seed + 303),
+        ctx.draws,
     )
-    samples = [
-        RUN_MODELS.expected_score_difference(result, p, exog_low, exog_high, levels)
-        for p in sim_params
-    ]
-    return RUN_MODELS.summarize_effect(samples, base)
 
 
 def run_h1_high_low(prepared: pd.DataFrame, ctx: Any) -> dict[str, Any]:
@@ -137,19 +157,12 @@ def run_h1_high_low(prepared: pd.DataFrame, ctx: Any) -> dict[str, Any]:
     )
     y_codes, levels = RUN_MODELS.encode_ordered_outcome(data["wz901dj_score"])
     exog = data[["external_high"] + available_controls].copy()
-    model = OrderedModel(y_codes, exog, distr="logit")
-    result = model.fit(method="bfgs", disp=False, maxiter=1000)
-    exog_low = exog.copy()
-    exog_low["external_high"] = 0
-    exog_high = exog.copy()
-    exog_high["external_high"] = 1
+    result = cached_fit(fit_compressed_ordered, compress_design(y_codes, exog), ctx.fit_cache)
+    exog_low, exog_high, pattern_weights = RUN_MODELS.contrast_patterns(
+        exog, "external_high", 0, 1
+    )
     effect_summary = ordered_marginal_effect(
-        result,
-        result.params.values,
-        exog_low.to_numpy(),
-        exog_high.to_numpy(),
-        levels,
-        ctx,
+        result, exog_low, exog_high, levels, ctx, "H1_high_low", pattern_weights
     )
     diagnostics = {
         "nobs": int(result.nobs),
@@ -202,8 +215,9 @@ def run_h2_continuous(prepared: pd.DataFrame, ctx: Any) -> dict[str, Any]:
     y = data["okq5xh8_ord"]
     design_cols = ["pqo6jmj_score"] + available_controls
     exog = RUN_MODELS.add_constant(data[design_cols])
-    model = sm.OLS(y, exog)
-    result = model.fit(cov_type="HC1")
+    result = cached_fit(
+        fit_compressed_ols, compress_design(y, exog), ctx.fit_cache, cov_type="HC1"
+    )
     coef = float(result.params["pqo6jmj_score"])
     se = float(result.bse["pqo6jmj_score"])
     ci_low, ci_high = result.conf_int().loc["pqo6jmj_score"].tolist()
@@ -257,8 +271,9 @@ def run_h3_teen_abuse(prepared: pd.DataFrame, ctx: Any) -> dict[str, Any]:
     y = data["self_love_score"]
     design_cols = ["mds78zu_binary", "v1k988q_binary"] + available_controls
     exog = RUN_MODELS.add_constant(data[design_cols])
-    model = sm.OLS(y, exog)
-    result = model.fit(cov_type="HC1")
+    result = cached_fit(
+        fit_compressed_ols, compress_design(y, exog), ctx.fit_cache, cov_type="HC1"
+    )
     coef = float(result.params["mds78zu_binary"])
     se = float(result.bse["mds78zu_binary"])
     ci_low, ci_high = result.conf_int().loc["mds78zu_binary"].tolist()
@@ -315,8 +330,9 @@ def run_h3_no_perpetration(prepared: pd.DataFrame, ctx: Any) -> dict[str, Any]:
     y = data["self_love_score"]
     design_cols = ["mds78zu_binary"] + available_controls
     exog = RUN_MODELS.add_constant(data[design_cols])
-    model = sm.OLS(y, exog)
-    result = model.fit(cov_type="HC1")
+    result = cached_fit(
+        fit_compressed_ols, compress_design(y, exog), ctx.fit_cache, cov_type="HC1"
+    )
     coef = float(result.params["mds78zu_binary"])
     se = float(result.bse["mds78zu_binary"])
     ci_low, ci_high = result.conf_int().loc["mds78zu_binary"].tolist()
@@ -371,6 +387,8 @@ def main() -> None:
         path = output_dir / f"{label}.json"
         path.write_text(json.dumps(summary, indent=2))
         print(f"Saved {label} summary to {path}")
+    if ctx.fit_cache is not None:
+        print(ctx.fit_cache.summary())
 
 
 if __name__ == "__main__":
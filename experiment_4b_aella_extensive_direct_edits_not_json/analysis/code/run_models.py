@@ -15,7 +15,17 @@ python analysis/code/run_models.py \
   --config config/agent_config.yaml \
   --seed 20251016 \
   --output-prefix outputs/run_models_loop003 \
-  --draws 400
+  --draws 400 \
+  --effect-method delta H2=both
+
+Ordinal contrasts use analytic delta-method intervals by default; ``draws``
+reproduces the simulation-based intervals and ``both`` reports the delta
+interval with the simulation summary alongside for validation. Methods can be
+set per hypothesis with ``H1=draws``-style entries.
+
+``--cluster-col``/``--strata-col`` replace the model-based (or HC) covariance
+with the Taylor-linearized sandwich over the analytic rows, with PSUs taken
+from the cluster column and nested in the strata.
 """
 
 from __future__ import annotations
@@ -23,16 +33,33 @@ from __future__ import annotations
 import argparse
 import json
 import math
-from dataclasses import dataclass
+from dataclasses import dataclass, field, replace
 from pathlib import Path
 from typing import Any, Dict, Iterable, List, Sequence
 
 import numpy as np
 import pandas as pd
 import statsmodels.api as sm
-from statsmodels.miscmodels.ordinal_model import OrderedModel, OrderedResults
 import yaml
 
+from fit_cache import FitCache, cached_fit
+from linearization import cumulative_link_cov, linear_terms, sandwich_cov
+from marginal_effects import (
+    EFFECT_METHODS,
+    category_indicator,
+    contrast_effect,
+    delta_method_summary,
+)
+from ordinal_solver import CumulativeLinkResults
+from pattern_compression import (
+    CompressedDesign,
+    compress_design,
+    fit_compressed_ols,
+    fit_compressed_ordered,
+    pattern_counts,
+)
+from replicate_weights import collapse_rows, replicate_cumulative_link, replicate_wls
+
 REPO_ROOT = Path(__file__).resolve().parents[2]
 
 RELIGION_ORDER = [
@@ -75,6 +102,96 @@ class RunContext:
     dataset_path: Path
     config_path: Path
     command: str
+    fit_cache: FitCache | None = None
+    effect_methods: dict[str, str] = field(default_factory=dict)
+    cluster_col: str | None = None
+    strata_col: str | None = None
+
+    def effect_method(self, hypothesis_id: str) -> str:
+        return self.effect_methods.get(hypothesis_id, self.effect_methods.get("default", "delta"))
+
+    def design_columns(self) -> list[str]:
+        return [col for col in (self.cluster_col, self.strata_col) if col]
+
+    def linearization_diagnostics(self) -> dict[str, Any]:
+        if not self.design_columns():
+            return {}
+        return {"cov_type": "linearized", "cluster_col": self.cluster_col, "strata_col": self.strata_col}
+
+
+@dataclass
+class HypothesisProblem:
+    """Analytic rows, compressed design and effect definition for one hypothesis.
+
+    Built once per sample so the full fit, the reported effect and replicate
+    re-estimates (``replicate_effects``) share the same cells and patterns.
+    Ordinal problems carry the row-level design and contrast; linear ones
+    report the coefficient of ``term``.
+    """
+
+    hypothesis_id: str
+    data: pd.DataFrame
+    design: CompressedDesign
+    term: str
+    controls: list[str]
+    dropped_controls: list[str]
+    exog: pd.DataFrame | None = None
+    levels: list[float] | None = None
+    values: np.ndarray | None = None
+    low_value: Any = None
+    high_value: Any = None
+    _patterns: tuple[np.ndarray, ...] | None = field(default=None, repr=False)
+
+    @property
+    def ordinal(self) -> bool:
+        return self.levels is not None
+
+    def fit(self, ctx: RunContext) -> Any:
+        if self.ordinal:
+            result = cached_fit(fit_compressed_ordered, self.design, ctx.fit_cache)
+        else:
+            result = cached_fit(fit_compressed_ols, self.design, ctx.fit_cache, cov_type="HC1")
+        if ctx.design_columns():
+            result = self.linearized(result, ctx)
+        return result
+
+    def linearized(self, result: Any, ctx: RunContext) -> Any:
+        """Swap the fit's covariance for the cluster/strata sandwich over analytic rows."""
+        clusters = self.data[ctx.cluster_col].to_numpy() if ctx.cluster_col else None
+        strata = self.data[ctx.strata_col].to_numpy() if ctx.strata_col else None
+        design = self.design
+        names = list(result.params.index)
+        if self.ordinal:
+            cov = cumulative_link_cov(result, clusters, strata, inverse=design.inverse)
+            return replace(
+                result, cov=pd.DataFrame(cov, index=names, columns=names), cov_type="linearized"
+            )
+        X = design.exog.to_numpy(dtype=float)
+        scores, _ = linear_terms(X, design.endog, result.params.to_numpy(), design.weights)
+        # Cells stand for repeated rows, so the bread uses counts times weights.
+        bread = np.linalg.pinv((X * design.fit_weights[:, None]).T @ X, hermitian=True)
+        cov = sandwich_cov(bread, scores[design.inverse], clusters, strata)
+        return replace(
+            result,
+            cov=pd.DataFrame(cov, index=names, columns=names),
+            cov_type="linearized",
+            use_t=False,
+        )
+
+    def contrast_patterns(self) -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """``contrast_patterns`` output plus each row's pattern index."""
+        if self._patterns is None:
+            exog_low = self.exog.copy()
+            exog_low[self.term] = self.low_value
+            patterns_low, inverse = np.unique(
+                exog_low.to_numpy(dtype=float), axis=0, return_inverse=True
+            )
+            inverse = inverse.ravel()
+            patterns_high = patterns_low.copy()
+            patterns_high[:, self.exog.columns.get_loc(self.term)] = self.high_value
+            counts = np.bincount(inverse, minlength=len(patterns_low)).astype(float)
+            self._patterns = (patterns_low, patterns_high, counts, inverse)
+        return self._patterns
 
 
 def parse_args() -> argparse.Namespace:
@@ -105,9 +222,64 @@ def parse_args() -> argparse.Namespace:
         default=400,
         help="Number of parameter draws for simulation-based CIs.",
     )
+    add_effect_method_args(parser)
+    add_fit_cache_args(parser)
+    add_design_args(parser)
     return parser.parse_args()
 
 
+def add_design_args(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument(
+        "--cluster-col",
+        help="Prepared column of PSU/cluster IDs for linearized (sandwich) covariance.",
+    )
+    parser.add_argument(
+        "--strata-col",
+        help="Prepared column of stratum IDs for linearized covariance.",
+    )
+
+
+def add_effect_method_args(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument(
+        "--effect-method",
+        nargs="+",
+        default=["delta"],
+        help=(
+            f"Uncertainty for ordinal contrasts ({', '.join(EFFECT_METHODS)}); "
+            "use HYP=method entries (e.g. H2=draws) to override per hypothesis."
+        ),
+    )
+
+
+def parse_effect_methods(values: Sequence[str]) -> dict[str, str]:
+    methods: dict[str, str] = {}
+    for value in values:
+        hypothesis_id, _, method = value.rpartition("=")
+        if method not in EFFECT_METHODS:
+            raise ValueError(f"Unknown effect method '{method}'; choose from {EFFECT_METHODS}.")
+        methods[hypothesis_id or "default"] = method
+    return methods
+
+
+def add_fit_cache_args(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument(
+        "--fit-cache",
+        help="Directory for the persistent model-fit cache (disabled when omitted).",
+    )
+    parser.add_argument(
+        "--fit-cache-max-mb",
+        type=float,
+        default=256.0,
+        help="Size cap for the fit cache; least recently used fits are evicted.",
+    )
+
+
+def build_fit_cache(args: argparse.Namespace) -> FitCache | None:
+    if not args.fit_cache:
+        return None
+    return FitCache(resolve_repo_path(args.fit_cache), int(args.fit_cache_max_mb * 1024**2))
+
+
 def load_config(path: Path) -> dict[str, Any]:
     resolved = resolve_repo_path(path)
     data = yaml.safe_load(resolved.read_text())
@@ -290,33 +462,20 @@ def simulate_from_cov(
         return rng.multivariate_normal(mean=mean, cov=np.diag(diag), size=draws)
 
 
-def expected_score_difference(
-    result: OrderedResults,
-    params: np.ndarray,
-    exog_low: np.ndarray,
-    exog_high: np.ndarray,
-    levels: list[float],
-) -> float:
-    probs_low = result.model.predict(params, exog_low, which="prob")
-    probs_high = result.model.predict(params, exog_high, which="prob")
-    level_values = np.asarray(levels, dtype=float)
-    expected_low = np.dot(probs_low, level_values)
-    expected_high = np.dot(probs_high, level_values)
-    return float(np.mean(expected_high - expected_low))
-
-
-def probability_difference(
-    result: OrderedResults,
-    params: np.ndarray,
-    exog_low: np.ndarray,
-    exog_high: np.ndarray,
-    target_codes: Sequence[int],
-) -> float:
-    probs_low = result.model.predict(params, exog_low, which="prob")
-    probs_high = result.model.predict(params, exog_high, which="prob")
-    low_total = probs_low[:, target_codes].sum(axis=1)
-    high_total = probs_high[:, target_codes].sum(axis=1)
-    return float(np.mean(high_total - low_total))
+def contrast_patterns(
+    exog: pd.DataFrame, column: str, low_value: float, high_value: float
+) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Unique covariate patterns with `column` set to each contrast value.
+
+    Averaging predictions over the patterns with their row counts equals the
+    row-level average, so effect computations scale with distinct patterns.
+    """
+    exog_low = exog.copy()
+    exog_low[column] = low_value
+    patterns_low, counts = pattern_counts(exog_low)
+    patterns_high = patterns_low.copy()
+    patterns_high[:, exog.columns.get_loc(column)] = high_value
+    return patterns_low, patterns_high, counts
 
 
 def summarize_effect(samples: list[float], point_estimate: float) -> dict[str, float]:
@@ -335,9 +494,71 @@ def summarize_effect(samples: list[float], point_estimate: float) -> dict[str, f
     }
 
 
-def run_h1(
-    df: pd.DataFrame, ctx: RunContext, weight_col: str | None = None
+def summarize_contrast(
+    result: CumulativeLinkResults,
+    exog_low: np.ndarray,
+    exog_high: np.ndarray,
+    values: Sequence[float],
+    pattern_weights: np.ndarray | None,
+    method: str,
+    rng: np.random.Generator,
+    draws: int,
 ) -> dict[str, Any]:
+    """Contrast of ``sum_k v_k p_k`` with delta-method and/or simulation intervals."""
+    if method not in EFFECT_METHODS:
+        raise ValueError(f"Unknown effect method '{method}'; choose from {EFFECT_METHODS}.")
+    estimate, gradient = contrast_effect(result, exog_low, exog_high, values, pattern_weights)
+    samples: list[float] = []
+    if method in ("draws", "both"):
+        sim_params = simulate_from_cov(rng, result.params.values, result.cov_params(), draws)
+        samples = [
+            contrast_effect(result, exog_low, exog_high, values, pattern_weights, params)[0]
+            for params in sim_params
+        ]
+    if method == "draws":
+        summary: dict[str, Any] = summarize_effect(samples, estimate)
+    else:
+        summary = delta_method_summary(estimate, gradient, result.cov_params().to_numpy())
+    if method == "both":
+        summary["draws_validation"] = summarize_effect(samples, estimate)
+    summary["method"] = method
+    return summary
+
+
+def replicate_effects(
+    problem: HypothesisProblem,
+    result: Any,
+    row_factors: np.ndarray,
+    linearized: bool = False,
+) -> np.ndarray:
+    """Effect re-estimated under each column of replicate multipliers (n_analytic, R).
+
+    Multipliers are summed into the compressed cells (and, for contrasts, the
+    averaging patterns) once; the contrast values stay at their full-sample
+    definition.
+    """
+    design = problem.design
+    cell_factors = collapse_rows(design.inverse, design.n_cells, row_factors)
+    if not problem.ordinal:
+        cell_weights = cell_factors if design.weights is None else cell_factors * design.weights[:, None]
+        params = replicate_wls(design.exog.to_numpy(dtype=float), design.endog, cell_weights)
+        return params[:, design.exog.columns.get_loc(problem.term)]
+    params = replicate_cumulative_link(design, result, cell_factors, linearized=linearized)
+    exog_low, exog_high, _, inverse = problem.contrast_patterns()
+    pattern_weights = collapse_rows(inverse, len(exog_low), row_factors)
+    return np.array(
+        [
+            contrast_effect(
+                result, exog_low, exog_high, problem.values, pattern_weights[:, r], params[r]
+            )[0]
+            for r in range(params.shape[0])
+        ]
+    )
+
+
+def h1_problem(
+    df: pd.DataFrame, weight_col: str | None = None, design_cols: Sequence[str] = ()
+) -> HypothesisProblem:
     base_cols = ["wz901dj_score", "externalreligion_ord"]
     control_candidates = [
         "selfage",
@@ -348,8 +569,9 @@ def run_h1(
     ]
     available_controls, dropped_controls = select_controls(df, control_candidates)
     cols = base_cols + available_controls
-    if weight_col and weight_col not in cols:
-        cols.append(weight_col)
+    for extra in [weight_col, *design_cols]:
+        if extra and extra not in cols:
+            cols.append(extra)
     data = df[cols].dropna()
     if data.empty:
         raise ValueError("H1 data frame is empty after dropping missing values.")
@@ -357,35 +579,44 @@ def run_h1(
     design_cols = ["externalreligion_ord"] + available_controls
     exog = data[design_cols].copy()
     weights = extract_weights(data, weight_col)
-    model_kwargs: dict[str, Any] = {"distr": "logit"}
-    if weights is not None:
-        model_kwargs["weights"] = weights
-    model = OrderedModel(y_codes, exog, **model_kwargs)
-    result = model.fit(method="bfgs", disp=False, maxiter=1000)
-    exog_low = exog.copy()
-    exog_high = exog.copy()
-    low_value = RELIGION_ORDER.index("not at all important")
-    high_value = RELIGION_ORDER.index("very important")
-    exog_low["externalreligion_ord"] = low_value
-    exog_high["externalreligion_ord"] = high_value
-    exog_low_mat = exog_low.to_numpy()
-    exog_high_mat = exog_high.to_numpy()
-    base_effect = expected_score_difference(
-        result, result.params.values, exog_low_mat, exog_high_mat, levels
+    return HypothesisProblem(
+        hypothesis_id="H1",
+        data=data,
+        design=compress_design(y_codes, exog, weights),
+        term="externalreligion_ord",
+        controls=available_controls,
+        dropped_controls=dropped_controls,
+        exog=exog,
+        levels=levels,
+        values=np.asarray(levels, dtype=float),
+        low_value=RELIGION_ORDER.index("not at all important"),
+        high_value=RELIGION_ORDER.index("very important"),
+    )
+
+
+def run_h1(
+    df: pd.DataFrame, ctx: RunContext, weight_col: str | None = None
+) -> dict[str, Any]:
+    problem = h1_problem(df, weight_col, ctx.design_columns())
+    result = problem.fit(ctx)
+    exog_low_mat, exog_high_mat, pattern_weights, _ = problem.contrast_patterns()
+    effect_summary = summarize_contrast(
+        result,
+        exog_low_mat,
+        exog_high_mat,
+        problem.values,
+        pattern_weights,
+        ctx.effect_method("H1"),
+        np.random.default_rng(ctx.seed + 101),
+        ctx.draws,
     )
-    rng = np.random.default_rng(ctx.seed + 101)
-    sim_params = simulate_from_cov(rng, result.params.values, result.cov_params(), ctx.draws)
-    samples = [
-        expected_score_difference(result, params, exog_low_mat, exog_high_mat, levels)
-        for params in sim_params
-    ]
-    effect_summary = summarize_effect(samples, base_effect)
     diagnostics = {
         "nobs": int(result.nobs),
         "llf": float(result.llf),
         "aic": float(result.aic),
         "bic": float(result.bic),
         "converged": bool(result.mle_retvals.get("converged", True)),
+        **ctx.linearization_diagnostics(),
     }
     return {
         "hypothesis_id": "H1",
@@ -393,13 +624,13 @@ def run_h1(
         "model": "ordered_logit",
         "outcome": "wz901dj_score",
         "predictor": "externalreligion_ord",
-        "controls": available_controls,
-        "dropped_controls": dropped_controls,
+        "controls": problem.controls,
+        "dropped_controls": problem.dropped_controls,
         "n_analytic": diagnostics["nobs"],
         "effect_metric": "ΔE[depression score | religion very important vs not important]",
         "effect": effect_summary,
-        "contrast_values": {"low": low_value, "high": high_value},
-        "ordered_levels": levels,
+        "contrast_values": {"low": problem.low_value, "high": problem.high_value},
+        "ordered_levels": problem.levels,
         "parameters": result.params.to_dict(),
         "diagnostics": diagnostics,
         "seed": ctx.seed,
@@ -410,9 +641,9 @@ def run_h1(
     }
 
 
-def run_h2(
-    df: pd.DataFrame, ctx: RunContext, weight_col: str | None = None
-) -> dict[str, Any]:
+def h2_problem(
+    df: pd.DataFrame, weight_col: str | None = None, design_cols: Sequence[str] = ()
+) -> HypothesisProblem:
     base_cols = ["okq5xh8_ord", "pqo6jmj_score"]
     control_candidates = [
         "selfage",
@@ -424,8 +655,9 @@ def run_h2(
     ]
     available_controls, dropped_controls = select_controls(df, control_candidates)
     cols = base_cols + available_controls
-    if weight_col and weight_col not in cols:
-        cols.append(weight_col)
+    for extra in [weight_col, *design_cols]:
+        if extra and extra not in cols:
+            cols.append(extra)
     data = df[cols].dropna()
     if data.empty:
         raise ValueError("H2 data frame is empty after dropping missing values.")
@@ -433,40 +665,49 @@ def run_h2(
     design_cols = ["pqo6jmj_score"] + available_controls
     exog = data[design_cols].copy()
     weights = extract_weights(data, weight_col)
-    model_kwargs: dict[str, Any] = {"distr": "logit"}
-    if weights is not None:
-        model_kwargs["weights"] = weights
-    model = OrderedModel(y_codes, exog, **model_kwargs)
-    result = model.fit(method="bfgs", disp=False, maxiter=1000)
     observed_vals = sorted(set(data["pqo6jmj_score"].dropna().unique()))
     q1 = data["pqo6jmj_score"].quantile(0.25)
     q3 = data["pqo6jmj_score"].quantile(0.75)
-    low_value = nearest_value(q1, observed_vals)
-    high_value = nearest_value(q3, observed_vals)
-    exog_low = exog.copy()
-    exog_high = exog.copy()
-    exog_low["pqo6jmj_score"] = low_value
-    exog_high["pqo6jmj_score"] = high_value
-    exog_low_mat = exog_low.to_numpy()
-    exog_high_mat = exog_high.to_numpy()
     threshold_code = HEALTH_ORDER.index("very good")
     high_cat_codes = [idx for idx, value in enumerate(levels) if value >= threshold_code]
-    base_effect = probability_difference(
-        result, result.params.values, exog_low_mat, exog_high_mat, high_cat_codes
+    return HypothesisProblem(
+        hypothesis_id="H2",
+        data=data,
+        design=compress_design(y_codes, exog, weights),
+        term="pqo6jmj_score",
+        controls=available_controls,
+        dropped_controls=dropped_controls,
+        exog=exog,
+        levels=levels,
+        values=category_indicator(len(levels), high_cat_codes),
+        low_value=nearest_value(q1, observed_vals),
+        high_value=nearest_value(q3, observed_vals),
+    )
+
+
+def run_h2(
+    df: pd.DataFrame, ctx: RunContext, weight_col: str | None = None
+) -> dict[str, Any]:
+    problem = h2_problem(df, weight_col, ctx.design_columns())
+    result = problem.fit(ctx)
+    exog_low_mat, exog_high_mat, pattern_weights, _ = problem.contrast_patterns()
+    effect_summary = summarize_contrast(
+        result,
+        exog_low_mat,
+        exog_high_mat,
+        problem.values,
+        pattern_weights,
+        ctx.effect_method("H2"),
+        np.random.default_rng(ctx.seed + 202),
+        ctx.draws,
     )
-    rng = np.random.default_rng(ctx.seed + 202)
-    sim_params = simulate_from_cov(rng, result.params.values, result.cov_params(), ctx.draws)
-    samples = [
-        probability_difference(result, params, exog_low_mat, exog_high_mat, high_cat_codes)
-        for params in sim_params
-    ]
-    effect_summary = summarize_effect(samples, base_effect)
     diagnostics = {
         "nobs": int(result.nobs),
         "llf": float(result.llf),
         "aic": float(result.aic),
         "bic": float(result.bic),
         "converged": bool(result.mle_retvals.get("converged", True)),
+        **ctx.linearization_diagnostics(),
     }
     return {
         "hypothesis_id": "H2",
@@ -474,13 +715,13 @@ def run_h2(
         "model": "ordered_logit",
         "outcome": "okq5xh8_ord",
         "predictor": "pqo6jmj_score",
-        "controls": available_controls,
-        "dropped_controls": dropped_controls,
+        "controls": problem.controls,
+        "dropped_controls": problem.dropped_controls,
         "n_analytic": diagnostics["nobs"],
         "effect_metric": "ΔPr(health ∈ {very good, excellent}) | guidance Q3 vs Q1",
         "effect": effect_summary,
-        "contrast_values": {"low": low_value, "high": high_value},
-        "ordered_levels": levels,
+        "contrast_values": {"low": problem.low_value, "high": problem.high_value},
+        "ordered_levels": problem.levels,
         "parameters": result.params.to_dict(),
         "diagnostics": diagnostics,
         "seed": ctx.seed,
@@ -497,40 +738,41 @@ def nearest_value(target: float, observed: Sequence[float]) -> float:
     return float(arr[idx])
 
 
-def run_h3(
-    df: pd.DataFrame, ctx: RunContext, weight_col: str | None = None
-) -> dict[str, Any]:
-    cols = [
-        "self_love_score",
-        "mds78zu_binary",
-        "selfage",
-        "biomale",
-        "gendermale",
-        "siblingnumber",
-        "classchild_score",
-    ]
-    if weight_col and weight_col not in cols:
-        cols.append(weight_col)
+H3_CONTROLS = [
+    "selfage",
+    "biomale",
+    "gendermale",
+    "siblingnumber",
+    "classchild_score",
+]
+
+
+def h3_problem(
+    df: pd.DataFrame, weight_col: str | None = None, design_cols: Sequence[str] = ()
+) -> HypothesisProblem:
+    cols = ["self_love_score", "mds78zu_binary", *H3_CONTROLS]
+    for extra in [weight_col, *design_cols]:
+        if extra and extra not in cols:
+            cols.append(extra)
     data = df[cols].dropna()
     y = data["self_love_score"]
-    exog = add_constant(
-        data[
-            [
-                "mds78zu_binary",
-                "selfage",
-                "biomale",
-                "gendermale",
-                "siblingnumber",
-                "classchild_score",
-            ]
-        ]
-    )
+    exog = add_constant(data[["mds78zu_binary", *H3_CONTROLS]])
     weights = extract_weights(data, weight_col)
-    if weights is not None:
-        model = sm.WLS(y, exog, weights=weights)
-    else:
-        model = sm.OLS(y, exog)
-    result = model.fit(cov_type="HC1")
+    return HypothesisProblem(
+        hypothesis_id="H3",
+        data=data,
+        design=compress_design(y, exog, weights),
+        term="mds78zu_binary",
+        controls=list(H3_CONTROLS),
+        dropped_controls=[],
+    )
+
+
+def run_h3(
+    df: pd.DataFrame, ctx: RunContext, weight_col: str | None = None
+) -> dict[str, Any]:
+    problem = h3_problem(df, weight_col, ctx.design_columns())
+    result = problem.fit(ctx)
     coef = float(result.params["mds78zu_binary"])
     se = float(result.bse["mds78zu_binary"])
     ci_low, ci_high = result.conf_int().loc["mds78zu_binary"].tolist()
@@ -538,6 +780,7 @@ def run_h3(
         "nobs": int(result.nobs),
         "r_squared": float(result.rsquared),
         "adj_r_squared": float(result.rsquared_adj),
+        **ctx.linearization_diagnostics(),
     }
     return {
         "hypothesis_id": "H3",
@@ -545,13 +788,7 @@ def run_h3(
         "model": "linear_regression",
         "outcome": "self_love_score",
         "predictor": "mds78zu_binary",
-        "controls": [
-            "selfage",
-            "biomale",
-            "gendermale",
-            "siblingnumber",
-            "classchild_score",
-        ],
+        "controls": problem.controls,
         "n_analytic": diagnostics["nobs"],
         "effect_metric": "Mean difference in self-love score (abuse vs none)",
         "effect": {
@@ -591,7 +828,14 @@ def main():
         config_path=resolve_repo_path(args.config),
         command="python analysis/code/run_models.py "
         f"--hypothesis {args.hypothesis} --config {args.config} "
-        f"--seed {seed} --draws {args.draws} --output-prefix {args.output_prefix}",
+        f"--seed {seed} --draws {args.draws} --output-prefix {args.output_prefix} "
+        f"--effect-method {' '.join(args.effect_method)}"
+        + (f" --cluster-col {args.cluster_col}" if args.cluster_col else "")
+        + (f" --strata-col {args.strata_col}" if args.strata_col else ""),
+        fit_cache=build_fit_cache(args),
+        effect_methods=parse_effect_methods(args.effect_method),
+        cluster_col=args.cluster_col,
+        strata_col=args.strata_col,
     )
     outputs_dir = resolve_repo_path(Path(args.output_prefix).parent)
     outputs_dir.mkdir(parents=True, exist_ok=True)
@@ -606,6 +850,8 @@ def main():
         out_path.parent.mkdir(parents=True, exist_ok=True)
         out_path.write_text(json.dumps(result, indent=2))
         print(f"Saved {hyp_id} results to {out_path}")
+    if ctx.fit_cache is not None:
+        print(ctx.fit_cache.summary())
 
 
 if __name__ == "__main__":
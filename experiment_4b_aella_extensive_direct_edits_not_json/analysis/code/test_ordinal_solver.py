@@ -0,0 +1,75 @@
+"""Checks of the native cumulative-link solver against statsmodels OrderedModel.
+
+Run with ``python -m pytest analysis/code/test_ordinal_solver.py`` from the
+experiment root.
+"""
+
+from __future__ import annotations
+
+import numpy as np
+import pandas as pd
+import pytest
+from statsmodels.miscmodels.ordinal_model import OrderedModel
+
+from ordinal_solver import CumulativeLinkModel
+
+
+@pytest.fixture(scope="module")
+def ordinal_data() -> tuple[pd.Series, pd.DataFrame]:
+    rng = np.random.default_rng(20251016)
+    n = 1500
+    exog = pd.DataFrame(
+        {
+            "focal": rng.integers(0, 4, n).astype(float),
+            "selfage": rng.normal(35.0, 10.0, n),
+            "biomale": rng.integers(0, 2, n).astype(float),
+        }
+    )
+    latent = 0.4 * exog["focal"] + 0.02 * exog["selfage"] - 0.3 * exog["biomale"] + rng.logistic(size=n)
+    endog = pd.Series(np.digitize(latent, [0.5, 1.5, 2.5, 3.5]), name="y")
+    return endog, exog
+
+
+@pytest.mark.parametrize("distr", ["logit", "probit"])
+@pytest.mark.parametrize("weight_type", ["freq", "prob"])
+def test_unweighted_fit_matches_ordered_model(ordinal_data, distr, weight_type):
+    endog, exog = ordinal_data
+    reference = OrderedModel(endog, exog, distr=distr).fit(method="bfgs", maxiter=5000, gtol=1e-6, disp=False)
+    native = CumulativeLinkModel(endog, exog, distr=distr, weight_type=weight_type).fit()
+
+    assert native.cov_type == "nonrobust"
+    np.testing.assert_allclose(native.params.to_numpy(), reference.params.to_numpy(), rtol=1e-5, atol=1e-6)
+    np.testing.assert_allclose(native.bse.to_numpy(), reference.bse.to_numpy(), rtol=1e-3)
+    assert native.llf == pytest.approx(reference.llf, rel=1e-9)
+
+
+def test_hc1_matches_hc0(ordinal_data):
+    endog, exog = ordinal_data
+    model = CumulativeLinkModel(endog, exog)
+    hc0 = model.fit(cov_type="HC0").bse.to_numpy()
+    hc1 = model.fit(cov_type="HC1").bse.to_numpy()
+    np.testing.assert_allclose(hc1, hc0, rtol=1e-12)
+
+
+def test_probability_weights_use_sandwich(ordinal_data):
+    endog, exog = ordinal_data
+    weights = np.random.default_rng(7).uniform(0.5, 2.0, len(endog))
+    fit = CumulativeLinkModel(endog, exog, weights=weights, weight_type="prob").fit()
+    assert fit.cov_type == "HC0"
+
+
+def test_stalled_line_search_is_not_converged(ordinal_data, monkeypatch):
+    endog, exog = ordinal_data
+    model = CumulativeLinkModel(endog, exog)
+    loglike = model.loglike_natural
+    calls = {"n": 0}
+
+    def worse_after_start(beta, cutpoints):
+        # Every trial point looks worse than the start, so step-halving runs out.
+        calls["n"] += 1
+        return loglike(beta, cutpoints) if calls["n"] == 1 else -np.inf
+
+    monkeypatch.setattr(model, "loglike_natural", worse_after_start)
+    fit = model.fit()
+    assert not fit.converged
+    assert fit.mle_retvals["score_max"] > 1e-8
@@ -0,0 +1,273 @@
+#!/usr/bin/env python3
+"""Batched least squares for many outcomes that share one design matrix.
+
+Specifications with the same predictors and covariates differ only in their
+outcome column and in which rows survive listwise deletion. Stacking the
+outcomes as columns of one matrix lets the whole grid be solved together:
+outcomes are grouped by complete-case mask, the cross-products X'WX for every
+distinct mask come from a single product with the per-row outer products, and
+each X'WX is factorized once (Cholesky, with a pseudo-inverse fallback for
+rank-deficient designs) and reused for every outcome in its group.
+``fit_weight_sweep`` extends the same product to a matrix of alternative
+weight vectors, one X'WX per (weight vector, mask) pair.
+
+Heteroskedasticity-consistent covariances follow statsmodels' WLS/OLS
+definitions (HC1 scales HC0 by nobs / df_resid; HC3 divides squared residuals
+by (1 - leverage)^2). "linearized" is the design-based sandwich from
+``linearization`` with optional clusters and strata. As in statsmodels,
+non-robust fits use t inference on the residual degrees of freedom and robust
+covariance types use normal inference.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+
+import numpy as np
+from scipy import stats
+
+from linearization import sandwich_cov
+
+COV_TYPES = ("nonrobust", "HC0", "HC1", "HC3", "linearized")
+
+
+@dataclass
+class BatchedLinearFit:
+    """Per-outcome least-squares output; leading axis is the outcome column."""
+
+    params: np.ndarray
+    cov_params: np.ndarray
+    nobs: np.ndarray
+    df_resid: np.ndarray
+    sigma2: np.ndarray
+    cov_type: str
+
+    @property
+    def bse(self) -> np.ndarray:
+        diag = np.diagonal(self.cov_params, axis1=1, axis2=2)
+        return np.sqrt(np.clip(diag, 0.0, None))
+
+    @property
+    def tvalues(self) -> np.ndarray:
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return self.params / self.bse
+
+    @property
+    def use_t(self) -> bool:
+        return self.cov_type == "nonrobust"
+
+    def _reference(self):
+        return stats.t(self.df_resid[:, None]) if self.use_t else stats.norm()
+
+    @property
+    def pvalues(self) -> np.ndarray:
+        return 2.0 * self._reference().sf(np.abs(self.tvalues))
+
+    def conf_int(self, alpha: float = 0.05) -> np.ndarray:
+        """Return an (n_outcomes, n_params, 2) array of t- or normal-based limits."""
+
+        half = self._reference().ppf(1.0 - alpha / 2.0) * self.bse
+        return np.stack([self.params - half, self.params + half], axis=-1)
+
+
+def complete_case_masks(
+    X: np.ndarray, Y: np.ndarray, weights: np.ndarray | None = None
+) -> np.ndarray:
+    """Listwise-deletion mask of shape (n_rows, n_outcomes)."""
+
+    X = np.asarray(X, dtype=float)
+    Y = np.asarray(Y, dtype=float).reshape(X.shape[0], -1)
+    shared = np.isfinite(X).all(axis=1)
+    if weights is not None:
+        shared &= np.isfinite(np.asarray(weights, dtype=float))
+    return shared[:, None] & np.isfinite(Y)
+
+
+def _invert_crossproduct(xtwx: np.ndarray, tol: float = 1e-7) -> tuple[np.ndarray, int]:
+    p = xtwx.shape[0]
+    try:
+        chol = np.linalg.cholesky(xtwx)
+    except np.linalg.LinAlgError:
+        chol = None
+    if chol is not None:
+        diag = np.diag(chol)
+        if diag.min() > tol * diag.max():
+            chol_inv = np.linalg.solve(chol, np.eye(p))
+            return chol_inv.T @ chol_inv, p
+    return np.linalg.pinv(xtwx, hermitian=True), int(np.linalg.matrix_rank(xtwx, hermitian=True))
+
+
+def _solve_pattern(
+    X: np.ndarray,
+    Y_g: np.ndarray,
+    pattern: np.ndarray,
+    w_g: np.ndarray,
+    xtwx: np.ndarray,
+    outer: np.ndarray,
+    cov_type: str,
+    clusters: np.ndarray | None,
+    strata: np.ndarray | None,
+) -> tuple[np.ndarray, np.ndarray, int, int, np.ndarray]:
+    """Coefficients (p, k) and covariances (k, p, p) for outcomes sharing rows and weights."""
+
+    p = X.shape[1]
+    xtwx_inv, rank = _invert_crossproduct(xtwx)
+    beta = xtwx_inv @ (X.T @ (w_g[:, None] * Y_g))
+    resid = Y_g - X @ beta
+    n_g = int(pattern.sum())
+    dof = max(n_g - rank, 1)
+    rss = w_g @ (resid * resid)
+    if cov_type == "nonrobust":
+        return beta, (rss / dof)[:, None, None] * xtwx_inv, n_g, dof, rss / dof
+    if cov_type == "linearized":
+        rows = np.flatnonzero(pattern)
+        scores = X[rows, None, :] * (w_g[rows, None] * resid[rows])[:, :, None]
+        cov = sandwich_cov(
+            xtwx_inv,
+            scores,
+            None if clusters is None else np.asarray(clusters)[rows],
+            None if strata is None else np.asarray(strata)[rows],
+        )
+        return beta, cov, n_g, dof, rss / dof
+    scores = (w_g * w_g)[:, None] * resid * resid
+    if cov_type == "HC3":
+        leverage = w_g * np.einsum("ip,pq,iq->i", X, xtwx_inv, X)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            scores = np.where(pattern[:, None], scores / (1.0 - leverage)[:, None] ** 2, 0.0)
+    meat = (scores.T @ outer).reshape(-1, p, p)
+    cov = xtwx_inv @ meat @ xtwx_inv
+    if cov_type == "HC1":
+        cov *= n_g / dof
+    return beta, cov, n_g, dof, rss / dof
+
+
+def _fit_patterns(
+    X: np.ndarray,
+    Y: np.ndarray,
+    patterns: np.ndarray,
+    group: np.ndarray,
+    pattern_weights: np.ndarray,
+    xtwx: np.ndarray,
+    outer: np.ndarray,
+    cov_type: str,
+    clusters: np.ndarray | None,
+    strata: np.ndarray | None,
+) -> BatchedLinearFit:
+    """Solve every mask pattern from its precomputed X'WX and collect one fit.
+
+    ``pattern_weights[g]`` are the row weights of pattern g (zero outside it)
+    and ``xtwx[g]`` the matching cross-product; outcome j uses pattern ``group[j]``.
+    """
+
+    m, p = Y.shape[1], X.shape[1]
+    params = np.empty((m, p))
+    cov_params = np.empty((m, p, p))
+    nobs = np.empty(m, dtype=int)
+    df_resid = np.empty(m)
+    sigma2 = np.empty(m)
+    for g, pattern in enumerate(patterns):
+        cols = np.flatnonzero(group == g)
+        beta, cov, n_g, dof, s2 = _solve_pattern(
+            X, Y[:, cols], pattern, pattern_weights[g], xtwx[g], outer, cov_type, clusters, strata
+        )
+        params[cols] = beta.T
+        cov_params[cols] = cov
+        nobs[cols] = n_g
+        df_resid[cols] = dof
+        sigma2[cols] = s2
+    return BatchedLinearFit(
+        params=params,
+        cov_params=cov_params,
+        nobs=nobs,
+        df_resid=df_resid,
+        sigma2=sigma2,
+        cov_type=cov_type,
+    )
+
+
+def fit_batched_ols(
+    X: np.ndarray,
+    Y: np.ndarray,
+    weights: np.ndarray | None = None,
+    mask: np.ndarray | None = None,
+    cov_type: str = "HC1",
+    clusters: np.ndarray | None = None,
+    strata: np.ndarray | None = None,
+) -> BatchedLinearFit:
+    """Fit ``Y[:, j] ~ X`` by (weighted) least squares for every column j.
+
+    ``X`` must already contain the intercept column. ``weights`` are analytic
+    WLS weights shared by all outcomes; ``mask`` is an (n_rows, n_outcomes)
+    boolean array of rows used by each outcome and defaults to
+    ``complete_case_masks``. Each column reproduces ``sm.WLS`` (or ``sm.OLS``)
+    fitted on its own complete cases with the requested ``cov_type``.
+    ``clusters`` and ``strata`` (one label per row) are used by
+    ``cov_type="linearized"`` only.
+    """
+
+    if cov_type not in COV_TYPES:
+        raise ValueError(f"Unknown cov_type '{cov_type}'; choose from {COV_TYPES}.")
+    X = np.asarray(X, dtype=float)
+    n, p = X.shape
+    Y = np.asarray(Y, dtype=float).reshape(n, -1)
+    m = Y.shape[1]
+    w = np.ones(n) if weights is None else np.asarray(weights, dtype=float)
+    if mask is None:
+        mask = complete_case_masks(X, Y, w)
+    mask = np.broadcast_to(np.asarray(mask, dtype=bool).reshape(n, -1), (n, m))
+
+    X = np.where(np.isfinite(X), X, 0.0)
+    Y = np.where(np.isfinite(Y), Y, 0.0)
+    w = np.where(np.isfinite(w), w, 0.0)
+    patterns, group = np.unique(mask.T, axis=0, return_inverse=True)
+    group = np.asarray(group).ravel()
+    pattern_weights = patterns * w
+    outer = (X[:, :, None] * X[:, None, :]).reshape(n, p * p)
+    xtwx_all = (pattern_weights @ outer).reshape(-1, p, p)
+    return _fit_patterns(X, Y, patterns, group, pattern_weights, xtwx_all, outer, cov_type, clusters, strata)
+
+
+def fit_weight_sweep(
+    X: np.ndarray,
+    Y: np.ndarray,
+    weight_matrix: np.ndarray,
+    mask: np.ndarray | None = None,
+    cov_type: str = "HC3",
+    clusters: np.ndarray | None = None,
+    strata: np.ndarray | None = None,
+) -> list[BatchedLinearFit]:
+    """``fit_batched_ols`` for every column of an (n_rows, n_weights) weight matrix.
+
+    The per-row outer products are formed once and X'WX for every
+    (weight vector, complete-case pattern) pair comes from one product, so a
+    whole family of alternative weights costs one pass over the design.
+    Rows with a non-finite weight in any column are dropped for all columns.
+    """
+
+    if cov_type not in COV_TYPES:
+        raise ValueError(f"Unknown cov_type '{cov_type}'; choose from {COV_TYPES}.")
+    X = np.asarray(X, dtype=float)
+    n, p = X.shape
+    Y = np.asarray(Y, dtype=float).reshape(n, -1)
+    m = Y.shape[1]
+    W = np.asarray(weight_matrix, dtype=float).reshape(n, -1)
+    if mask is None:
+        mask = complete_case_masks(X, Y) & np.isfinite(W).all(axis=1)[:, None]
+    mask = np.broadcast_to(np.asarray(mask, dtype=bool).reshape(n, -1), (n, m))
+
+    X = np.where(np.isfinite(X), X, 0.0)
+    Y = np.where(np.isfinite(Y), Y, 0.0)
+    W = np.where(np.isfinite(W), W, 0.0)
+    patterns, group = np.unique(mask.T, axis=0, return_inverse=True)
+    group = np.asarray(group).ravel()
+    n_weights, n_patterns = W.shape[1], patterns.shape[0]
+    pattern_weights = patterns[None, :, :] * W.T[:, None, :]
+    outer = (X[:, :, None] * X[:, None, :]).reshape(n, p * p)
+    xtwx_all = (pattern_weights.reshape(-1, n) @ outer).reshape(n_weights, n_patterns, p, p)
+
+    return [
+        _fit_patterns(
+            X, Y, patterns, group, pattern_weights[k], xtwx_all[k], outer, cov_type, clusters, strata
+        )
+        for k in range(n_weights)
+    ]
@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""Taylor-linearization (sandwich) covariance with strata and clusters.
+
+For an estimator solving ``sum_i u_i(theta) = 0`` with weighted score
+contributions ``u_i`` and Hessian ``H``, the design-based covariance is
+``B M B'`` with ``B = (-H)^-1`` and
+
+    M = sum_h n_h / (n_h - 1) sum_c (z_hc - zbar_h)(z_hc - zbar_h)',
+
+where ``z_hc`` are the score totals of PSU (cluster) c in stratum h and
+``zbar_h`` their stratum mean. Without clusters every row is its own PSU;
+without strata all PSUs share one stratum. PSU totals for every score column
+come from one sparse product, and the scores may carry a leading batch axis
+(several outcomes sharing a design), so a whole family of fits is handled in
+one pass. Scores may also be a scipy sparse matrix; only the PSU totals are
+densified. Strata with a single PSU contribute nothing, as with the survey
+default of treating them as certainty units.
+
+The ``*_terms`` helpers return ``(scores, bread)`` for OLS/WLS, logit and
+cumulative-link fits; ``cumulative_link_cov`` maps the result back to
+OrderedModel's parameter layout.
+"""
+
+from __future__ import annotations
+
+from typing import Any
+
+import numpy as np
+from scipy import sparse, special
+
+
+def _codes(values: Any) -> np.ndarray:
+    return np.unique(np.asarray(values), return_inverse=True)[1].ravel()
+
+
+def stratified_meat(
+    scores: np.ndarray,
+    clusters: Any = None,
+    strata: Any = None,
+) -> np.ndarray:
+    """Between-PSU score covariance for scores shaped (n, p) or (n, m, p)."""
+
+    is_sparse = sparse.issparse(scores)
+    scores = sparse.csr_matrix(scores, dtype=float) if is_sparse else np.asarray(scores, dtype=float)
+    n = scores.shape[0]
+    flat = scores if is_sparse else scores.reshape(n, -1)
+    stratum = np.zeros(n, dtype=np.int64) if strata is None else _codes(strata)
+    cluster = np.arange(n) if clusters is None else _codes(clusters)
+    # PSUs are nested in strata: the same cluster label in two strata is two PSUs.
+    psu_keys, psu = np.unique(np.column_stack([stratum, cluster]), axis=0, return_inverse=True)
+    psu = psu.ravel()
+    n_psu = psu_keys.shape[0]
+    indicator = sparse.csr_matrix((np.ones(n), (psu, np.arange(n))), shape=(n_psu, n))
+    totals = (indicator @ flat).toarray() if is_sparse else np.asarray(indicator @ flat)
+    psu_stratum = psu_keys[:, 0]
+    n_h = np.bincount(psu_stratum).astype(float)
+    stratum_means = np.zeros((n_h.size, flat.shape[1]))
+    np.add.at(stratum_means, psu_stratum, totals)
+    stratum_means /= n_h[:, None]
+    deviations = totals - stratum_means[psu_stratum]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        factor = np.where(n_h > 1, n_h / (n_h - 1), 0.0)[psu_stratum]
+    deviations = deviations.reshape((n_psu,) + scores.shape[1:])
+    if scores.ndim == 2:
+        return (deviations * factor[:, None]).T @ deviations
+    return np.einsum("g,gmp,gmq->mpq", factor, deviations, deviations)
+
+
+def sandwich_cov(
+    bread: np.ndarray,
+    scores: np.ndarray,
+    clusters: Any = None,
+    strata: Any = None,
+) -> np.ndarray:
+    """``bread @ meat @ bread'``; ``bread`` may be batched like ``scores``."""
+
+    meat = stratified_meat(scores, clusters, strata)
+    return bread @ meat @ np.swapaxes(bread, -1, -2)
+
+
+def linear_terms(
+    X: np.ndarray, y: np.ndarray, params: np.ndarray, weights: Any = None
+) -> tuple[np.ndarray, np.ndarray]:
+    """Scores ``w_i x_i e_i`` and bread ``(X'WX)^+`` for OLS/WLS."""
+
+    X = np.asarray(X, dtype=float)
+    w = np.ones(X.shape[0]) if weights is None else np.asarray(weights, dtype=float)
+    resid = np.asarray(y, dtype=float) - X @ np.asarray(params, dtype=float)
+    bread = np.linalg.pinv((X * w[:, None]).T @ X, hermitian=True)
+    return X * (w * resid)[:, None], bread
+
+
+def logit_terms(
+    X: np.ndarray, y: np.ndarray, params: np.ndarray, weights: Any = None
+) -> tuple[np.ndarray, np.ndarray]:
+    """Scores ``w_i x_i (y_i - p_i)`` and bread ``(X' W diag(p(1-p)) X)^-1`` for logit."""
+
+    X = np.asarray(X, dtype=float)
+    w = np.ones(X.shape[0]) if weights is None else np.asarray(weights, dtype=float)
+    prob = special.expit(X @ np.asarray(params, dtype=float))
+    curvature = w * prob * (1.0 - prob)
+    bread = np.linalg.pinv((X * curvature[:, None]).T @ X, hermitian=True)
+    return X * (w * (np.asarray(y, dtype=float) - prob))[:, None], bread
+
+
+def cumulative_link_terms(result: Any, inverse: Any = None) -> tuple[np.ndarray, np.ndarray]:
+    """Natural-parameter scores and bread for an ``ordinal_solver`` fit.
+
+    Scores carry the probability weights. For a fit on compressed cells pass
+    the row-to-cell ``inverse`` so every analytic row contributes its own
+    score; frequency weights then become repeated rows.
+    """
+
+    model = result.model
+    row_weights = model.weights if model.weight_type == "prob" else np.ones_like(model.weights)
+    scores = result.score_obs_natural * row_weights[:, None]
+    if inverse is not None:
+        scores = scores[np.asarray(inverse).ravel()]
+    return scores, np.linalg.pinv(-result.hessian_natural)
+
+
+def cumulative_link_cov(
+    result: Any, clusters: Any = None, strata: Any = None, inverse: Any = None
+) -> np.ndarray:
+    """Linearized covariance in OrderedModel's layout (first threshold plus log increments)."""
+
+    scores, bread = cumulative_link_terms(result, inverse)
+    cov_natural = sandwich_cov(bread, scores, clusters, strata)
+    _, cutpoints = result.model.to_natural(result.params.to_numpy())
+    jac = result.model.transform_jacobian(cutpoints)
+    return jac @ cov_natural @ jac.T
@@ -4,7 +4,8 @@ Run minimal exploratory OLS models based on analysis/hypotheses.csv.
 
 - Reads dataset (CSV) and hypotheses registry
 - For each hypothesis row, supports multiple outcomes separated by commas
-- Fits OLS: outcome ~ predictor + covariates (all standardized)
+- Fits OLS: outcome ~ predictor + covariates (all standardized); specs sharing
+  a predictor and covariates are solved in one batch (batched_ols.py)
 - Appends results to analysis/results.csv with effect size, SE, CI, p-value
 
 Usage:
@@ -18,6 +19,7 @@ Notes:
   - Designed for exploratory use (confirmatory flag is read from hypotheses)
   - Assumes SRS; sets design_used=false and provides srs_justification text
   - Uses normal approximation for p-values (large-sample t ≈ N(0,1))
+  - --cov-type HC1 switches to heteroskedasticity-robust SEs
 """
 from __future__ import annotations
 
@@ -31,15 +33,9 @@ from typing import List, Optional, Sequence
 import numpy as np
 import pandas as pd
 
-REPO = Path(__file__).resolve().parents[2]
-
+from batched_ols import COV_TYPES, complete_case_masks, fit_batched_ols
 
-def zscore(x: pd.Series) -> pd.Series:
-    mu = x.mean()
-    sd = x.std(ddof=1)
-    if sd == 0 or pd.isna(sd):
-        return x * 0.0
-    return (x - mu) / sd
+REPO = Path(__file__).resolve().parents[2]
 
 
 @dataclass
@@ -79,23 +75,6 @@ def parse_hypotheses(df: pd.DataFrame) -> List[ModelSpec]:
     return specs
 
 
-def ols_fit(y: np.ndarray, X: np.ndarray) -> tuple[np.ndarray, np.ndarray, float, int]:
-    # Add small ridge if singular
-    XtX = X.T @ X
-    try:
-        XtX_inv = np.linalg.inv(XtX)
-    except np.linalg.LinAlgError:
-        XtX_inv = np.linalg.pinv(XtX)
-    beta = XtX_inv @ (X.T @ y)
-    resid = y - X @ beta
-    n, k = X.shape
-    dof = max(n - k, 1)
-    sigma2 = float((resid @ resid) / dof)
-    var_beta = sigma2 * XtX_inv
-    se = np.sqrt(np.clip(np.diag(var_beta), 0, np.inf))
-    return beta, se, sigma2, dof
-
-
 def normal_pvalue(z: float) -> float:
     # two-sided p under N(0,1)
     # Phi(z) = 0.5 * (1 + erf(z / sqrt(2)))
@@ -103,67 +82,94 @@ def normal_pvalue(z: float) -> float:
     return max(0.0, min(1.0, 2.0 * (1.0 - phi)))
 
 
-def fit_spec(df: pd.DataFrame, spec: ModelSpec) -> Optional[dict]:
-    cols = [spec.outcome, spec.predictor] + spec.covariates
-    missing = [c for c in cols if c not in df.columns]
-    if missing:
-        return {
-            "result_id": "",
-            "hypothesis_id": spec.hypothesis_id,
-            "hypothesis_family": spec.hypothesis_family,
-            "confirmatory": spec.confirmatory,
-            "estimate": "",
-            "se": "",
-            "ci_low": "",
-            "ci_high": "",
-            "p_value": "",
-            "q_value": "",
-            "design_used": False,
-            "srs_justification": "No weights/strata/clusters found; SRS approximation used (see config/survey_design.yaml).",
-            "notes": f"Skipped: missing columns {missing} for outcome {spec.outcome} and predictor {spec.predictor}",
-        }
-
-    sub = df[cols].dropna()
-    if sub.shape[0] < 30:
-        return {
-            "result_id": "",
-            "hypothesis_id": spec.hypothesis_id,
-            "hypothesis_family": spec.hypothesis_family,
-            "confirmatory": spec.confirmatory,
-            "estimate": "",
-            "se": "",
-            "ci_low": "",
-            "ci_high": "",
-            "p_value": "",
-            "q_value": "",
-            "design_used": False,
-            "srs_justification": "No weights/strata/clusters found; SRS approximation used (see config/survey_design.yaml).",
-            "notes": f"Skipped: insufficient complete cases (n={sub.shape[0]})",
-        }
-
-    y = zscore(sub[spec.outcome]).to_numpy(dtype=float)
-    X_cols = [spec.predictor] + spec.covariates
-    X = np.column_stack([np.ones(sub.shape[0])] + [zscore(sub[c]).to_numpy(dtype=float) for c in X_cols])
-
-    beta, se, sigma2, dof = ols_fit(y, X)
-
-    # Index 1 corresponds to the predictor coefficient (0 is intercept)
-    b = float(beta[1])
-    s = float(se[1]) if se[1] > 0 else float("nan")
-    z = b / s if s and s > 0 else float("nan")
-    p = normal_pvalue(z) if not math.isnan(z) else float("nan")
-    ci95 = 1.96 * s if not math.isnan(s) else float("nan")
-
+def skipped_result(spec: ModelSpec, notes: str) -> dict:
     return {
-        "estimate": b,
-        "se": s,
-        "ci_low": b - ci95 if not math.isnan(ci95) else "",
-        "ci_high": b + ci95 if not math.isnan(ci95) else "",
-        "p_value": p,
-        "notes": f"OLS (standardized); n={sub.shape[0]}; dof={dof}; sigma2={sigma2:.4f}",
+        "result_id": "",
+        "hypothesis_id": spec.hypothesis_id,
+        "hypothesis_family": spec.hypothesis_family,
+        "confirmatory": spec.confirmatory,
+        "estimate": "",
+        "se": "",
+        "ci_low": "",
+        "ci_high": "",
+        "p_value": "",
+        "q_value": "",
+        "design_used": False,
+        "srs_justification": "No weights/strata/clusters found; SRS approximation used (see config/survey_design.yaml).",
+        "notes": notes,
     }
 
 
+def fit_specs(df: pd.DataFrame, specs: Sequence[ModelSpec], cov_type: str = "nonrobust") -> List[Optional[dict]]:
+    """Fit every spec, batching outcomes that share a predictor and covariates.
+
+    Each spec keeps its own complete cases and is standardized on them. OLS is
+    invariant to that affine rescaling, so the raw design of a group is solved
+    once for all of its outcomes and the predictor coefficient is rescaled by
+    sd(predictor) / sd(outcome) within each spec's subset afterwards.
+    """
+    results: List[Optional[dict]] = [None] * len(specs)
+    groups: dict[tuple[str, tuple[str, ...]], List[int]] = {}
+    for i, spec in enumerate(specs):
+        cols = [spec.outcome, spec.predictor] + spec.covariates
+        missing = [c for c in cols if c not in df.columns]
+        if missing:
+            results[i] = skipped_result(
+                spec,
+                f"Skipped: missing columns {missing} for outcome {spec.outcome} and predictor {spec.predictor}",
+            )
+            continue
+        groups.setdefault((spec.predictor, tuple(spec.covariates)), []).append(i)
+
+    label = "OLS (standardized)" if cov_type == "nonrobust" else f"OLS (standardized, {cov_type} SEs)"
+    for (predictor, covariates), members in groups.items():
+        X_raw = df[[predictor, *covariates]].to_numpy(dtype=float)
+        Y = df[[specs[i].outcome for i in members]].to_numpy(dtype=float)
+        mask = complete_case_masks(X_raw, Y)
+        n_complete = mask.sum(axis=0)
+        fitted = []
+        for j, i in enumerate(members):
+            if n_complete[j] < 30:
+                results[i] = skipped_result(specs[i], f"Skipped: insufficient complete cases (n={n_complete[j]})")
+            else:
+                fitted.append(j)
+        if not fitted:
+            continue
+        mask = mask[:, fitted]
+        X = np.column_stack([np.ones(len(df)), X_raw])
+        fit = fit_batched_ols(X, Y[:, fitted], mask=mask, cov_type=cov_type)
+
+        with np.errstate(invalid="ignore"):
+            sd_x = np.nanstd(np.where(mask, X_raw[:, [0]], np.nan), axis=0, ddof=1)
+            sd_y = np.nanstd(np.where(mask, Y[:, fitted], np.nan), axis=0, ddof=1)
+        # A constant column standardizes to zeros, which zeroes its coefficient.
+        scale_y = np.divide(1.0, sd_y, out=np.zeros_like(sd_y), where=sd_y > 0)
+        # Index 1 corresponds to the predictor coefficient (0 is intercept)
+        estimates = fit.params[:, 1] * sd_x * scale_y
+        ses = fit.bse[:, 1] * sd_x * scale_y
+        sigma2 = fit.sigma2 * scale_y**2
+
+        for k, j in enumerate(fitted):
+            b = float(estimates[k])
+            s = float(ses[k]) if ses[k] > 0 else float("nan")
+            z = b / s if s and s > 0 else float("nan")
+            p = normal_pvalue(z) if not math.isnan(z) else float("nan")
+            ci95 = 1.96 * s if not math.isnan(s) else float("nan")
+            results[members[j]] = {
+                "estimate": b,
+                "se": s,
+                "ci_low": b - ci95 if not math.isnan(ci95) else "",
+                "ci_high": b + ci95 if not math.isnan(ci95) else "",
+                "p_value": p,
+                "notes": f"{label}; n={fit.nobs[k]}; dof={int(fit.df_resid[k])}; sigma2={sigma2[k]:.4f}",
+            }
+    return results
+
+
+def fit_spec(df: pd.DataFrame, spec: ModelSpec, cov_type: str = "nonrobust") -> Optional[dict]:
+    return fit_specs(df, [spec], cov_type=cov_type)[0]
+
+
 def write_results(results_path: Path, rows: List[dict]):
     results_path.parent.mkdir(parents=True, exist_ok=True)
     header = [
@@ -196,6 +202,7 @@ def main() -> int:
     ap.add_argument("--hypotheses", default=str(REPO / "analysis" / "hypotheses.csv"))
     ap.add_argument("--results", default=str(REPO / "analysis" / "results.csv"))
     ap.add_argument("--seed", type=int, default=20251016)
+    ap.add_argument("--cov-type", choices=COV_TYPES, default="nonrobust")
     args = ap.parse_args()
 
     df = pd.read_csv(REPO / args.input)
@@ -208,8 +215,7 @@ def main() -> int:
 
     out_rows: List[dict] = []
     counter = 1
-    for spec in specs:
-        res = fit_spec(df, spec)
+    for spec, res in zip(specs, fit_specs(df, specs, cov_type=args.cov_type)):
         if res is None:
             continue
         # Assemble full row
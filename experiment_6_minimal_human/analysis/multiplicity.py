@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""Grouped multiple-testing adjustments (BH, BY, Holm, Hochberg, Storey).
+
+All families are adjusted together: p-values are sorted once by
+(family, p) and each procedure becomes a scaled p-value followed by a
+cumulative minimum (step-up) or maximum (step-down) that restarts at every
+family boundary. NaN p-values sort last, are excluded from their family's
+size and receive NaN. Missing family labels are rejected. Ties keep input
+order, matching ``Series.rank(method="first")``.
+
+* ``bh``: q_(r) = min_{j >= r} p_(j) m / j.
+* ``by``: BH times the harmonic sum ``sum_{i <= m} 1 / i``.
+* ``holm``: q_(r) = max_{j <= r} (m - j + 1) p_(j).
+* ``hochberg``: q_(r) = min_{j >= r} (m - j + 1) p_(j).
+* ``storey``: BH scaled by ``pi0 = min(1, #{p > lambda} / (m (1 - lambda)))``.
+
+Adjusted values are capped at 1.
+"""
+
+from __future__ import annotations
+
+from typing import Any, Iterable, Sequence
+
+import numpy as np
+import pandas as pd
+
+METHODS = ("bh", "by", "holm", "hochberg", "storey")
+
+
+class _SortedFamilies:
+    """Family-major, p-ascending order of a flat p-value array."""
+
+    def __init__(self, pvalues: Any, groups: Any = None) -> None:
+        self.p = np.asarray(pvalues, dtype=float).ravel()
+        n = self.p.size
+        codes = np.zeros(n, dtype=np.int64) if groups is None else pd.factorize(np.asarray(groups).ravel())[0]
+        if codes.size != n:
+            raise ValueError(f"Got {codes.size} family labels for {n} p-values.")
+        if (codes < 0).any():
+            raise ValueError(f"{int((codes < 0).sum())} family label(s) are missing; label or drop those tests first.")
+        self.order = np.lexsort((self.p, codes))
+        self.sorted_p = self.p[self.order]
+        self.sorted_codes = codes[self.order]
+        self.valid = ~np.isnan(self.sorted_p)
+        n_groups = int(codes.max()) + 1 if n else 0
+        self.m = np.bincount(codes[~np.isnan(self.p)], minlength=n_groups).astype(float)[self.sorted_codes]
+        starts = np.flatnonzero(np.r_[True, self.sorted_codes[1:] != self.sorted_codes[:-1]]) if n else []
+        first = np.zeros(n, dtype=np.int64)
+        if n:
+            first[starts] = starts
+            first = np.maximum.accumulate(first)
+        self.rank = np.arange(n) - first + 1.0
+
+    def _grouped(self, values: np.ndarray, how: str, reverse: bool) -> np.ndarray:
+        series = pd.Series(values[::-1] if reverse else values)
+        codes = self.sorted_codes[::-1] if reverse else self.sorted_codes
+        out = getattr(series.groupby(codes, sort=False), how)(skipna=True).to_numpy()
+        return out[::-1] if reverse else out
+
+    def step_up(self, scaled: np.ndarray) -> np.ndarray:
+        return self._grouped(np.where(self.valid, scaled, np.nan), "cummin", reverse=True)
+
+    def step_down(self, scaled: np.ndarray) -> np.ndarray:
+        return self._grouped(np.where(self.valid, scaled, np.nan), "cummax", reverse=False)
+
+    def unsort(self, sorted_values: np.ndarray) -> np.ndarray:
+        out = np.empty_like(sorted_values)
+        out[self.order] = np.where(self.valid, np.minimum(sorted_values, 1.0), np.nan)
+        return out
+
+
+def _harmonic(m: np.ndarray) -> np.ndarray:
+    m_int = m.astype(np.int64)
+    table = np.concatenate([[0.0], np.cumsum(1.0 / np.arange(1, max(int(m_int.max(initial=0)), 1) + 1))])
+    return table[m_int]
+
+
+def adjust(
+    pvalues: Any,
+    groups: Any = None,
+    method: str = "bh",
+    storey_lambda: float = 0.5,
+) -> np.ndarray:
+    """Adjusted p-values (q-values) for every entry, families given by ``groups``."""
+
+    return adjust_many(pvalues, groups, [method], storey_lambda)[method]
+
+
+def adjust_many(
+    pvalues: Any,
+    groups: Any = None,
+    methods: Iterable[str] = METHODS,
+    storey_lambda: float = 0.5,
+) -> dict[str, np.ndarray]:
+    """Several adjustments from one sort of the p-values."""
+
+    methods = list(methods)
+    unknown = [method for method in methods if method not in METHODS]
+    if unknown:
+        raise ValueError(f"Unknown multiplicity method(s) {unknown}; choose from {METHODS}.")
+    fam = _SortedFamilies(pvalues, groups)
+    p, m, rank = fam.sorted_p, fam.m, fam.rank
+    shape = np.shape(pvalues)
+    out: dict[str, np.ndarray] = {}
+    bh = None
+    if {"bh", "by", "storey"} & set(methods):
+        bh = fam.step_up(p * (m / rank))
+    for method in methods:
+        if method == "bh":
+            sorted_q = bh
+        elif method == "by":
+            sorted_q = bh * _harmonic(m)
+        elif method == "holm":
+            sorted_q = fam.step_down(p * (m - rank + 1))
+        elif method == "hochberg":
+            sorted_q = fam.step_up(p * (m - rank + 1))
+        else:
+            above = pd.Series(np.where(fam.valid, p > storey_lambda, False).astype(float))
+            n_above = above.groupby(fam.sorted_codes).transform("sum").to_numpy()
+            with np.errstate(divide="ignore", invalid="ignore"):
+                pi0 = np.minimum(1.0, n_above / (m * (1.0 - storey_lambda)))
+            sorted_q = bh * pi0
+        out[method] = fam.unsort(sorted_q).reshape(shape)
+    return out
+
+
+def rank_within(pvalues: Any, groups: Any = None) -> np.ndarray:
+    """1-based rank of each p-value inside its family (NaN for missing p-values)."""
+
+    fam = _SortedFamilies(pvalues, groups)
+    ranks = np.empty(fam.p.size)
+    ranks[fam.order] = np.where(fam.valid, fam.rank, np.nan)
+    return ranks.reshape(np.shape(pvalues))
+
+
+def audit_table(
+    hypothesis_ids: Sequence[Any],
+    pvalues: Any,
+    groups: Any = None,
+    method: str = "bh",
+) -> pd.DataFrame:
+    """family / hypothesis_id / p_value / q_value / rank_within_family rows."""
+
+    pvalues = np.asarray(pvalues, dtype=float)
+    families = np.full(pvalues.size, "", dtype=object) if groups is None else np.asarray(groups, dtype=object)
+    return pd.DataFrame(
+        {
+            "family": families,
+            "hypothesis_id": list(hypothesis_ids),
+            "p_value": pvalues,
+            "q_value": adjust(pvalues, groups, method),
+            "rank_within_family": rank_within(pvalues, groups),
+        }
+    )
@@ -0,0 +1,188 @@
+#!/usr/bin/env python3
+"""Model predictions over a grid of covariate values in one matrix product.
+
+Interaction plots and predicted-value tables evaluate a fitted model at every
+combination of a few focal values (e.g. moderator levels × a range of the
+exposure) with the remaining covariates held at fixed values. ``expand_grid``
+builds that design in one step, and ``PredictionGrid`` aligns it to the
+model's parameters, computes all linear predictors with a single product and
+derives standard errors and confidence limits for every grid point at once:
+
+* ``"delta"`` intervals are formed on the linear-predictor scale from
+  ``sqrt(x' V x)`` and mapped through the inverse link (the response-scale SE
+  uses the link derivative);
+* ``"draws"`` intervals simulate parameter vectors and evaluate all grid
+  points for all draws with one product.
+
+Predictions are cached on the grid per interval setting, so tables and plots
+drawn from the same grid share the work. ``linear_contrasts`` covers the
+related case of linear combinations of coefficients (e.g. simple slopes).
+"""
+
+from __future__ import annotations
+
+import itertools
+import math
+from typing import Any, Callable, Mapping, Sequence
+
+import numpy as np
+import pandas as pd
+from scipy import special, stats
+
+LINKS = ("identity", "logit")
+INTERVAL_METHODS = ("delta", "draws")
+
+
+def expand_grid(
+    base: Mapping[str, float],
+    axes: Mapping[str, Sequence[Any]],
+    derived: Mapping[str, Callable[[pd.DataFrame], Any]] | None = None,
+) -> pd.DataFrame:
+    """Cartesian product of ``axes`` (first axis outermost) with ``base`` values elsewhere.
+
+    ``derived`` columns (interaction terms, dummies of a categorical axis) are
+    computed from the expanded frame in insertion order.
+    """
+
+    product = list(itertools.product(*axes.values()))
+    grid = pd.DataFrame(product, columns=list(axes))
+    for column, value in base.items():
+        if column not in grid.columns:
+            grid[column] = float(value)
+    for column, builder in (derived or {}).items():
+        grid[column] = builder(grid)
+    return grid
+
+
+def class_religion_grid(
+    base: Mapping[str, float],
+    class_values: Sequence[float],
+    levels: Mapping[float, str],
+    dummies: Mapping[float, str],
+) -> pd.DataFrame:
+    """Religiosity levels × classchild values with dummies and interactions derived.
+
+    ``levels`` maps religion codes to the ``religion_level`` labels and
+    ``dummies`` maps each non-reference code to its dummy column; every dummy
+    also gets a ``<dummy>_classchild_int`` interaction.
+    """
+
+    derived: dict[str, Callable[[pd.DataFrame], Any]] = {}
+    for level, dummy in dummies.items():
+        derived[dummy] = lambda frame, level=level: (frame["religion_code"] == level).astype(float)
+        derived[f"{dummy}_classchild_int"] = lambda frame, dummy=dummy: frame[dummy] * frame["classchild"]
+    grid = expand_grid(
+        base,
+        {"religion_code": list(levels), "classchild": list(class_values)},
+        derived,
+    )
+    grid["religion_level"] = grid["religion_code"].map(levels)
+    return grid
+
+
+class PredictionGrid:
+    """Linear predictors, predictions and intervals for every row of ``grid``."""
+
+    def __init__(
+        self,
+        grid: pd.DataFrame,
+        params: pd.Series,
+        cov: pd.DataFrame | np.ndarray | None = None,
+        link: str = "identity",
+    ) -> None:
+        if link not in LINKS:
+            raise ValueError(f"Unknown link '{link}'; choose from {LINKS}.")
+        names = list(params.index)
+        missing = [name for name in names if name not in grid.columns and name != "const"]
+        if missing:
+            raise KeyError(f"Grid is missing model columns: {missing}")
+        self.grid = grid.reset_index(drop=True)
+        self.params = params.to_numpy(dtype=float)
+        self.cov = None if cov is None else np.asarray(cov, dtype=float)
+        self.link = link
+        self.design = np.column_stack(
+            [
+                np.ones(len(self.grid)) if name == "const" and name not in grid.columns
+                else self.grid[name].to_numpy(dtype=float)
+                for name in names
+            ]
+        )
+        self._linear: np.ndarray | None = None
+        self._linear_se: np.ndarray | None = None
+        self._cache: dict[tuple[Any, ...], pd.DataFrame] = {}
+
+    def inverse_link(self, eta: np.ndarray) -> np.ndarray:
+        return special.expit(eta) if self.link == "logit" else eta
+
+    @property
+    def linear_predictor(self) -> np.ndarray:
+        if self._linear is None:
+            self._linear = self.design @ self.params
+        return self._linear
+
+    @property
+    def linear_se(self) -> np.ndarray:
+        if self.cov is None:
+            raise ValueError("Intervals need the parameter covariance matrix.")
+        if self._linear_se is None:
+            variance = np.einsum("ip,pq,iq->i", self.design, self.cov, self.design)
+            self._linear_se = np.sqrt(np.clip(variance, 0.0, None))
+        return self._linear_se
+
+    def point_predictions(self) -> np.ndarray:
+        return self.inverse_link(self.linear_predictor)
+
+    def predictions(
+        self,
+        alpha: float = 0.05,
+        method: str = "delta",
+        draws: int = 1000,
+        seed: int = 0,
+    ) -> pd.DataFrame:
+        """Grid columns plus ``predicted``, ``se``, ``ci_low`` and ``ci_high``."""
+
+        if method not in INTERVAL_METHODS:
+            raise ValueError(f"Unknown interval method '{method}'; choose from {INTERVAL_METHODS}.")
+        key = (alpha, method, draws if method == "draws" else None, seed if method == "draws" else None)
+        if key in self._cache:
+            return self._cache[key]
+        estimate = self.point_predictions()
+        if method == "delta":
+            q = stats.norm.ppf(1.0 - alpha / 2.0)
+            se_linear = self.linear_se
+            derivative = estimate * (1.0 - estimate) if self.link == "logit" else 1.0
+            se = se_linear * derivative
+            low = self.inverse_link(self.linear_predictor - q * se_linear)
+            high = self.inverse_link(self.linear_predictor + q * se_linear)
+        else:
+            if self.cov is None:
+                raise ValueError("Intervals need the parameter covariance matrix.")
+            rng = np.random.default_rng(seed)
+            simulated = rng.multivariate_normal(self.params, self.cov, size=draws)
+            values = self.inverse_link(simulated @ self.design.T)
+            se = values.std(axis=0, ddof=1)
+            low, high = np.percentile(values, [100 * alpha / 2, 100 * (1 - alpha / 2)], axis=0)
+        frame = self.grid.copy()
+        frame["predicted"] = estimate
+        frame["se"] = se
+        frame["ci_low"] = low
+        frame["ci_high"] = high
+        self._cache[key] = frame
+        return frame
+
+
+def linear_contrasts(
+    params: pd.Series,
+    cov: pd.DataFrame | np.ndarray,
+    contrasts: pd.DataFrame,
+) -> pd.DataFrame:
+    """Estimates, SEs and normal p-values for rows of ``contrasts`` (columns = param names)."""
+
+    matrix = contrasts.reindex(columns=params.index, fill_value=0.0).to_numpy(dtype=float)
+    estimate = matrix @ params.to_numpy(dtype=float)
+    variance = np.einsum("ip,pq,iq->i", matrix, np.asarray(cov, dtype=float), matrix)
+    se = np.sqrt(np.clip(variance, 0.0, None))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        z = estimate / se
+    pvalue = np.array([math.erfc(abs(value) / math.sqrt(2.0)) for value in z])
+    return pd.DataFrame({"estimate": estimate, "se": se, "p_value": pvalue}, index=contrasts.index)
@@ -14,9 +14,13 @@ import matplotlib.pyplot as plt
 import numpy as np
 import pandas as pd
 import statsmodels.api as sm
-from statsmodels.stats.multitest import multipletests
 from statsmodels.stats.outliers_influence import variance_inflation_factor
 
+import multiplicity
+from batched_ols import BatchedLinearFit, complete_case_masks, fit_batched_ols, fit_weight_sweep
+from prediction_grid import PredictionGrid, expand_grid, linear_contrasts
+from weight_sensitivity import add_drift, build_weight_family, kish_ess
+
 REPO_ROOT = Path(__file__).resolve().parents[1]
 DATA_PATH = REPO_ROOT / "childhoodbalancedpublic_original.csv"
 ARTIFACTS = REPO_ROOT / "artifacts"
@@ -138,9 +142,16 @@ H2_EXPOSURES = {
 }
 
 H3_PREDICTORS = ["adversity_center", "support_center", "adversity_support_interaction"]
+H3_SUPPORT_LEVELS = (-1.0, 0.0, 1.0)
+H3_ADVERSITY_GRID = np.linspace(-2, 2, 100)
 
 TRIMMED_WEIGHT_QUANTILE = 0.99
 TRIMMED_SCENARIO_LABEL = "Trimmed weights (99th percentile)"
+CLUSTERED_SCENARIO_LABEL = "Country-clustered linearized SEs"
+
+WEIGHT_SWEEP_TRIM_QUANTILES = (0.9, 0.95, 0.975, TRIMMED_WEIGHT_QUANTILE)
+WEIGHT_SWEEP_CAP_RATIOS = (3.0, 5.0)
+WEIGHT_CALIBRATION_COLUMNS = ("country_group", "biomale")
 
 ALTERNATE_COHESION_COLUMNS = GUIDANCE_COLUMNS + (
     "during ages *0-12*:  family/culture had hilarious joking, goofing around, pranks, tomfoolery (qnzuq5n)",
@@ -178,6 +189,46 @@ class ModelResult:
     subset: pd.DataFrame
 
 
+@dataclass(frozen=True)
+class PrimarySpecification:
+    hypothesis: str
+    exposure_name: str
+    exposure_label: str
+    predictors: tuple[str, ...]
+    covariates: tuple[str, ...]
+    outcomes: tuple[tuple[str, str], ...]
+
+
+def primary_specifications() -> list[PrimarySpecification]:
+    specs = [
+        PrimarySpecification(
+            "H1",
+            "guidance_index_z",
+            "Guidance index",
+            ("guidance_index_z",),
+            tuple(BASE_COVARIATES),
+            tuple(H1_OUTCOMES),
+        )
+    ]
+    base_h2_covariates = ["guidance_index_z"] + BASE_COVARIATES
+    for exposure_name, exposure_label in H2_EXPOSURES.items():
+        covariates = tuple(cov for cov in base_h2_covariates if cov not in {exposure_name, "religion"})
+        specs.append(
+            PrimarySpecification("H2", exposure_name, exposure_label, (exposure_name,), covariates, tuple(H2_OUTCOMES))
+        )
+    specs.append(
+        PrimarySpecification(
+            "H3",
+            "adversity_support_interaction",
+            "Adversity × support",
+            tuple(H3_PREDICTORS),
+            tuple(BASE_COVARIATES + ["religiosity_current_z"]),
+            tuple(H3_OUTCOMES),
+        )
+    )
+    return specs
+
+
 def zscore(series: pd.Series) -> pd.Series:
     mean = series.mean()
     std = series.std(ddof=0)
@@ -252,42 +303,56 @@ def fit_model_pair(
     return subset, weighted, unweighted
 
 
-def fit_weighted_model(
+def fit_weighted_models(
     df: pd.DataFrame,
-    outcome: str,
+    outcomes: Sequence[str],
     predictors: Sequence[str],
     covariates: Sequence[str],
     weight_column: str,
-) -> tuple[pd.DataFrame, sm.regression.linear_model.RegressionResultsWrapper]:
-    required = {outcome, *predictors, *covariates, weight_column}
-    subset = df.dropna(subset=required).copy()
-    x = add_constant(subset[list(predictors) + list(covariates)])
-    y = subset[outcome]
-    weighted = sm.WLS(y, x, weights=subset[weight_column]).fit(cov_type="HC3")
-    return subset, weighted
+    cluster_column: str | None = None,
+) -> tuple[list[str], BatchedLinearFit]:
+    # One batched WLS fit per outcome, each on its own complete cases; HC3
+    # unless a cluster column asks for the linearized (sandwich) covariance.
+    x = add_constant(df[list(predictors) + list(covariates)])
+    fit = fit_batched_ols(
+        x.to_numpy(dtype=float),
+        df[list(outcomes)].to_numpy(dtype=float),
+        weights=df[weight_column].to_numpy(dtype=float),
+        cov_type="HC3" if cluster_column is None else "linearized",
+        clusters=None if cluster_column is None else df[cluster_column].fillna("missing").to_numpy(),
+    )
+    return list(x.columns), fit
 
 
-def summarize_weighted_result(
-    res: sm.regression.linear_model.RegressionResultsWrapper,
+def summarize_weighted_fits(
+    names: Sequence[str],
+    fit: BatchedLinearFit,
     exposure_name: str,
     scenario: str,
     hypothesis: str,
     exposure_label: str,
-    outcome_label: str,
-) -> dict[str, float | str | int]:
-    ci = res.conf_int().loc[exposure_name]
-    return {
-        "Scenario": scenario,
-        "Hypothesis": hypothesis,
-        "Exposure": exposure_label,
-        "Outcome": outcome_label,
-        "Coefficient": float(res.params[exposure_name]),
-        "SE": float(res.bse[exposure_name]),
-        "CI_lower": float(ci[0]),
-        "CI_upper": float(ci[1]),
-        "p": float(res.pvalues[exposure_name]),
-        "N": int(res.nobs),
-    }
+    outcome_labels: Sequence[str],
+) -> list[dict[str, float | str | int]]:
+    j = list(names).index(exposure_name)
+    ci = fit.conf_int()[:, j]
+    params = fit.params[:, j]
+    bse = fit.bse[:, j]
+    pvalues = fit.pvalues[:, j]
+    return [
+        {
+            "Scenario": scenario,
+            "Hypothesis": hypothesis,
+            "Exposure": exposure_label,
+            "Outcome": outcome_label,
+            "Coefficient": float(params[i]),
+            "SE": float(bse[i]),
+            "CI_lower": float(ci[i, 0]),
+            "CI_upper": float(ci[i, 1]),
+            "p": float(pvalues[i]),
+            "N": int(fit.nobs[i]),
+        }
+        for i, outcome_label in enumerate(outcome_labels)
+    ]
 
 
 def add_sensitivity_features(df: pd.DataFrame) -> pd.DataFrame:
@@ -310,123 +375,148 @@ def add_sensitivity_features(df: pd.DataFrame) -> pd.DataFrame:
     return working
 
 
-def run_trimmed_weight_models(df: pd.DataFrame) -> list[dict[str, float | str | int]]:
+def run_primary_specifications(
+    df: pd.DataFrame,
+    scenario: str,
+    weight_column: str,
+    cluster_column: str | None = None,
+) -> list[dict[str, float | str | int]]:
     records: list[dict[str, float | str | int]] = []
-    trimmed_col = "weight_trimmed"
-
-    for label, column in H1_OUTCOMES:
-        subset, res = fit_weighted_model(
+    for spec in primary_specifications():
+        labels, columns = zip(*spec.outcomes)
+        names, fit = fit_weighted_models(
             df,
-            column,
-            predictors=["guidance_index_z"],
-            covariates=BASE_COVARIATES,
-            weight_column=trimmed_col,
+            columns,
+            predictors=spec.predictors,
+            covariates=spec.covariates,
+            weight_column=weight_column,
+            cluster_column=cluster_column,
         )
-        records.append(
-            summarize_weighted_result(
-                res,
-                exposure_name="guidance_index_z",
-                scenario=TRIMMED_SCENARIO_LABEL,
-                hypothesis="H1",
-                exposure_label="Guidance index",
-                outcome_label=label,
+        records.extend(
+            summarize_weighted_fits(
+                names,
+                fit,
+                exposure_name=spec.exposure_name,
+                scenario=scenario,
+                hypothesis=spec.hypothesis,
+                exposure_label=spec.exposure_label,
+                outcome_labels=labels,
             )
         )
+    return records
 
-    base_h2_covariates = ["guidance_index_z"] + BASE_COVARIATES
-    for exposure_name, exposure_label in H2_EXPOSURES.items():
-        covariates = [cov for cov in base_h2_covariates if cov not in {exposure_name, "religion"}]
-        for label, column in H2_OUTCOMES:
-            subset, res = fit_weighted_model(
-                df,
-                column,
-                predictors=[exposure_name],
-                covariates=covariates,
-                weight_column=trimmed_col,
-            )
-            records.append(
-                summarize_weighted_result(
-                    res,
-                    exposure_name=exposure_name,
-                    scenario=TRIMMED_SCENARIO_LABEL,
-                    hypothesis="H2",
-                    exposure_label=exposure_label,
-                    outcome_label=label,
+
+def run_weight_sweep(df: pd.DataFrame) -> pd.DataFrame:
+    # Every primary specification against every trimmed/capped/calibrated
+    # weight vector: one design pass per specification, HC3 as in the main fits.
+    family = build_weight_family(
+        df,
+        WEIGHT_COLUMN,
+        trim_quantiles=WEIGHT_SWEEP_TRIM_QUANTILES,
+        cap_ratios=WEIGHT_SWEEP_CAP_RATIOS,
+        calibration_columns=WEIGHT_CALIBRATION_COLUMNS,
+    )
+    weights = family.matrix
+    records: list[dict[str, float | str | int]] = []
+    for spec in primary_specifications():
+        labels, columns = zip(*spec.outcomes)
+        x = add_constant(df[list(spec.predictors) + list(spec.covariates)])
+        X = x.to_numpy(dtype=float)
+        Y = df[list(columns)].to_numpy(dtype=float)
+        mask = complete_case_masks(X, Y) & np.isfinite(weights).all(axis=1)[:, None]
+        fits = fit_weight_sweep(X, Y, weights, mask=mask, cov_type="HC3")
+        ess = kish_ess(weights, mask)
+        j = list(x.columns).index(spec.exposure_name)
+        for k, fit in enumerate(fits):
+            ci = fit.conf_int()[:, j]
+            for i, outcome_label in enumerate(labels):
+                w_i = weights[mask[:, i], k]
+                records.append(
+                    {
+                        "Weight_scenario": family.labels[k],
+                        "Weight_kind": family.kinds[k],
+                        "Hypothesis": spec.hypothesis,
+                        "Exposure": spec.exposure_label,
+                        "Outcome": outcome_label,
+                        "Coefficient": float(fit.params[i, j]),
+                        "SE": float(fit.bse[i, j]),
+                        "CI_lower": float(ci[i, 0]),
+                        "CI_upper": float(ci[i, 1]),
+                        "p": float(fit.pvalues[i, j]),
+                        "N": int(fit.nobs[i]),
+                        "ESS": float(ess[k, i]),
+                        "Deff_kish": float(fit.nobs[i] / ess[k, i]),
+                        "Max_weight_ratio": float(w_i.max() / w_i.mean()),
+                        "Min_weight": float(w_i.min()),
+                    }
                 )
-            )
+    return add_drift(pd.DataFrame(records), base_label=family.labels[0])
 
-    h3_covariates = BASE_COVARIATES + ["religiosity_current_z"]
-    for label, column in H3_OUTCOMES:
-        subset, res = fit_weighted_model(
-            df,
-            column,
-            predictors=H3_PREDICTORS,
-            covariates=h3_covariates,
-            weight_column=trimmed_col,
-        )
-        records.append(
-            summarize_weighted_result(
-                res,
-                exposure_name="adversity_support_interaction",
-                scenario=TRIMMED_SCENARIO_LABEL,
-                hypothesis="H3",
-                exposure_label="Adversity × support",
-                outcome_label=label,
-            )
-        )
 
-    return records
+def trimmed_weight_models(sweep_df: pd.DataFrame) -> pd.DataFrame:
+    # The 99th-percentile trim is one column of the weight sweep; reuse its fits.
+    rows = sweep_df[sweep_df["Weight_scenario"] == f"trim_q{TRIMMED_WEIGHT_QUANTILE:g}"]
+    columns = ["Hypothesis", "Exposure", "Outcome", "Coefficient", "SE", "CI_lower", "CI_upper", "p", "N"]
+    trimmed = rows[columns].reset_index(drop=True)
+    trimmed.insert(0, "Scenario", TRIMMED_SCENARIO_LABEL)
+    return trimmed
+
+
+def run_clustered_variance_models(df: pd.DataFrame) -> list[dict[str, float | str | int]]:
+    # Same weighted fits as the main analysis; only the covariance changes.
+    return run_primary_specifications(
+        df, CLUSTERED_SCENARIO_LABEL, WEIGHT_COLUMN, cluster_column=COUNTRY_COLUMN
+    )
 
 
 def run_alternative_cohesion_models(df: pd.DataFrame) -> list[dict[str, float | str | int]]:
-    records: list[dict[str, float | str | int]] = []
-    for label, column in H1_OUTCOMES:
-        subset, res, _ = fit_model_pair(
-            df,
-            column,
-            predictors=["cohesion_alt_z"],
-            covariates=BASE_COVARIATES,
-        )
-        records.append(
-            summarize_weighted_result(
-                res,
-                exposure_name="cohesion_alt_z",
-                scenario=ALTERNATE_COHESION_LABEL,
-                hypothesis="H1",
-                exposure_label=ALTERNATE_COHESION_LABEL,
-                outcome_label=label,
-            )
-        )
-    return records
+    h1_labels, h1_columns = zip(*H1_OUTCOMES)
+    names, fit = fit_weighted_models(
+        df,
+        h1_columns,
+        predictors=["cohesion_alt_z"],
+        covariates=BASE_COVARIATES,
+        weight_column=WEIGHT_COLUMN,
+    )
+    return summarize_weighted_fits(
+        names,
+        fit,
+        exposure_name="cohesion_alt_z",
+        scenario=ALTERNATE_COHESION_LABEL,
+        hypothesis="H1",
+        exposure_label=ALTERNATE_COHESION_LABEL,
+        outcome_labels=h1_labels,
+    )
 
 
 def run_alternative_adversity_models(df: pd.DataFrame) -> list[dict[str, float | str | int]]:
     records: list[dict[str, float | str | int]] = []
     h3_covariates = BASE_COVARIATES + ["religiosity_current_z"]
+    h3_labels, h3_columns = zip(*H3_OUTCOMES)
 
     for key, config in ALTERNATE_ADVERSITY_CONFIGS.items():
         center_col = f"{key}_center"
         interaction_col = f"{key}_support_interaction"
         scenario_label = config["label"]
         predictors = [center_col, "support_center", interaction_col]
-        for label, column in H3_OUTCOMES:
-            subset, res = fit_weighted_model(
-                df,
-                column,
-                predictors=predictors,
-                covariates=h3_covariates,
-                weight_column=WEIGHT_COLUMN,
-            )
-            records.append(
-                summarize_weighted_result(
-                    res,
-                    exposure_name=interaction_col,
-                    scenario=scenario_label,
-                    hypothesis="H3",
-                    exposure_label=f"{scenario_label} × support",
-                    outcome_label=label,
-                )
+        names, fit = fit_weighted_models(
+            df,
+            h3_columns,
+            predictors=predictors,
+            covariates=h3_covariates,
+            weight_column=WEIGHT_COLUMN,
+        )
+        records.extend(
+            summarize_weighted_fits(
+                names,
+                fit,
+                exposure_name=interaction_col,
+                scenario=scenario_label,
+                hypothesis="H3",
+                exposure_label=f"{scenario_label} × support",
+                outcome_labels=h3_labels,
             )
+        )
     return records
 
 
@@ -451,11 +541,19 @@ def collect_guidance_depression_summary(
 
 
 def run_sensitivity_analyses(df: pd.DataFrame, loop_index: int) -> dict[str, object]:
-    trimmed_records = run_trimmed_weight_models(df)
-    trimmed_df = pd.DataFrame(trimmed_records)
+    sweep_df = run_weight_sweep(df)
+    sweep_path = artifact_path("sensitivity_weight_sweep_loop{loop}.csv", loop_index)
+    sweep_df.to_csv(sweep_path, index=False)
+
+    trimmed_df = trimmed_weight_models(sweep_df)
     trimmed_path = artifact_path("sensitivity_trimmed_weights_loop{loop}.csv", loop_index)
     trimmed_df.to_csv(trimmed_path, index=False)
 
+    clustered_records = run_clustered_variance_models(df)
+    clustered_df = pd.DataFrame(clustered_records)
+    clustered_path = artifact_path("sensitivity_clustered_se_loop{loop}.csv", loop_index)
+    clustered_df.to_csv(clustered_path, index=False)
+
     cohesion_records = run_alternative_cohesion_models(df)
     cohesion_df = pd.DataFrame(cohesion_records)
     cohesion_path = artifact_path("sensitivity_cohesion_loop{loop}.csv", loop_index)
@@ -473,10 +571,14 @@ def run_sensitivity_analyses(df: pd.DataFrame, loop_index: int) -> dict[str, obj
     return {
         "trimmed_df": trimmed_df,
         "trimmed_path": trimmed_path,
+        "clustered_df": clustered_df,
+        "clustered_path": clustered_path,
         "cohesion_df": cohesion_df,
         "cohesion_path": cohesion_path,
         "adversity_df": adversity_df,
         "adversity_path": adversity_path,
+        "sweep_df": sweep_df,
+        "sweep_path": sweep_path,
         "guidance_summary_path": guidance_path,
         "guidance_summary_df": guidance_summary,
         "guidance_correlation": correlation,
@@ -515,60 +617,68 @@ def adjust_pvalues(
     results: Iterable[ModelResult],
     group_key: str,
 ) -> dict[tuple[str, str], float]:
-    groups: dict[str, list[ModelResult]] = {}
-    for result in results:
-        key = getattr(result, group_key)
-        groups.setdefault(key, []).append(result)
-    adjusted: dict[tuple[str, str], float] = {}
-    for key, group in groups.items():
-        pvals = [res.weighted_res.pvalues[res.exposure_name] for res in group]
-        _, adj_p, _, _ = multipletests(pvals, method="fdr_bh")
-        for res, adj in zip(group, adj_p):
-            adjusted[(res.exposure_label, res.outcome_label)] = adj
-    return adjusted
+    results = list(results)
+    pvals = np.array([res.weighted_res.pvalues[res.exposure_name] for res in results], dtype=float)
+    groups = [getattr(res, group_key) for res in results]
+    adj_p = multiplicity.adjust(pvals, groups, method="bh")
+    return {(res.exposure_label, res.outcome_label): adj for res, adj in zip(results, adj_p)}
 
 
 def simple_slopes_table(results: Iterable[ModelResult]) -> pd.DataFrame:
+    contrasts = pd.DataFrame(
+        {
+            "adversity_center": 1.0,
+            "adversity_support_interaction": list(H3_SUPPORT_LEVELS),
+        }
+    )
     rows = []
     for result in results:
         res = result.weighted_res
-        for support_level in (-1.0, 0.0, 1.0):
-            contrast = np.zeros(len(res.params))
-            contrast[res.params.index.get_loc("adversity_center")] = 1
-            contrast[
-                res.params.index.get_loc("adversity_support_interaction")
-            ] = support_level
-            test = res.t_test(contrast)
+        slopes = linear_contrasts(res.params, res.cov_params(), contrasts)
+        for support_level, slope in zip(H3_SUPPORT_LEVELS, slopes.itertuples()):
             rows.append(
                 {
                     "Outcome": result.outcome_label,
                     "Support level": support_level,
-                    "Slope": float(np.asarray(test.effect).item()),
-                    "SE": float(np.asarray(test.sd).item()),
-                    "p": float(test.pvalue),
+                    "Slope": float(slope.estimate),
+                    "SE": float(slope.se),
+                    "p": float(slope.p_value),
                 }
             )
     return pd.DataFrame(rows)
 
 
-def predicted_supports(results: Iterable[ModelResult]) -> pd.DataFrame:
+def h3_prediction_grid(result: ModelResult) -> PredictionGrid:
+    # Support levels × adversity (plot range plus the mean) at analytic covariate means.
+    covariate_means = result.subset[BASE_COVARIATES + ["religiosity_current_z"]].mean()
+    grid = expand_grid(
+        covariate_means.to_dict(),
+        {
+            "support_center": H3_SUPPORT_LEVELS,
+            "adversity_center": [0.0, *H3_ADVERSITY_GRID],
+        },
+        {
+            "adversity_support_interaction": lambda frame: frame["adversity_center"]
+            * frame["support_center"]
+        },
+    )
+    res = result.weighted_res
+    return PredictionGrid(grid, res.params, res.cov_params())
+
+
+def predicted_supports(
+    results: Iterable[ModelResult], grids: Sequence[PredictionGrid]
+) -> pd.DataFrame:
     rows = []
-    for result in results:
-        covariate_means = result.subset[BASE_COVARIATES + ["religiosity_current_z"]].mean()
-        res = result.weighted_res
-        for support_level in (-1.0, 0.0, 1.0):
-            sample = covariate_means.to_dict()
-            sample["adversity_center"] = 0.0
-            sample["support_center"] = support_level
-            sample["adversity_support_interaction"] = 0.0
-            sample = {k: v for k, v in sample.items() if k in res.params.index}
-            sample["const"] = 1.0
-            pred = res.predict(pd.DataFrame([sample]))
+    for result, grid in zip(results, grids):
+        preds = grid.predictions()
+        at_mean = preds[preds["adversity_center"] == 0.0]
+        for support_level, pred in zip(at_mean["support_center"], at_mean["predicted"]):
             rows.append(
                 {
                     "Outcome": result.outcome_label,
-                    "Support level": support_level,
-                    "Predicted (sd units)": float(pred.iloc[0]),
+                    "Support level": float(support_level),
+                    "Predicted (sd units)": float(pred),
                 }
             )
     return pd.DataFrame(rows)
@@ -625,25 +735,19 @@ def plot_h3_interaction(results: list[ModelResult], loop_index: int) -> None:
     plt.close()
 
 
-def plot_h3_simple_slopes(results: list[ModelResult], loop_index: int) -> None:
+def plot_h3_simple_slopes(
+    results: list[ModelResult], grids: Sequence[PredictionGrid], loop_index: int
+) -> None:
     fig, axes = plt.subplots(2, 2, figsize=(10, 6), sharey=True)
     supports = [-1.0, 1.0]
-    adversities = np.linspace(-2, 2, 100)
     axes = axes.flatten()
-    for ax, result in zip(axes, results):
+    for ax, result, grid in zip(axes, results, grids):
+        preds = grid.predictions()
+        curve = preds[preds["adversity_center"].isin(H3_ADVERSITY_GRID)]
         for support_level in supports:
-            preds = []
-            for adv in adversities:
-                sample = result.subset[BASE_COVARIATES + ["religiosity_current_z"]].mean().to_dict()
-                sample["adversity_center"] = adv
-                sample["support_center"] = support_level
-                sample["adversity_support_interaction"] = adv * support_level
-                sample = {k: v for k, v in sample.items() if k in result.weighted_res.params.index}
-                sample["const"] = 1.0
-                pred = result.weighted_res.predict(pd.DataFrame([sample]))
-                preds.append(float(pred.iloc[0]))
+            line = curve[curve["support_center"] == support_level]
             label = "High support" if support_level > 0 else "Low support"
-            ax.plot(adversities, preds, label=label)
+            ax.plot(line["adversity_center"], line["predicted"], label=label)
         ax.set_title(result.outcome_label)
         ax.set_xlabel("Adversity (SD)")
         ax.set_ylabel("Outcome (SD)")
@@ -726,6 +830,25 @@ def write_summary(
             f"and cohesion/adversity checks in artifacts/{sensitivity_data['cohesion_path'].name} and "
             f"{sensitivity_data['adversity_path'].name}."
         )
+        lines.append(
+            f"- Country-clustered linearized SEs for the main weighted models are in "
+            f"artifacts/{sensitivity_data['clustered_path'].name}."
+        )
+        sweep_df: pd.DataFrame = sensitivity_data["sweep_df"]  # type: ignore[assignment]
+        drift = sweep_df["Drift_SE_units"].abs().dropna()
+        if drift.empty:
+            drift_text = "no finite drift could be computed against the base weights."
+        else:
+            worst = sweep_df.loc[drift.idxmax()]
+            drift_text = (
+                f"the largest drift is {worst['Drift_SE_units']:.2f} base SEs "
+                f"({worst['Exposure']} → {worst['Outcome']}, {worst['Weight_scenario']})."
+            )
+        lines.append(
+            f"- The weight sweep ({sweep_df['Weight_scenario'].nunique()} trimmed/capped/calibrated weight vectors, "
+            f"Kish ESS {sweep_df['ESS'].min():.0f}–{sweep_df['ESS'].max():.0f}) is in "
+            f"artifacts/{sensitivity_data['sweep_path'].name}; {drift_text}"
+        )
 
         def format_sensitivity_line(record: pd.Series) -> str:
             return (
@@ -879,7 +1002,8 @@ def main() -> None:
     slopes_path = artifact_path("h3_simple_slopes_loop{loop}.csv", loop_index)
     slopes.to_csv(slopes_path, index=False)
 
-    preds = predicted_supports(h3_results)
+    h3_grids = [h3_prediction_grid(res) for res in h3_results]
+    preds = predicted_supports(h3_results, h3_grids)
     preds_path = artifact_path("h3_predicted_supports_loop{loop}.csv", loop_index)
     preds.to_csv(preds_path, index=False)
 
@@ -908,7 +1032,7 @@ def main() -> None:
     plot_h1_coefficients(h1_results, loop_index)
     plot_h2_coefficients(h2_results, loop_index)
     plot_h3_interaction(h3_results, loop_index)
-    plot_h3_simple_slopes(h3_results, loop_index)
+    plot_h3_simple_slopes(h3_results, h3_grids, loop_index)
 
     write_summary(
         total_rows=total_rows,
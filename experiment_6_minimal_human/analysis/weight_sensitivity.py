@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+"""Families of alternative survey weights for weight-sensitivity sweeps.
+
+Every alternative weighting is one column of an (n_rows, n_weights) matrix,
+so a specification can be refit against the whole family at once with
+``batched_ols.fit_weight_sweep``. Columns are built from the base weight:
+
+* ``trim``: the base weight clipped at its q-th quantile (the 0.99 column is
+  the ``weight_trimmed`` scenario);
+* ``cap``: the base weight capped at ``ratio`` times its mean, with the
+  removed mass redistributed proportionally over the uncapped rows until no
+  row exceeds the cap, so the weight total is preserved;
+* ``rake``: each trimmed column raked (iterative proportional fitting) back
+  to the base-weight margins of the calibration variables;
+* ``greg``: each trimmed column linearly (GREG) calibrated to the same
+  base-weight totals. Linear calibration can produce negative weights, which
+  ``Min_weight`` in the sweep table makes visible.
+
+Missing calibration values form their own category. Kish's effective sample
+size ``(sum w)^2 / sum w^2`` is computed for every (weight vector, model
+sample) pair from two matrix products.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Sequence
+
+import numpy as np
+import pandas as pd
+
+
+@dataclass
+class WeightFamily:
+    """Alternative weight vectors as columns; ``labels[0]`` is the base weight."""
+
+    labels: list[str]
+    kinds: list[str]
+    matrix: np.ndarray
+
+    def column(self, label: str) -> np.ndarray:
+        return self.matrix[:, self.labels.index(label)]
+
+
+def trim_weights(weights: np.ndarray, quantiles: Sequence[float]) -> np.ndarray:
+    """Weights clipped at each quantile (pandas' linear interpolation)."""
+
+    w = np.asarray(weights, dtype=float)
+    cutoffs = np.nanquantile(w, np.asarray(quantiles, dtype=float))
+    return np.minimum(w[:, None], cutoffs[None, :])
+
+
+def cap_weights(weights: np.ndarray, ratios: Sequence[float], max_iter: int = 100) -> np.ndarray:
+    """Weights capped at ``ratio * mean`` with the excess spread over uncapped rows."""
+
+    ratios = np.asarray(ratios, dtype=float)
+    if np.any(ratios <= 1.0):
+        raise ValueError("Cap ratios must exceed 1 for the weight total to be preserved.")
+    w = np.asarray(weights, dtype=float)
+    total = w.sum()
+    caps = ratios * w.mean()
+    out = np.repeat(w[:, None], ratios.size, axis=1)
+    for _ in range(max_iter):
+        capped = out >= caps
+        if not (out > caps * (1.0 + 1e-12)).any():
+            break
+        free_total = np.where(capped, 0.0, out).sum(axis=0)
+        scale = (total - caps * capped.sum(axis=0)) / free_total
+        out = np.where(capped, caps, out * scale)
+    return np.minimum(out, caps)
+
+
+def category_codes(df: pd.DataFrame, columns: Sequence[str]) -> list[np.ndarray]:
+    """Integer codes per calibration column; missing values are a category."""
+
+    return [pd.factorize(df[column], use_na_sentinel=False)[0] for column in columns]
+
+
+def margin_totals(weights: np.ndarray, codes: Sequence[np.ndarray]) -> list[np.ndarray]:
+    """Weighted category totals of every calibration margin."""
+
+    return [np.bincount(code, weights=weights) for code in codes]
+
+
+def rake_weights(
+    weights: np.ndarray,
+    codes: Sequence[np.ndarray],
+    targets: Sequence[np.ndarray],
+    max_iter: int = 100,
+    tol: float = 1e-10,
+) -> np.ndarray:
+    """Iterative proportional fitting of every weight column to the target margins."""
+
+    out = np.asarray(weights, dtype=float).reshape(codes[0].size, -1).copy()
+    indicators = [np.eye(target.size)[code] for code, target in zip(codes, targets)]
+    for _ in range(max_iter):
+        previous = out.copy()
+        for indicator, code, target in zip(indicators, codes, targets):
+            current = indicator.T @ out
+            with np.errstate(divide="ignore", invalid="ignore"):
+                factor = np.where(current > 0, target[:, None] / current, 1.0)
+            out *= factor[code]
+        if np.max(np.abs(out - previous)) <= tol * np.abs(previous).mean():
+            break
+    return out
+
+
+def calibration_design(codes: Sequence[np.ndarray]) -> np.ndarray:
+    """Intercept plus reference-coded dummies for every calibration margin."""
+
+    n = codes[0].size
+    blocks = [np.ones((n, 1))]
+    for code in codes:
+        blocks.append(np.eye(int(code.max()) + 1)[code][:, 1:])
+    return np.hstack(blocks)
+
+
+def greg_weights(weights: np.ndarray, design: np.ndarray, totals: np.ndarray) -> np.ndarray:
+    """Linear (GREG) calibration of every weight column to ``design`` totals."""
+
+    W = np.asarray(weights, dtype=float)
+    n, q = design.shape
+    outer = (design[:, :, None] * design[:, None, :]).reshape(n, q * q)
+    xtwx = (W.T @ outer).reshape(-1, q, q)
+    gap = totals[None, :] - W.T @ design
+    lam = np.einsum("kij,kj->ki", np.linalg.pinv(xtwx, hermitian=True), gap)
+    return W * (1.0 + design @ lam.T)
+
+
+def build_weight_family(
+    df: pd.DataFrame,
+    weight_column: str,
+    trim_quantiles: Sequence[float],
+    cap_ratios: Sequence[float],
+    calibration_columns: Sequence[str],
+) -> WeightFamily:
+    """Base, trimmed, capped, raked and GREG-calibrated weights in one matrix."""
+
+    base = df[weight_column].to_numpy(dtype=float)
+    trimmed = trim_weights(base, trim_quantiles)
+    trim_labels = [f"trim_q{q:g}" for q in trim_quantiles]
+    labels = ["base", *trim_labels, *(f"cap_{r:g}xmean" for r in cap_ratios)]
+    kinds = ["base", *["trim"] * len(trim_quantiles), *["cap"] * len(cap_ratios)]
+    blocks = [base[:, None], trimmed, cap_weights(base, cap_ratios)]
+
+    if calibration_columns:
+        codes = category_codes(df, calibration_columns)
+        blocks.append(rake_weights(trimmed, codes, margin_totals(base, codes)))
+        design = calibration_design(codes)
+        blocks.append(greg_weights(trimmed, design, base @ design))
+        labels += [f"rake_{label}" for label in trim_labels] + [f"greg_{label}" for label in trim_labels]
+        kinds += ["rake"] * len(trim_labels) + ["greg"] * len(trim_labels)
+    return WeightFamily(labels=labels, kinds=kinds, matrix=np.hstack(blocks))
+
+
+def kish_ess(weights: np.ndarray, mask: np.ndarray) -> np.ndarray:
+    """Kish effective sample size per (weight column, mask column)."""
+
+    W = np.asarray(weights, dtype=float)
+    M = np.asarray(mask, dtype=float)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return (W.T @ M) ** 2 / ((W * W).T @ M)
+
+
+def add_drift(
+    table: pd.DataFrame,
+    base_label: str = "base",
+    keys: Sequence[str] = ("Hypothesis", "Exposure", "Outcome"),
+) -> pd.DataFrame:
+    """Coefficient drift from the base weighting, raw and in base-SE units."""
+
+    keys = list(keys)
+    base = table.loc[table["Weight_scenario"] == base_label, keys + ["Coefficient", "SE"]]
+    joined = table[keys].merge(base, on=keys, how="left")
+    out = table.copy()
+    out["Drift"] = out["Coefficient"].to_numpy() - joined["Coefficient"].to_numpy()
+    out["Drift_SE_units"] = out["Drift"].to_numpy() / joined["SE"].to_numpy()
+    return out